@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.db import transaction
 
 from .forms import AttendanceShiftForm
-from .models import Attendance, AttendanceShift
+from .models import Attendance, AttendanceShift, WorkCalendarDay
 
 
 @admin.register(Attendance)
@@ -74,3 +74,19 @@ class AttendanceShiftAdmin(admin.ModelAdmin):
                 super().save_model(request, obj, form, change)
         else:
             super().save_model(request, obj, form, change)
+
+
+@admin.register(WorkCalendarDay)
+class WorkCalendarDayAdmin(admin.ModelAdmin):
+    list_display = ("day", "day_type", "name", "org", "is_deleted")
+    list_filter = ("day_type", "is_deleted")
+    search_fields = ("name", "org__org_name")
+    date_hierarchy = "day"
+    autocomplete_fields = ("org",)
+    fields = ("day", "day_type", "name", "org", "is_deleted")
+
+    def save_model(self, request, obj, form, change):
+        obj.update_by = str(request.user.pk)
+        if not change:
+            obj.create_by = str(request.user.pk)
+        super().save_model(request, obj, form, change)
@@ -0,0 +1,28 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.attendance.services import generate_absences
+
+
+class Command(BaseCommand):
+    help = "按工作日历为指定日期补齐缺勤记录（旷工/请假），默认处理前一天，建议每日定时执行"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="日期，格式 YYYY-MM-DD，默认昨天")
+
+    def handle(self, *args, **options):
+        if options["date"]:
+            try:
+                day = date.fromisoformat(options["date"])
+            except ValueError:
+                raise CommandError("日期格式应为 YYYY-MM-DD")
+        else:
+            day = timezone.localdate() - timedelta(days=1)
+        result = generate_absences(day)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{day} 已生成旷工 {result['absent']} 条、请假 {result['leave']} 条"
+            )
+        )
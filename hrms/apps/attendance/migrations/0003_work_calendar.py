@@ -0,0 +1,128 @@
+# Generated by Django 5.0.14 on 2026-10-18 20:00
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("attendance", "0002_attendanceshift"),
+        ("organization", "0007_organization_history"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WorkCalendarDay",
+            fields=[
+                (
+                    "id",
+                    models.CharField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        help_text="主键ID，采用UUID生成",
+                        max_length=50,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "is_deleted",
+                    models.BooleanField(
+                        default=False,
+                        help_text="逻辑删除标识（禁止物理删除）",
+                        verbose_name="逻辑删除标识",
+                    ),
+                ),
+                (
+                    "create_time",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="创建时间（禁止手动修改）",
+                        verbose_name="创建时间",
+                    ),
+                ),
+                (
+                    "create_by",
+                    models.CharField(
+                        help_text="创建人（关联用户表 ID）",
+                        max_length=64,
+                        verbose_name="创建人",
+                    ),
+                ),
+                (
+                    "update_time",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="更新时间（触发器自动更新）",
+                        verbose_name="更新时间",
+                    ),
+                ),
+                (
+                    "update_by",
+                    models.CharField(
+                        help_text="更新人（关联用户表 ID）",
+                        max_length=64,
+                        verbose_name="更新人",
+                    ),
+                ),
+                ("day", models.DateField(verbose_name="日期")),
+                (
+                    "day_type",
+                    models.CharField(
+                        choices=[("holiday", "休息日"), ("workday", "调休上班")],
+                        max_length=20,
+                        verbose_name="日期类型",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        help_text="如 国庆节",
+                        max_length=64,
+                        verbose_name="名称",
+                    ),
+                ),
+                (
+                    "org",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="为空表示全公司；指定组织时覆盖该组织及其下级",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="work_calendar_days",
+                        to="organization.organization",
+                        verbose_name="适用组织",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "工作日历",
+                "verbose_name_plural": "工作日历",
+                "db_table": "attendance_work_calendar",
+                "ordering": ["day"],
+                "abstract": False,
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="workcalendarday",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("is_deleted", False), ("org__isnull", True)),
+                fields=("day",),
+                name="uniq_work_calendar_company_day",
+                violation_error_message="全公司在该日期已有设置",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="workcalendarday",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("is_deleted", False), ("org__isnull", False)),
+                fields=("day", "org"),
+                name="uniq_work_calendar_org_day",
+                violation_error_message="该组织在该日期已有设置",
+            ),
+        ),
+    ]
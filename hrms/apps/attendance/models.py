@@ -98,3 +98,61 @@ class AttendanceShift(BaseModel):
     @classmethod
     def get_active_shift(cls):
         return cls.objects.filter(is_active=True).order_by("-update_time").first()
+
+
+class WorkCalendarDay(BaseModel):
+    """
+    公司工作日历的例外日期
+    默认周一至周五为工作日；这里登记法定节假日（休息）与调休上班日。
+    org 为空表示全公司，指定组织时覆盖该组织及其全部下级，离员工所在组织最近的设置优先。
+    """
+
+    DAY_TYPE_CHOICES = [
+        ("holiday", "休息日"),
+        ("workday", "调休上班"),
+    ]
+
+    day = models.DateField(verbose_name="日期")
+    day_type = models.CharField(
+        max_length=20, choices=DAY_TYPE_CHOICES, verbose_name="日期类型"
+    )
+    name = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        verbose_name="名称",
+        help_text="如 国庆节",
+    )
+    org = models.ForeignKey(
+        "organization.Organization",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="work_calendar_days",
+        verbose_name="适用组织",
+        help_text="为空表示全公司；指定组织时覆盖该组织及其下级",
+    )
+
+    class Meta(BaseModel.Meta):
+        db_table = "attendance_work_calendar"
+        verbose_name = "工作日历"
+        verbose_name_plural = verbose_name
+        ordering = ["day"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day"],
+                condition=models.Q(is_deleted=False, org__isnull=True),
+                name="uniq_work_calendar_company_day",
+                violation_error_message="全公司在该日期已有设置",
+            ),
+            models.UniqueConstraint(
+                fields=["day", "org"],
+                condition=models.Q(is_deleted=False, org__isnull=False),
+                name="uniq_work_calendar_org_day",
+                violation_error_message="该组织在该日期已有设置",
+            ),
+        ]
+
+    def __str__(self):
+        # get_day_type_display is generated by Django for choices; ignored for type checker.
+        return f"{self.day} {self.name or self.get_day_type_display()}"  # type: ignore[attr-defined]
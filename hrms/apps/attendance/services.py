@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from datetime import date
+
+from django.db import transaction
+
+from apps.employee.models import Employee
+from apps.leave.models import LeaveDay
+from apps.organization.services import IN_SERVICE_STATUSES
+
+from .models import Attendance
+from .work_calendar import get_work_calendar
+
+ABSENCE_REASON = "系统生成：工作日无打卡记录"
+LEAVE_REASON = "系统生成：当日工作时段内请假"
+
+
+def generate_absences(day: date, *, operator: str = "system") -> dict[str, int]:
+    """为指定日期补齐缺勤记录，返回 {"absent": 旷工条数, "leave": 请假条数}。
+
+    只处理按所在组织工作日历当天为工作日、已入职且在职、当天没有任何考勤记录的员工；
+    请假日明细 leave_day 当天有行（工作时段内有已批准/已完成请假）的记为请假，
+    其余记为旷工。重复执行不会重复生成。
+    """
+    employees = list(
+        Employee.objects.filter(
+            is_deleted=False,
+            emp_status__in=IN_SERVICE_STATUSES,
+            hire_date__lte=day,
+        )
+        .exclude(attendance_records__attendance_date=day)
+        .values_list("id", "org_id")
+    )
+    calendars = {org_id: get_work_calendar(org_id) for _, org_id in employees}
+    due = [
+        str(emp_id) for emp_id, org_id in employees if calendars[org_id].is_workday(day)
+    ]
+    if not due:
+        return {"absent": 0, "leave": 0}
+
+    on_leave = {
+        str(emp_id)
+        for emp_id in LeaveDay.objects.filter(emp_id__in=due, day=day).values_list(
+            "emp_id", flat=True
+        )
+    }
+
+    records = [
+        Attendance(
+            emp_id=emp_id,
+            attendance_date=day,
+            attendance_type="check_in",
+            attendance_status="leave" if emp_id in on_leave else "absent",
+            exception_reason=LEAVE_REASON if emp_id in on_leave else ABSENCE_REASON,
+            create_by=operator,
+            update_by=operator,
+        )
+        for emp_id in due
+    ]
+    with transaction.atomic():
+        Attendance.objects.bulk_create(records)
+    return {"absent": len(records) - len(on_leave), "leave": len(on_leave)}
@@ -0,0 +1,21 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.organization.models import Organization
+from .models import WorkCalendarDay
+from .work_calendar import invalidate_work_calendar
+
+
+@receiver(post_save, sender=WorkCalendarDay)
+@receiver(post_delete, sender=WorkCalendarDay)
+def invalidate_on_calendar_change(sender, instance, **kwargs):
+    # 提交后再失效，避免其他进程在提交前按旧数据重新装载并记在新版本号下
+    transaction.on_commit(invalidate_work_calendar)
+
+
+@receiver(post_save, sender=Organization)
+@receiver(post_delete, sender=Organization)
+def invalidate_on_org_change(sender, instance, **kwargs):
+    # 上级组织变化会改变继承到的覆盖设置
+    transaction.on_commit(invalidate_work_calendar)
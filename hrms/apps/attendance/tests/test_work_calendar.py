@@ -0,0 +1,213 @@
+import random
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.attendance.models import Attendance, WorkCalendarDay
+from apps.attendance.services import generate_absences
+from apps.attendance.work_calendar import (
+    WORK_CALENDAR_VERSION,
+    get_work_calendar,
+    invalidate_work_calendar,
+)
+from apps.core.versions import get_version
+from apps.employee.models import Employee
+from apps.leave.days import refresh_leave_days
+from apps.leave.models import LeaveApply
+from apps.leave.services import submit_leave
+from apps.organization.models import Organization
+from apps.performance.services import compute_leave_days
+from utils.workcalendar import WorkCalendar
+
+
+class WorkCalendarTests(TestCase):
+    def setUp(self) -> None:
+        invalidate_work_calendar()
+        self.root = self._create_org("WC-ROOT", "总部")
+        self.plant = self._create_org("WC-PLANT", "工厂", parent=self.root)
+        self.line = self._create_org("WC-LINE", "产线", parent=self.plant)
+        self.office = self._create_emp("W001", "职能", self.root)
+        self.worker = self._create_emp("W002", "产线工", self.line)
+        # 2030-09-30 是周一
+        self.monday = date(2030, 9, 30)
+
+    def _create_org(self, code, name, parent=None) -> Organization:
+        return Organization.objects.create(
+            org_code=code,
+            org_name=name,
+            org_type="department" if parent else "company",
+            parent_org=parent,
+            effective_time=timezone.now(),
+            status="enabled",
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _create_emp(self, emp_id, name, org) -> Employee:
+        return Employee.objects.create(
+            emp_id=emp_id,
+            id_card=f"42012319900101{emp_id[-3:]}1",
+            emp_name=name,
+            gender="male",
+            birth_date=timezone.now().date(),
+            phone="13800000000",
+            email=f"{emp_id.lower()}@example.com",
+            hire_date=date(2020, 1, 1),
+            org=org,
+            position="员工",
+            employment_type="full_time",
+            emp_status="active",
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _mark(self, day, day_type, org=None) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            WorkCalendarDay.objects.create(
+                day=day,
+                day_type=day_type,
+                org=org,
+                create_by="tests",
+                update_by="tests",
+            )
+
+    def _at(self, day: date, hour: int) -> datetime:
+        return timezone.make_aware(datetime.combine(day, time(hour)))
+
+    def test_prefix_sums_match_day_by_day_count(self) -> None:
+        print("\n[结构验证] 位图+前缀和的区间计数与逐日累加一致...")
+        rng = random.Random(15)
+        base = date(2030, 1, 1)
+        overrides = {
+            base + timedelta(days=rng.randint(0, 400)): rng.random() < 0.3
+            for _ in range(60)
+        }
+        calendar = WorkCalendar(overrides)
+
+        def workday(d):
+            return overrides.get(d, d.weekday() < 5)
+
+        for _ in range(200):
+            start = base + timedelta(days=rng.randint(-60, 460))
+            end = start + timedelta(days=rng.randint(0, 90))
+            expected = sum(
+                workday(start + timedelta(days=i)) for i in range((end - start).days)
+            )
+            self.assertEqual(calendar.workdays(start, end), expected)
+
+        hours = WorkCalendar(windows=[(time(9), time(12)), (time(13), time(18))])
+        friday = self._at(self.monday - timedelta(days=3), 10)
+        self.assertEqual(
+            hours.working_seconds(friday, friday + timedelta(days=3, hours=4)),
+            (7 + 4) * 3600,
+        )
+        self.assertEqual(
+            list(
+                hours.working_seconds_by_day(
+                    friday, friday + timedelta(days=3, hours=4)
+                )
+            ),
+            [(friday.date(), 7 * 3600), (self.monday, 4 * 3600)],
+        )
+        print("[校验通过] 200 次随机区间计数一致，跨周末工时只计工作时段。")
+
+    def test_holidays_and_org_overrides_drive_leave_days(self) -> None:
+        print("\n[日历验证] 节假日、调休与组织覆盖共同决定请假天数...")
+        holiday = self.monday + timedelta(days=1)
+        makeup = self.monday - timedelta(days=2)
+        self._mark(holiday, "holiday")
+        self._mark(makeup, "workday")
+        # 工厂整体节假日照常上班，产线继承工厂的设置
+        self._mark(holiday, "workday", org=self.plant)
+
+        office = get_work_calendar(self.root.pk)
+        line = get_work_calendar(self.line.pk)
+        week = (makeup, self.monday + timedelta(days=5))
+        print(
+            f"[当周工作日] 总部 {office.workdays(*week)} 天, 产线 {line.workdays(*week)} 天"
+        )
+        self.assertEqual(office.workdays(*week), 5)
+        self.assertEqual(line.workdays(*week), 6)
+
+        # 周五 9:00 至下周三 18:00（跨周末与节假日）
+        start = self._at(self.monday - timedelta(days=3), 9)
+        end = self._at(self.monday + timedelta(days=2), 18)
+        office_leave = submit_leave(
+            self.office, leave_type="personal", segments=[(start, end)], operator="t"
+        )
+        worker_leave = submit_leave(
+            self.worker, leave_type="personal", segments=[(start, end)], operator="t"
+        )
+        self.assertEqual(office_leave.total_days, Decimal("4.00"))
+        self.assertEqual(worker_leave.total_days, Decimal("5.00"))
+
+        LeaveApply.objects.filter(pk=office_leave.pk).update(apply_status="approved")
+        # 直接 UPDATE 不触发信号，补上请假日明细的刷新
+        refresh_leave_days([office_leave.pk])
+        cycle = (self._at(self.monday, 0), self._at(self.monday + timedelta(days=7), 0))
+        self.assertEqual(compute_leave_days(self.office, *cycle), Decimal("2"))
+        print("[校验通过] 请假与绩效统计都跳过了周末和节假日。")
+
+    def test_version_is_held_in_the_database(self) -> None:
+        print("\n[失效验证] 日历版本号存于数据库，提交后递增，缓存清空也不回退...")
+        week = (self.monday, self.monday + timedelta(days=7))
+        self.assertEqual(get_work_calendar(self.root.pk).workdays(*week), 5)
+        before = get_version(WORK_CALENDAR_VERSION)
+        with self.captureOnCommitCallbacks(execute=True):
+            WorkCalendarDay.objects.create(
+                day=self.monday,
+                day_type="holiday",
+                create_by="tests",
+                update_by="tests",
+            )
+            self.assertEqual(get_version(WORK_CALENDAR_VERSION), before)
+        after = get_version(WORK_CALENDAR_VERSION)
+        print(f"[版本号] {before} -> {after}")
+        self.assertGreater(after, before)
+
+        # 其他进程只需读到同一个版本号；缓存后端被清空不会让版本号回到旧值
+        cache.clear()
+        self.assertEqual(get_version(WORK_CALENDAR_VERSION), after)
+        self.assertEqual(get_work_calendar(self.root.pk).workdays(*week), 4)
+        print("[校验通过] 日历变更提交后所有进程按新版本重新装载。")
+
+    def test_generate_absences_on_working_days_only(self) -> None:
+        print("\n[缺勤生成] 工作日无打卡者记旷工，请假者记请假，节假日不生成...")
+        holiday = self.monday + timedelta(days=1)
+        self._mark(holiday, "holiday")
+        leave = submit_leave(
+            self.worker,
+            leave_type="sick",
+            segments=[(self._at(self.monday, 14), self._at(self.monday, 16))],
+            operator="t",
+        )
+        LeaveApply.objects.filter(pk=leave.pk).update(apply_status="approved")
+        # 直接 UPDATE 不触发信号，补上请假日明细的刷新
+        refresh_leave_days([leave.pk])
+
+        result = generate_absences(self.monday)
+        print(f"[周一] {result}")
+        self.assertEqual(result, {"absent": 1, "leave": 1})
+        self.assertEqual(
+            Attendance.objects.get(
+                emp=self.worker, attendance_date=self.monday
+            ).attendance_status,
+            "leave",
+        )
+        self.assertEqual(generate_absences(self.monday), {"absent": 0, "leave": 0})
+        self.assertEqual(generate_absences(holiday), {"absent": 0, "leave": 0})
+
+        out = StringIO()
+        call_command(
+            "generate_absences",
+            "--date",
+            str(self.monday + timedelta(days=5)),
+            stdout=out,
+        )
+        self.assertIn("旷工 0 条", out.getvalue())
+        print("[校验通过] 重复执行不重复生成，节假日与周末跳过。")
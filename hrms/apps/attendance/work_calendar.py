@@ -0,0 +1,74 @@
+"""
+公司工作日历
+
+节假日/调休登记在 WorkCalendarDay，按组织（连同上级组织的覆盖设置）装入
+utils.workcalendar.WorkCalendar：位图 + 前缀和，任意两个时间点之间的工作日数、
+工作时长均为 O(1)。请假时长、考勤缺勤生成、绩效出勤指标共用这一份日历。
+装好的日历按组织缓存在进程内，日历或组织层级变化提交后递增数据库中的版本号
+（apps.core.versions），所有进程下次读取时重新装载。
+"""
+
+from __future__ import annotations
+
+from datetime import time
+
+from django.conf import settings
+from django.db import connection
+
+from apps.core.versions import bump_version, get_version
+from utils.workcalendar import WorkCalendar
+
+WORK_CALENDAR_VERSION = "work_calendar"
+
+# {组织 id 或 None(全公司): (版本号, 日历)}
+_calendars: dict[str | None, tuple[int, WorkCalendar]] = {}
+
+
+def invalidate_work_calendar() -> None:
+    """日历或组织层级变化后调用；应在变更提交后执行（transaction.on_commit）。"""
+    bump_version(WORK_CALENDAR_VERSION)
+
+
+def work_day_windows() -> list[tuple[time, time]]:
+    return [
+        (time.fromisoformat(start), time.fromisoformat(end))
+        for start, end in getattr(
+            settings, "WORK_DAY_WINDOWS", [("09:00", "12:00"), ("13:00", "18:00")]
+        )
+    ]
+
+
+def load_work_calendar(org_id: str | None = None) -> WorkCalendar:
+    """一条查询取出全公司与该组织各级上级的设置，离组织最近的覆盖较远的。"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT d.day, d.day_type
+            FROM attendance_work_calendar d
+            LEFT JOIN organization_closure c
+              ON c.ancestor_id = d.org_id AND c.descendant_id = %s
+            WHERE d.is_deleted = FALSE
+              AND (d.org_id IS NULL OR c.descendant_id IS NOT NULL)
+            ORDER BY c.depth DESC NULLS FIRST
+            """,
+            [str(org_id) if org_id else None],
+        )
+        rows = cursor.fetchall()
+    overrides = {day: day_type == "workday" for day, day_type in rows}
+    return WorkCalendar(overrides, windows=work_day_windows())
+
+
+def get_work_calendar(org_id: str | None = None) -> WorkCalendar:
+    """组织适用的工作日历（进程内缓存，版本号变化时重新装载）。"""
+    key = str(org_id) if org_id else None
+    version = get_version(WORK_CALENDAR_VERSION)
+    cached = _calendars.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    calendar = load_work_calendar(key)
+    _calendars[key] = (version, calendar)
+    return calendar
+
+
+def calendar_for_employee(employee) -> WorkCalendar:
+    return get_work_calendar(employee.org_id if employee is not None else None)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import LeaveReasonConfig
+from .models import LeaveAccrualRule, LeaveReasonConfig, LeaveSlaRule
 
 
 @admin.register(LeaveReasonConfig)
@@ -15,3 +15,16 @@ class LeaveReasonConfigAdmin(admin.ModelAdmin):
     list_filter = ("status",)
     search_fields = ("code", "name")
     ordering = ("sort_order", "code")
+
+
+@admin.register(LeaveAccrualRule)
+class LeaveAccrualRuleAdmin(admin.ModelAdmin):
+    list_display = ("leave_type", "min_years", "annual_days", "frequency", "status")
+    list_filter = ("leave_type", "frequency", "status")
+    ordering = ("leave_type", "min_years")
+
+
+@admin.register(LeaveSlaRule)
+class LeaveSlaRuleAdmin(admin.ModelAdmin):
+    list_display = ("leave_type", "remind_hours", "escalate_hours", "status")
+    list_filter = ("status",)
@@ -1,5 +1,5 @@
 from django import forms
-from .models import LeaveReasonConfig
+from .models import LeaveReasonConfig, LeaveSlaRule
 
 
 class LeaveReasonConfigForm(forms.ModelForm):
@@ -8,6 +8,7 @@ class LeaveReasonConfigForm(forms.ModelForm):
         fields = [
             "name",
             "description",
+            "leave_type",
             "max_days",
             "requires_attachment",
             "status",
@@ -34,7 +35,7 @@ class LeaveReasonConfigForm(forms.ModelForm):
                     {"class": "h-4 w-4 text-primary focus:ring-primary"}
                 )
                 continue
-            if name == "status":
+            if name in ("status", "leave_type"):
                 field.widget.attrs.update(
                     {
                         "class": "w-full rounded-lg border border-gray-200 bg-white px-4 py-2 text-sm text-gray-700"
@@ -42,3 +43,23 @@ class LeaveReasonConfigForm(forms.ModelForm):
                 )
                 continue
             field.widget.attrs.update({"class": base_class})
+
+
+class LeaveSlaRuleForm(forms.ModelForm):
+    class Meta:
+        model = LeaveSlaRule
+        fields = ["leave_type", "remind_hours", "escalate_hours", "status"]
+        widgets = {
+            "remind_hours": forms.NumberInput(attrs={"min": 0}),
+            "escalate_hours": forms.NumberInput(attrs={"min": 0}),
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["leave_type"].empty_label = "默认（未单独配置的类型）"
+        for field in self.fields.values():
+            field.widget.attrs.update(
+                {
+                    "class": "w-full rounded-lg border border-gray-200 bg-gray-50 px-4 py-2 text-sm text-gray-700"
+                }
+            )
@@ -0,0 +1,46 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("config", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="leavereasonconfig",
+            name="leave_type",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("personal", "事假"),
+                    ("sick", "病假"),
+                    ("annual", "年假"),
+                    ("marriage", "婚假"),
+                    ("maternity", "产假"),
+                    ("paternity", "陪产假"),
+                    ("funeral", "丧假"),
+                    ("injury", "工伤假"),
+                    ("lieu", "调休假"),
+                ],
+                help_text="设置后最长天数即该类型每人每年的额度（0 表示不限），由请假额度台账校验",
+                max_length=20,
+                null=True,
+                verbose_name="适用请假类型",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="leavereasonconfig",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(
+                    ("is_deleted", False), ("leave_type__isnull", False)
+                ),
+                fields=("leave_type",),
+                name="uniq_leave_reason_type",
+                violation_error_message="该请假类型已有对应的理由配置",
+            ),
+        ),
+    ]
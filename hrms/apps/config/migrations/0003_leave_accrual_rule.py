@@ -0,0 +1,140 @@
+# Generated by Django 5.0.14 on 2026-10-18 20:48
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("config", "0002_leave_reason_type"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeaveAccrualRule",
+            fields=[
+                (
+                    "id",
+                    models.CharField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        help_text="主键ID，采用UUID生成",
+                        max_length=50,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "is_deleted",
+                    models.BooleanField(
+                        default=False,
+                        help_text="逻辑删除标识（禁止物理删除）",
+                        verbose_name="逻辑删除标识",
+                    ),
+                ),
+                (
+                    "create_time",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="创建时间（禁止手动修改）",
+                        verbose_name="创建时间",
+                    ),
+                ),
+                (
+                    "create_by",
+                    models.CharField(
+                        help_text="创建人（关联用户表 ID）",
+                        max_length=64,
+                        verbose_name="创建人",
+                    ),
+                ),
+                (
+                    "update_time",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="更新时间（触发器自动更新）",
+                        verbose_name="更新时间",
+                    ),
+                ),
+                (
+                    "update_by",
+                    models.CharField(
+                        help_text="更新人（关联用户表 ID）",
+                        max_length=64,
+                        verbose_name="更新人",
+                    ),
+                ),
+                (
+                    "leave_type",
+                    models.CharField(
+                        choices=[
+                            ("personal", "事假"),
+                            ("sick", "病假"),
+                            ("annual", "年假"),
+                            ("marriage", "婚假"),
+                            ("maternity", "产假"),
+                            ("paternity", "陪产假"),
+                            ("funeral", "丧假"),
+                            ("injury", "工伤假"),
+                            ("lieu", "调休假"),
+                        ],
+                        max_length=20,
+                        verbose_name="请假类型",
+                    ),
+                ),
+                (
+                    "min_years",
+                    models.PositiveSmallIntegerField(
+                        default=0,
+                        help_text="满该年数（含）适用本档",
+                        verbose_name="最低司龄（年）",
+                    ),
+                ),
+                (
+                    "annual_days",
+                    models.DecimalField(
+                        decimal_places=2,
+                        help_text="按月入账时每月入账 1/12，全年合计与年度天数一致",
+                        max_digits=5,
+                        verbose_name="年度天数",
+                    ),
+                ),
+                (
+                    "frequency",
+                    models.CharField(
+                        choices=[("monthly", "按月入账"), ("yearly", "按年入账")],
+                        default="monthly",
+                        help_text="同一请假类型的各档应使用相同的入账周期",
+                        max_length=20,
+                        verbose_name="入账周期",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("enabled", "启用"), ("disabled", "禁用")],
+                        default="enabled",
+                        max_length=20,
+                        verbose_name="状态",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "请假额度入账规则",
+                "verbose_name_plural": "请假额度入账规则",
+                "db_table": "config_leave_accrual_rule",
+                "ordering": ["leave_type", "min_years"],
+                "abstract": False,
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="leaveaccrualrule",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("is_deleted", False)),
+                fields=("leave_type", "min_years"),
+                name="uniq_leave_accrual_tier",
+                violation_error_message="该请假类型已有相同司龄的入账规则",
+            ),
+        ),
+    ]
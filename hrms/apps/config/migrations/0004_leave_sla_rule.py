@@ -0,0 +1,133 @@
+# Generated by Django 5.0.14 on 2026-10-18 20:50
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("config", "0003_leave_accrual_rule"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeaveSlaRule",
+            fields=[
+                (
+                    "id",
+                    models.CharField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        help_text="主键ID，采用UUID生成",
+                        max_length=50,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "is_deleted",
+                    models.BooleanField(
+                        default=False,
+                        help_text="逻辑删除标识（禁止物理删除）",
+                        verbose_name="逻辑删除标识",
+                    ),
+                ),
+                (
+                    "create_time",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="创建时间（禁止手动修改）",
+                        verbose_name="创建时间",
+                    ),
+                ),
+                (
+                    "create_by",
+                    models.CharField(
+                        help_text="创建人（关联用户表 ID）",
+                        max_length=64,
+                        verbose_name="创建人",
+                    ),
+                ),
+                (
+                    "update_time",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="更新时间（触发器自动更新）",
+                        verbose_name="更新时间",
+                    ),
+                ),
+                (
+                    "update_by",
+                    models.CharField(
+                        help_text="更新人（关联用户表 ID）",
+                        max_length=64,
+                        verbose_name="更新人",
+                    ),
+                ),
+                (
+                    "leave_type",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("personal", "事假"),
+                            ("sick", "病假"),
+                            ("annual", "年假"),
+                            ("marriage", "婚假"),
+                            ("maternity", "产假"),
+                            ("paternity", "陪产假"),
+                            ("funeral", "丧假"),
+                            ("injury", "工伤假"),
+                            ("lieu", "调休假"),
+                        ],
+                        help_text="留空为默认规则",
+                        max_length=20,
+                        null=True,
+                        verbose_name="请假类型",
+                    ),
+                ),
+                (
+                    "remind_hours",
+                    models.PositiveIntegerField(
+                        default=24,
+                        help_text="0 表示不提醒",
+                        verbose_name="提醒时限（小时）",
+                    ),
+                ),
+                (
+                    "escalate_hours",
+                    models.PositiveIntegerField(
+                        default=72,
+                        help_text="0 表示不升级",
+                        verbose_name="升级时限（小时）",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("enabled", "启用"), ("disabled", "禁用")],
+                        default="enabled",
+                        max_length=20,
+                        verbose_name="状态",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "请假审批时限",
+                "verbose_name_plural": "请假审批时限",
+                "db_table": "config_leave_sla",
+                "ordering": ["leave_type"],
+                "abstract": False,
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="leaveslarule",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("is_deleted", False)),
+                fields=("leave_type",),
+                name="uniq_leave_sla_type",
+                nulls_distinct=False,
+                violation_error_message="该请假类型已有审批时限配置",
+            ),
+        ),
+    ]
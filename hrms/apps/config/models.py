@@ -1,7 +1,19 @@
 from decimal import Decimal
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils.text import slugify
 from apps.core.models import BaseModel
+from apps.leave.models import LeaveApply
+from utils.id_allocator import IdSequence, allocate
+
+# 请假理由编码：名称 slug + "-" + 全局序号
+REASON_CODE_SEQUENCE = IdSequence(
+    name="hrms_leave_reason_code_seq",
+    seed_sql=(
+        "SELECT MAX(substring(code FROM '-([0-9]{1,18})$')::bigint) "
+        "FROM config_leave_reason"
+    ),
+)
 
 
 class LeaveReasonConfig(BaseModel):
@@ -29,6 +41,14 @@ class LeaveReasonConfig(BaseModel):
         verbose_name="最长天数",
         help_text="自动校验最长可请假天数",
     )
+    leave_type = models.CharField(
+        max_length=20,
+        choices=LeaveApply.LEAVE_TYPE_CHOICES,
+        null=True,
+        blank=True,
+        verbose_name="适用请假类型",
+        help_text="设置后最长天数即该类型每人每年的额度（0 表示不限），由请假额度台账校验",
+    )
     requires_attachment = models.BooleanField(
         default=False, verbose_name="是否需要附件", help_text="如病假是否必须上传病假条"
     )
@@ -44,24 +64,130 @@ class LeaveReasonConfig(BaseModel):
         verbose_name = "请假理由配置"
         verbose_name_plural = verbose_name
         ordering = ["sort_order", "code"]
+        constraints = [
+            # 每种请假类型至多一条有效配置，额度来源唯一
+            models.UniqueConstraint(
+                fields=["leave_type"],
+                condition=models.Q(is_deleted=False, leave_type__isnull=False),
+                name="uniq_leave_reason_type",
+                violation_error_message="该请假类型已有对应的理由配置",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.code})"
 
     def _generate_code(self):
-        base_code = slugify(self.name or "") or "reason"
-        candidate = base_code
-        count = 1
-        while (
-            LeaveReasonConfig.objects.filter(code=candidate)
-            .exclude(pk=self.pk)
-            .exists()
-        ):
-            count += 1
-            candidate = f"{base_code}-{count}"
-        return candidate
+        base_code = (slugify(self.name or "") or "reason")[:24]
+        return allocate(REASON_CODE_SEQUENCE, prefix=f"{base_code}-")
 
     def save(self, *args, **kwargs):
         if not self.code:
             self.code = self._generate_code()
         super().save(*args, **kwargs)
+
+
+class LeaveAccrualRule(BaseModel):
+    """
+    请假额度入账规则（按司龄分档）
+    同一请假类型可配置多档，员工按周期首日的满司龄年数落在 min_years 最大的一档；
+    配置了规则的类型由 run_leave_accrual 按月或按年入账，不再在开户时按最长天数入账。
+    """
+
+    FREQUENCY_CHOICES = [
+        ("monthly", "按月入账"),
+        ("yearly", "按年入账"),
+    ]
+    STATUS_CHOICES = LeaveReasonConfig.STATUS_CHOICES
+
+    leave_type = models.CharField(
+        max_length=20, choices=LeaveApply.LEAVE_TYPE_CHOICES, verbose_name="请假类型"
+    )
+    min_years = models.PositiveSmallIntegerField(
+        default=0, verbose_name="最低司龄（年）", help_text="满该年数（含）适用本档"
+    )
+    annual_days = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        verbose_name="年度天数",
+        help_text="按月入账时每月入账 1/12，全年合计与年度天数一致",
+    )
+    frequency = models.CharField(
+        max_length=20,
+        choices=FREQUENCY_CHOICES,
+        default="monthly",
+        verbose_name="入账周期",
+        help_text="同一请假类型的各档应使用相同的入账周期",
+    )
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default="enabled", verbose_name="状态"
+    )
+
+    class Meta(BaseModel.Meta):
+        db_table = "config_leave_accrual_rule"
+        verbose_name = "请假额度入账规则"
+        verbose_name_plural = verbose_name
+        ordering = ["leave_type", "min_years"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["leave_type", "min_years"],
+                condition=models.Q(is_deleted=False),
+                name="uniq_leave_accrual_tier",
+                violation_error_message="该请假类型已有相同司龄的入账规则",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_leave_type_display()} 满 {self.min_years} 年"
+
+
+class LeaveSlaRule(BaseModel):
+    """
+    请假审批时限（SLA）
+    单据审核中超过 remind_hours 小时提醒审批人，超过 escalate_hours 小时通知审批人的
+    上级（0 表示不提醒/不升级）；请假类型留空为默认规则，适用于没有单独配置的类型。
+    """
+
+    STATUS_CHOICES = LeaveReasonConfig.STATUS_CHOICES
+
+    leave_type = models.CharField(
+        max_length=20,
+        choices=LeaveApply.LEAVE_TYPE_CHOICES,
+        null=True,
+        blank=True,
+        verbose_name="请假类型",
+        help_text="留空为默认规则",
+    )
+    remind_hours = models.PositiveIntegerField(
+        default=24, verbose_name="提醒时限（小时）", help_text="0 表示不提醒"
+    )
+    escalate_hours = models.PositiveIntegerField(
+        default=72, verbose_name="升级时限（小时）", help_text="0 表示不升级"
+    )
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default="enabled", verbose_name="状态"
+    )
+
+    class Meta(BaseModel.Meta):
+        db_table = "config_leave_sla"
+        verbose_name = "请假审批时限"
+        verbose_name_plural = verbose_name
+        ordering = ["leave_type"]
+        constraints = [
+            # 默认规则（类型为空）同样只能有一条
+            models.UniqueConstraint(
+                fields=["leave_type"],
+                condition=models.Q(is_deleted=False),
+                nulls_distinct=False,
+                name="uniq_leave_sla_type",
+                violation_error_message="该请假类型已有审批时限配置",
+            ),
+        ]
+
+    def __str__(self):
+        return self.get_leave_type_display() if self.leave_type else "默认"
+
+    def clean(self):
+        super().clean()
+        if 0 < self.escalate_hours <= self.remind_hours:
+            raise ValidationError({"escalate_hours": "升级时限应晚于提醒时限"})
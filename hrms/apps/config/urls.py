@@ -1,9 +1,10 @@
 from django.urls import path
 
-from .views import ConfigHomeView
+from .views import ConfigHomeView, LeavePolicyView
 
 app_name = "config"
 
 urlpatterns = [
     path("", ConfigHomeView.as_view(), name="dashboard"),
+    path("leave-policy/", LeavePolicyView.as_view(), name="leave_policy"),
 ]
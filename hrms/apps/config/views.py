@@ -3,9 +3,12 @@ from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.http import HttpRequest
 from django.shortcuts import redirect
-from django.views.generic import TemplateView
+from django.urls import reverse_lazy
+from django.views.generic import FormView, TemplateView
 
 from apps.attendance.models import AttendanceShift
+from .forms import LeaveSlaRuleForm
+from .models import LeaveAccrualRule, LeaveSlaRule
 
 
 class AdminRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
@@ -56,9 +59,9 @@ class ConfigHomeView(AdminRequiredMixin, TemplateView):
                     },
                     {
                         "name": "审批SLA与额度",
-                        "desc": "审批时限、年假/调休额度、超时提醒（规划中）",
-                        "url_name": None,
-                        "status": "planned",
+                        "desc": "按请假类型的审批时限、超时提醒与升级；按司龄分档的额度入账规则",
+                        "url_name": "config:leave_policy",
+                        "status": "available",
                     },
                 ],
             },
@@ -92,3 +95,35 @@ class ConfigHomeView(AdminRequiredMixin, TemplateView):
             },
         ]
         return context
+
+
+class LeavePolicyView(AdminRequiredMixin, FormView):
+    """审批时限按请假类型逐条保存（同一类型再次提交即覆盖），并列出额度入账规则。"""
+
+    template_name = "config/leave_policy.html"
+    form_class = LeaveSlaRuleForm
+    success_url = reverse_lazy("config:leave_policy")
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        if self.request.method == "POST":
+            leave_type = self.request.POST.get("leave_type") or None
+            kwargs["instance"] = LeaveSlaRule.objects.filter(
+                is_deleted=False, leave_type=leave_type
+            ).first()
+        return kwargs
+
+    def get_context_data(self, **kwargs: Any):
+        context = super().get_context_data(**kwargs)
+        context["sla_rules"] = LeaveSlaRule.objects.filter(is_deleted=False)
+        context["accrual_rules"] = LeaveAccrualRule.objects.filter(is_deleted=False)
+        return context
+
+    def form_valid(self, form):
+        rule = form.save(commit=False)
+        rule.update_by = str(self.request.user.id)
+        if not rule.create_by:
+            rule.create_by = str(self.request.user.id)
+        rule.save()
+        messages.success(self.request, f"审批时限“{rule}”已保存。")
+        return super().form_valid(form)
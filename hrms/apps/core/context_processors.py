@@ -1,10 +1,11 @@
-from apps.organization.models import Organization
-from .roles import is_performance_admin
+from utils.sql_scope import get_scope_for_user
+from .roles import Role
 
 
 def user_roles(request):
     """
     全局上下文处理器：注入用户角色信息，用于前端菜单控制
+    角色来自缓存的 UserScope，缓存命中时不产生数据库查询
     """
     context = {
         "is_manager": False,
@@ -25,22 +26,11 @@ def user_roles(request):
         return context
 
     # 2. 检查关联员工
-    if hasattr(request.user, "employee"):
-        emp = request.user.employee
-
-        # 判断是否是部门负责人
-        # 查找是否有任何组织将该员工设为 manager
-        if Organization.objects.filter(manager_emp=emp).exists():
-            context["is_manager"] = True
-
-        # 判断是否是 HR (简单逻辑：所属部门名称包含'人力'或'HR'，或者职位包含'HR')
-        # 实际项目中应使用更严谨的 Group 或 Role 表
-        if "人力" in emp.org.org_name or "HR" in emp.position.upper():
-            context["is_hr"] = True
-
-        if request.user.is_staff:  # Django Staff 也可以视为 HR/后台人员
-            context["is_hr"] = True
-
-        context["is_performance_admin"] = is_performance_admin(request.user)
+    scope = get_scope_for_user(request.user)
+    if scope and scope.emp_pk:
+        # 是否是部门负责人 / HR（HR 判断含 Django Staff）
+        context["is_manager"] = scope.is_manager
+        context["is_hr"] = scope.is_hr
+        context["is_performance_admin"] = bool(scope.roles & Role.PERFORMANCE_ADMIN)
 
     return context
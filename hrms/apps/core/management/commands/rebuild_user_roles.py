@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from apps.core.roles import refresh_user_roles
+from utils.sql_scope import invalidate_user_scope
+
+
+class Command(BaseCommand):
+    help = "全量重算用户角色位图 core_user_role"
+
+    def handle(self, *args, **options):
+        rows = refresh_user_roles(full=True)
+        invalidate_user_scope()
+        self.stdout.write(self.style.SUCCESS(f"已重算 {rows} 个用户的角色"))
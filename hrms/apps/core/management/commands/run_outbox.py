@@ -0,0 +1,75 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from apps.core.outbox import (
+    OUTBOX_BATCH_SIZE,
+    deliver_batch,
+    load_sinks,
+    purge_delivered,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "投递发件箱 core_outbox：按批 SELECT ... FOR UPDATE SKIP LOCKED 领取到期消息，"
+        "投递到 OUTBOX_SINKS 配置的下游，可多进程并行运行"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=OUTBOX_BATCH_SIZE,
+            help="每批领取的消息数",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="投递完当前到期的消息后退出（适合定时任务），默认常驻轮询",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=1.0,
+            help="没有到期消息时的轮询间隔（秒）",
+        )
+        parser.add_argument(
+            "--purge-days",
+            type=int,
+            help="先删除投递成功超过该天数的消息",
+        )
+
+    def handle(self, *args, **options):
+        if options["purge_days"] is not None:
+            deleted = purge_delivered(timedelta(days=options["purge_days"]))
+            self.stdout.write(f"已清理 {deleted} 条已投递消息")
+
+        sinks = load_sinks()
+        totals = {"delivered": 0, "retried": 0, "dead": 0}
+        try:
+            while True:
+                run = deliver_batch(sinks, batch_size=options["batch_size"])
+                for key in totals:
+                    totals[key] += getattr(run, key)
+                if run.retried or run.dead:
+                    self.stdout.write(
+                        self.style.WARNING(
+                            f"本批 {run.claimed} 条：{run.retried} 条稍后重试，"
+                            f"{run.dead} 条超过重试次数"
+                        )
+                    )
+                if run.claimed:
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(options["sleep"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"已投递 {totals['delivered']} 条，{totals['retried']} 条待重试，"
+                f"{totals['dead']} 条投递失败"
+            )
+        )
@@ -0,0 +1,86 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_user_roles(apps, schema_editor):
+    from apps.core.roles import compute_role_mask
+
+    UserRoleAssignment = apps.get_model("core", "UserRoleAssignment")
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT
+                emp.user_id,
+                COALESCE(emp.position, ''),
+                COALESCE(org.org_name, ''),
+                EXISTS (
+                    SELECT 1
+                    FROM organization m
+                    WHERE m.is_deleted = FALSE
+                      AND m.manager_emp_id = emp.id
+                )
+            FROM employee emp
+            JOIN organization org ON emp.org_id = org.id
+            WHERE emp.is_deleted = FALSE
+              AND org.is_deleted = FALSE
+              AND emp.user_id IS NOT NULL
+            """
+        )
+        rows = cursor.fetchall()
+    UserRoleAssignment.objects.bulk_create(
+        [
+            UserRoleAssignment(
+                user_id=user_id,
+                roles=compute_role_mask(
+                    position=position, org_name=org_name, manages_org=manages_org
+                ),
+            )
+            for user_id, position, org_name, manages_org in rows
+        ],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserRoleAssignment",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="role_assignment",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="系统用户",
+                    ),
+                ),
+                (
+                    "roles",
+                    models.PositiveIntegerField(default=0, verbose_name="角色位图"),
+                ),
+                (
+                    "update_time",
+                    models.DateTimeField(auto_now=True, verbose_name="计算时间"),
+                ),
+            ],
+            options={
+                "verbose_name": "用户角色",
+                "verbose_name_plural": "用户角色",
+                "db_table": "core_user_role",
+            },
+        ),
+        migrations.RunPython(populate_user_roles, migrations.RunPython.noop),
+    ]
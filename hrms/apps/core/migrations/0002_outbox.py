@@ -0,0 +1,79 @@
+# Generated by Django 5.0.14 on 2026-10-18 20:35
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_user_role_assignment"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxMessage",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("topic", models.CharField(max_length=64, verbose_name="消息主题")),
+                (
+                    "aggregate_id",
+                    models.CharField(max_length=50, verbose_name="业务对象ID"),
+                ),
+                ("payload", models.JSONField(default=dict, verbose_name="消息内容")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "待投递"),
+                            ("delivered", "已投递"),
+                            ("dead", "投递失败"),
+                        ],
+                        default="pending",
+                        max_length=16,
+                        verbose_name="状态",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="投递次数"
+                    ),
+                ),
+                (
+                    "available_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        help_text="失败重试时顺延",
+                        verbose_name="可投递时间",
+                    ),
+                ),
+                (
+                    "create_time",
+                    models.DateTimeField(auto_now_add=True, verbose_name="创建时间"),
+                ),
+                (
+                    "delivered_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="投递时间"
+                    ),
+                ),
+                (
+                    "last_error",
+                    models.TextField(blank=True, default="", verbose_name="最近错误"),
+                ),
+            ],
+            options={
+                "verbose_name": "发件箱消息",
+                "verbose_name_plural": "发件箱消息",
+                "db_table": "core_outbox",
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("status", "pending")),
+                        fields=["available_at", "id"],
+                        name="idx_outbox_due",
+                    )
+                ],
+            },
+        ),
+    ]
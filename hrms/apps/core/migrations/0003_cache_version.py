@@ -0,0 +1,33 @@
+# Generated by Django 5.0.14 on 2026-10-18 21:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_outbox"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CacheVersion",
+            fields=[
+                (
+                    "name",
+                    models.CharField(
+                        max_length=100,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="名称",
+                    ),
+                ),
+                ("version", models.BigIntegerField(default=0, verbose_name="版本号")),
+            ],
+            options={
+                "verbose_name": "缓存版本号",
+                "verbose_name_plural": "缓存版本号",
+                "db_table": "core_cache_version",
+            },
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 import uuid
 
 
@@ -34,3 +35,82 @@ class BaseModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class UserRoleAssignment(models.Model):
+    """
+    用户角色位图（物化），见 apps.core.roles.Role
+    员工/组织变更时由信号重算，权限判断与菜单只读这一份结果
+    """
+
+    user = models.OneToOneField(
+        "auth.User",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="role_assignment",
+        verbose_name="系统用户",
+    )
+    roles = models.PositiveIntegerField(default=0, verbose_name="角色位图")
+    update_time = models.DateTimeField(auto_now=True, verbose_name="计算时间")
+
+    class Meta:
+        db_table = "core_user_role"
+        verbose_name = "用户角色"
+        verbose_name_plural = verbose_name
+
+
+class OutboxMessage(models.Model):
+    """
+    事务性发件箱：业务变更在同一事务内写入一条待投递消息，
+    由 run_outbox 进程异步领取并投递到各个下游（邮件、IM、日历同步等），
+    请求耗时与下游快慢无关
+    """
+
+    STATUS_CHOICES = (
+        ("pending", "待投递"),
+        ("delivered", "已投递"),
+        ("dead", "投递失败"),
+    )
+
+    id = models.BigAutoField(primary_key=True)
+    topic = models.CharField(max_length=64, verbose_name="消息主题")
+    aggregate_id = models.CharField(max_length=50, verbose_name="业务对象ID")
+    payload = models.JSONField(default=dict, verbose_name="消息内容")
+    status = models.CharField(
+        max_length=16, choices=STATUS_CHOICES, default="pending", verbose_name="状态"
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="投递次数")
+    available_at = models.DateTimeField(
+        default=timezone.now, verbose_name="可投递时间", help_text="失败重试时顺延"
+    )
+    create_time = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
+    delivered_at = models.DateTimeField(null=True, blank=True, verbose_name="投递时间")
+    last_error = models.TextField(blank=True, default="", verbose_name="最近错误")
+
+    class Meta:
+        db_table = "core_outbox"
+        verbose_name = "发件箱消息"
+        verbose_name_plural = verbose_name
+        indexes = [
+            # 领取待投递消息只扫这一小段
+            models.Index(
+                fields=["available_at", "id"],
+                name="idx_outbox_due",
+                condition=models.Q(status="pending"),
+            ),
+        ]
+
+
+class CacheVersion(models.Model):
+    """
+    缓存版本号：按版本号组织的缓存（进程内或共享缓存）读取这里的当前值，
+    数据变更提交后递增即可让所有进程的旧缓存整体失效，不受缓存后端淘汰的影响
+    """
+
+    name = models.CharField(max_length=100, primary_key=True, verbose_name="名称")
+    version = models.BigIntegerField(default=0, verbose_name="版本号")
+
+    class Meta:
+        db_table = "core_cache_version"
+        verbose_name = "缓存版本号"
+        verbose_name_plural = verbose_name
@@ -0,0 +1,240 @@
+"""事务性发件箱（transactional outbox）。
+
+业务代码在自己的事务里调用 enqueue / enqueue_many 写入 core_outbox，与状态变更
+同生共死：事务回滚则消息不存在，事务提交则消息一定会被投递。真正的投递由
+run_outbox 进程完成：每批用 ``SELECT ... FOR UPDATE SKIP LOCKED`` 领取到期消息，
+多个进程并行时互不等待、也不会重复领取；按配置的下游（sink）逐个投递，失败的
+消息按指数退避顺延，超过最大次数后标记为 dead 留待人工处理。
+
+投递语义为至少一次：某个下游失败时整条消息重试，已成功的下游会再收到一次，
+下游应按消息 id 去重。
+"""
+
+from __future__ import annotations
+
+import json
+import urllib.request
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from typing import Iterable, Mapping, Sequence
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import OutboxMessage
+
+OUTBOX_BATCH_SIZE = 100
+
+Message = tuple[str, str, Mapping]
+
+
+def enqueue(topic: str, aggregate_id, payload: Mapping | None = None) -> None:
+    """写入一条消息；应在产生该消息的业务事务内调用。"""
+    enqueue_many([(topic, aggregate_id, payload or {})])
+
+
+def enqueue_many(messages: Iterable[Message]) -> int:
+    """批量写入 (topic, aggregate_id, payload)，一条 INSERT，返回条数。"""
+    rows = [
+        OutboxMessage(
+            topic=topic,
+            aggregate_id=str(aggregate_id),
+            payload=json.loads(json.dumps(payload, cls=DjangoJSONEncoder)),
+        )
+        for topic, aggregate_id, payload in messages
+    ]
+    if rows:
+        OutboxMessage.objects.bulk_create(rows)
+    return len(rows)
+
+
+def serialize(message: OutboxMessage) -> dict:
+    return {
+        "id": message.id,
+        "topic": message.topic,
+        "aggregate_id": message.aggregate_id,
+        "payload": message.payload,
+        "create_time": message.create_time.isoformat(),
+        "attempts": message.attempts + 1,
+    }
+
+
+class OutboxSink:
+    """投递下游基类。
+
+    topics 为主题前缀过滤（如 ``["leave."]``），为空表示接收全部主题。
+    子类实现 send（逐条）或重写 deliver（整批），deliver 返回 {消息 id: 错误信息}，
+    未出现在返回值里的消息视为投递成功。
+    """
+
+    def __init__(self, topics: Sequence[str] | None = None):
+        self.topics = tuple(topics or ())
+
+    def accepts(self, topic: str) -> bool:
+        return not self.topics or topic.startswith(self.topics)
+
+    def deliver(self, messages: Sequence[OutboxMessage]) -> dict[int, str]:
+        errors = {}
+        for message in messages:
+            try:
+                self.send(message)
+            except Exception as exc:
+                errors[message.id] = f"{type(exc).__name__}: {exc}"
+        return errors
+
+    def send(self, message: OutboxMessage) -> None:
+        raise NotImplementedError
+
+
+class FileSink(OutboxSink):
+    """追加写入本地 JSON Lines 文件，一批一次写入；用于本地联调或对接日志采集。"""
+
+    def __init__(self, path, topics: Sequence[str] | None = None):
+        super().__init__(topics)
+        self.path = Path(path)
+
+    def deliver(self, messages: Sequence[OutboxMessage]) -> dict[int, str]:
+        lines = "".join(
+            json.dumps(serialize(message), ensure_ascii=False) + "\n"
+            for message in messages
+        )
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as fh:
+                fh.write(lines)
+        except OSError as exc:
+            return {message.id: f"OSError: {exc}" for message in messages}
+        return {}
+
+
+class HttpSink(OutboxSink):
+    """整批以 JSON 数组 POST 到 webhook，非 2xx 或超时则整批重试。"""
+
+    def __init__(
+        self,
+        url: str,
+        topics: Sequence[str] | None = None,
+        timeout: float = 5,
+        headers: Mapping[str, str] | None = None,
+    ):
+        super().__init__(topics)
+        self.url = url
+        self.timeout = timeout
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+
+    def deliver(self, messages: Sequence[OutboxMessage]) -> dict[int, str]:
+        body = json.dumps(
+            [serialize(message) for message in messages], ensure_ascii=False
+        ).encode("utf-8")
+        request = urllib.request.Request(
+            self.url, data=body, headers=self.headers, method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout):
+                pass
+        except Exception as exc:
+            return {message.id: f"{type(exc).__name__}: {exc}" for message in messages}
+        return {}
+
+
+def load_sinks() -> list[OutboxSink]:
+    """按 settings.OUTBOX_SINKS 实例化下游：[{"BACKEND": 路径, "OPTIONS": {...}}]。"""
+    return [
+        import_string(config["BACKEND"])(**config.get("OPTIONS", {}))
+        for config in settings.OUTBOX_SINKS
+    ]
+
+
+@dataclass(frozen=True)
+class OutboxRun:
+    """一批投递的结果：领取条数、成功、顺延重试、转为 dead 的条数。"""
+
+    claimed: int = 0
+    delivered: int = 0
+    retried: int = 0
+    dead: int = 0
+
+
+# 第 n 次失败后顺延 OUTBOX_RETRY_SECONDS * 2^(n-1) 秒，封顶 OUTBOX_RETRY_MAX_SECONDS
+_FAIL_SQL = """
+    UPDATE core_outbox o
+    SET attempts = o.attempts + 1,
+        last_error = f.error,
+        status = CASE WHEN o.attempts + 1 >= %s THEN 'dead' ELSE 'pending' END,
+        available_at = now() + least(
+            %s * power(2, o.attempts), %s
+        ) * interval '1 second'
+    FROM unnest(%s::bigint[], %s::text[]) AS f(id, error)
+    WHERE o.id = f.id
+    RETURNING o.status
+"""
+
+
+def deliver_batch(
+    sinks: Sequence[OutboxSink] | None = None, *, batch_size: int = OUTBOX_BATCH_SIZE
+) -> OutboxRun:
+    """领取一批到期消息并投递。
+
+    领取与回写在同一事务内完成，行锁一直持有到投递结束：其他 worker 的 SKIP LOCKED
+    会跳过这些行去领下一批，进程中途退出时锁随事务释放，消息回到待投递。
+    """
+    sinks = load_sinks() if sinks is None else sinks
+    with transaction.atomic():
+        batch = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", available_at__lte=timezone.now())
+            .order_by("available_at", "id")[:batch_size]
+        )
+        if not batch:
+            return OutboxRun()
+
+        errors: dict[int, str] = {}
+        for sink in sinks:
+            accepted = [message for message in batch if sink.accepts(message.topic)]
+            if accepted:
+                for pk, error in sink.deliver(accepted).items():
+                    errors.setdefault(pk, error)
+
+        delivered = [message.id for message in batch if message.id not in errors]
+        if delivered:
+            OutboxMessage.objects.filter(id__in=delivered).update(
+                status="delivered",
+                attempts=F("attempts") + 1,
+                delivered_at=timezone.now(),
+                last_error="",
+            )
+        statuses = []
+        if errors:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    _FAIL_SQL,
+                    [
+                        settings.OUTBOX_MAX_ATTEMPTS,
+                        settings.OUTBOX_RETRY_SECONDS,
+                        settings.OUTBOX_RETRY_MAX_SECONDS,
+                        list(errors),
+                        [error[:2000] for error in errors.values()],
+                    ],
+                )
+                statuses = [status for (status,) in cursor.fetchall()]
+    dead = statuses.count("dead")
+    return OutboxRun(
+        claimed=len(batch),
+        delivered=len(delivered),
+        retried=len(statuses) - dead,
+        dead=dead,
+    )
+
+
+def purge_delivered(older_than: timedelta) -> int:
+    """删除投递成功超过 older_than 的消息，返回删除条数。"""
+    cutoff = timezone.now() - older_than
+    deleted, _ = OutboxMessage.objects.filter(
+        status="delivered", delivered_at__lt=cutoff
+    ).delete()
+    return deleted
@@ -1,28 +1,148 @@
+from __future__ import annotations
+
+import enum
+from typing import Iterable
+
 from django.contrib.auth.models import AbstractUser
+from django.db import connection, transaction
 
+from utils.sql_scope import get_scope_for_user
 
-def _extract_employee(user: AbstractUser):
-    return getattr(user, "employee", None)
 
+class Role(enum.IntFlag):
+    """用户角色位图，物化在 core_user_role 表并随 UserScope 一起缓存。"""
 
-def is_performance_admin(user: AbstractUser) -> bool:
+    HR = 1  # 人力部门或 HR 岗位
+    MANAGER = 2  # 任一组织的负责人
+    PERFORMANCE_ADMIN = 4  # CFO / 绩效部门
+    DIRECTOR = 8  # 总监岗位（入职审批）
+    ORG_ADMIN = 16  # 组织架构维护（HR Director）
+
+
+def compute_role_mask(*, position: str, org_name: str, manages_org: bool) -> int:
+    """岗位/组织名称 → 角色位图。全系统唯一一份字符串匹配规则。"""
+
+    position_raw = position or ""
+    org_name_raw = org_name or ""
+    position_upper = position_raw.upper()
+    org_upper = org_name_raw.upper()
+
+    mask = Role(0)
+    if "人力" in org_name_raw or "HR" in position_upper or "HR" in org_upper:
+        mask |= Role.HR
+    if manages_org:
+        mask |= Role.MANAGER
+    if (
+        position_upper == "CFO"
+        or "绩效" in position_raw
+        or "绩效" in org_name_raw
+        or "PERFORMANCE" in position_upper
+        or "PERFORMANCE" in org_upper
+    ):
+        mask |= Role.PERFORMANCE_ADMIN
+    if "总监" in position_raw or "DIRECTOR" in position_upper:
+        mask |= Role.DIRECTOR
+    if position_raw == "HR Director":
+        mask |= Role.ORG_ADMIN
+    return int(mask)
+
+
+def refresh_user_roles(
+    *,
+    emp_ids: Iterable[str] = (),
+    org_ids: Iterable[str] = (),
+    user_ids: Iterable[int] = (),
+    full: bool = False,
+) -> int:
+    """重算受影响用户的角色位图并写回 core_user_role，返回写入行数。
+
+    目标 = 指定员工 + 指定组织的成员 + 指定账号；full=True 时全量重算。
+    不再对应有效员工的账号会删除其角色行。
+    """
+    from .models import UserRoleAssignment
+
+    emp_ids = [str(e) for e in emp_ids if e]
+    org_ids = [str(o) for o in org_ids if o]
+    user_ids = [int(u) for u in user_ids if u]
+    if not full and not (emp_ids or org_ids or user_ids):
+        return 0
+
+    sql = """
+        SELECT
+            emp.user_id,
+            COALESCE(emp.position, ''),
+            COALESCE(org.org_name, ''),
+            EXISTS (
+                SELECT 1
+                FROM organization m
+                WHERE m.is_deleted = FALSE
+                  AND m.manager_emp_id = emp.id
+            )
+        FROM employee emp
+        JOIN organization org ON emp.org_id = org.id
+        WHERE emp.is_deleted = FALSE
+          AND org.is_deleted = FALSE
+          AND emp.user_id IS NOT NULL
+    """
+    params: list[object] = []
+    if not full:
+        sql += """
+          AND (emp.id = ANY(%s) OR emp.org_id = ANY(%s) OR emp.user_id = ANY(%s))
+        """
+        params = [emp_ids, org_ids, user_ids]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    assignments = [
+        UserRoleAssignment(
+            user_id=user_id,
+            roles=compute_role_mask(
+                position=position, org_name=org_name, manages_org=manages_org
+            ),
+        )
+        for user_id, position, org_name, manages_org in rows
+    ]
+    found = {a.user_id for a in assignments}
+    with transaction.atomic():
+        stale = UserRoleAssignment.objects.exclude(user_id__in=found)
+        if not full:
+            stale = stale.filter(user_id__in=user_ids)
+        stale.delete()
+        UserRoleAssignment.objects.bulk_create(
+            assignments,
+            update_conflicts=True,
+            unique_fields=["user"],
+            update_fields=["roles", "update_time"],
+        )
+    return len(assignments)
+
+
+def get_role_mask(user: AbstractUser) -> int:
+    """当前用户的角色位图（来自缓存的 UserScope，不含超管/Staff 标记）。"""
+
+    scope = get_scope_for_user(user)
+    return scope.roles if scope else 0
+
+
+def has_role(user: AbstractUser, role: Role) -> bool:
+    return bool(get_role_mask(user) & role)
+
+
+def is_hr_user(user: AbstractUser) -> bool:
     if not user.is_authenticated:
         return False
-    if user.is_superuser:
-        return True
+    return user.is_superuser or user.is_staff or has_role(user, Role.HR)
+
 
-    emp = _extract_employee(user)
-    if not emp:
+def is_performance_admin(user: AbstractUser) -> bool:
+    if not user.is_authenticated:
         return False
+    return user.is_superuser or has_role(user, Role.PERFORMANCE_ADMIN)
 
-    position = (emp.position or "").upper()
-    org_name_raw = getattr(emp.org, "org_name", "") or ""
-    org_name = org_name_raw.upper()
 
-    return (
-        position == "CFO"
-        or "绩效" in (emp.position or "")
-        or "绩效" in org_name_raw
-        or "PERFORMANCE" in position
-        or "PERFORMANCE" in org_name
-    )
+def is_org_admin(user: AbstractUser) -> bool:
+    if not user.is_authenticated:
+        return False
+    return user.is_superuser or has_role(user, Role.ORG_ADMIN)
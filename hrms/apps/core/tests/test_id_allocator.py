@@ -0,0 +1,112 @@
+from io import BytesIO
+
+import openpyxl
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.config.models import LeaveReasonConfig
+from apps.employee.models import Employee
+from apps.employee.services import allocate_emp_id, allocate_emp_ids
+from apps.organization.models import Organization
+from apps.organization.services import allocate_org_code
+
+
+class IdAllocatorTests(TestCase):
+    def setUp(self) -> None:
+        self.org = Organization.objects.create(
+            org_code="HR",
+            org_name="人力资源部",
+            org_type="department",
+            effective_time=timezone.now(),
+            status="enabled",
+            create_by="tests",
+            update_by="tests",
+        )
+        Employee.objects.create(
+            emp_id="EMP1500",
+            id_card="420123199001010401",
+            emp_name="老员工",
+            gender="male",
+            birth_date=timezone.now().date(),
+            phone="13800000000",
+            email="emp1500@example.com",
+            hire_date=timezone.now().date(),
+            org=self.org,
+            position="专员",
+            employment_type="full_time",
+            emp_status="active",
+            create_by="tests",
+            update_by="tests",
+        )
+        User.objects.create_user(username="EMP1777", password="x")
+
+    def test_sequence_seeds_after_existing_ids_and_leases_blocks(self) -> None:
+        print("\n[分配验证] 序列从已用最大号之后继续，批量预留一次往返...")
+        first = allocate_emp_id()
+        print(f"[首个工号] {first}")
+        self.assertEqual(first, "EMP1778")
+        with self.assertNumQueries(1):
+            block = allocate_emp_ids(10000)
+        self.assertEqual(len(set(block)), 10000)
+        self.assertNotIn(first, block)
+        self.assertEqual(allocate_emp_ids(0), [])
+        print(f"[批量预留] {block[0]} ~ {block[-1]}")
+        print("[校验通过] 工号唯一且不与已有账号冲突。")
+
+    def test_org_and_reason_codes_use_sequences(self) -> None:
+        print("\n[分配验证] 组织编码与请假理由编码不再循环探测...")
+        Organization.objects.filter(pk=self.org.pk).update(org_code="HR-41")
+        codes = {allocate_org_code("Tech Center") for _ in range(3)}
+        print(f"[组织编码] {sorted(codes)}")
+        self.assertEqual(codes, {"TECHCENT-42", "TECHCENT-43", "TECHCENT-44"})
+
+        reasons = [
+            LeaveReasonConfig.objects.create(
+                name="Annual Leave", create_by="tests", update_by="tests"
+            )
+            for _ in range(2)
+        ]
+        print(f"[理由编码] {[r.code for r in reasons]}")
+        self.assertEqual(reasons[0].code, "annual-leave-1")
+        self.assertNotEqual(reasons[0].code, reasons[1].code)
+        print("[校验通过] 编码由序列保证唯一。")
+
+    def test_import_fills_blank_emp_ids_from_one_block(self) -> None:
+        print("\n[导入验证] 工号留空的行批量分配工号...")
+        admin = User.objects.create_superuser(username="imp", password="x")
+        self.client.force_login(admin)
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.append(["姓名", "工号"])
+        for idx in range(3):
+            ws.append(
+                [
+                    f"导入{idx}",
+                    None,
+                    f"42012319900101050{idx}",
+                    "1990-01-01",
+                    "13800000000",
+                    f"imp{idx}@example.com",
+                    "HR",
+                    "专员",
+                    "2024-01-01",
+                    "female",
+                ]
+            )
+        buffer = BytesIO()
+        wb.save(buffer)
+        upload = SimpleUploadedFile("emps.xlsx", buffer.getvalue())
+        self.client.post(reverse("employee:import"), {"file": upload})
+
+        imported = sorted(
+            Employee.objects.filter(emp_name__startswith="导入").values_list(
+                "emp_id", flat=True
+            )
+        )
+        print(f"[导入工号] {imported}")
+        self.assertEqual(imported, ["EMP1778", "EMP1779", "EMP1780"])
+        self.assertTrue(User.objects.filter(username="EMP1780").exists())
+        print("[校验通过] 空工号行全部获得唯一工号。")
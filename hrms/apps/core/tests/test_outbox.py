@@ -0,0 +1,182 @@
+import json
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.core.models import OutboxMessage
+from apps.core.outbox import (
+    FileSink,
+    HttpSink,
+    OutboxSink,
+    deliver_batch,
+    enqueue,
+    purge_delivered,
+)
+from apps.employee.models import Employee
+from apps.leave.services import SegmentOverlapError, bulk_transition, submit_leave
+from apps.organization.models import Organization
+
+
+class RejectingSink(OutboxSink):
+    def send(self, message):
+        raise RuntimeError(f"{message.topic} 下游不可用")
+
+
+class _Collector(BaseHTTPRequestHandler):
+    received = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.received.append(json.loads(body))
+        self.send_response(500 if self.path == "/broken" else 204)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(OUTBOX_MAX_ATTEMPTS=2, OUTBOX_RETRY_SECONDS=30)
+class OutboxTests(TestCase):
+    def setUp(self) -> None:
+        self.org = Organization.objects.create(
+            org_code="OUTBOX-ORG",
+            org_name="通知中心",
+            org_type="company",
+            effective_time=timezone.now(),
+            status="enabled",
+            create_by="tests",
+            update_by="tests",
+        )
+        self.mgr_user = User.objects.create_user(username="outbox-mgr", password="x")
+        self.manager = self._create_emp("O001", "通知经理", user=self.mgr_user)
+        self.dev = self._create_emp("O002", "通知专员", manager=self.manager)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = Path(self.tmp.name) / "outbox.jsonl"
+
+    def _create_emp(self, emp_id, name, manager=None, user=None) -> Employee:
+        return Employee.objects.create(
+            emp_id=emp_id,
+            id_card=f"42012319900101{emp_id[-3:]}1",
+            emp_name=name,
+            gender="male",
+            birth_date=timezone.now().date(),
+            phone="13800000000",
+            email=f"{emp_id.lower()}@example.com",
+            hire_date=timezone.now().date(),
+            org=self.org,
+            position="员工",
+            employment_type="full_time",
+            emp_status="active",
+            manager_emp=manager,
+            user=user,
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _topics(self):
+        return list(
+            OutboxMessage.objects.order_by("id").values_list("topic", flat=True)
+        )
+
+    def test_messages_commit_and_roll_back_with_the_status_change(self) -> None:
+        print("\n[发件箱验证] 消息与请假状态变更同事务写入，失败的提交不留消息...")
+        start = timezone.make_aware(datetime(2031, 5, 6, 9))
+        segments = [(start, start.replace(hour=12))]
+        leave = submit_leave(
+            self.dev, leave_type="personal", segments=segments, operator="tests"
+        )
+        with self.assertRaises(SegmentOverlapError):
+            submit_leave(
+                self.dev, leave_type="personal", segments=segments, operator="tests"
+            )
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            enqueue("leave.noop", leave.pk)
+            raise RuntimeError("rollback")
+        self.assertEqual(self._topics(), ["leave.submitted"])
+
+        bulk_transition(self.mgr_user, [leave.pk], "approve")
+        self.assertEqual(self._topics(), ["leave.submitted", "leave.approved"])
+        submitted, approved = OutboxMessage.objects.order_by("id")
+        self.assertEqual(submitted.aggregate_id, str(leave.pk))
+        self.assertEqual(submitted.payload["approver_emp_id"], str(self.manager.pk))
+        self.assertEqual(submitted.payload["total_days"], "0.38")
+        self.assertEqual(approved.payload["emp_id"], str(self.dev.pk))
+        self.assertEqual(approved.payload["operator"], str(self.mgr_user.pk))
+        print("[校验通过] 只有提交成功的状态变更留下了发件箱消息。")
+
+    def test_worker_claims_with_skip_locked_and_backs_off(self) -> None:
+        print("\n[投递验证] SKIP LOCKED 领取、按主题分发、失败顺延直至转为 dead...")
+        enqueue("leave.submitted", "L1", {"n": 1})
+        enqueue("leave.approved", "L1", {"n": 2})
+        enqueue("attendance.punched", "A1")
+        sinks = [FileSink(self.path, topics=["leave."]), RejectingSink(["attendance."])]
+
+        with CaptureQueriesContext(connection) as ctx:
+            run = deliver_batch(sinks, batch_size=10)
+        claim = next(q["sql"] for q in ctx.captured_queries if "FOR UPDATE" in q["sql"])
+        self.assertIn("SKIP LOCKED", claim)
+        self.assertEqual(
+            (run.claimed, run.delivered, run.retried, run.dead), (3, 2, 1, 0)
+        )
+        lines = [json.loads(line) for line in self.path.read_text().splitlines()]
+        self.assertEqual([line["payload"] for line in lines], [{"n": 1}, {"n": 2}])
+
+        failed = OutboxMessage.objects.get(topic="attendance.punched")
+        self.assertEqual((failed.status, failed.attempts), ("pending", 1))
+        self.assertIn("下游不可用", failed.last_error)
+        self.assertGreater(failed.available_at, timezone.now() + timedelta(seconds=20))
+        # 未到重试时间不会被再次领取
+        self.assertEqual(deliver_batch(sinks).claimed, 0)
+
+        OutboxMessage.objects.filter(pk=failed.pk).update(available_at=timezone.now())
+        run = deliver_batch(sinks)
+        self.assertEqual((run.claimed, run.dead), (1, 1))
+        failed.refresh_from_db()
+        self.assertEqual((failed.status, failed.attempts), ("dead", 2))
+
+        OutboxMessage.objects.filter(status="delivered").update(
+            delivered_at=timezone.now() - timedelta(days=8)
+        )
+        self.assertEqual(purge_delivered(timedelta(days=7)), 2)
+        print("[校验通过] 成功的消息写入下游，失败的按退避重试，超限后停止投递。")
+
+    def test_http_sink_and_command(self) -> None:
+        print("\n[投递验证] HTTP 下游按批 POST，命令行投递完即退出...")
+        server = HTTPServer(("127.0.0.1", 0), _Collector)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        base = f"http://127.0.0.1:{server.server_port}"
+        _Collector.received.clear()
+
+        enqueue("leave.rejected", "L2", {"reason": "冲突"})
+        enqueue("leave.completed", "L3")
+        sinks = [
+            {"BACKEND": "apps.core.outbox.HttpSink", "OPTIONS": {"url": f"{base}/hook"}}
+        ]
+        out = StringIO()
+        with override_settings(OUTBOX_SINKS=sinks):
+            call_command("run_outbox", "--once", stdout=out)
+        self.assertIn("已投递 2 条", out.getvalue())
+        self.assertEqual(len(_Collector.received), 1)
+        self.assertEqual(
+            [item["aggregate_id"] for item in _Collector.received[0]], ["L2", "L3"]
+        )
+        self.assertEqual(_Collector.received[0][0]["payload"], {"reason": "冲突"})
+
+        enqueue("leave.rejected", "L4")
+        run = deliver_batch([HttpSink(f"{base}/broken", timeout=2)])
+        self.assertEqual(run.retried, 1)
+        self.assertIn("500", OutboxMessage.objects.get(aggregate_id="L4").last_error)
+        print("[校验通过] 整批一次请求送达，下游报错时消息留待重试。")
@@ -0,0 +1,77 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.core.models import UserRoleAssignment
+from apps.core.roles import Role, compute_role_mask, get_role_mask
+from apps.employee.models import Employee
+from apps.organization.models import Organization
+
+
+class RoleMaskTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.org = Organization.objects.create(
+            org_code="ROLE-ORG",
+            org_name="财务部",
+            org_type="company",
+            effective_time=timezone.now(),
+            status="enabled",
+            create_by="tests",
+            update_by="tests",
+        )
+        self.user = User.objects.create_user(username="role", password="x")
+        self.emp = Employee.objects.create(
+            emp_id="R001",
+            id_card="420123199001010202",
+            emp_name="角色员工",
+            gender="female",
+            birth_date=timezone.now().date(),
+            phone="13800000010",
+            email="role@example.com",
+            hire_date=timezone.now().date(),
+            org=self.org,
+            position="会计",
+            employment_type="full_time",
+            emp_status="active",
+            user=self.user,
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def test_compute_role_mask_rules(self) -> None:
+        print("\n[规则验证] 岗位/组织名称映射为角色位图...")
+        cases = {
+            ("HR Director", "人力资源部", False): Role.HR
+            | Role.DIRECTOR
+            | Role.ORG_ADMIN,
+            ("CFO", "财务部", True): Role.PERFORMANCE_ADMIN | Role.MANAGER,
+            ("专员", "绩效管理部", False): Role.PERFORMANCE_ADMIN,
+            ("工程师", "研发部", False): Role(0),
+        }
+        for (position, org_name, manages), expected in cases.items():
+            mask = compute_role_mask(
+                position=position, org_name=org_name, manages_org=manages
+            )
+            print(f"[映射] {position}/{org_name} -> {Role(mask)!r}")
+            self.assertEqual(mask, int(expected))
+        print("[校验通过] 角色规则集中在一处。")
+
+    def test_roles_recomputed_on_org_rename(self) -> None:
+        print("\n[一致性验证] 组织改名后成员角色自动重算...")
+        self.assertEqual(UserRoleAssignment.objects.get(user=self.user).roles, 0)
+
+        self.org.org_name = "绩效管理部"
+        self.org.save()
+        stored = UserRoleAssignment.objects.get(user=self.user).roles
+        print(f"[物化结果] {Role(stored)!r}")
+        self.assertTrue(stored & Role.PERFORMANCE_ADMIN)
+        self.assertTrue(get_role_mask(self.user) & Role.PERFORMANCE_ADMIN)
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("performance:manage_list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["is_performance_admin"])
+        print("[校验通过] 权限校验与菜单读取同一份角色位图。")
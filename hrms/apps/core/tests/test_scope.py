@@ -0,0 +1,73 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.employee.models import Employee
+from apps.organization.models import Organization
+from utils.sql_scope import get_scope_for_user
+
+
+# 只统计业务查询：缓存放在进程内，不把共享缓存的读写算进去
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class UserScopeCacheTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.org = Organization.objects.create(
+            org_code="SCOPE-ORG",
+            org_name="研发中心",
+            org_type="company",
+            effective_time=timezone.now(),
+            status="enabled",
+            create_by="tests",
+            update_by="tests",
+        )
+        self.user = User.objects.create_user(username="scope", password="x")
+        self.emp = Employee.objects.create(
+            emp_id="S001",
+            id_card="420123199001010101",
+            emp_name="范围员工",
+            gender="male",
+            birth_date=timezone.now().date(),
+            phone="13800000009",
+            email="scope@example.com",
+            hire_date=timezone.now().date(),
+            org=self.org,
+            position="工程师",
+            employment_type="full_time",
+            emp_status="active",
+            user=self.user,
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def test_warm_lookup_runs_no_queries(self) -> None:
+        print("\n[性能验证] 缓存命中时解析用户范围不访问数据库...")
+        with self.assertNumQueries(1):
+            scope = get_scope_for_user(self.user)
+        self.assertEqual(scope.org_id, str(self.org.pk))
+        with self.assertNumQueries(0):
+            warm = get_scope_for_user(self.user)
+        self.assertEqual(warm, scope)
+        print("[校验通过] 冷启动 1 次查询，热路径 0 次查询。")
+
+    def test_signals_invalidate_cached_scope(self) -> None:
+        print("\n[一致性验证] 员工/组织变更后缓存自动失效...")
+        self.assertFalse(get_scope_for_user(self.user).is_manager)
+
+        # 失效在事务提交后执行
+        with self.captureOnCommitCallbacks(execute=True):
+            self.org.manager_emp = self.emp
+            self.org.save()
+        scope = get_scope_for_user(self.user)
+        print(f"[组织变更] 负责组织: {scope.managed_org_ids}")
+        self.assertTrue(scope.is_manager)
+        self.assertEqual(scope.root_org_ids, [str(self.org.pk)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.emp.position = "HR BP"
+            self.emp.save()
+        self.assertTrue(get_scope_for_user(self.user).is_hr)
+        print("[校验通过] 变更立即反映到用户范围。")
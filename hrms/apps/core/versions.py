@@ -0,0 +1,53 @@
+"""数据库中的缓存版本号（core_cache_version）。
+
+缓存键里带上版本号，数据变更后递增版本号即可让旧缓存整体失效。版本号放在数据库
+而不是缓存里：所有 worker 读到的是同一个值，缓存后端淘汰或清空也不会让版本号
+回退到旧值、重新命中早已过期的缓存。递增应在变更提交后执行
+（transaction.on_commit），以免提交前有请求按旧数据缓存到新版本号下。
+"""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+from django.db import connection
+
+
+def get_versions(names: Iterable[str]) -> dict[str, int]:
+    """一次查询取出多个版本号；从未递增过的名称为 0。"""
+    names = list(dict.fromkeys(names))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name, version FROM core_cache_version WHERE name = ANY(%s)",
+            [names],
+        )
+        found = dict(cursor.fetchall())
+    return {name: int(found.get(name, 0)) for name in names}
+
+
+def get_version(name: str) -> int:
+    return get_versions([name])[name]
+
+
+def bump_versions(names: Iterable[str]) -> None:
+    """递增这些版本号（不存在时新建）。
+
+    新值取当前时钟的微秒数（至少比旧值大 1）而不是简单加一：递增所在的事务
+    回滚后版本号退回旧值，再次递增也不会得到一个曾经用过的版本号。
+    """
+    names = sorted(set(names))
+    if not names:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO core_cache_version (name, version) "
+            "SELECT unnest(%s::text[]), "
+            "(extract(epoch FROM clock_timestamp()) * 1000000)::bigint "
+            "ON CONFLICT (name) DO UPDATE "
+            "SET version = GREATEST(core_cache_version.version + 1, EXCLUDED.version)",
+            [names],
+        )
+
+
+def bump_version(name: str) -> None:
+    bump_versions([name])
@@ -3,10 +3,13 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.utils import timezone
 from django.db.models import Q
 from apps.leave.models import LeaveApply
+from apps.leave.services import pending_approval_count
+from .roles import is_hr_user
 from apps.performance.models import PerformanceEvaluation
 from apps.attendance.models import Attendance
 from apps.audit.models import AuditLog
 from apps.employee.models import Employee
+from apps.organization.services import total_headcount
 
 
 class DashboardView(LoginRequiredMixin, TemplateView):
@@ -46,7 +49,7 @@ class DashboardView(LoginRequiredMixin, TemplateView):
                 from django.contrib.auth.models import User as AuthUser
 
                 context["is_admin_dashboard"] = True
-                context["total_employees"] = Employee.objects.count()
+                context["total_employees"] = total_headcount()
                 context["total_orgs"] = Organization.objects.count()
                 context["active_users"] = AuthUser.objects.filter(
                     is_active=True
@@ -62,12 +65,11 @@ class DashboardView(LoginRequiredMixin, TemplateView):
                 return context
 
         # 2. 统计数据
-        # 待办审批 (作为管理者，查询下属申请的待审批单据)
-        # 逻辑：申请人的 manager 是我，且状态是 pending
-        pending_approvals = LeaveApply.objects.filter(
-            emp__manager_emp=emp, apply_status="pending"
-        ).count()
-        is_manager = Employee.objects.filter(manager_emp=emp).exists()
+        # 待办审批 (作为审批人名下审核中的单据，读待办计数表；HR 另计共享复核队列)
+        hr_reviewer = is_hr_user(user)
+        pending_approvals = pending_approval_count(emp, include_pool=hr_reviewer)
+        team_size = Employee.objects.reports_under(emp).count()
+        is_manager = team_size > 0
 
         # 待办绩效评价 (自评 或 他评)
         pending_perf = PerformanceEvaluation.objects.filter(
@@ -77,7 +79,8 @@ class DashboardView(LoginRequiredMixin, TemplateView):
 
         context["total_todos"] = pending_approvals + pending_perf
         context["pending_approvals_count"] = pending_approvals
-        context["show_pending_approvals"] = is_manager
+        context["show_pending_approvals"] = is_manager or hr_reviewer
+        context["team_size"] = team_size
 
         # 3. 今日考勤
         today = timezone.now().date()
@@ -51,6 +51,16 @@ class EmployeeForm(forms.ModelForm):
         # 过滤组织，只显示启用的
         self.fields["org"].queryset = Organization.objects.filter(status="enabled")
 
+    def clean_manager_emp(self):
+        manager = self.cleaned_data.get("manager_emp")
+        if manager and self.instance.pk:
+            # 上级不能是本人或本人的（跨级）下属，否则汇报线成环
+            if manager.pk == self.instance.pk or Employee.objects.is_above(
+                self.instance, manager
+            ):
+                raise forms.ValidationError("直接上级不能是本人或其下属")
+        return manager
+
 
 class HROnboardingForm(EmployeeForm):
     initial_password = forms.CharField(
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.employee.services import (
+    rebuild_reporting_closure,
+    verify_reporting_closure,
+)
+
+
+class Command(BaseCommand):
+    help = "全量重建汇报线闭包表 employee_reporting_closure，并与递归遍历结果校验"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify-only",
+            action="store_true",
+            help="只校验，不重建",
+        )
+
+    def handle(self, *args, **options):
+        if not options["verify_only"]:
+            with transaction.atomic():
+                rows = rebuild_reporting_closure()
+            self.stdout.write(f"已重建汇报线闭包：{rows} 行")
+
+        diff = verify_reporting_closure()
+        if not diff.ok:
+            raise CommandError(
+                f"汇报线闭包校验失败：缺失 {diff.missing} 行，多余 {diff.extra} 行"
+            )
+        self.stdout.write(self.style.SUCCESS("汇报线闭包校验通过"))
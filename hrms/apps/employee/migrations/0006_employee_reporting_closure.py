@@ -0,0 +1,75 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employee", "0005_remove_resigning_status"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EmployeeReportingLine",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("depth", models.PositiveIntegerField(verbose_name="层级距离")),
+                (
+                    "manager",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="report_links",
+                        to="employee.employee",
+                        verbose_name="上级",
+                    ),
+                ),
+                (
+                    "report",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="manager_links",
+                        to="employee.employee",
+                        verbose_name="下属",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "汇报线闭包",
+                "verbose_name_plural": "汇报线闭包",
+                "db_table": "employee_reporting_closure",
+                "indexes": [
+                    models.Index(
+                        fields=["report", "manager"], name="idx_emp_reporting_report"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="employeereportingline",
+            constraint=models.UniqueConstraint(
+                fields=("manager", "report"), name="uniq_emp_reporting_pair"
+            ),
+        ),
+        migrations.RunSQL(
+            sql="""
+            WITH RECURSIVE paths(report_id, manager_id, depth) AS (
+                SELECT n.id, n.id, 0
+                FROM employee n
+                WHERE n.is_deleted = FALSE
+                UNION ALL
+                SELECT p.report_id, parent.id, p.depth + 1
+                FROM paths p
+                JOIN employee cur ON cur.id = p.manager_id
+                JOIN employee parent ON parent.id = cur.manager_emp_id
+                WHERE parent.is_deleted = FALSE AND p.depth < 256
+            )
+            INSERT INTO employee_reporting_closure (manager_id, report_id, depth)
+            SELECT manager_id, report_id, depth FROM paths;
+            """,
+            reverse_sql="""
+            DELETE FROM employee_reporting_closure;
+            """,
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:35
+
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employee", "0006_employee_reporting_closure"),
+        ("organization", "0007_organization_history"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EmployeeAssignmentHistory",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "emp_status",
+                    models.CharField(max_length=20, verbose_name="员工状态"),
+                ),
+                (
+                    "employment_type",
+                    models.CharField(max_length=20, verbose_name="雇佣类型"),
+                ),
+                (
+                    "valid_period",
+                    django.contrib.postgres.fields.ranges.DateTimeRangeField(
+                        verbose_name="有效区间"
+                    ),
+                ),
+                (
+                    "emp",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="assignment_history",
+                        to="employee.employee",
+                        verbose_name="员工",
+                    ),
+                ),
+                (
+                    "org",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="assignment_history",
+                        to="organization.organization",
+                        verbose_name="所属组织",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "员工任职历史",
+                "verbose_name_plural": "员工任职历史",
+                "db_table": "employee_assignment_history",
+                "indexes": [
+                    django.contrib.postgres.indexes.GistIndex(
+                        fields=["valid_period"], name="gist_emp_assign_period"
+                    ),
+                    models.Index(fields=["org"], name="idx_emp_assign_org"),
+                    models.Index(fields=["emp"], name="idx_emp_assign_emp"),
+                ],
+            },
+        ),
+        migrations.RunSQL(
+            sql=[
+                (
+                    """
+                    INSERT INTO employee_assignment_history
+                        (emp_id, org_id, emp_status, employment_type, valid_period)
+                    SELECT id, org_id, emp_status, employment_type,
+                           tstzrange(hire_date::timestamp AT TIME ZONE %s, NULL)
+                    FROM employee
+                    WHERE is_deleted = FALSE;
+                    """,
+                    [settings.TIME_ZONE],
+                )
+            ],
+            reverse_sql="""
+            DELETE FROM employee_assignment_history;
+            """,
+        ),
+        BtreeGistExtension(),
+        migrations.RunSQL(
+            sql="""
+            ALTER TABLE employee_assignment_history
+            ADD CONSTRAINT no_emp_assignment_overlap
+            EXCLUDE USING gist (
+                emp_id WITH =,
+                valid_period WITH &&
+            );
+            """,
+            reverse_sql="""
+            ALTER TABLE employee_assignment_history
+            DROP CONSTRAINT IF EXISTS no_emp_assignment_overlap;
+            """,
+        ),
+    ]
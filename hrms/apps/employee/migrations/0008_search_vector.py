@@ -0,0 +1,38 @@
+# Generated by Django 5.0.14 on 2026-10-18 20:17
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+from utils.textsearch import refresh_search_vectors
+
+
+def backfill_search_vector(apps, schema_editor):
+    refresh_search_vectors("employee", ("emp_name", "emp_id", "email"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employee", "0007_employee_assignment_history"),
+        ("organization", "0007_organization_history"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="employee",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True, verbose_name="检索向量"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="gin_employee_search"
+            ),
+        ),
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,46 @@
+from django.contrib.postgres.fields import DateTimeRangeField
+from django.contrib.postgres.indexes import GinIndex, GistIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from apps.core.models import BaseModel
 from django.contrib.auth.models import User
 
 
+class EmployeeQuerySet(models.QuerySet):
+    """
+    基于汇报线闭包表 employee_reporting_closure 的层级查询
+    任意深度的下属/上级判断都只需一次索引查找
+    """
+
+    def reports_under(self, manager, *, min_depth=1, max_depth=None):
+        """manager 之下（任意层级，不含本人）的全部员工
+
+        层级范围须与 manager 条件放在同一次 filter 中，否则会另起一次闭包表关联，
+        匹配到这些员工与其他上级之间的链接。
+        """
+        lookup = {
+            "manager_links__manager": manager,
+            "manager_links__depth__gte": min_depth,
+        }
+        if max_depth is not None:
+            lookup["manager_links__depth__lte"] = max_depth
+        return self.filter(**lookup)
+
+    def managers_of(self, report):
+        """report 的整条上级链（由近及远）"""
+        return self.filter(
+            report_links__report=report, report_links__depth__gte=1
+        ).order_by("report_links__depth")
+
+    def is_above(self, manager, report) -> bool:
+        """manager 是否位于 report 的汇报链上方（直属或跨级）"""
+        if manager is None or report is None:
+            return False
+        return EmployeeReportingLine.objects.filter(
+            manager=manager, report=report, depth__gte=1
+        ).exists()
+
+
 class Employee(BaseModel):
     """
     员工档案表
@@ -81,17 +119,98 @@ class Employee(BaseModel):
         related_name="employee",
         verbose_name="关联系统用户",
     )
+    # 姓名/工号/邮箱的分词结果（utils.textsearch），保存时由 apps.employee.signals 计算
+    search_vector = SearchVectorField(
+        null=True, editable=False, verbose_name="检索向量"
+    )
+
+    SEARCH_FIELDS = ("emp_name", "emp_id", "email")
+
+    objects = EmployeeQuerySet.as_manager()
 
     class Meta:
         db_table = "employee"
         verbose_name = "员工档案"
         verbose_name_plural = verbose_name
         ordering = ["emp_id"]
+        indexes = [
+            GinIndex(fields=["search_vector"], name="gin_employee_search"),
+        ]
 
     def __str__(self):
         return f"{self.emp_name} ({self.emp_id})"
 
 
+class EmployeeReportingLine(models.Model):
+    """
+    汇报线闭包表
+    每条 (manager, report) 记录表示 manager 位于 report 汇报链上方 depth 级；
+    depth=0 为员工自身，由 apps.employee.signals 随 manager_emp 变更增量维护
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    manager = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name="report_links",
+        verbose_name="上级",
+    )
+    report = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name="manager_links",
+        verbose_name="下属",
+    )
+    depth = models.PositiveIntegerField(verbose_name="层级距离")
+
+    class Meta:
+        db_table = "employee_reporting_closure"
+        verbose_name = "汇报线闭包"
+        verbose_name_plural = verbose_name
+        constraints = [
+            models.UniqueConstraint(
+                fields=["manager", "report"], name="uniq_emp_reporting_pair"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["report", "manager"], name="idx_emp_reporting_report"),
+        ]
+
+
+class EmployeeAssignmentHistory(models.Model):
+    """
+    员工任职历史（所属组织, 员工状态, 雇佣类型, 有效区间）
+    与组织人数汇总同一时机维护，供历史某一时刻的人数统计使用
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    emp = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name="assignment_history",
+        verbose_name="员工",
+    )
+    org = models.ForeignKey(
+        "organization.Organization",
+        on_delete=models.CASCADE,
+        related_name="assignment_history",
+        verbose_name="所属组织",
+    )
+    emp_status = models.CharField(max_length=20, verbose_name="员工状态")
+    employment_type = models.CharField(max_length=20, verbose_name="雇佣类型")
+    valid_period = DateTimeRangeField(verbose_name="有效区间")
+
+    class Meta:
+        db_table = "employee_assignment_history"
+        verbose_name = "员工任职历史"
+        verbose_name_plural = verbose_name
+        indexes = [
+            GistIndex(fields=["valid_period"], name="gist_emp_assign_period"),
+            models.Index(fields=["org"], name="idx_emp_assign_org"),
+            models.Index(fields=["emp"], name="idx_emp_assign_emp"),
+        ]
+
+
 class EmployeeHistory(BaseModel):
     """
     员工历史信息表 (仅用于记录核心信息变更)
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterable
+
+from django.db import connection
+
+from utils.closure import ClosureDiff, ClosureSpec, rebuild, refresh_subtrees, verify
+from utils.id_allocator import IdSequence, allocate, allocate_block
+
+REPORTING_CLOSURE = ClosureSpec(
+    closure_table="employee_reporting_closure",
+    node_table="employee",
+    parent_column="manager_emp_id",
+    ancestor_column="manager_id",
+    descendant_column="report_id",
+)
+
+# 工号 EMP + 数字；系统账号用户名与工号一致，因此两边已用的号码都要跳过
+EMP_ID_SEQUENCE = IdSequence(
+    name="hrms_emp_id_seq",
+    prefix="EMP",
+    start=1001,
+    seed_sql=(
+        "SELECT MAX(substring(code FROM 4)::bigint) FROM ("
+        "SELECT emp_id AS code FROM employee "
+        "UNION ALL SELECT username FROM auth_user"
+        ") used WHERE code ~ '^EMP[0-9]{1,18}$'"
+    ),
+)
+
+
+def allocate_emp_id() -> str:
+    """分配一个新工号（基于数据库序列，多进程并发也不会重复）。"""
+    return allocate(EMP_ID_SEQUENCE)
+
+
+def allocate_emp_ids(count: int) -> list[str]:
+    """一次往返预留 count 个工号，供批量导入使用。"""
+    return allocate_block(EMP_ID_SEQUENCE, count)
+
+
+def refresh_reporting_lines(emp_ids: Iterable[str]) -> int:
+    """重算指定员工（含其全部下属）的汇报线闭包行。"""
+    return refresh_subtrees(REPORTING_CLOSURE, list(emp_ids))
+
+
+def rebuild_reporting_closure() -> int:
+    """全量重建汇报线闭包表，返回写入行数。"""
+    return rebuild(REPORTING_CLOSURE)
+
+
+def verify_reporting_closure() -> ClosureDiff:
+    """与递归遍历结果对比，返回缺失/多余行数。"""
+    return verify(REPORTING_CLOSURE)
+
+
+def record_assignment(employee, *, at: datetime) -> None:
+    """关闭员工当前的任职历史区间，未删除时按现值开启新区间。"""
+    with connection.cursor() as cursor:
+        # 同一时刻内开启又变更的区间没有实际有效期，直接删除
+        cursor.execute(
+            "DELETE FROM employee_assignment_history "
+            "WHERE emp_id = %s AND upper_inf(valid_period) AND lower(valid_period) >= %s",
+            [str(employee.pk), at],
+        )
+        cursor.execute(
+            "UPDATE employee_assignment_history "
+            "SET valid_period = tstzrange(lower(valid_period), %s) "
+            "WHERE emp_id = %s AND upper_inf(valid_period)",
+            [at, str(employee.pk)],
+        )
+        if employee.is_deleted:
+            return
+        cursor.execute(
+            "INSERT INTO employee_assignment_history "
+            "(emp_id, org_id, emp_status, employment_type, valid_period) "
+            "VALUES (%s, %s, %s, %s, tstzrange(%s, NULL))",
+            [
+                str(employee.pk),
+                str(employee.org_id),
+                employee.emp_status,
+                employee.employment_type,
+                at,
+            ],
+        )
@@ -0,0 +1,149 @@
+from datetime import datetime, time
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.core.roles import refresh_user_roles
+from apps.organization.services import apply_headcount_deltas, invalidate_org_tree
+from utils.sql_scope import invalidate_user_scope
+from utils.textsearch import search_vector
+from .models import Employee
+from .services import record_assignment, refresh_reporting_lines
+
+
+@receiver(pre_save, sender=Employee)
+def remember_previous_state(sender, instance, **kwargs):
+    # 账号换绑时旧账号的缓存范围也需要失效；姓名变化可能影响组织树上的负责人；
+    # 上级/删除标记变化时需要重算汇报线闭包；组织/状态/类型变化时需要增减人数汇总；
+    # 工号/姓名/邮箱/组织/删除标记变化时需要刷新请假检索宽表
+    instance._previous_user_id = None
+    instance._previous_profile = None
+    instance._previous_name = None
+    instance._reporting_state = None
+    instance._headcount_key = None
+    if instance._state.adding:
+        return
+    previous = (
+        Employee.objects.filter(pk=instance.pk)
+        .values_list(
+            "user_id",
+            "emp_name",
+            "manager_emp_id",
+            "is_deleted",
+            "org_id",
+            "emp_status",
+            "employment_type",
+            "emp_id",
+            "email",
+        )
+        .first()
+    )
+    if previous is None:
+        return
+    instance._previous_user_id, instance._previous_name = previous[:2]
+    instance._previous_profile = (
+        previous[7],
+        previous[1],
+        previous[4],
+        previous[3],
+        previous[8],
+    )
+    instance._reporting_state = previous[2:4]
+    if not previous[3]:
+        instance._headcount_key = previous[4:7]
+
+
+@receiver(pre_save, sender=Employee)
+def assign_search_vector(sender, instance, update_fields=None, **kwargs):
+    # 只更新部分字段（状态等）时检索字段不会变化，沿用库里的向量；
+    # 直接改库或批量写入后用 rebuild_search_index 重算
+    if update_fields is None:
+        instance.search_vector = search_vector(
+            *(getattr(instance, name) for name in Employee.SEARCH_FIELDS)
+        )
+
+
+def _headcount_key(employee):
+    if employee.is_deleted:
+        return None
+    return (employee.org_id, employee.emp_status, employee.employment_type)
+
+
+@receiver(post_save, sender=Employee)
+def maintain_reporting_closure(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_reporting_state", None)
+    current = (instance.manager_emp_id, instance.is_deleted)
+    if not created and previous == current:
+        return
+    with transaction.atomic():
+        refresh_reporting_lines([instance.pk])
+
+
+@receiver(post_save, sender=Employee)
+def maintain_headcount(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_headcount_key", None)
+    current = _headcount_key(instance)
+    if previous == current:
+        return
+    # 任职历史与人数汇总同步变化；新建档案从入职日零点起算
+    if created:
+        at = timezone.make_aware(datetime.combine(instance.hire_date, time.min))
+    else:
+        at = timezone.now()
+    record_assignment(instance, at=at)
+    deltas = {}
+    if previous:
+        deltas[tuple(previous)] = -1
+    if current:
+        deltas[current] = deltas.get(current, 0) + 1
+    if apply_headcount_deltas(deltas):
+        transaction.on_commit(invalidate_org_tree)
+
+
+@receiver(pre_delete, sender=Employee)
+def remember_direct_reports(sender, instance, **kwargs):
+    # 物理删除时下属的 manager_emp 由 SET_NULL 批量置空（不触发信号），这里先记下
+    instance._direct_report_ids = list(
+        instance.subordinates.values_list("pk", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Employee)
+def detach_direct_reports(sender, instance, **kwargs):
+    refresh_reporting_lines(getattr(instance, "_direct_report_ids", []))
+
+
+@receiver(post_delete, sender=Employee)
+def release_headcount(sender, instance, **kwargs):
+    current = _headcount_key(instance)
+    if current and apply_headcount_deltas({current: -1}):
+        transaction.on_commit(invalidate_org_tree)
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def maintain_employee_roles(sender, instance, **kwargs):
+    refresh_user_roles(
+        emp_ids=[instance.pk],
+        user_ids=[instance.user_id, getattr(instance, "_previous_user_id", None)],
+    )
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def invalidate_employee_scope(sender, instance, **kwargs):
+    # 提交后再失效，避免其他请求在提交前按旧数据重新缓存
+    for user_id in {instance.user_id, getattr(instance, "_previous_user_id", None)}:
+        if user_id:
+            transaction.on_commit(partial(invalidate_user_scope, user_id))
+
+
+@receiver(post_save, sender=Employee)
+def invalidate_manager_display(sender, instance, created, **kwargs):
+    if created or getattr(instance, "_previous_name", None) == instance.emp_name:
+        return
+    if instance.managed_orgs.exists():
+        transaction.on_commit(invalidate_org_tree)
@@ -0,0 +1,129 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.employee.forms import EmployeeForm
+from apps.employee.models import Employee, EmployeeReportingLine
+from apps.employee.services import verify_reporting_closure
+from apps.organization.models import Organization
+
+
+class ReportingClosureTests(TestCase):
+    def setUp(self) -> None:
+        self.org = Organization.objects.create(
+            org_code="RP-ORG",
+            org_name="研发中心",
+            org_type="company",
+            effective_time=timezone.now(),
+            status="enabled",
+            create_by="tests",
+            update_by="tests",
+        )
+        self.ceo = self._create_emp("R001", "总经理")
+        self.director = self._create_emp("R002", "总监", manager=self.ceo)
+        self.lead = self._create_emp("R003", "组长", manager=self.director)
+        self.dev = self._create_emp("R004", "工程师", manager=self.lead)
+        self.other = self._create_emp("R005", "市场专员", manager=self.ceo)
+
+    def _create_emp(self, emp_id, name, manager=None) -> Employee:
+        return Employee.objects.create(
+            emp_id=emp_id,
+            id_card=f"4201231990010{emp_id[-4:]}1"[:18],
+            emp_name=name,
+            gender="male",
+            birth_date=timezone.now().date(),
+            phone="13800000000",
+            email=f"{emp_id.lower()}@example.com",
+            hire_date=timezone.now().date(),
+            org=self.org,
+            position="员工",
+            employment_type="full_time",
+            emp_status="active",
+            manager_emp=manager,
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _codes(self, queryset) -> set[str]:
+        return set(queryset.values_list("emp_id", flat=True))
+
+    def test_reports_under_and_is_above_are_single_queries(self) -> None:
+        print("\n[结构验证] 任意深度的下属/上级判断各一次查询...")
+        with self.assertNumQueries(1):
+            codes = self._codes(Employee.objects.reports_under(self.director))
+        print(f"[总监下属] {sorted(codes)}")
+        self.assertEqual(codes, {"R003", "R004"})
+        self.assertEqual(
+            self._codes(Employee.objects.reports_under(self.ceo, max_depth=1)),
+            {"R002", "R005"},
+        )
+        # 总监的直属下属与 CEO 相隔两级，但不应计入总监的跨级下属
+        self.assertEqual(
+            self._codes(Employee.objects.reports_under(self.director, min_depth=2)),
+            {"R004"},
+        )
+        with self.assertNumQueries(1):
+            self.assertTrue(Employee.objects.is_above(self.ceo, self.dev))
+        self.assertFalse(Employee.objects.is_above(self.other, self.dev))
+        self.assertFalse(Employee.objects.is_above(self.dev, self.dev))
+        self.assertEqual(
+            list(
+                Employee.objects.managers_of(self.dev).values_list("emp_id", flat=True)
+            ),
+            ["R003", "R002", "R001"],
+        )
+        print("[校验通过] 闭包表查询结果与汇报链一致。")
+
+    def test_manager_change_and_soft_delete_move_subtree(self) -> None:
+        print("\n[结构验证] 调整上级或逻辑删除后整条汇报线随之更新...")
+        self.lead.manager_emp = self.other
+        self.lead.save()
+        self.assertTrue(Employee.objects.is_above(self.other, self.dev))
+        self.assertFalse(Employee.objects.is_above(self.director, self.dev))
+        self.assertEqual(
+            EmployeeReportingLine.objects.get(manager=self.ceo, report=self.dev).depth,
+            3,
+        )
+
+        self.other.is_deleted = True
+        self.other.save()
+        self.assertFalse(Employee.objects.is_above(self.ceo, self.dev))
+        self.assertTrue(verify_reporting_closure().ok)
+        print("[校验通过] 增量维护后闭包与递归遍历一致。")
+
+    def test_form_rejects_reporting_cycle(self) -> None:
+        print("\n[一致性验证] 上级不能设为本人的下属...")
+        form = EmployeeForm(
+            data={
+                "emp_name": self.director.emp_name,
+                "gender": "male",
+                "phone": self.director.phone,
+                "email": self.director.email,
+                "id_card": self.director.id_card,
+                "org": self.org.pk,
+                "position": "总监",
+                "hire_date": self.director.hire_date.isoformat(),
+                "employment_type": "full_time",
+                "emp_status": "active",
+                "manager_emp": self.dev.pk,
+            },
+            instance=self.director,
+        )
+        self.assertFalse(form.is_valid())
+        print(f"[表单错误] {form.errors.get('manager_emp')}")
+        self.assertIn("manager_emp", form.errors)
+        print("[校验通过] 成环的上级设置被拦截。")
+
+    def test_rebuild_command_repairs_drift(self) -> None:
+        print("\n[运维验证] 重建命令修复绕过信号产生的偏差...")
+        Employee.objects.filter(pk=self.dev.pk).update(manager_emp=self.other)
+        self.assertFalse(verify_reporting_closure().ok)
+
+        out = StringIO()
+        call_command("rebuild_reporting_closure", stdout=out)
+        print(f"[命令输出] {out.getvalue().strip()}")
+        self.assertTrue(verify_reporting_closure().ok)
+        self.assertTrue(Employee.objects.is_above(self.other, self.dev))
+        print("[校验通过] 重建后汇报线闭包恢复一致。")
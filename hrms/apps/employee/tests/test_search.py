@@ -0,0 +1,71 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.employee.models import Employee
+from apps.organization.models import Organization
+
+
+class EmployeeSqlSearchTests(TestCase):
+    def setUp(self) -> None:
+        # 检索页读取 vw_employee_profile，测试库按 apply_views.py 同样的脚本建视图
+        sql = Path(settings.BASE_DIR, "db", "sql", "report_views.sql").read_text(
+            encoding="utf-8"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+        self.org = Organization.objects.create(
+            org_code="ES-ORG",
+            org_name="平台部",
+            org_type="company",
+            effective_time=timezone.now(),
+            status="enabled",
+            create_by="tests",
+            update_by="tests",
+        )
+        self.admin = User.objects.create_superuser(username="es-admin", password="x")
+        self._create_emp("S2001", "欧阳明远", "mingyuan@example.com")
+        self._create_emp("S2002", "明远航", "yuanhang@example.com")
+        self._create_emp("S2003", "王小明", "xiaoming@example.com")
+
+    def _create_emp(self, emp_id, name, email) -> Employee:
+        return Employee.objects.create(
+            emp_id=emp_id,
+            id_card=f"42012319900101{emp_id[-3:]}1",
+            emp_name=name,
+            gender="male",
+            birth_date=timezone.now().date(),
+            phone="13800000000",
+            email=email,
+            hire_date=timezone.now().date(),
+            org=self.org,
+            position="员工",
+            employment_type="full_time",
+            emp_status="active",
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _search(self, keyword):
+        resp = self.client.get(reverse("employee:sql_search"), {"keyword": keyword})
+        self.assertEqual(resp.status_code, 200)
+        return [r["emp_id"] for r in resp.context["results"]]
+
+    def test_keyword_uses_search_vector(self) -> None:
+        print("\n[员工检索验证] 姓名子串/工号前缀/邮箱前缀走检索向量...")
+        self.client.force_login(self.admin)
+        self.assertEqual(self._search("明远"), ["S2001", "S2002"])
+        self.assertEqual(self._search("明"), ["S2001", "S2002", "S2003"])
+        self.assertEqual(self._search("s200"), ["S2001", "S2002", "S2003"])
+        self.assertEqual(self._search("yuanhang"), ["S2002"])
+        self.assertEqual(self._search("远明"), [])
+
+        # 多个关键字需同时命中
+        self.assertEqual(self._search("明 mingyuan"), ["S2001"])
+        self.assertEqual(self._search("明远 yuan"), ["S2002"])
+        print("[校验通过] 二元分词命中姓名子串，多个关键字取交集。")
@@ -22,15 +22,17 @@ import openpyxl
 from io import BytesIO
 
 from .models import Employee
+from .services import allocate_emp_id, allocate_emp_ids
 from .forms import EmployeeImportForm, EmployeeForm, HROnboardingForm
 from apps.organization.models import Organization
+from apps.core.roles import Role, has_role, is_hr_user
 from utils.sql_scope import (
     build_org_tree_cte,
     get_user_scope,
     normalize_str,
     parse_iso_date,
-    uniq,
 )
+from utils.textsearch import search_query
 
 
 # 1. 导入处理 View
@@ -46,13 +48,21 @@ class EmployeeImportView(LoginRequiredMixin, FormView):
             sheet = wb.active
             success_count = 0
             errors = []
+            rows = [
+                (row_idx, row)
+                for row_idx, row in enumerate(
+                    sheet.iter_rows(min_row=2, values_only=True), start=2
+                )
+                if row[0]  # 忽略空行
+            ]
+            # 工号列留空的行由系统分配：一次性预留整批工号
+            reserved_ids = iter(
+                allocate_emp_ids(
+                    sum(1 for _, row in rows if len(row) > 1 and not row[1])
+                )
+            )
 
-            for row_idx, row in enumerate(
-                sheet.iter_rows(min_row=2, values_only=True), start=2
-            ):
-                if not row[0]:
-                    # 忽略空行
-                    continue
+            for row_idx, row in rows:
                 try:
                     (
                         name,
@@ -69,6 +79,8 @@ class EmployeeImportView(LoginRequiredMixin, FormView):
                 except ValueError:
                     errors.append(f"第 {row_idx} 行格式错误：列数不足")
                     continue
+                if not emp_id:
+                    emp_id = next(reserved_ids)
 
                 if Employee.objects.filter(emp_id=emp_id).exists():
                     errors.append(f"第 {row_idx} 行错误：工号 {emp_id} 已存在")
@@ -145,7 +157,7 @@ class EmployeeTemplateDownloadView(LoginRequiredMixin, View):
         ws.title = "员工导入模板"
         headers = [
             "姓名",
-            "工号",
+            "工号(留空自动分配)",
             "身份证号",
             "出生日期",
             "手机号",
@@ -189,14 +201,7 @@ class EmployeeCreateView(LoginRequiredMixin, CreateView):
     success_url = reverse_lazy("employee:list")
 
     def form_valid(self, form):
-        last_emp = Employee.objects.order_by("-create_time").first()
-        new_id_suffix = 1001
-        if last_emp and last_emp.emp_id.startswith("EMP"):
-            try:
-                new_id_suffix = int(last_emp.emp_id[3:]) + 1
-            except ValueError:
-                pass
-        emp_id = f"EMP{new_id_suffix}"
+        emp_id = allocate_emp_id()
 
         try:
             with transaction.atomic():
@@ -277,24 +282,7 @@ class EmployeeOrgSqlSearchView(LoginRequiredMixin, View):
                 return redirect("core:dashboard")
 
         # 允许范围：本人所在组织 + 其负责组织（如有）的子树
-        root_ids: list[str] = []
-        if scope.org_id:
-            root_ids.append(scope.org_id)
-
-        if scope.emp_pk:
-            with connection.cursor() as cursor:
-                cursor.execute(
-                    """
-                    SELECT org.id
-                    FROM organization org
-                    WHERE org.is_deleted = FALSE
-                      AND org.manager_emp_id = %s
-                    """,
-                    [scope.emp_pk],
-                )
-                root_ids.extend([r[0] for r in cursor.fetchall()])
-
-        root_ids = uniq([rid for rid in root_ids if rid])
+        root_ids = scope.root_org_ids
 
         # 组织下拉（仅允许范围内）
         org_options: list[dict[str, str]] = []
@@ -317,8 +305,8 @@ class EmployeeOrgSqlSearchView(LoginRequiredMixin, View):
                     {cte_sql}
                     SELECT o.id, o.org_name
                     FROM organization o
+                    JOIN org_tree t ON t.id = o.id
                     WHERE o.is_deleted = FALSE
-                      AND o.id IN (SELECT id FROM org_tree)
                     ORDER BY o.org_name
                     """,
                     cte_params,
@@ -348,10 +336,21 @@ class EmployeeOrgSqlSearchView(LoginRequiredMixin, View):
 
         if not (scope.is_superuser or scope.is_hr):
             cte_sql, cte_params = build_org_tree_cte(root_ids)
-            clauses.append("v.org_id IN (SELECT id FROM org_tree)")
+            scope_join = "JOIN org_tree t ON t.id = v.org_id"
             params.extend(cte_params)
         else:
             cte_sql = ""
+            scope_join = ""
+
+        # 关键字走 search_vector 全文检索（CJK 二元分词，见 utils.textsearch），按相关度排序
+        terms = search_query(keyword)
+        search_join = ""
+        order_by = "v.org_name ASC, v.emp_id ASC"
+        if terms:
+            search_join = "CROSS JOIN to_tsquery('simple', %s) AS q(query)"
+            params.append(terms)
+            clauses.append("v.search_vector @@ q.query")
+            order_by = f"ts_rank(v.search_vector, q.query) DESC, {order_by}"
 
         if filter_org:
             clauses.append("v.org_id = %s")
@@ -405,13 +404,6 @@ class EmployeeOrgSqlSearchView(LoginRequiredMixin, View):
             clauses.append("v.birth_date <= %s")
             params.append(birth_end)
 
-        if keyword:
-            kw = f"%{keyword.lower()}%"
-            clauses.append(
-                "(LOWER(v.emp_name) LIKE %s OR LOWER(v.emp_id) LIKE %s OR LOWER(v.email) LIKE %s)"
-            )
-            params.extend([kw, kw, kw])
-
         if manager_keyword:
             kw = f"%{manager_keyword.lower()}%"
             clauses.append(
@@ -439,8 +431,10 @@ class EmployeeOrgSqlSearchView(LoginRequiredMixin, View):
                 v.manager_emp_name,
                 v.manager_emp_code
             FROM public.vw_employee_profile v
+            {scope_join}
+            {search_join}
             WHERE {where_sql}
-            ORDER BY v.org_name ASC, v.emp_id ASC
+            ORDER BY {order_by}
             LIMIT {self.max_rows}
         """
 
@@ -496,37 +490,14 @@ class HROnboardingView(LoginRequiredMixin, UserPassesTestMixin, View):
     def test_func(self):
         return self._is_hr_user()
 
-    def _user_employee(self):
-        return getattr(self.request.user, "employee", None)
-
     def _is_hr_user(self):
-        user = self.request.user
-        if user.is_superuser or user.is_staff:
-            return True
-        emp = self._user_employee()
-        if not emp:
-            return False
-        org_name = (emp.org.org_name or "").lower()
-        position = (emp.position or "").upper()
-        return "人力" in org_name or "HR" in position
+        return is_hr_user(self.request.user)
 
     def _is_hr_director(self):
-        emp = self._user_employee()
-        if not emp:
-            return False
-        position_raw = emp.position or ""
-        position = position_raw.upper()
-        return "总监" in position_raw or "DIRECTOR" in position
+        return has_role(self.request.user, Role.DIRECTOR)
 
     def _generate_emp_id(self):
-        last_emp = Employee.objects.order_by("-create_time").first()
-        suffix = 1001
-        if last_emp and last_emp.emp_id.startswith("EMP"):
-            try:
-                suffix = int(last_emp.emp_id[3:]) + 1
-            except ValueError:
-                pass
-        return f"EMP{suffix}"
+        return allocate_emp_id()
 
     def _context_data(self, form=None):
         form = form or self.form_class()
@@ -554,9 +525,14 @@ class HROnboardingView(LoginRequiredMixin, UserPassesTestMixin, View):
         if action == "approve_onboarding" and self._is_hr_director():
             emp_pk = request.POST.get("employee_pk")
             if emp_pk:
-                Employee.objects.filter(pk=emp_pk).update(
-                    emp_status="active", update_by=request.user.username
-                )
+                employee = Employee.objects.filter(pk=emp_pk).first()
+                if employee:
+                    # 逐条保存以触发人数汇总/任职历史等信号
+                    employee.emp_status = "active"
+                    employee.update_by = request.user.username
+                    employee.save(
+                        update_fields=["emp_status", "update_by", "update_time"]
+                    )
                 messages.success(request, "已将该员工状态修改为在职。")
             return redirect(self.success_url)
 
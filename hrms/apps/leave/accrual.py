@@ -0,0 +1,122 @@
+"""
+按司龄分档的请假额度入账
+
+规则配置在 config_leave_accrual_rule（apps.config.models.LeaveAccrualRule）。每次运行
+处理一个周期（某月或某年），一条语句对全体在职员工完成：按周期首日的满司龄年数取
+适用档位、折算本周期天数、写入 accrual 流水并累加到余额表。流水按
+(员工, 请假类型, 入账周期) 唯一，同一周期重复运行只会跳过已入账的员工，
+补跑历史周期也不会重复入账。
+
+按月入账时第 m 月入账 round(年度天数 × m / 12) - round(年度天数 × (m - 1) / 12)，
+逐月舍入误差不累积，全年合计恰为年度天数。
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection, transaction
+
+from apps.organization.services import IN_SERVICE_STATUSES
+
+from .services import ACCRUAL_RULES_SQL
+
+ACCRUAL_FREQUENCIES = ("monthly", "yearly")
+
+# 周期首日前（含）入职且当前在职的员工，按首日的满司龄年数取 min_years 最大的一档
+_ACCRUAL_SQL = f"""
+WITH tiers AS (
+    SELECT DISTINCT ON (e.id, r.leave_type)
+           e.id AS emp_id, r.leave_type, r.annual_days
+    FROM employee e
+    JOIN ({ACCRUAL_RULES_SQL}) r
+      ON r.frequency = %(frequency)s
+     AND r.min_years <= date_part('year', age(%(period)s::date, e.hire_date))
+    WHERE e.is_deleted = FALSE
+      AND e.emp_status = ANY(%(statuses)s)
+      AND e.hire_date <= %(period)s::date
+    ORDER BY e.id, r.leave_type, r.min_years DESC
+),
+posted AS (
+    INSERT INTO leave_ledger_entry
+        (emp_id, leave_type, year, entry_type, days, leave_id, accrual_period,
+         create_time)
+    SELECT emp_id, leave_type, %(year)s, 'accrual',
+           round(annual_days * %(step)s / %(steps)s, 2)
+           - round(annual_days * (%(step)s - 1) / %(steps)s, 2),
+           NULL, %(period)s::date, now()
+    FROM tiers
+    WHERE annual_days > 0
+    ON CONFLICT (emp_id, leave_type, accrual_period)
+        WHERE accrual_period IS NOT NULL
+    DO NOTHING
+    RETURNING emp_id, leave_type, year, days
+),
+balances AS (
+    INSERT INTO leave_balance
+        (emp_id, leave_type, year, accrued, pending, used, update_time)
+    SELECT emp_id, leave_type, year, days, 0, 0, now()
+    FROM posted
+    ON CONFLICT (emp_id, leave_type, year) DO UPDATE
+    SET accrued = leave_balance.accrued + EXCLUDED.accrued,
+        update_time = now()
+)
+SELECT (SELECT COUNT(*) FROM tiers WHERE annual_days > 0),
+       (SELECT COUNT(*) FROM posted),
+       (SELECT COALESCE(SUM(days), 0) FROM posted)
+"""
+
+
+@dataclass(frozen=True)
+class AccrualRun:
+    """一次入账的结果：适用规则的人次、新写入的流水条数与天数、耗时。"""
+
+    frequency: str
+    period: date
+    eligible: int
+    posted: int
+    days: Decimal
+    seconds: float
+
+    @property
+    def skipped(self) -> int:
+        """本周期此前已入账、这次跳过的人次。"""
+        return self.eligible - self.posted
+
+
+def accrual_period(frequency: str, day: date) -> date:
+    """day 所在入账周期的首日。"""
+    if frequency not in ACCRUAL_FREQUENCIES:
+        raise ValueError(f"unknown accrual frequency: {frequency}")
+    return day.replace(day=1) if frequency == "monthly" else date(day.year, 1, 1)
+
+
+def run_leave_accrual(frequency: str, day: date) -> AccrualRun:
+    """为 day 所在的周期入账（幂等），返回人次、条数与耗时。"""
+    period = accrual_period(frequency, day)
+    monthly = frequency == "monthly"
+    started = time.perf_counter()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            _ACCRUAL_SQL,
+            {
+                "frequency": frequency,
+                "period": period,
+                "year": period.year,
+                "step": period.month if monthly else 1,
+                "steps": 12 if monthly else 1,
+                "statuses": list(IN_SERVICE_STATUSES),
+            },
+        )
+        eligible, posted, days = cursor.fetchone()
+    return AccrualRun(
+        frequency=frequency,
+        period=period,
+        eligible=int(eligible),
+        posted=int(posted),
+        days=Decimal(days),
+        seconds=time.perf_counter() - started,
+    )
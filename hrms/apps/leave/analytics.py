@@ -0,0 +1,324 @@
+"""
+请假统计汇总 leave_month_stat
+
+按（组织, 月份, 请假类型, 申请状态）预聚合天数与单数，报表与 JSON 接口只读这张小表，
+不再对 leave_profile 全量分组。口径取自检索宽表：每张请假单按最早开始时间
+（没有时间段时按提交时间）所在的本地自然月归集，天数为整单 total_days。
+
+维护方式与 org_headcount 相同：宽表增量刷新的同一条语句里，用刷新前后的行算出差值，
+直属计数落在所属组织上，子树计数经闭包表传导到全部祖先；组织调整上级时按闭包表
+重算受影响组织的子树计数。
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+from typing import Iterable, Sequence
+
+from django.conf import settings
+from django.db import connection
+
+from utils.closure import ClosureDiff
+
+from .models import LeaveApply
+
+# 计入“已休”的状态（报表默认口径）
+USED_STATUSES = ("approved", "completed")
+
+_KEY = "org_id, month, leave_type, apply_status"
+
+# 请假单归属的本地自然月（参数为时区）
+_MONTH_SQL = (
+    "date_trunc('month', COALESCE(start_time, apply_time) AT TIME ZONE %s)::date"
+)
+
+# 增量维护：{new} / {old} 为刷新后 / 刷新前的宽表行（需含 org_id, leave_type,
+# apply_status, total_days, start_time, apply_time），作为 WITH 子句的后续 CTE 拼接
+_DELTA_CTE = f"""
+stat_delta AS (
+    SELECT org_id, {_MONTH_SQL} AS month, leave_type, apply_status,
+           total_days AS days, 1 AS cnt
+    FROM {{new}}
+    UNION ALL
+    SELECT org_id, {_MONTH_SQL}, leave_type, apply_status,
+           -total_days, -1
+    FROM {{old}}
+),
+stat_net AS (
+    SELECT {_KEY}, SUM(days) AS days, SUM(cnt) AS cnt
+    FROM stat_delta
+    GROUP BY {_KEY}
+    HAVING SUM(days) <> 0 OR SUM(cnt) <> 0
+),
+stat_applied AS (
+    INSERT INTO leave_month_stat
+        ({_KEY}, direct_days, direct_count, subtree_days, subtree_count)
+    SELECT {_KEY}, SUM(dd), SUM(dc), SUM(sd), SUM(sc)
+    FROM (
+        SELECT {_KEY}, days AS dd, cnt AS dc, 0 AS sd, 0 AS sc FROM stat_net
+        UNION ALL
+        SELECT oc.ancestor_id, n.month, n.leave_type, n.apply_status, 0, 0, n.days, n.cnt
+        FROM stat_net n
+        JOIN organization_closure oc ON oc.descendant_id = n.org_id
+    ) t
+    GROUP BY {_KEY}
+    ON CONFLICT ({_KEY}) DO UPDATE SET
+        direct_days = leave_month_stat.direct_days + EXCLUDED.direct_days,
+        direct_count = leave_month_stat.direct_count + EXCLUDED.direct_count,
+        subtree_days = leave_month_stat.subtree_days + EXCLUDED.subtree_days,
+        subtree_count = leave_month_stat.subtree_count + EXCLUDED.subtree_count
+)
+"""
+
+
+def stat_delta_cte(new: str, old: str) -> tuple[str, list]:
+    """供宽表刷新语句拼接的差值 CTE 及其参数（两处月份换算的时区）。"""
+    return _DELTA_CTE.format(new=new, old=old), [settings.TIME_ZONE] * 2
+
+
+def retract_leave_stats(leave_ids: Iterable) -> None:
+    """请假单被物理删除前，从汇总中扣除其宽表行（宽表行随级联删除，不经增量刷新）。"""
+    ids = [str(pk) for pk in leave_ids if pk]
+    if not ids:
+        return
+    delta_sql, params = stat_delta_cte(new="stat_none", old="stat_gone")
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "WITH stat_gone AS ("
+            "SELECT * FROM leave_profile WHERE leave_id = ANY(%s)), "
+            "stat_none AS (SELECT * FROM stat_gone WHERE FALSE), "
+            f"{delta_sql} SELECT 1",
+            [ids, *params],
+        )
+
+
+def recompute_subtree_leave_stats(org_ids: Iterable[str]) -> None:
+    """组织迁移/删除/恢复后，按闭包表重算指定组织的 subtree_*。"""
+    ids = list({str(pk) for pk in org_ids if pk})
+    if not ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "UPDATE leave_month_stat SET subtree_days = 0, subtree_count = 0 "
+            "WHERE org_id = ANY(%s)",
+            [ids],
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO leave_month_stat
+                ({_KEY}, direct_days, direct_count, subtree_days, subtree_count)
+            SELECT oc.ancestor_id, s.month, s.leave_type, s.apply_status, 0, 0,
+                   SUM(s.direct_days), SUM(s.direct_count)
+            FROM organization_closure oc
+            JOIN leave_month_stat s ON s.org_id = oc.descendant_id
+            WHERE oc.ancestor_id = ANY(%s)
+            GROUP BY oc.ancestor_id, s.month, s.leave_type, s.apply_status
+            ON CONFLICT ({_KEY}) DO UPDATE SET
+                subtree_days = EXCLUDED.subtree_days,
+                subtree_count = EXCLUDED.subtree_count
+            """,
+            [ids],
+        )
+
+
+# 按宽表从头计算的期望汇总，供全量重建与校验共用
+_EXPECTED_CTE = f"""
+direct AS (
+    SELECT org_id, {_MONTH_SQL} AS month, leave_type, apply_status,
+           SUM(total_days) AS days, COUNT(*) AS cnt
+    FROM leave_profile
+    GROUP BY 1, 2, 3, 4
+),
+subtree AS (
+    SELECT oc.ancestor_id AS org_id, d.month, d.leave_type, d.apply_status,
+           SUM(d.days) AS days, SUM(d.cnt) AS cnt
+    FROM direct d
+    JOIN organization_closure oc ON oc.descendant_id = d.org_id
+    GROUP BY 1, 2, 3, 4
+),
+expected AS (
+    SELECT
+        COALESCE(d.org_id, s.org_id) AS org_id,
+        COALESCE(d.month, s.month) AS month,
+        COALESCE(d.leave_type, s.leave_type) AS leave_type,
+        COALESCE(d.apply_status, s.apply_status) AS apply_status,
+        COALESCE(d.days, 0)::numeric(12, 2) AS direct_days,
+        COALESCE(d.cnt, 0)::int AS direct_count,
+        COALESCE(s.days, 0)::numeric(12, 2) AS subtree_days,
+        COALESCE(s.cnt, 0)::int AS subtree_count
+    FROM direct d
+    FULL JOIN subtree s
+        ON s.org_id = d.org_id
+        AND s.month = d.month
+        AND s.leave_type = d.leave_type
+        AND s.apply_status = d.apply_status
+)
+"""
+
+_STORED_COLUMNS = f"{_KEY}, direct_days, direct_count, subtree_days, subtree_count"
+
+
+def rebuild_leave_stats() -> int:
+    """按宽表全量重建汇总，返回写入行数。"""
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM leave_month_stat")
+        cursor.execute(
+            f"WITH {_EXPECTED_CTE} "
+            f"INSERT INTO leave_month_stat ({_STORED_COLUMNS}) "
+            f"SELECT {_STORED_COLUMNS} FROM expected",
+            [settings.TIME_ZONE],
+        )
+        return cursor.rowcount
+
+
+def verify_leave_stats() -> ClosureDiff:
+    """与宽表现算结果对比（忽略已归零的行），返回缺失/多余行数。"""
+    stored = (
+        f"SELECT {_STORED_COLUMNS} FROM leave_month_stat "
+        "WHERE direct_count <> 0 OR subtree_count <> 0 "
+        "OR direct_days <> 0 OR subtree_days <> 0"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH {_EXPECTED_CTE} "
+            "SELECT "
+            f"(SELECT COUNT(*) FROM (SELECT * FROM expected EXCEPT {stored}) m), "
+            f"(SELECT COUNT(*) FROM ({stored} EXCEPT SELECT * FROM expected) x)",
+            [settings.TIME_ZONE],
+        )
+        missing, extra = cursor.fetchone()
+    return ClosureDiff(missing=int(missing), extra=int(extra))
+
+
+def _scope_sql(org_id: str | None) -> tuple[str, str, list]:
+    """取数范围：指定组织读其子树合计；为空表示全公司，读各组织直属之和。"""
+    if org_id:
+        return "subtree_days", "subtree_count", [str(org_id)]
+    return "direct_days", "direct_count", []
+
+
+def _yoy(current: Decimal, previous: Decimal) -> float | None:
+    if not previous:
+        return None
+    return round(float((current - previous) / previous * 100), 1)
+
+
+def leave_pivot(
+    org_id: str | None,
+    year: int,
+    *,
+    statuses: Sequence[str] = USED_STATUSES,
+) -> dict:
+    """某组织（含下级，空为全公司）一年内“请假类型 × 月份”的透视表，附上年同期对比，
+    以及各直接下级组织的年度合计。两次汇总表查询，不触碰请假明细。"""
+    days_col, count_col, org_params = _scope_sql(org_id)
+    org_filter = "org_id = %s AND" if org_id else ""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT month, leave_type, SUM({days_col}), SUM({count_col})
+            FROM leave_month_stat
+            WHERE {org_filter} month >= %s AND month < %s AND apply_status = ANY(%s)
+            GROUP BY month, leave_type
+            HAVING SUM({count_col}) <> 0 OR SUM({days_col}) <> 0
+            """,
+            [*org_params, date(year - 1, 1, 1), date(year + 1, 1, 1), list(statuses)],
+        )
+        cells = cursor.fetchall()
+
+        parent_filter = "o.parent_org_id = %s" if org_id else "o.parent_org_id IS NULL"
+        cursor.execute(
+            f"""
+            SELECT o.id, o.org_name,
+                   COALESCE(SUM(s.subtree_days) FILTER (WHERE s.month >= %s), 0),
+                   COALESCE(SUM(s.subtree_count) FILTER (WHERE s.month >= %s), 0),
+                   COALESCE(SUM(s.subtree_days) FILTER (WHERE s.month < %s), 0)
+            FROM organization o
+            LEFT JOIN leave_month_stat s
+              ON s.org_id = o.id
+             AND s.month >= %s AND s.month < %s
+             AND s.apply_status = ANY(%s)
+            WHERE {parent_filter} AND o.is_deleted = FALSE
+            GROUP BY o.id, o.org_name
+            ORDER BY o.org_name
+            """,
+            [
+                date(year, 1, 1),
+                date(year, 1, 1),
+                date(year, 1, 1),
+                date(year - 1, 1, 1),
+                date(year + 1, 1, 1),
+                list(statuses),
+                *org_params,
+            ],
+        )
+        children = cursor.fetchall()
+
+    zero = Decimal("0")
+    current: dict[str, list] = {}
+    previous: dict[str, list] = {}
+    for month, leave_type, days, count in cells:
+        target = current if month.year == year else previous
+        row = target.setdefault(leave_type, [[zero, 0] for _ in range(12)])
+        row[month.month - 1] = [days, int(count)]
+
+    rows = []
+    month_totals = [[zero, 0] for _ in range(12)]
+    for leave_type, label in LeaveApply.LEAVE_TYPE_CHOICES:
+        if leave_type not in current and leave_type not in previous:
+            continue
+        months = current.get(leave_type, [[zero, 0]] * 12)
+        prev = previous.get(leave_type, [[zero, 0]] * 12)
+        for total, (days, count) in zip(month_totals, months):
+            total[0] += days
+            total[1] += count
+        total_days = sum((days for days, _ in months), zero)
+        prev_days = sum((days for days, _ in prev), zero)
+        rows.append(
+            {
+                "leave_type": leave_type,
+                "label": label,
+                "months": [
+                    {"days": float(days), "count": count} for days, count in months
+                ],
+                "days": float(total_days),
+                "count": sum(count for _, count in months),
+                "prev_days": float(prev_days),
+                "prev_count": sum(count for _, count in prev),
+                "yoy": _yoy(total_days, prev_days),
+            }
+        )
+
+    total_days = sum((days for days, _ in month_totals), zero)
+    prev_total = sum((days for months in previous.values() for days, _ in months), zero)
+    return {
+        "org_id": str(org_id) if org_id else None,
+        "year": year,
+        "statuses": list(statuses),
+        "months": [f"{year}-{month:02d}" for month in range(1, 13)],
+        "rows": rows,
+        "totals": {
+            "months": [
+                {"days": float(days), "count": count} for days, count in month_totals
+            ],
+            "days": float(total_days),
+            "count": sum(count for _, count in month_totals),
+            "prev_days": float(prev_total),
+            "prev_count": sum(
+                count for months in previous.values() for _, count in months
+            ),
+            "yoy": _yoy(total_days, prev_total),
+        },
+        "children": [
+            {
+                "org_id": str(child_id),
+                "org_name": name,
+                "days": float(days),
+                "count": int(count),
+                "prev_days": float(prev_days),
+                "yoy": _yoy(days, prev_days),
+            }
+            for child_id, name, days, count, prev_days in children
+        ],
+    }
@@ -0,0 +1,167 @@
+"""
+团队请假日历（谁不在）
+
+一次范围查询取出组织子树在窗口内的全部占用时间段（走 gist_leave_segment_period 索引），
+装入内存区间树后按天回答“谁不在 / 可用人数”；结果按 (组织, 月份) 缓存。
+时间段变化只让涉及的月份失效，员工调岗/组织变更时整体失效；版本号存于数据库，
+在变更提交后递增（批量组织调整不逐行触发信号，由调整服务在提交后整体失效）。
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+from apps.core.versions import bump_version, bump_versions, get_versions
+from apps.organization.services import IN_SERVICE_STATUSES, get_org_headcounts
+from utils.intervals import IntervalIndex
+
+from .models import LeaveApply
+
+CALENDAR_CACHE_PREFIX = "hrms:leave_calendar"
+# 版本号存于数据库（apps.core.versions），所有 worker 共用
+CALENDAR_VERSION = "leave_calendar"
+
+
+def _month_version(month: date) -> str:
+    return f"{CALENDAR_VERSION}:{month:%Y-%m}"
+
+
+def month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def next_month(month: date) -> date:
+    return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def months_touched(start: datetime, end: datetime) -> list[date]:
+    """时间段 [start, end) 覆盖到的本地自然月（月初日期）。"""
+    first = month_start(timezone.localtime(start).date())
+    last = month_start(timezone.localtime(end - timedelta(microseconds=1)).date())
+    months = []
+    while first <= last:
+        months.append(first)
+        first = next_month(first)
+    return months
+
+
+def invalidate_leave_calendar(
+    periods: Iterable[tuple[datetime, datetime]] | None = None,
+) -> None:
+    """让日历缓存失效：传入时间段时只影响涉及的月份，否则全部失效。
+
+    应在变更提交后执行（transaction.on_commit）。
+    """
+    if periods is None:
+        bump_version(CALENDAR_VERSION)
+        return
+    bump_versions(
+        _month_version(month)
+        for start, end in periods
+        for month in months_touched(start, end)
+    )
+
+
+def _local_midnight(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def fetch_team_segments(org_id: str, start: datetime, end: datetime) -> IntervalIndex:
+    """组织子树在 [start, end) 内占用中的时间段，一条 SQL 取回并建区间树。"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT s.leave_start_time, s.leave_end_time,
+                   e.id, e.emp_name, l.id, l.leave_type, l.apply_status
+            FROM leave_time_segment s
+            JOIN employee e ON e.id = s.emp_id
+            JOIN organization_closure oc
+              ON oc.descendant_id = e.org_id AND oc.ancestor_id = %s
+            JOIN leave_apply l ON l.id = s.leave_id
+            WHERE s.is_active
+              AND tstzrange(s.leave_start_time, s.leave_end_time)
+                  && tstzrange(%s, %s)
+              AND e.is_deleted = FALSE
+              AND e.emp_status = ANY(%s)
+            """,
+            [str(org_id), start, end, list(IN_SERVICE_STATUSES)],
+        )
+        rows = cursor.fetchall()
+    keys = ("emp_id", "emp_name", "leave_id", "leave_type", "apply_status")
+    return IntervalIndex.from_tuples(
+        (row[0], row[1], dict(zip(keys, row[2:]))) for row in rows
+    )
+
+
+def build_team_calendar(org_id: str, month: date) -> dict:
+    """按天统计组织子树的请假人员与可用人数（不读缓存）。"""
+    month = month_start(month)
+    first, after = _local_midnight(month), _local_midnight(next_month(month))
+    segments = fetch_team_segments(org_id, first, after)
+    headcount = get_org_headcounts([org_id]).get(str(org_id), {}).get("subtree") or 0
+    type_labels = dict(LeaveApply.LEAVE_TYPE_CHOICES)
+
+    days = []
+    day = month
+    while day < next_month(month):
+        day_start, day_end = _local_midnight(day), _local_midnight(day + timedelta(1))
+        out: dict[str, dict] = {}
+        for interval in segments.overlapping(day_start, day_end):
+            payload = interval.payload
+            entry = out.setdefault(
+                payload["emp_id"],
+                {
+                    "emp_id": payload["emp_id"],
+                    "emp_name": payload["emp_name"],
+                    "leave_id": payload["leave_id"],
+                    "leave_type": payload["leave_type"],
+                    "leave_type_label": type_labels.get(payload["leave_type"], ""),
+                    "apply_status": payload["apply_status"],
+                    "full_day": False,
+                },
+            )
+            if interval.start <= day_start and interval.end >= day_end:
+                entry["full_day"] = True
+        people = sorted(out.values(), key=lambda e: e["emp_name"])
+        days.append(
+            {
+                "date": day.isoformat(),
+                "day": day.day,
+                "weekday": day.weekday(),
+                "out": people,
+                "out_count": len(people),
+                "available": max(headcount - len(people), 0),
+            }
+        )
+        day += timedelta(days=1)
+
+    return {
+        "org_id": str(org_id),
+        "month": f"{month:%Y-%m}",
+        "headcount": headcount,
+        "segments": len(segments),
+        "days": days,
+    }
+
+
+def get_team_calendar(org_id: str, month: date) -> dict:
+    """带缓存的团队日历，缓存键含全局版本与月份版本。"""
+    month = month_start(month)
+    versions = get_versions([CALENDAR_VERSION, _month_version(month)])
+    key = (
+        f"{CALENDAR_CACHE_PREFIX}:{versions[CALENDAR_VERSION]}:"
+        f"{versions[_month_version(month)]}:{org_id}:{month:%Y-%m}"
+    )
+    calendar = cache.get(key)
+    if calendar is None:
+        calendar = build_team_calendar(org_id, month)
+        cache.set(
+            key, calendar, getattr(settings, "LEAVE_CALENDAR_CACHE_TIMEOUT", 3600)
+        )
+    return calendar
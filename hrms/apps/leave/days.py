@@ -0,0 +1,158 @@
+"""
+请假按天展开的事实表 leave_day
+
+考勤补记、绩效请假天数等按“某人某天是否请假、请了多少”判断，原来要取出时间段
+再逐段按工作日历换算；这里把已批准/已完成的请假单按员工所在组织的工作日历展开成
+(请假单, 日期, 比例) 行，读取方直接按 (emp_id, day) 等值连接。
+
+写入路径按单据刷新：给定一批请假单（或员工、组织、日期范围），一条查询取出时间段，
+在 Python 中按日历展开后先删后插。工作日历按组织直接从数据库装载（不走进程内缓存），
+同一事务里刚改过的日历也能立即生效。
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Iterable
+
+from django.db import connection
+from django.utils import timezone
+
+from apps.attendance.work_calendar import load_work_calendar
+from utils.closure import ClosureDiff
+
+# 占用工时的请假状态：已完成的请假同样是实际休过的
+LEAVE_DAY_STATUSES = ("approved", "completed")
+
+_FRACTION = Decimal("0.0001")
+
+_SEGMENTS_SQL = """
+SELECT la.id, la.emp_id, emp.org_id, la.leave_type,
+       seg.leave_start_time, seg.leave_end_time
+FROM leave_apply la
+JOIN employee emp ON emp.id = la.emp_id
+JOIN leave_time_segment seg ON seg.leave_id = la.id AND seg.is_deleted = FALSE
+WHERE la.is_deleted = FALSE
+  AND la.apply_status = ANY(%s)
+  AND {where}
+"""
+
+# 各刷新入口对应的请假单范围
+_SCOPES = {
+    "leave": "la.id = ANY(%s)",
+    "emp": "la.emp_id = ANY(%s)",
+    # 组织迁移会改变继承到的日历覆盖，整棵子树的成员都要重新展开
+    "org": (
+        "la.emp_id IN (SELECT e.id FROM employee e "
+        "JOIN organization_closure c ON c.descendant_id = e.org_id "
+        "WHERE c.ancestor_id = ANY(%s))"
+    ),
+    "period": (
+        "la.id IN (SELECT s.leave_id FROM leave_time_segment s "
+        "WHERE s.is_deleted = FALSE "
+        "AND s.leave_start_time < %s AND s.leave_end_time > %s)"
+    ),
+}
+
+_INSERT_SQL = """
+INSERT INTO leave_day (leave_id, emp_id, day, leave_type, fraction)
+SELECT * FROM unnest(%s::text[], %s::text[], %s::date[], %s::text[], %s::numeric[])
+"""
+
+
+def _expand(rows: Iterable[tuple]) -> list[tuple]:
+    """把 (请假单, 员工, 组织, 类型, 开始, 结束) 时间段展开为 leave_day 行。"""
+    calendars = {}
+    seconds: dict[tuple, int] = defaultdict(int)
+    for leave_id, emp_id, org_id, leave_type, start, end in rows:
+        calendar = calendars.get(org_id)
+        if calendar is None:
+            calendar = calendars[org_id] = load_work_calendar(org_id)
+        for day, used in calendar.working_seconds_by_day(start, end):
+            seconds[(leave_id, emp_id, org_id, leave_type, day)] += used
+
+    result = []
+    for (leave_id, emp_id, org_id, leave_type, day), used in seconds.items():
+        day_seconds = calendars[org_id].day_seconds
+        if not day_seconds:
+            continue
+        fraction = min(Decimal(used) / Decimal(day_seconds), Decimal("1"))
+        result.append(
+            (str(leave_id), str(emp_id), day, leave_type, fraction.quantize(_FRACTION))
+        )
+    return result
+
+
+def _expected(where: str, params: list) -> list[tuple]:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _SEGMENTS_SQL.format(where=where), [list(LEAVE_DAY_STATUSES), *params]
+        )
+        return _expand(cursor.fetchall())
+
+
+def _insert(cursor, rows: list[tuple]) -> int:
+    if rows:
+        cursor.execute(_INSERT_SQL, [list(column) for column in zip(*rows)])
+    return len(rows)
+
+
+def _refresh(scope: str, params: list) -> int:
+    where = _SCOPES[scope]
+    rows = _expected(where, params)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "DELETE FROM leave_day WHERE leave_id IN "
+            f"(SELECT la.id FROM leave_apply la WHERE {where})",
+            params,
+        )
+        return _insert(cursor, rows)
+
+
+def _ids(ids: Iterable) -> list[str]:
+    return list(dict.fromkeys(str(pk) for pk in ids if pk))
+
+
+def refresh_leave_days(leave_ids: Iterable) -> int:
+    """按请假单重新展开，返回写入行数。"""
+    ids = _ids(leave_ids)
+    return _refresh("leave", [ids]) if ids else 0
+
+
+def refresh_employee_leave_days(emp_ids: Iterable) -> int:
+    """员工调岗（适用的工作日历随之变化）后重新展开其全部请假单。"""
+    ids = _ids(emp_ids)
+    return _refresh("emp", [ids]) if ids else 0
+
+
+def refresh_org_leave_days(org_ids: Iterable) -> int:
+    """组织迁移后重新展开这些组织整棵子树成员的请假单。"""
+    ids = _ids(org_ids)
+    return _refresh("org", [ids]) if ids else 0
+
+
+def refresh_leave_days_on(day: date) -> int:
+    """工作日历某天的设置变化后，重新展开时间段覆盖该本地日期的请假单。"""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return _refresh("period", [start + timedelta(days=1), start])
+
+
+def rebuild_leave_days() -> int:
+    """全量重建，返回写入行数。"""
+    rows = _expected("TRUE", [])
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM leave_day")
+        return _insert(cursor, rows)
+
+
+def verify_leave_days() -> ClosureDiff:
+    """与现算结果对比，返回缺失/多余（含比例或类型不一致）行数。"""
+    expected = set(_expected("TRUE", []))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT leave_id, emp_id, day, leave_type, fraction " "FROM leave_day"
+        )
+        stored = set(cursor.fetchall())
+    return ClosureDiff(missing=len(expected - stored), extra=len(stored - expected))
@@ -1,20 +1,24 @@
 from django import forms
 from .models import LeaveApply
+from .services import check_leave_quota
+
+# 只用于解析单个时间值，不作为表单字段声明
+_DATETIME = forms.DateTimeField()
 
 
 class LeaveApplyForm(forms.ModelForm):
-    start_time = forms.DateTimeField(
-        label="开始时间",
-        widget=forms.DateTimeInput(
-            attrs={"type": "datetime-local", "class": "form-input"}
-        ),
-    )
-    end_time = forms.DateTimeField(
-        label="结束时间",
-        widget=forms.DateTimeInput(
-            attrs={"type": "datetime-local", "class": "form-input"}
-        ),
-    )
+    """
+    请假申请表单
+    时间段以同名字段 start_time / end_time 重复提交（第 i 个开始时间对应第 i 个结束时间），
+    校验通过后 cleaned_data["segments"] 为按提交顺序排列的 [(开始, 结束), ...]。
+    传入 employee 时同时按额度台账校验剩余额度（一次查询，不扫描请假历史）。
+    """
+
+    max_segments = 20
+
+    def __init__(self, *args, employee=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.employee = employee
 
     class Meta:
         model = LeaveApply
@@ -38,11 +42,81 @@ class LeaveApplyForm(forms.ModelForm):
 
     # leave_type choices come from LeaveApply.LEAVE_TYPE_CHOICES
 
+    def _values(self, name):
+        if hasattr(self.data, "getlist"):
+            values = self.data.getlist(name)
+        else:
+            values = self.data.get(name)
+        if not isinstance(values, (list, tuple)):
+            values = [values]
+        return ["" if v is None else v for v in values]
+
+    def _rows(self):
+        """按位置配对开始/结束时间，只丢弃两者都未填写的行。"""
+        starts = self._values("start_time")
+        ends = self._values("end_time")
+        size = max(len(starts), len(ends))
+        starts += [""] * (size - len(starts))
+        ends += [""] * (size - len(ends))
+        return [(start, end) for start, end in zip(starts, ends) if start or end]
+
+    def segment_rows(self):
+        """回显用：按提交顺序返回 [{"start": 原始值, "end": 原始值}, ...]。"""
+        rows = self._rows() if self.is_bound else []
+        return [{"start": start, "end": end} for start, end in rows] or [
+            {"start": "", "end": ""}
+        ]
+
     def clean(self):
         cleaned_data = super().clean()
-        start = cleaned_data.get("start_time")
-        end = cleaned_data.get("end_time")
+        rows = self._rows()
 
-        if start and end and start >= end:
-            raise forms.ValidationError("结束时间必须晚于开始时间")
+        if not rows:
+            raise forms.ValidationError("请至少填写一个请假时间段")
+        if len(rows) > self.max_segments:
+            raise forms.ValidationError(f"单次申请最多 {self.max_segments} 个时间段")
+
+        segments, errors = [], []
+        for index, (raw_start, raw_end) in enumerate(rows, start=1):
+            if not raw_start or not raw_end:
+                errors.append(f"第 {index} 段：开始/结束时间不完整")
+                continue
+            try:
+                start = _DATETIME.clean(raw_start)
+                end = _DATETIME.clean(raw_end)
+            except forms.ValidationError:
+                errors.append(f"第 {index} 段：时间格式不正确")
+                continue
+            if start >= end:
+                errors.append(f"第 {index} 段：结束时间必须晚于开始时间")
+                continue
+            segments.append((start, end))
+        if errors:
+            raise forms.ValidationError(errors)
+
+        leave_type = cleaned_data.get("leave_type")
+        if self.employee is not None and leave_type:
+            shortfalls = check_leave_quota(self.employee, leave_type, segments)
+            if shortfalls:
+                raise forms.ValidationError([s.message for s in shortfalls])
+
+        cleaned_data["segments"] = segments
         return cleaned_data
+
+
+class LeaveImportForm(forms.Form):
+    file = forms.FileField(
+        label="选择文件",
+        help_text="CSV（UTF-8）或 .xlsx，首行为表头",
+        widget=forms.ClearableFileInput(attrs={"accept": ".csv,.xlsx"}),
+    )
+    dry_run = forms.BooleanField(
+        label="只校验，不导入",
+        required=False,
+    )
+
+    def clean_file(self):
+        upload = self.cleaned_data["file"]
+        if not upload.name.lower().endswith((".csv", ".xlsx")):
+            raise forms.ValidationError("仅支持 .csv 或 .xlsx 文件")
+        return upload
@@ -0,0 +1,447 @@
+"""
+请假历史批量导入
+
+用于从旧系统迁移请假记录（可达数十万行）：
+- 逐行流式读取 CSV / xlsx（openpyxl 只读模式），文件须按工号排序（同一员工的行连续）：
+  读到下一位员工时上一位员工的行归入当前批次，批次满 chunk_size 张单据即校验写入，
+  内存中只保留一批的行，与文件大小无关；同一员工的行不连续时，后出现的行不导入；
+- 按员工分批处理：每批先加与提交请假相同的咨询锁，一次查询取回这批员工占用中的时间段，
+  再把文件内的时间段与库内时间段按开始时间合并排序、一遍扫描找出所有重叠，
+  不靠排他约束逐条报错；
+- 校验通过的单据按批 bulk_create 主表与时间段，并按集合补齐待办计数、审批链、额度台账、
+  检索宽表与日历缓存；校验失败的整张单据跳过，问题汇总为可下载的错误报告。
+历史数据不做额度校验，只按状态记账。
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from functools import partial
+from typing import IO, Iterable, Iterator, Sequence
+
+import openpyxl
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.attendance.work_calendar import get_work_calendar
+from apps.employee.models import Employee
+from utils.csvstream import iter_csv
+from utils.textsearch import search_vector
+
+from .calendar import invalidate_leave_calendar
+from .days import LEAVE_DAY_STATUSES, refresh_leave_days
+from .models import LeaveApply, LeaveTimeSegment
+from .profile import refresh_leave_profiles
+from .services import (
+    TRANSITIONS,
+    apply_inbox_deltas,
+    create_approval_tasks,
+    ledger_holding,
+    ledger_moves,
+    post_leave_ledger,
+    segment_days,
+)
+
+IMPORT_HEADERS = ("工号", "请假类型", "开始时间", "结束时间", "状态", "事由", "原单号")
+REPORT_HEADERS = ("行号", "工号", "原单号", "问题")
+
+DEFAULT_STATUS = "approved"
+
+# 按请假单数分批：每批一个事务
+IMPORT_CHUNK_SIZE = 1000
+
+_LEAVE_TYPES = {
+    **{code: code for code, _ in LeaveApply.LEAVE_TYPE_CHOICES},
+    **{label: code for code, label in LeaveApply.LEAVE_TYPE_CHOICES},
+}
+_STATUSES = {
+    **{code: code for code, _ in LeaveApply.STATUS_CHOICES},
+    **{label: code for code, label in LeaveApply.STATUS_CHOICES},
+}
+# 各状态的时间段是否参与重叠校验，与状态流转时的处理一致（审核中占用）
+_SEGMENTS_ACTIVE = {t.target: t.segments_active for t in TRANSITIONS.values()}
+
+
+def segments_active(status: str) -> bool:
+    return _SEGMENTS_ACTIVE.get(status, True)
+
+
+@dataclass(frozen=True)
+class ImportRow:
+    """文件中的一行（一个时间段）；同一员工、同一原单号的多行合为一张请假单。"""
+
+    line: int
+    emp_code: str
+    leave_type: str
+    start: datetime
+    end: datetime
+    status: str
+    reason: str | None
+    ref: str | None
+
+    @property
+    def key(self) -> tuple[str, str]:
+        return (self.emp_code, self.ref or f"#{self.line}")
+
+
+@dataclass(frozen=True)
+class ImportIssue:
+    line: int
+    emp_code: str
+    ref: str | None
+    message: str
+
+    def as_row(self) -> tuple:
+        return (self.line, self.emp_code, self.ref or "", self.message)
+
+
+@dataclass
+class ImportResult:
+    leaves: int = 0
+    segments: int = 0
+    issues: list[ImportIssue] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.issues
+
+
+# ---------------------------------------------------------------------------
+# 读取与解析
+# ---------------------------------------------------------------------------
+
+
+def iter_import_rows(source: IO[bytes], filename: str) -> Iterator[tuple[int, tuple]]:
+    """逐行产出 (行号, 单元格值)，跳过表头与空行；按扩展名区分 xlsx 与 CSV。"""
+    if filename.lower().endswith(".xlsx"):
+        workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(min_row=2, values_only=True)
+            for line, values in enumerate(rows, start=2):
+                if any(value not in (None, "") for value in values):
+                    yield line, values
+        finally:
+            workbook.close()
+        return
+    text = io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+    try:
+        for line, values in enumerate(csv.reader(text), start=1):
+            if line == 1 or not any(value.strip() for value in values):
+                continue
+            yield line, tuple(values)
+    finally:
+        text.detach()
+
+
+def _text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _datetime(value, label: str) -> datetime:
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        parsed = parse_datetime(_text(value))
+        if parsed is None:
+            raise ValueError(f"{label}格式应为 YYYY-MM-DD HH:MM")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_import_row(line: int, values: Sequence) -> ImportRow:
+    """校验并转换一行；格式问题抛出 ValueError（消息即报告中的问题描述）。"""
+    cells = [*values, *([None] * len(IMPORT_HEADERS))][: len(IMPORT_HEADERS)]
+    emp_code, leave_type, start, end, status, reason, ref = cells
+    emp_code = _text(emp_code)
+    if not emp_code:
+        raise ValueError("工号不能为空")
+    code = _LEAVE_TYPES.get(_text(leave_type))
+    if code is None:
+        raise ValueError(f"无法识别的请假类型：{_text(leave_type) or '（空）'}")
+    status_code = _STATUSES.get(_text(status) or DEFAULT_STATUS)
+    if status_code is None:
+        raise ValueError(f"无法识别的状态：{_text(status)}")
+    start = _datetime(start, "开始时间")
+    end = _datetime(end, "结束时间")
+    if end <= start:
+        raise ValueError("结束时间必须晚于开始时间")
+    return ImportRow(
+        line=line,
+        emp_code=emp_code,
+        leave_type=code,
+        start=start,
+        end=end,
+        status=status_code,
+        reason=_text(reason) or None,
+        ref=_text(ref) or None,
+    )
+
+
+# ---------------------------------------------------------------------------
+# 重叠校验：同一员工的时间段（文件内 + 库内）按开始时间排序后一遍扫描
+# ---------------------------------------------------------------------------
+
+
+def _window(start: datetime, end: datetime) -> str:
+    fmt = "%Y-%m-%d %H:%M"
+    return (
+        f"{timezone.localtime(start).strftime(fmt)} ~ "
+        f"{timezone.localtime(end).strftime(fmt)}"
+    )
+
+
+def sweep_conflicts(
+    rows: Sequence[ImportRow], existing: Sequence[tuple[datetime, datetime]]
+) -> dict[int, str]:
+    """返回 {行号: 问题}：与排在前面、仍在占用中的时间段重叠的行。
+
+    rows 为同一员工待导入的行，existing 为其库内占用中的时间段；只有占用状态的行参与扫描。
+    区间按 [start, end) 处理，首尾相接不算重叠，与 no_leave_overlap 约束一致。
+    """
+    events = [(start, end, None) for start, end in existing]
+    events.extend(
+        (row.start, row.end, row) for row in rows if segments_active(row.status)
+    )
+    events.sort(key=lambda event: (event[0], event[1], event[2] is not None))
+    conflicts: dict[int, str] = {}
+    latest = None
+    for event in events:
+        start, end, row = event
+        if latest is not None and start < latest[1] and row is not None:
+            other = latest[2]
+            if other is None:
+                message = f"与已有请假（{_window(latest[0], latest[1])}）重叠"
+            elif other.key == row.key:
+                message = f"与同一单据的第 {other.line} 行重叠"
+            else:
+                message = f"与第 {other.line} 行重叠"
+            conflicts.setdefault(row.line, message)
+        if latest is None or end > latest[1]:
+            latest = event
+    return conflicts
+
+
+def _occupied_segments(emp_ids: Sequence[str]) -> dict[str, list]:
+    """一次查询取回这批员工占用中的时间段（走 no_leave_overlap 约束的索引）。"""
+    occupied: dict[str, list] = {pk: [] for pk in emp_ids}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT emp_id, leave_start_time, leave_end_time
+            FROM leave_time_segment
+            WHERE emp_id = ANY(%s) AND is_active
+            """,
+            [list(emp_ids)],
+        )
+        for emp_id, start, end in cursor.fetchall():
+            occupied[emp_id].append((start, end))
+    return occupied
+
+
+# ---------------------------------------------------------------------------
+# 导入
+# ---------------------------------------------------------------------------
+
+
+def _group_issue(rows: Sequence[ImportRow], message: str) -> list[ImportIssue]:
+    return [ImportIssue(row.line, row.emp_code, row.ref, message) for row in rows]
+
+
+def _check_group(rows: Sequence[ImportRow]) -> str | None:
+    first = rows[0]
+    if any(
+        (row.leave_type, row.status) != (first.leave_type, first.status) for row in rows
+    ):
+        return f"原单号 {first.ref} 的各行请假类型或状态不一致"
+    return None
+
+
+def _write_chunk(
+    chunk: Sequence[tuple[dict, list[ImportRow]]], operator: str
+) -> tuple[int, list]:
+    """写入一批已校验的单据并补齐派生数据，返回 (时间段数, 日历失效范围)。"""
+    leaves, segments, deltas = [], [], {}
+    by_status: dict[str, list[str]] = {}
+    for employee, rows in chunk:
+        calendar = get_work_calendar(employee["org_id"])
+        first = rows[0]
+        leave_id = str(uuid.uuid4())
+        days = [segment_days(row.start, row.end, calendar) for row in rows]
+        reason = next((row.reason for row in rows if row.reason), None)
+        # 与提交时相同：审批人为申请人当时的直属上级
+        approver = employee["manager_emp_id"]
+        leaves.append(
+            LeaveApply(
+                id=leave_id,
+                emp_id=employee["id"],
+                leave_type=first.leave_type,
+                apply_status=first.status,
+                reason=reason,
+                total_days=sum(days, Decimal("0")),
+                approver_emp_id=approver,
+                search_vector=search_vector(reason),
+                create_by=operator,
+                update_by=operator,
+            )
+        )
+        segments.extend(
+            LeaveTimeSegment(
+                leave_id=leave_id,
+                emp_id=employee["id"],
+                leave_start_time=row.start,
+                leave_end_time=row.end,
+                segment_days=day,
+                is_active=segments_active(first.status),
+                create_by=operator,
+                update_by=operator,
+            )
+            for row, day in zip(rows, days)
+        )
+        by_status.setdefault(first.status, []).append(leave_id)
+        if first.status == "reviewing" and approver:
+            deltas[approver] = deltas.get(approver, 0) + 1
+
+    LeaveApply.objects.bulk_create(leaves)
+    LeaveTimeSegment.objects.bulk_create(segments)
+    apply_inbox_deltas(deltas)
+    create_approval_tasks(by_status.get("reviewing", []))
+    for status, ids in by_status.items():
+        post_leave_ledger(ids, ledger_moves(None, ledger_holding(status)))
+    refresh_leave_profiles([leave.pk for leave in leaves])
+    refresh_leave_days(
+        pk for status in LEAVE_DAY_STATUSES for pk in by_status.get(status, [])
+    )
+    periods = [(s.leave_start_time, s.leave_end_time) for s in segments]
+    return len(segments), periods
+
+
+def import_leaves(
+    rows: Iterable[tuple[int, Sequence]],
+    *,
+    operator: str,
+    dry_run: bool = False,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> ImportResult:
+    """导入按工号排序的 (行号, 单元格值) 序列，返回导入条数与逐行问题。
+
+    任一行有问题的单据整体跳过；dry_run 时只校验不写入。
+    """
+    result = ImportResult()
+    # {工号: {单据键: [行, ...]}}，只保存尚未处理的一批
+    batch: dict[str, dict[tuple[str, str], list[ImportRow]]] = {}
+    batch_leaves = 0
+    current = None
+    finished: set[str] = set()
+    for line, values in rows:
+        try:
+            row = parse_import_row(line, values)
+        except ValueError as exc:
+            code = _text(values[0]) if values else ""
+            result.issues.append(ImportIssue(line, code, None, str(exc)))
+            continue
+        if row.emp_code != current:
+            if current is not None:
+                finished.add(current)
+                if batch_leaves >= chunk_size:
+                    _import_batch(batch, result, operator, dry_run)
+                    batch, batch_leaves = {}, 0
+            if row.emp_code in finished:
+                result.issues.append(
+                    ImportIssue(
+                        row.line,
+                        row.emp_code,
+                        row.ref,
+                        f"工号 {row.emp_code} 的行不连续，文件须按工号排序",
+                    )
+                )
+                continue
+            current = row.emp_code
+        groups = batch.setdefault(row.emp_code, {})
+        if row.key not in groups:
+            batch_leaves += 1
+        groups.setdefault(row.key, []).append(row)
+    if batch:
+        _import_batch(batch, result, operator, dry_run)
+    result.issues.sort(key=lambda issue: issue.line)
+    return result
+
+
+def _import_batch(
+    batch: dict[str, dict[tuple[str, str], list[ImportRow]]],
+    result: ImportResult,
+    operator: str,
+    dry_run: bool,
+) -> None:
+    employees = {
+        row["emp_id"]: row
+        for row in Employee.objects.filter(
+            emp_id__in=list(batch), is_deleted=False
+        ).values("id", "emp_id", "org_id", "manager_emp_id")
+    }
+    by_employee: dict[str, list[list[ImportRow]]] = {}
+    for code, groups in batch.items():
+        for group in groups.values():
+            if code not in employees:
+                result.issues.extend(_group_issue(group, f"工号 {code} 不存在"))
+                continue
+            problem = _check_group(group)
+            if problem:
+                result.issues.extend(_group_issue(group, problem))
+                continue
+            by_employee.setdefault(code, []).append(group)
+    if not by_employee:
+        return
+
+    codes = list(by_employee)
+    emp_ids = [str(employees[code]["id"]) for code in codes]
+    with transaction.atomic():
+        if not dry_run:
+            # 与 submit_leave 相同的按员工咨询锁，校验结论在本批提交前不会被并发申请推翻
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT pg_advisory_xact_lock(hashtext('leave_apply:' || pk)) "
+                    "FROM unnest(%s::text[]) AS e(pk)",
+                    [sorted(emp_ids)],
+                )
+        occupied = _occupied_segments(emp_ids)
+        accepted = []
+        for code, emp_id in zip(codes, emp_ids):
+            emp_groups = by_employee[code]
+            conflicts = sweep_conflicts(
+                [row for group in emp_groups for row in group], occupied[emp_id]
+            )
+            for group in emp_groups:
+                bad = [row for row in group if row.line in conflicts]
+                if not bad:
+                    accepted.append((employees[code], group))
+                    continue
+                for row in group:
+                    message = conflicts.get(
+                        row.line, f"同一单据的第 {bad[0].line} 行有误"
+                    )
+                    result.issues.append(
+                        ImportIssue(row.line, row.emp_code, row.ref, message)
+                    )
+        result.leaves += len(accepted)
+        if dry_run:
+            result.segments += sum(len(group) for _, group in accepted)
+            return
+        segments, periods = _write_chunk(accepted, operator)
+        result.segments += segments
+    transaction.on_commit(partial(invalidate_leave_calendar, periods))
+
+
+def iter_issue_csv(issues: Iterable[ImportIssue]) -> Iterator[str]:
+    """错误报告的 CSV 文本（带 BOM，与检索导出一致）。"""
+    return iter_csv(REPORT_HEADERS, (issue.as_row() for issue in issues))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from apps.leave.sla import SLA_BATCH_SIZE, check_leave_sla
+
+
+class Command(BaseCommand):
+    help = (
+        "按请假审批时限（config_leave_sla）巡检审核中的单据，超时的按批写入发件箱"
+        "（leave.sla.remind / leave.sla.escalate），同一级别只通知一次，建议每 10 分钟执行"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=SLA_BATCH_SIZE,
+            help="每批处理的通知数",
+        )
+
+    def handle(self, *args, **options):
+        run = check_leave_sla(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"已发出超时提醒 {run.reminded} 条、超时升级 {run.escalated} 条，"
+                f"用时 {run.seconds:.2f} 秒"
+            )
+        )
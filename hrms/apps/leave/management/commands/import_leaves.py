@@ -0,0 +1,77 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.leave.importer import (
+    IMPORT_CHUNK_SIZE,
+    IMPORT_HEADERS,
+    import_leaves,
+    iter_import_rows,
+    iter_issue_csv,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "从 CSV / xlsx 批量导入请假历史：按员工扫描校验时间段重叠（文件内与库内），"
+        "分批写入并补齐派生数据，有问题的单据整体跳过并输出错误报告"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            help=(
+                "CSV（UTF-8）或 xlsx 文件，首行为表头，按工号排序，"
+                f"列依次为：{','.join(IMPORT_HEADERS)}"
+            ),
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="只校验，不落库",
+        )
+        parser.add_argument(
+            "--report",
+            help="错误报告输出路径（CSV）；不指定时在终端列出前 20 条",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=IMPORT_CHUNK_SIZE,
+            help="每个事务写入的请假单数",
+        )
+        parser.add_argument(
+            "--operator",
+            default="system",
+            help="写入 create_by / update_by 的操作人",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        try:
+            with open(path, "rb") as source:
+                result = import_leaves(
+                    iter_import_rows(source, path),
+                    operator=options["operator"],
+                    dry_run=options["dry_run"],
+                    chunk_size=options["chunk_size"],
+                )
+        except OSError as exc:
+            raise CommandError(f"无法读取文件：{exc}")
+
+        verb = "可导入" if options["dry_run"] else "已导入"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {result.leaves} 张请假单（{result.segments} 个时间段）"
+            )
+        )
+        if result.ok:
+            return
+        self.stdout.write(self.style.WARNING(f"{len(result.issues)} 行未导入"))
+        if options["report"]:
+            with open(options["report"], "w", encoding="utf-8", newline="") as fh:
+                fh.writelines(iter_issue_csv(result.issues))
+            self.stdout.write(f"错误报告已写入 {options['report']}")
+            return
+        for issue in result.issues[:20]:
+            self.stdout.write(
+                f"第 {issue.line} 行（{issue.emp_code}）：{issue.message}"
+            )
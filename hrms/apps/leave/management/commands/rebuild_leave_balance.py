@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.leave.services import rebuild_leave_balance, verify_leave_balance
+
+
+class Command(BaseCommand):
+    help = (
+        "按请假历史重建请假额度台账 leave_ledger_entry / leave_balance，"
+        "并为缺少入账的年度按当前额度配置补记入账"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify-only",
+            action="store_true",
+            help="只校验，不重建",
+        )
+
+    def handle(self, *args, **options):
+        if not options["verify_only"]:
+            with transaction.atomic():
+                rows = rebuild_leave_balance()
+            self.stdout.write(f"已重建请假额度余额：{rows} 行")
+
+        diff = verify_leave_balance()
+        if not diff.ok:
+            raise CommandError(
+                f"请假额度台账校验失败：缺失 {diff.missing} 行，多余 {diff.extra} 行"
+            )
+        self.stdout.write(self.style.SUCCESS("请假额度台账校验通过"))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.leave.days import rebuild_leave_days, verify_leave_days
+
+
+class Command(BaseCommand):
+    help = "按时间段与工作日历全量重建请假日明细表 leave_day，并校验与现算结果一致"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify-only",
+            action="store_true",
+            help="只校验，不重建",
+        )
+
+    def handle(self, *args, **options):
+        if not options["verify_only"]:
+            with transaction.atomic():
+                rows = rebuild_leave_days()
+            self.stdout.write(f"已重建请假日明细：{rows} 行")
+
+        diff = verify_leave_days()
+        if not diff.ok:
+            raise CommandError(
+                f"请假日明细校验失败：缺失 {diff.missing} 行，多余 {diff.extra} 行"
+            )
+        self.stdout.write(self.style.SUCCESS("请假日明细校验通过"))
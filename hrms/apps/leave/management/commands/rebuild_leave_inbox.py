@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.leave.services import (
+    rebuild_approval_tasks,
+    rebuild_leave_inbox,
+    verify_approval_tasks,
+    verify_leave_inbox,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "补齐审批任务 leave_approval_task 并按请假单全量重建审批待办计数表 "
+        "leave_inbox_counter，校验与现算结果一致"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify-only",
+            action="store_true",
+            help="只校验，不重建",
+        )
+
+    def handle(self, *args, **options):
+        if not options["verify_only"]:
+            with transaction.atomic():
+                created, closed = rebuild_approval_tasks()
+                rows = rebuild_leave_inbox()
+            self.stdout.write(f"已补齐审批任务：新建 {created} 条，关闭 {closed} 条")
+            self.stdout.write(f"已重建审批待办计数：{rows} 行")
+
+        diff = verify_approval_tasks()
+        if not diff.ok:
+            raise CommandError(
+                f"审批任务校验失败：{diff.missing} 张审核中的单据缺少待审批步骤，"
+                f"{diff.extra} 张已处理的单据仍有未完成步骤"
+            )
+        diff = verify_leave_inbox()
+        if not diff.ok:
+            raise CommandError(
+                f"审批待办计数校验失败：缺失 {diff.missing} 行，多余 {diff.extra} 行"
+            )
+        self.stdout.write(self.style.SUCCESS("审批待办计数校验通过"))
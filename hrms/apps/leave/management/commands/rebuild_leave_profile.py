@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.leave.profile import rebuild_leave_profile, verify_leave_profile
+
+
+class Command(BaseCommand):
+    help = (
+        "按请假单、员工、组织全量重建请假检索宽表 leave_profile，并校验与现算结果一致"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify-only",
+            action="store_true",
+            help="只校验，不重建",
+        )
+
+    def handle(self, *args, **options):
+        if not options["verify_only"]:
+            with transaction.atomic():
+                rows = rebuild_leave_profile()
+            self.stdout.write(f"已重建请假检索宽表：{rows} 行")
+
+        diff = verify_leave_profile()
+        if not diff.ok:
+            raise CommandError(
+                f"请假检索宽表校验失败：缺失 {diff.missing} 行，多余 {diff.extra} 行"
+            )
+        self.stdout.write(self.style.SUCCESS("请假检索宽表校验通过"))
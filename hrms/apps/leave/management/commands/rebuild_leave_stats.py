@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.leave.analytics import rebuild_leave_stats, verify_leave_stats
+
+
+class Command(BaseCommand):
+    help = "按请假检索宽表全量重建请假统计汇总表 leave_month_stat，并校验与现算结果一致"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify-only",
+            action="store_true",
+            help="只校验，不重建",
+        )
+
+    def handle(self, *args, **options):
+        if not options["verify_only"]:
+            with transaction.atomic():
+                rows = rebuild_leave_stats()
+            self.stdout.write(f"已重建请假统计汇总：{rows} 行")
+
+        diff = verify_leave_stats()
+        if not diff.ok:
+            raise CommandError(
+                f"请假统计汇总校验失败：缺失 {diff.missing} 行，多余 {diff.extra} 行"
+            )
+        self.stdout.write(self.style.SUCCESS("请假统计汇总校验通过"))
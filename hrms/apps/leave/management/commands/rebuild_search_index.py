@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.employee.models import Employee
+from apps.leave.models import LeaveApply
+from apps.leave.profile import rebuild_leave_profile, verify_leave_profile
+from utils.textsearch import refresh_search_vectors
+
+SOURCES = (Employee, LeaveApply)
+
+
+class Command(BaseCommand):
+    help = (
+        "按当前分词规则重算员工、请假单的检索向量 search_vector，"
+        "并重建请假检索宽表中的拼接向量"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify-only",
+            action="store_true",
+            help="只校验，不重建",
+        )
+
+    def handle(self, *args, **options):
+        verify_only = options["verify_only"]
+        stale = 0
+        with transaction.atomic():
+            for model in SOURCES:
+                rows = refresh_search_vectors(
+                    model._meta.db_table, model.SEARCH_FIELDS, verify_only=verify_only
+                )
+                stale += rows
+                verb = "过期" if verify_only else "已更新"
+                self.stdout.write(
+                    f"{model._meta.verbose_name}检索向量{verb}：{rows} 行"
+                )
+            if not verify_only:
+                rebuild_leave_profile()
+
+        if verify_only and stale:
+            raise CommandError(f"检索向量校验失败：{stale} 行与当前分词结果不一致")
+        diff = verify_leave_profile()
+        if not diff.ok:
+            raise CommandError(
+                f"请假检索宽表校验失败：缺失 {diff.missing} 行，多余 {diff.extra} 行"
+            )
+        self.stdout.write(self.style.SUCCESS("检索向量校验通过"))
@@ -0,0 +1,46 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.leave.accrual import ACCRUAL_FREQUENCIES, run_leave_accrual
+
+FREQUENCY_LABELS = {"monthly": "月度入账", "yearly": "年度入账"}
+
+
+class Command(BaseCommand):
+    help = (
+        "按入账规则（config_leave_accrual_rule）为全体在职员工入账请假额度，"
+        "同一周期重复执行不会重复入账，建议每日定时执行"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date", help="入账周期内任一日期，格式 YYYY-MM-DD，默认今天"
+        )
+        parser.add_argument(
+            "--frequency",
+            choices=ACCRUAL_FREQUENCIES,
+            help="只处理该入账周期的规则，默认按月、按年都处理",
+        )
+
+    def handle(self, *args, **options):
+        if options["date"]:
+            try:
+                day = date.fromisoformat(options["date"])
+            except ValueError:
+                raise CommandError("日期格式应为 YYYY-MM-DD")
+        else:
+            day = timezone.localdate()
+        frequencies = (
+            [options["frequency"]] if options["frequency"] else ACCRUAL_FREQUENCIES
+        )
+        for frequency in frequencies:
+            run = run_leave_accrual(frequency, day)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{FREQUENCY_LABELS[frequency]} {run.period}：适用 {run.eligible} 人次，"
+                    f"新入账 {run.posted} 条共 {run.days} 天，"
+                    f"已入账跳过 {run.skipped} 条，用时 {run.seconds:.2f} 秒"
+                )
+            )
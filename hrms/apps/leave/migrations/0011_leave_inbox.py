@@ -0,0 +1,80 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employee", "0007_employee_assignment_history"),
+        ("leave", "0010_partial_overlap"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeaveInboxCounter",
+            fields=[
+                (
+                    "approver_emp",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="leave_inbox_counter",
+                        serialize=False,
+                        to="employee.employee",
+                        verbose_name="审批人",
+                    ),
+                ),
+                (
+                    "pending_count",
+                    models.IntegerField(default=0, verbose_name="待审批数"),
+                ),
+            ],
+            options={
+                "verbose_name": "审批待办计数",
+                "verbose_name_plural": "审批待办计数",
+                "db_table": "leave_inbox_counter",
+            },
+        ),
+        migrations.AddField(
+            model_name="leaveapply",
+            name="approver_emp",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                help_text="冗余字段：提交时申请人的直属上级，调整上级时随待审批单据一并变更",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="leave_inbox",
+                to="employee.employee",
+                verbose_name="审批人",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="leaveapply",
+            index=models.Index(
+                fields=["approver_emp", "apply_status", "create_time", "id"],
+                name="idx_leave_inbox",
+            ),
+        ),
+        migrations.RunSQL(
+            sql="""
+            UPDATE leave_apply l
+            SET approver_emp_id = e.manager_emp_id
+            FROM employee e
+            WHERE e.id = l.emp_id AND l.approver_emp_id IS NULL;
+
+            INSERT INTO leave_inbox_counter (approver_emp_id, pending_count)
+            SELECT approver_emp_id, COUNT(*)
+            FROM leave_apply
+            WHERE apply_status = 'reviewing'
+              AND is_deleted = FALSE
+              AND approver_emp_id IS NOT NULL
+            GROUP BY approver_emp_id;
+            """,
+            reverse_sql="""
+            DELETE FROM leave_inbox_counter;
+            """,
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:49
+
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employee", "0007_employee_assignment_history"),
+        ("leave", "0011_leave_inbox"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="leavetimesegment",
+            index=django.contrib.postgres.indexes.GistIndex(
+                models.Func(
+                    models.F("leave_start_time"),
+                    models.F("leave_end_time"),
+                    function="tstzrange",
+                    output_field=django.contrib.postgres.fields.ranges.DateTimeRangeField(),
+                ),
+                condition=models.Q(("is_active", True)),
+                name="gist_leave_segment_period",
+            ),
+        ),
+    ]
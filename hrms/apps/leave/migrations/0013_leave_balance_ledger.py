@@ -0,0 +1,230 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_ledger(apps, schema_editor):
+    # 历史请假单按当前状态补记流水（此时尚无额度配置关联请假类型，不产生入账）
+    schema_editor.execute(
+        """
+        INSERT INTO leave_ledger_entry
+            (emp_id, leave_type, year, entry_type, days, leave_id, create_time)
+        SELECT seg.emp_id, seg.leave_type, seg.year, m.entry_type, seg.days,
+               seg.leave_id, now()
+        FROM (
+            SELECT l.id AS leave_id, l.emp_id, l.leave_type, l.apply_status,
+                   EXTRACT(YEAR FROM s.leave_start_time AT TIME ZONE %s)::int AS year,
+                   SUM(s.segment_days) AS days
+            FROM leave_apply l
+            JOIN leave_time_segment s ON s.leave_id = l.id
+            WHERE l.is_deleted = FALSE
+            GROUP BY l.id, l.emp_id, l.leave_type, l.apply_status, 5
+        ) seg
+        JOIN (VALUES ('reviewing', 'reserve'),
+                     ('approved', 'reserve'), ('approved', 'consume'),
+                     ('completed', 'reserve'), ('completed', 'consume'))
+            AS m(apply_status, entry_type)
+          ON m.apply_status = seg.apply_status
+        """,
+        [settings.TIME_ZONE],
+    )
+    schema_editor.execute(
+        """
+        INSERT INTO leave_balance
+            (emp_id, leave_type, year, accrued, pending, used, update_time)
+        SELECT emp_id, leave_type, year, 0,
+               SUM(CASE entry_type WHEN 'reserve' THEN days
+                                   WHEN 'consume' THEN -days ELSE 0 END),
+               SUM(CASE entry_type WHEN 'consume' THEN days ELSE 0 END),
+               now()
+        FROM leave_ledger_entry
+        GROUP BY emp_id, leave_type, year
+        """
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("config", "0002_leave_reason_type"),
+        ("employee", "0007_employee_assignment_history"),
+        ("leave", "0012_leave_segment_period_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeaveBalance",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "leave_type",
+                    models.CharField(
+                        choices=[
+                            ("personal", "事假"),
+                            ("sick", "病假"),
+                            ("annual", "年假"),
+                            ("marriage", "婚假"),
+                            ("maternity", "产假"),
+                            ("paternity", "陪产假"),
+                            ("funeral", "丧假"),
+                            ("injury", "工伤假"),
+                            ("lieu", "调休假"),
+                        ],
+                        max_length=20,
+                        verbose_name="请假类型",
+                    ),
+                ),
+                ("year", models.IntegerField(verbose_name="年度")),
+                (
+                    "accrued",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=10,
+                        verbose_name="已入账天数",
+                    ),
+                ),
+                (
+                    "pending",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=10,
+                        verbose_name="审核中占用天数",
+                    ),
+                ),
+                (
+                    "used",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=10,
+                        verbose_name="已使用天数",
+                    ),
+                ),
+                (
+                    "update_time",
+                    models.DateTimeField(auto_now=True, verbose_name="更新时间"),
+                ),
+                (
+                    "emp",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="leave_balances",
+                        to="employee.employee",
+                        verbose_name="员工",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "请假额度余额",
+                "verbose_name_plural": "请假额度余额",
+                "db_table": "leave_balance",
+            },
+        ),
+        migrations.CreateModel(
+            name="LeaveLedgerEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "leave_type",
+                    models.CharField(
+                        choices=[
+                            ("personal", "事假"),
+                            ("sick", "病假"),
+                            ("annual", "年假"),
+                            ("marriage", "婚假"),
+                            ("maternity", "产假"),
+                            ("paternity", "陪产假"),
+                            ("funeral", "丧假"),
+                            ("injury", "工伤假"),
+                            ("lieu", "调休假"),
+                        ],
+                        max_length=20,
+                        verbose_name="请假类型",
+                    ),
+                ),
+                ("year", models.IntegerField(verbose_name="年度")),
+                (
+                    "entry_type",
+                    models.CharField(
+                        choices=[
+                            ("accrual", "额度入账"),
+                            ("reserve", "提交占用"),
+                            ("release", "释放占用"),
+                            ("consume", "批准扣减"),
+                            ("restore", "撤销退回"),
+                        ],
+                        max_length=20,
+                        verbose_name="流水类型",
+                    ),
+                ),
+                (
+                    "days",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=10, verbose_name="天数"
+                    ),
+                ),
+                (
+                    "create_time",
+                    models.DateTimeField(auto_now_add=True, verbose_name="记账时间"),
+                ),
+                (
+                    "emp",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="leave_ledger_entries",
+                        to="employee.employee",
+                        verbose_name="员工",
+                    ),
+                ),
+                (
+                    "leave",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="ledger_entries",
+                        to="leave.leaveapply",
+                        verbose_name="关联请假单",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "请假额度流水",
+                "verbose_name_plural": "请假额度流水",
+                "db_table": "leave_ledger_entry",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="leavebalance",
+            constraint=models.UniqueConstraint(
+                fields=("emp", "leave_type", "year"), name="uniq_leave_balance"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="leaveledgerentry",
+            index=models.Index(
+                fields=["emp", "leave_type", "year"], name="idx_leave_ledger_key"
+            ),
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
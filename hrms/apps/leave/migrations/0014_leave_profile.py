@@ -0,0 +1,164 @@
+# Generated by Django 5.0.14 on 2026-10-18 20:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employee", "0007_employee_assignment_history"),
+        ("leave", "0013_leave_balance_ledger"),
+        ("organization", "0007_organization_history"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeaveProfile",
+            fields=[
+                (
+                    "leave",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="profile",
+                        serialize=False,
+                        to="leave.leaveapply",
+                        verbose_name="请假单",
+                    ),
+                ),
+                (
+                    "leave_type",
+                    models.CharField(
+                        choices=[
+                            ("personal", "事假"),
+                            ("sick", "病假"),
+                            ("annual", "年假"),
+                            ("marriage", "婚假"),
+                            ("maternity", "产假"),
+                            ("paternity", "陪产假"),
+                            ("funeral", "丧假"),
+                            ("injury", "工伤假"),
+                            ("lieu", "调休假"),
+                        ],
+                        max_length=20,
+                        verbose_name="请假类型",
+                    ),
+                ),
+                (
+                    "apply_status",
+                    models.CharField(
+                        choices=[
+                            ("reviewing", "审核中"),
+                            ("approved", "已批准"),
+                            ("rejected", "已拒绝"),
+                            ("completed", "已完成"),
+                        ],
+                        max_length=20,
+                        verbose_name="申请状态",
+                    ),
+                ),
+                (
+                    "total_days",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=10, verbose_name="总天数"
+                    ),
+                ),
+                ("apply_time", models.DateTimeField(verbose_name="提交时间")),
+                (
+                    "reason",
+                    models.TextField(blank=True, null=True, verbose_name="请假事由"),
+                ),
+                ("emp_code", models.CharField(max_length=32, verbose_name="工号")),
+                ("emp_name", models.CharField(max_length=50, verbose_name="姓名")),
+                ("org_code", models.CharField(max_length=50, verbose_name="组织编码")),
+                ("org_name", models.CharField(max_length=100, verbose_name="组织名称")),
+                (
+                    "start_time",
+                    models.DateTimeField(null=True, verbose_name="最早开始时间"),
+                ),
+                (
+                    "end_time",
+                    models.DateTimeField(null=True, verbose_name="最晚结束时间"),
+                ),
+                (
+                    "emp",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="employee.employee",
+                        verbose_name="申请人",
+                    ),
+                ),
+                (
+                    "org",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="organization.organization",
+                        verbose_name="所属组织",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "请假检索宽表",
+                "verbose_name_plural": "请假检索宽表",
+                "db_table": "leave_profile",
+                "indexes": [
+                    models.Index(
+                        models.OrderBy(
+                            models.F("start_time"), descending=True, nulls_last=True
+                        ),
+                        models.OrderBy(models.F("apply_time"), descending=True),
+                        name="idx_leave_profile_recent",
+                    ),
+                    models.Index(
+                        fields=["org", "start_time"], name="idx_leave_profile_org"
+                    ),
+                    models.Index(
+                        fields=["emp_code", "start_time"], name="idx_leave_profile_emp"
+                    ),
+                    models.Index(
+                        fields=["emp", "start_time"], name="idx_leave_profile_emp_pk"
+                    ),
+                    models.Index(
+                        fields=["leave_type", "apply_status", "start_time"],
+                        name="idx_leave_profile_type",
+                    ),
+                    models.Index(
+                        fields=["apply_status", "start_time"],
+                        name="idx_leave_profile_status",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunSQL(
+            sql="""
+        INSERT INTO leave_profile (
+            leave_id, leave_type, apply_status, total_days, apply_time, reason,
+            emp_id, emp_code, emp_name, org_id, org_code, org_name,
+            start_time, end_time
+        )
+        SELECT la.id, la.leave_type, la.apply_status, la.total_days, la.apply_time,
+               la.reason, emp.id, emp.emp_id, emp.emp_name, org.id, org.org_code,
+               org.org_name, seg.start_time, seg.end_time
+        FROM leave_apply la
+        JOIN employee emp ON la.emp_id = emp.id
+        JOIN organization org ON emp.org_id = org.id
+        LEFT JOIN (
+            SELECT leave_id,
+                   MIN(leave_start_time) AS start_time,
+                   MAX(leave_end_time) AS end_time
+            FROM leave_time_segment
+            WHERE is_deleted = FALSE
+            GROUP BY leave_id
+        ) seg ON seg.leave_id = la.id
+        WHERE la.is_deleted = FALSE
+          AND emp.is_deleted = FALSE
+          AND org.is_deleted = FALSE;
+        """,
+            reverse_sql="DELETE FROM leave_profile;",
+        ),
+    ]
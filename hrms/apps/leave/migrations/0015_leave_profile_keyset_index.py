@@ -0,0 +1,30 @@
+# Generated by Django 5.0.14 on 2026-10-18 20:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employee", "0007_employee_assignment_history"),
+        ("leave", "0014_leave_profile"),
+        ("organization", "0007_organization_history"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="leaveprofile",
+            name="idx_leave_profile_recent",
+        ),
+        migrations.AddIndex(
+            model_name="leaveprofile",
+            index=models.Index(
+                models.OrderBy(
+                    models.F("start_time"), descending=True, nulls_last=True
+                ),
+                models.OrderBy(models.F("apply_time"), descending=True),
+                models.OrderBy(models.F("leave_id"), descending=True),
+                name="idx_leave_profile_recent",
+            ),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.0.14 on 2026-10-18 20:17
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+from utils.textsearch import refresh_search_vectors
+
+
+def backfill_search_vector(apps, schema_editor):
+    refresh_search_vectors("leave_apply", ("reason",))
+    schema_editor.execute(
+        """
+        UPDATE leave_profile p
+        SET search_vector = COALESCE(la.search_vector, ''::tsvector)
+                            || COALESCE(emp.search_vector, ''::tsvector)
+        FROM leave_apply la
+        JOIN employee emp ON emp.id = la.emp_id
+        WHERE la.id = p.leave_id
+        """
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employee", "0008_search_vector"),
+        ("leave", "0015_leave_profile_keyset_index"),
+        ("organization", "0007_organization_history"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="leaveapply",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True, verbose_name="检索向量"
+            ),
+        ),
+        migrations.AddField(
+            model_name="leaveprofile",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                null=True, verbose_name="检索向量"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="leaveprofile",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="gin_leave_profile_search"
+            ),
+        ),
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,134 @@
+# Generated by Django 5.0.14 on 2026-10-18 20:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employee", "0008_search_vector"),
+        ("leave", "0016_search_vector"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeaveApprovalTask",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("step", models.PositiveSmallIntegerField(verbose_name="步骤")),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("manager", "直属上级"), ("hr", "人力资源")],
+                        max_length=20,
+                        verbose_name="审批环节",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("waiting", "未开始"),
+                            ("pending", "待审批"),
+                            ("approved", "已通过"),
+                            ("rejected", "已拒绝"),
+                            ("cancelled", "已取消"),
+                        ],
+                        default="waiting",
+                        max_length=20,
+                        verbose_name="状态",
+                    ),
+                ),
+                ("create_time", models.DateTimeField(verbose_name="生成时间")),
+                (
+                    "decided_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="处理时间"
+                    ),
+                ),
+                (
+                    "approver_emp",
+                    models.ForeignKey(
+                        blank=True,
+                        db_index=False,
+                        help_text="为空表示由 HR 共享队列中的任一 HR 处理",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="leave_approval_tasks",
+                        to="employee.employee",
+                        verbose_name="审批人",
+                    ),
+                ),
+                (
+                    "decided_by_emp",
+                    models.ForeignKey(
+                        blank=True,
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="employee.employee",
+                        verbose_name="处理人",
+                    ),
+                ),
+                (
+                    "leave",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="approval_tasks",
+                        to="leave.leaveapply",
+                        verbose_name="请假单",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "请假审批任务",
+                "verbose_name_plural": "请假审批任务",
+                "db_table": "leave_approval_task",
+                "ordering": ["leave", "step"],
+                "indexes": [
+                    models.Index(
+                        fields=["approver_emp", "status", "create_time", "id"],
+                        name="idx_leave_task_inbox",
+                    ),
+                    models.Index(
+                        condition=models.Q(
+                            ("approver_emp__isnull", True), ("status", "pending")
+                        ),
+                        fields=["kind", "create_time", "id"],
+                        name="idx_leave_task_pool",
+                    ),
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="leaveapprovaltask",
+            constraint=models.UniqueConstraint(
+                fields=("leave", "step"), name="uniq_leave_task_step"
+            ),
+        ),
+        # 历史单据补一步审批记录：审核中的单据停在原审批人（没有上级的进入 HR 队列），
+        # 已处理的单据按结果记为上级审批已通过/已拒绝；进行中的单据不追加 HR 复核
+        migrations.RunSQL(
+            sql="""
+        INSERT INTO leave_approval_task
+            (leave_id, step, kind, approver_emp_id, status, create_time, decided_at)
+        SELECT la.id,
+               1,
+               CASE WHEN la.approver_emp_id IS NULL THEN 'hr' ELSE 'manager' END,
+               la.approver_emp_id,
+               CASE la.apply_status
+                   WHEN 'reviewing' THEN 'pending'
+                   WHEN 'rejected' THEN 'rejected'
+                   ELSE 'approved'
+               END,
+               la.create_time,
+               CASE WHEN la.apply_status = 'reviewing' THEN NULL ELSE la.update_time END
+        FROM leave_apply la
+        WHERE la.is_deleted = FALSE
+          AND la.apply_status IN ('reviewing', 'approved', 'completed', 'rejected');
+        """,
+            reverse_sql="DELETE FROM leave_approval_task;",
+        ),
+    ]
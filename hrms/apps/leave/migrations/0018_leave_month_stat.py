@@ -0,0 +1,108 @@
+# Generated by Django 5.0.14 on 2026-10-18 20:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from apps.leave.analytics import rebuild_leave_stats
+
+
+def backfill_leave_stats(apps, schema_editor):
+    rebuild_leave_stats()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("leave", "0017_approval_task"),
+        ("organization", "0007_organization_history"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeaveMonthStat",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("month", models.DateField(help_text="当月 1 日", verbose_name="月份")),
+                (
+                    "leave_type",
+                    models.CharField(
+                        choices=[
+                            ("personal", "事假"),
+                            ("sick", "病假"),
+                            ("annual", "年假"),
+                            ("marriage", "婚假"),
+                            ("maternity", "产假"),
+                            ("paternity", "陪产假"),
+                            ("funeral", "丧假"),
+                            ("injury", "工伤假"),
+                            ("lieu", "调休假"),
+                        ],
+                        max_length=20,
+                        verbose_name="请假类型",
+                    ),
+                ),
+                (
+                    "apply_status",
+                    models.CharField(
+                        choices=[
+                            ("reviewing", "审核中"),
+                            ("approved", "已批准"),
+                            ("rejected", "已拒绝"),
+                            ("completed", "已完成"),
+                        ],
+                        max_length=20,
+                        verbose_name="申请状态",
+                    ),
+                ),
+                (
+                    "direct_days",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="直属天数",
+                    ),
+                ),
+                (
+                    "direct_count",
+                    models.IntegerField(default=0, verbose_name="直属单数"),
+                ),
+                (
+                    "subtree_days",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="含下级天数",
+                    ),
+                ),
+                (
+                    "subtree_count",
+                    models.IntegerField(default=0, verbose_name="含下级单数"),
+                ),
+                (
+                    "org",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="organization.organization",
+                        verbose_name="组织",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "请假统计汇总",
+                "verbose_name_plural": "请假统计汇总",
+                "db_table": "leave_month_stat",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="leavemonthstat",
+            constraint=models.UniqueConstraint(
+                fields=("org", "month", "leave_type", "apply_status"),
+                name="uniq_leave_month_stat_key",
+            ),
+        ),
+        migrations.RunPython(backfill_leave_stats, migrations.RunPython.noop),
+    ]
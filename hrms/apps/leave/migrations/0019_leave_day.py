@@ -0,0 +1,93 @@
+# Generated by Django 5.0.14 on 2026-10-18 20:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from apps.leave.days import rebuild_leave_days
+
+
+def backfill_leave_days(apps, schema_editor):
+    rebuild_leave_days()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("attendance", "0003_work_calendar"),
+        ("employee", "0008_search_vector"),
+        ("leave", "0018_leave_month_stat"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeaveDay",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("day", models.DateField(verbose_name="日期")),
+                (
+                    "leave_type",
+                    models.CharField(
+                        choices=[
+                            ("personal", "事假"),
+                            ("sick", "病假"),
+                            ("annual", "年假"),
+                            ("marriage", "婚假"),
+                            ("maternity", "产假"),
+                            ("paternity", "陪产假"),
+                            ("funeral", "丧假"),
+                            ("injury", "工伤假"),
+                            ("lieu", "调休假"),
+                        ],
+                        max_length=20,
+                        verbose_name="请假类型",
+                    ),
+                ),
+                (
+                    "fraction",
+                    models.DecimalField(
+                        decimal_places=4, max_digits=5, verbose_name="占当天工时比例"
+                    ),
+                ),
+                (
+                    "emp",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="employee.employee",
+                        verbose_name="员工",
+                    ),
+                ),
+                (
+                    "leave",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="days",
+                        to="leave.leaveapply",
+                        verbose_name="请假单",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "请假日明细",
+                "verbose_name_plural": "请假日明细",
+                "db_table": "leave_day",
+                "indexes": [
+                    models.Index(
+                        fields=["emp", "day"],
+                        include=("fraction", "leave_type"),
+                        name="idx_leave_day_emp",
+                    ),
+                    models.Index(fields=["day"], name="idx_leave_day_day"),
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="leaveday",
+            constraint=models.UniqueConstraint(
+                fields=("leave", "day"), name="uniq_leave_day"
+            ),
+        ),
+        migrations.RunPython(backfill_leave_days, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.14 on 2026-10-18 20:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("config", "0003_leave_accrual_rule"),
+        ("employee", "0008_search_vector"),
+        ("leave", "0019_leave_day"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="leaveledgerentry",
+            name="accrual_period",
+            field=models.DateField(
+                blank=True,
+                help_text="按入账规则入账时为周期首日（月初或年初），同一周期只入账一次",
+                null=True,
+                verbose_name="入账周期",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="leaveledgerentry",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("accrual_period__isnull", False)),
+                fields=("emp", "leave_type", "accrual_period"),
+                name="uniq_leave_ledger_accrual_period",
+            ),
+        ),
+    ]
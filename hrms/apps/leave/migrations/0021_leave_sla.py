@@ -0,0 +1,61 @@
+# Generated by Django 5.0.14 on 2026-10-18 20:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("config", "0004_leave_sla_rule"),
+        ("employee", "0008_search_vector"),
+        ("leave", "0020_ledger_accrual_period"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeaveSlaNotice",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "level",
+                    models.CharField(
+                        choices=[("remind", "超时提醒"), ("escalate", "超时升级")],
+                        max_length=20,
+                        verbose_name="通知级别",
+                    ),
+                ),
+                ("create_time", models.DateTimeField(verbose_name="通知时间")),
+            ],
+            options={
+                "verbose_name": "审批时限通知",
+                "verbose_name_plural": "审批时限通知",
+                "db_table": "leave_sla_notice",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="leaveapply",
+            index=models.Index(
+                condition=models.Q(("apply_status", "reviewing")),
+                fields=["create_time"],
+                name="idx_leave_reviewing_created",
+            ),
+        ),
+        migrations.AddField(
+            model_name="leaveslanotice",
+            name="leave",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="sla_notices",
+                to="leave.leaveapply",
+                verbose_name="请假单",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="leaveslanotice",
+            constraint=models.UniqueConstraint(
+                fields=("leave", "level"), name="uniq_leave_sla_notice"
+            ),
+        ),
+    ]
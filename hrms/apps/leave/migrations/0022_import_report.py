@@ -0,0 +1,59 @@
+# Generated by Django 5.0.14 on 2026-10-18 21:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("leave", "0021_leave_sla"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeaveImportReport",
+            fields=[
+                (
+                    "token",
+                    models.CharField(
+                        max_length=32,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="下载令牌",
+                    ),
+                ),
+                (
+                    "content",
+                    models.TextField(
+                        help_text="CSV 文本（带 BOM）", verbose_name="报告内容"
+                    ),
+                ),
+                (
+                    "create_time",
+                    models.DateTimeField(auto_now_add=True, verbose_name="生成时间"),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="导入人",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "请假导入错误报告",
+                "verbose_name_plural": "请假导入错误报告",
+                "db_table": "leave_import_report",
+                "indexes": [
+                    models.Index(
+                        fields=["create_time"], name="idx_leave_import_report_time"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -1,3 +1,6 @@
+from django.contrib.postgres.fields import DateTimeRangeField
+from django.contrib.postgres.indexes import GinIndex, GistIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from apps.core.models import BaseModel
 
@@ -51,12 +54,41 @@ class LeaveApply(BaseModel):
     total_days = models.DecimalField(
         max_digits=10, decimal_places=2, verbose_name="总天数"
     )
+    approver_emp = models.ForeignKey(
+        "employee.Employee",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_index=False,
+        related_name="leave_inbox",
+        verbose_name="审批人",
+        help_text="冗余字段：提交时申请人的直属上级，调整上级时随待审批单据一并变更",
+    )
+    # 请假事由的分词结果，保存时由 apps.leave.signals 计算，随宽表 leave_profile 一并检索
+    search_vector = SearchVectorField(
+        null=True, editable=False, verbose_name="检索向量"
+    )
+
+    SEARCH_FIELDS = ("reason",)
 
     class Meta(BaseModel.Meta):
         db_table = "leave_apply"
         verbose_name = "请假申请"
         verbose_name_plural = verbose_name
         ordering = ["-create_time"]
+        indexes = [
+            # 审批收件箱：按审批人+状态定位，再按提交时间做游标分页
+            models.Index(
+                fields=["approver_emp", "apply_status", "create_time", "id"],
+                name="idx_leave_inbox",
+            ),
+            # 审批时限巡检：只收录审核中的单据，历史单据再多也不影响扫描范围
+            models.Index(
+                fields=["create_time"],
+                condition=models.Q(apply_status="reviewing"),
+                name="idx_leave_reviewing_created",
+            ),
+        ]
 
     def __str__(self):
         # get_leave_type_display is generated by Django for choices; ignored for type checker.
@@ -97,3 +129,470 @@ class LeaveTimeSegment(BaseModel):
         db_table = "leave_time_segment"
         verbose_name = "请假时间段"
         verbose_name_plural = verbose_name
+        indexes = [
+            # 按时间窗口查询占用中的时间段（团队日历等），不限定员工
+            GistIndex(
+                models.Func(
+                    models.F("leave_start_time"),
+                    models.F("leave_end_time"),
+                    function="tstzrange",
+                    output_field=DateTimeRangeField(),
+                ),
+                condition=models.Q(is_active=True),
+                name="gist_leave_segment_period",
+            ),
+        ]
+
+
+class LeaveInboxCounter(models.Model):
+    """
+    审批待办计数表
+    每个审批人一行，pending_count 为其名下审核中且未删除的请假单数；
+    由请假单信号与批量审批按增量维护，可用 rebuild_leave_inbox 命令全量重建。
+    """
+
+    approver_emp = models.OneToOneField(
+        "employee.Employee",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="leave_inbox_counter",
+        verbose_name="审批人",
+    )
+    pending_count = models.IntegerField(default=0, verbose_name="待审批数")
+
+    class Meta:
+        db_table = "leave_inbox_counter"
+        verbose_name = "审批待办计数"
+        verbose_name_plural = verbose_name
+
+
+class LeaveApprovalTask(models.Model):
+    """
+    请假审批任务
+    提交时按审批链一次生成全部步骤：第 1 步为直属上级；请假天数达到 LEAVE_HR_APPROVAL_DAYS
+    或申请人没有直属上级时追加人力资源复核（HR 共享队列，approver_emp 为空）。
+    审核中的单据恰有一个 pending 步骤，其审批人冗余在 LeaveApply.approver_emp。
+    """
+
+    KIND_CHOICES = [
+        ("manager", "直属上级"),
+        ("hr", "人力资源"),
+    ]
+
+    STATUS_CHOICES = [
+        ("waiting", "未开始"),
+        ("pending", "待审批"),
+        ("approved", "已通过"),
+        ("rejected", "已拒绝"),
+        ("cancelled", "已取消"),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    leave = models.ForeignKey(
+        LeaveApply,
+        on_delete=models.CASCADE,
+        related_name="approval_tasks",
+        verbose_name="请假单",
+    )
+    step = models.PositiveSmallIntegerField(verbose_name="步骤")
+    kind = models.CharField(
+        max_length=20, choices=KIND_CHOICES, verbose_name="审批环节"
+    )
+    approver_emp = models.ForeignKey(
+        "employee.Employee",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_index=False,
+        related_name="leave_approval_tasks",
+        verbose_name="审批人",
+        help_text="为空表示由 HR 共享队列中的任一 HR 处理",
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default="waiting",
+        verbose_name="状态",
+    )
+    create_time = models.DateTimeField(verbose_name="生成时间")
+    decided_at = models.DateTimeField(null=True, blank=True, verbose_name="处理时间")
+    decided_by_emp = models.ForeignKey(
+        "employee.Employee",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_index=False,
+        related_name="+",
+        verbose_name="处理人",
+    )
+
+    class Meta:
+        db_table = "leave_approval_task"
+        verbose_name = "请假审批任务"
+        verbose_name_plural = verbose_name
+        ordering = ["leave", "step"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["leave", "step"], name="uniq_leave_task_step"
+            ),
+        ]
+        indexes = [
+            # 审批收件箱：按审批人+状态定位，再按生成时间做游标分页
+            models.Index(
+                fields=["approver_emp", "status", "create_time", "id"],
+                name="idx_leave_task_inbox",
+            ),
+            # HR 共享队列
+            models.Index(
+                fields=["kind", "create_time", "id"],
+                condition=models.Q(status="pending", approver_emp__isnull=True),
+                name="idx_leave_task_pool",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.leave_id} #{self.step} {self.get_kind_display()}"
+
+
+class LeaveBalance(models.Model):
+    """
+    请假额度余额表
+    每个 (员工, 请假类型, 年度) 一行，为流水表 leave_ledger_entry 的累计结果；
+    可用额度 = 已入账 - 已使用 - 审核中占用。随记账在同一事务内更新，
+    可用 rebuild_leave_balance 命令按请假历史重建。
+    """
+
+    emp = models.ForeignKey(
+        "employee.Employee",
+        on_delete=models.CASCADE,
+        related_name="leave_balances",
+        verbose_name="员工",
+    )
+    leave_type = models.CharField(
+        max_length=20, choices=LeaveApply.LEAVE_TYPE_CHOICES, verbose_name="请假类型"
+    )
+    year = models.IntegerField(verbose_name="年度")
+    accrued = models.DecimalField(
+        max_digits=10, decimal_places=2, default=0, verbose_name="已入账天数"
+    )
+    pending = models.DecimalField(
+        max_digits=10, decimal_places=2, default=0, verbose_name="审核中占用天数"
+    )
+    used = models.DecimalField(
+        max_digits=10, decimal_places=2, default=0, verbose_name="已使用天数"
+    )
+    update_time = models.DateTimeField(auto_now=True, verbose_name="更新时间")
+
+    class Meta:
+        db_table = "leave_balance"
+        verbose_name = "请假额度余额"
+        verbose_name_plural = verbose_name
+        constraints = [
+            models.UniqueConstraint(
+                fields=["emp", "leave_type", "year"], name="uniq_leave_balance"
+            ),
+        ]
+
+    @property
+    def available(self):
+        return self.accrued - self.used - self.pending
+
+
+class LeaveLedgerEntry(models.Model):
+    """
+    请假额度流水表（只追加）
+    入账(accrual)、提交占用(reserve)、拒绝释放(release)、批准扣减(consume)、
+    删除已批准单据退回(restore)各记一行，days 均为正数，方向由 entry_type 决定。
+    """
+
+    ENTRY_TYPE_CHOICES = [
+        ("accrual", "额度入账"),
+        ("reserve", "提交占用"),
+        ("release", "释放占用"),
+        ("consume", "批准扣减"),
+        ("restore", "撤销退回"),
+    ]
+
+    emp = models.ForeignKey(
+        "employee.Employee",
+        on_delete=models.CASCADE,
+        related_name="leave_ledger_entries",
+        verbose_name="员工",
+    )
+    leave_type = models.CharField(
+        max_length=20, choices=LeaveApply.LEAVE_TYPE_CHOICES, verbose_name="请假类型"
+    )
+    year = models.IntegerField(verbose_name="年度")
+    entry_type = models.CharField(
+        max_length=20, choices=ENTRY_TYPE_CHOICES, verbose_name="流水类型"
+    )
+    days = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="天数")
+    leave = models.ForeignKey(
+        LeaveApply,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="ledger_entries",
+        verbose_name="关联请假单",
+    )
+    accrual_period = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name="入账周期",
+        help_text="按入账规则入账时为周期首日（月初或年初），同一周期只入账一次",
+    )
+    create_time = models.DateTimeField(auto_now_add=True, verbose_name="记账时间")
+
+    class Meta:
+        db_table = "leave_ledger_entry"
+        verbose_name = "请假额度流水"
+        verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(
+                fields=["emp", "leave_type", "year"], name="idx_leave_ledger_key"
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["emp", "leave_type", "accrual_period"],
+                condition=models.Q(accrual_period__isnull=False),
+                name="uniq_leave_ledger_accrual_period",
+            ),
+        ]
+
+
+class LeaveProfile(models.Model):
+    """
+    请假检索宽表（物化的 vw_leave_profile）
+    每张未删除请假单一行，冗余申请人、所属组织与时间段的最早开始/最晚结束；
+    由请假单、时间段、员工、组织的写入路径按单据增量刷新（见 apps.leave.profile），
+    可用 rebuild_leave_profile 命令全量重建。
+    """
+
+    leave = models.OneToOneField(
+        LeaveApply,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="profile",
+        verbose_name="请假单",
+    )
+    leave_type = models.CharField(
+        max_length=20, choices=LeaveApply.LEAVE_TYPE_CHOICES, verbose_name="请假类型"
+    )
+    apply_status = models.CharField(
+        max_length=20, choices=LeaveApply.STATUS_CHOICES, verbose_name="申请状态"
+    )
+    total_days = models.DecimalField(
+        max_digits=10, decimal_places=2, verbose_name="总天数"
+    )
+    apply_time = models.DateTimeField(verbose_name="提交时间")
+    reason = models.TextField(null=True, blank=True, verbose_name="请假事由")
+    emp = models.ForeignKey(
+        "employee.Employee",
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name="+",
+        verbose_name="申请人",
+    )
+    emp_code = models.CharField(max_length=32, verbose_name="工号")
+    emp_name = models.CharField(max_length=50, verbose_name="姓名")
+    org = models.ForeignKey(
+        "organization.Organization",
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name="+",
+        verbose_name="所属组织",
+    )
+    org_code = models.CharField(max_length=50, verbose_name="组织编码")
+    org_name = models.CharField(max_length=100, verbose_name="组织名称")
+    start_time = models.DateTimeField(null=True, verbose_name="最早开始时间")
+    end_time = models.DateTimeField(null=True, verbose_name="最晚结束时间")
+    # 请假事由 + 员工姓名/工号/邮箱的检索向量（两张源表向量的拼接）
+    search_vector = SearchVectorField(null=True, verbose_name="检索向量")
+
+    class Meta:
+        db_table = "leave_profile"
+        verbose_name = "请假检索宽表"
+        verbose_name_plural = verbose_name
+        indexes = [
+            GinIndex(fields=["search_vector"], name="gin_leave_profile_search"),
+            # 检索页默认排序（开始时间倒序）与游标翻页，leave_id 保证顺序唯一
+            models.Index(
+                models.F("start_time").desc(nulls_last=True),
+                models.F("apply_time").desc(),
+                models.F("leave_id").desc(),
+                name="idx_leave_profile_recent",
+            ),
+            models.Index(fields=["org", "start_time"], name="idx_leave_profile_org"),
+            models.Index(
+                fields=["emp_code", "start_time"], name="idx_leave_profile_emp"
+            ),
+            models.Index(fields=["emp", "start_time"], name="idx_leave_profile_emp_pk"),
+            models.Index(
+                fields=["leave_type", "apply_status", "start_time"],
+                name="idx_leave_profile_type",
+            ),
+            models.Index(
+                fields=["apply_status", "start_time"], name="idx_leave_profile_status"
+            ),
+        ]
+
+
+class LeaveMonthStat(models.Model):
+    """
+    请假统计汇总表（组织, 月份, 请假类型, 申请状态）
+    按请假单最早开始时间所在的本地自然月归集；direct_* 为直属该组织员工的天数/单数，
+    subtree_* 为含全部下级组织的合计。随检索宽表 leave_profile 的增量刷新按差值维护
+    （见 apps.leave.analytics），组织调整上级时重算受影响祖先的 subtree_*，
+    可用 rebuild_leave_stats 命令全量重建。
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    org = models.ForeignKey(
+        "organization.Organization",
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name="+",
+        verbose_name="组织",
+    )
+    month = models.DateField(verbose_name="月份", help_text="当月 1 日")
+    leave_type = models.CharField(
+        max_length=20, choices=LeaveApply.LEAVE_TYPE_CHOICES, verbose_name="请假类型"
+    )
+    apply_status = models.CharField(
+        max_length=20, choices=LeaveApply.STATUS_CHOICES, verbose_name="申请状态"
+    )
+    direct_days = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0, verbose_name="直属天数"
+    )
+    direct_count = models.IntegerField(default=0, verbose_name="直属单数")
+    subtree_days = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0, verbose_name="含下级天数"
+    )
+    subtree_count = models.IntegerField(default=0, verbose_name="含下级单数")
+
+    class Meta:
+        db_table = "leave_month_stat"
+        verbose_name = "请假统计汇总"
+        verbose_name_plural = verbose_name
+        constraints = [
+            # 报表按组织 + 月份区间取数，唯一索引同时承担查询
+            models.UniqueConstraint(
+                fields=["org", "month", "leave_type", "apply_status"],
+                name="uniq_leave_month_stat_key",
+            ),
+        ]
+
+
+class LeaveDay(models.Model):
+    """
+    请假按天展开的事实表
+    每张已批准/已完成请假单在每个有工时占用的本地日期一行，fraction 为当天被占用的
+    工时占员工所在组织工作日历一天工时的比例（周末、节假日不产生行）；
+    考勤、绩效等按 (emp_id, day) 直接等值连接，不再在 Python 里做区间换算。
+    由请假单、时间段、员工调岗与工作日历的写入路径按单据刷新（见 apps.leave.days），
+    可用 rebuild_leave_days 命令全量重建。
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    leave = models.ForeignKey(
+        LeaveApply,
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name="days",
+        verbose_name="请假单",
+    )
+    emp = models.ForeignKey(
+        "employee.Employee",
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name="+",
+        verbose_name="员工",
+    )
+    day = models.DateField(verbose_name="日期")
+    leave_type = models.CharField(
+        max_length=20, choices=LeaveApply.LEAVE_TYPE_CHOICES, verbose_name="请假类型"
+    )
+    fraction = models.DecimalField(
+        max_digits=5, decimal_places=4, verbose_name="占当天工时比例"
+    )
+
+    class Meta:
+        db_table = "leave_day"
+        verbose_name = "请假日明细"
+        verbose_name_plural = verbose_name
+        constraints = [
+            models.UniqueConstraint(fields=["leave", "day"], name="uniq_leave_day"),
+        ]
+        indexes = [
+            # 按人按天等值连接，带上比例与类型可只读索引
+            models.Index(
+                fields=["emp", "day"],
+                include=["fraction", "leave_type"],
+                name="idx_leave_day_emp",
+            ),
+            models.Index(fields=["day"], name="idx_leave_day_day"),
+        ]
+
+
+class LeaveSlaNotice(models.Model):
+    """
+    审批时限通知记录
+    每张单据每个级别（超时提醒、超时升级）至多一行，由 check_leave_sla 与发件箱消息
+    同事务写入，保证同一级别只通知一次。
+    """
+
+    LEVEL_CHOICES = [
+        ("remind", "超时提醒"),
+        ("escalate", "超时升级"),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    leave = models.ForeignKey(
+        LeaveApply,
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name="sla_notices",
+        verbose_name="请假单",
+    )
+    level = models.CharField(
+        max_length=20, choices=LEVEL_CHOICES, verbose_name="通知级别"
+    )
+    create_time = models.DateTimeField(verbose_name="通知时间")
+
+    class Meta:
+        db_table = "leave_sla_notice"
+        verbose_name = "审批时限通知"
+        verbose_name_plural = verbose_name
+        constraints = [
+            models.UniqueConstraint(
+                fields=["leave", "level"], name="uniq_leave_sla_notice"
+            ),
+        ]
+
+
+class LeaveImportReport(models.Model):
+    """
+    请假导入错误报告
+    导入页生成后按令牌下载；存在数据库而不是进程内缓存，下载请求落到任一 worker
+    都能取到。只能由导入人下载，过期的报告在下次导入时清理。
+    """
+
+    token = models.CharField(max_length=32, primary_key=True, verbose_name="下载令牌")
+    user = models.ForeignKey(
+        "auth.User",
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="导入人",
+    )
+    content = models.TextField(verbose_name="报告内容", help_text="CSV 文本（带 BOM）")
+    create_time = models.DateTimeField(auto_now_add=True, verbose_name="生成时间")
+
+    class Meta:
+        db_table = "leave_import_report"
+        verbose_name = "请假导入错误报告"
+        verbose_name_plural = verbose_name
+        indexes = [
+            # 清理过期报告
+            models.Index(fields=["create_time"], name="idx_leave_import_report_time"),
+        ]
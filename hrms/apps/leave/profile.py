@@ -0,0 +1,141 @@
+"""
+请假检索宽表 leave_profile
+
+原 vw_leave_profile 视图每次检索都要按请假单重新聚合全部时间段并关联员工、组织；
+这里把结果物化成表，写入路径按单据增量刷新：给定一批请假单（或员工、组织），
+一条语句重新计算这些单据的行并 upsert，已不满足条件（单据/员工/组织已删除）的行删除；
+同一条语句按刷新前后的差值维护请假统计汇总 leave_month_stat（见 apps.leave.analytics）。
+"""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+from django.db import connection
+
+from utils.closure import ClosureDiff
+
+from .analytics import rebuild_leave_stats, stat_delta_cte
+
+_COLUMNS = (
+    "leave_id, leave_type, apply_status, total_days, apply_time, reason, "
+    "emp_id, emp_code, emp_name, org_id, org_code, org_name, start_time, end_time, "
+    "search_vector"
+)
+
+# 与 vw_leave_profile 口径一致（另带检索向量）；{where} 限定参与计算的请假单
+_PROFILE_SQL = """
+SELECT la.id, la.leave_type, la.apply_status, la.total_days, la.apply_time, la.reason,
+       emp.id, emp.emp_id, emp.emp_name, org.id, org.org_code, org.org_name,
+       seg.start_time, seg.end_time,
+       COALESCE(la.search_vector, ''::tsvector) || COALESCE(emp.search_vector, ''::tsvector)
+FROM leave_apply la
+JOIN employee emp ON la.emp_id = emp.id
+JOIN organization org ON emp.org_id = org.id
+LEFT JOIN (
+    SELECT leave_id,
+           MIN(leave_start_time) AS start_time,
+           MAX(leave_end_time) AS end_time
+    FROM leave_time_segment
+    WHERE is_deleted = FALSE AND {segment_where}
+    GROUP BY leave_id
+) seg ON seg.leave_id = la.id
+WHERE la.is_deleted = FALSE
+  AND emp.is_deleted = FALSE
+  AND org.is_deleted = FALSE
+  AND {where}
+"""
+
+# 各刷新入口对应的请假单范围
+_SCOPES = {
+    "leave": "{alias}.id = ANY(%s)",
+    "emp": "{alias}.emp_id = ANY(%s)",
+    "org": "{alias}.emp_id IN (SELECT id FROM employee WHERE org_id = ANY(%s))",
+}
+
+
+def _refresh(scope: str, ids: Iterable) -> int:
+    ids = list(dict.fromkeys(str(pk) for pk in ids if pk))
+    if not ids:
+        return 0
+    target = _SCOPES[scope]
+    profile_sql = _PROFILE_SQL.format(
+        where=target.format(alias="la"),
+        segment_where=(
+            "leave_id IN (SELECT l.id FROM leave_apply l WHERE "
+            f"{target.format(alias='l')})"
+        ),
+    )
+    stat_sql, stat_params = stat_delta_cte(new="fresh", old="previous")
+    updates = ", ".join(
+        f"{column} = EXCLUDED.{column}"
+        for column in _COLUMNS.split(", ")
+        if column != "leave_id"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH fresh ({_COLUMNS}) AS ({profile_sql}),
+            previous AS (
+                SELECT p.* FROM leave_profile p
+                JOIN leave_apply la ON la.id = p.leave_id
+                WHERE {target.format(alias="la")}
+            ),
+            removed AS (
+                DELETE FROM leave_profile p
+                USING leave_apply la
+                WHERE la.id = p.leave_id
+                  AND {target.format(alias="la")}
+                  AND NOT EXISTS (SELECT 1 FROM fresh f WHERE f.leave_id = p.leave_id)
+            ),
+            {stat_sql}
+            INSERT INTO leave_profile ({_COLUMNS})
+            SELECT {_COLUMNS} FROM fresh
+            ON CONFLICT (leave_id) DO UPDATE SET {updates}
+            """,
+            [ids, ids, ids, ids, *stat_params],
+        )
+        return cursor.rowcount
+
+
+def refresh_leave_profiles(leave_ids: Iterable) -> int:
+    """按请假单刷新宽表行，返回写入行数。"""
+    return _refresh("leave", leave_ids)
+
+
+def refresh_employee_leave_profiles(emp_ids: Iterable) -> int:
+    """员工改名、改工号、调岗或删除后刷新其全部请假单。"""
+    return _refresh("emp", emp_ids)
+
+
+def refresh_org_leave_profiles(org_ids: Iterable) -> int:
+    """组织改名、改编码或删除后刷新其成员的全部请假单。"""
+    return _refresh("org", org_ids)
+
+
+def rebuild_leave_profile() -> int:
+    """全量重建宽表（连同由其派生的统计汇总），返回宽表写入行数。"""
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM leave_profile")
+        cursor.execute(
+            f"INSERT INTO leave_profile ({_COLUMNS}) "
+            + _PROFILE_SQL.format(where="TRUE", segment_where="TRUE")
+        )
+        rows = cursor.rowcount
+    rebuild_leave_stats()
+    return rows
+
+
+def verify_leave_profile() -> ClosureDiff:
+    """与现算结果对比，返回缺失/多余（含内容不一致）行数。"""
+    expected = _PROFILE_SQL.format(where="TRUE", segment_where="TRUE")
+    stored = f"SELECT {_COLUMNS} FROM leave_profile"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH expected AS ({expected}) "
+            "SELECT "
+            f"(SELECT COUNT(*) FROM (SELECT * FROM expected EXCEPT {stored}) m), "
+            f"(SELECT COUNT(*) FROM ({stored} EXCEPT SELECT * FROM expected) x)"
+        )
+        missing, extra = cursor.fetchone()
+    return ClosureDiff(missing=int(missing), extra=int(extra))
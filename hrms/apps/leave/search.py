@@ -0,0 +1,309 @@
+"""
+请假检索（leave_profile 宽表上的原生 SQL）
+
+检索页与导出共用同一份过滤条件与数据范围：
+- 检索页按 (start_time, apply_time, leave_id) 倒序做游标分页，翻到任何一页代价都相同；
+  带关键字时走 search_vector 全文检索，按相关度优先排序，游标多带一列相关度；
+- 导出用服务端游标逐批读取，配合流式响应，内存占用与结果行数无关。
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from decimal import Decimal, InvalidOperation
+from typing import IO, Iterator
+
+import openpyxl
+from django.db import connection
+from django.utils import timezone
+
+from utils.csvstream import iter_csv
+from utils.keyset import KeysetPage, decode_cursor, encode_cursor
+from utils.sql_scope import (
+    UserScope,
+    build_org_tree_cte,
+    normalize_str,
+    parse_iso_datetime_local,
+)
+from utils.textsearch import search_query
+
+from .models import LeaveApply
+
+SEARCH_COLUMNS = (
+    "leave_id",
+    "leave_type",
+    "apply_status",
+    "total_days",
+    "apply_time",
+    "emp_id",
+    "emp_name",
+    "org_name",
+    "start_time",
+    "end_time",
+    "reason",
+    "rank",
+)
+
+_SELECT = """
+    v.leave_id, v.leave_type, v.apply_status, v.total_days, v.apply_time,
+    v.emp_code AS emp_id, v.emp_name, v.org_name, v.start_time, v.end_time, v.reason
+"""
+
+EXPORT_HEADERS = (
+    "单号",
+    "请假类型",
+    "状态",
+    "天数",
+    "申请时间",
+    "工号",
+    "姓名",
+    "部门",
+    "开始时间",
+    "结束时间",
+    "事由",
+)
+
+# 与 idx_leave_profile_recent 一致；leave_id 保证顺序唯一，没有时间段的单据排在最后
+_ORDER_BY = "v.start_time DESC NULLS LAST, v.apply_time DESC, v.leave_id DESC"
+
+# 有关键字时先按相关度排序（gin_leave_profile_search 负责匹配）
+_RANK = "ts_rank(v.search_vector, q.query)::float8"
+
+
+def _decimal(raw: str) -> Decimal | None:
+    try:
+        return Decimal(raw) if raw else None
+    except InvalidOperation:
+        return None
+
+
+@dataclass(frozen=True)
+class LeaveSearchFilters:
+    org: str = ""
+    keyword: str = ""
+    emp_id: str = ""
+    leave_type: str = ""
+    apply_status: str = ""
+    start: str = ""
+    end: str = ""
+    days_min: str = ""
+    days_max: str = ""
+
+    @classmethod
+    def from_query(cls, query) -> "LeaveSearchFilters":
+        return cls(
+            org=normalize_str(query.get("org")),
+            keyword=normalize_str(query.get("keyword")),
+            emp_id=normalize_str(query.get("emp_id")),
+            leave_type=normalize_str(query.get("leave_type")),
+            apply_status=normalize_str(query.get("apply_status")),
+            start=parse_iso_datetime_local(query.get("start")) or "",
+            end=parse_iso_datetime_local(query.get("end")) or "",
+            days_min=normalize_str(query.get("days_min")),
+            days_max=normalize_str(query.get("days_max")),
+        )
+
+    @property
+    def search_terms(self) -> str:
+        return search_query(self.keyword)
+
+    def as_dict(self) -> dict[str, str]:
+        return asdict(self)
+
+    def as_query(self) -> dict[str, str]:
+        """非空条件，用于翻页/导出链接。"""
+        return {key: value for key, value in asdict(self).items() if value}
+
+
+def build_search_sql(
+    scope: UserScope,
+    filters: LeaveSearchFilters,
+    *,
+    after: list[str] | None = None,
+    limit: int | None = None,
+) -> tuple[str, list[object]]:
+    """按数据范围与过滤条件拼出检索 SQL；after 为上一页最后一行的游标值。"""
+    clauses: list[str] = ["1=1"]
+    params: list[object] = []
+
+    if scope.is_superuser or scope.is_hr:
+        cte_sql, scope_join = "", ""
+    else:
+        cte_sql, cte_params = build_org_tree_cte(scope.root_org_ids)
+        scope_join = "JOIN org_tree t ON t.id = v.org_id"
+        params.extend(cte_params)
+
+    # 关键字按 CJK 二元分词匹配姓名/工号/邮箱/事由
+    terms = filters.search_terms
+    if terms:
+        search_join, rank, order_by = (
+            "CROSS JOIN to_tsquery('simple', %s) AS q(query)",
+            _RANK,
+            f"{_RANK} DESC, {_ORDER_BY}",
+        )
+        clauses.append("v.search_vector @@ q.query")
+        params.append(terms)
+    else:
+        search_join, rank, order_by = "", "0::float8", _ORDER_BY
+
+    if filters.org:
+        clauses.append("v.org_id = %s")
+        params.append(filters.org)
+    if filters.emp_id:
+        clauses.append("v.emp_code = %s")
+        params.append(filters.emp_id)
+    if filters.leave_type:
+        clauses.append("v.leave_type = %s")
+        params.append(filters.leave_type)
+    if filters.apply_status:
+        clauses.append("v.apply_status = %s")
+        params.append(filters.apply_status)
+    # 时间范围基于请假分段的最小/最大区间
+    if filters.start:
+        clauses.append("v.start_time >= %s")
+        params.append(filters.start)
+    if filters.end:
+        clauses.append("v.end_time <= %s")
+        params.append(filters.end)
+    days_min, days_max = _decimal(filters.days_min), _decimal(filters.days_max)
+    if days_min is not None:
+        clauses.append("v.total_days >= %s")
+        params.append(days_min)
+    if days_max is not None:
+        clauses.append("v.total_days <= %s")
+        params.append(days_max)
+
+    if after is not None:
+        start_time, apply_time, leave_id = after[-3:]
+        if start_time:
+            tail = (
+                "((v.start_time, v.apply_time, v.leave_id) < (%s, %s, %s) "
+                "OR v.start_time IS NULL)"
+            )
+            tail_params = [start_time, apply_time, leave_id]
+        else:
+            tail = "(v.start_time IS NULL AND (v.apply_time, v.leave_id) < (%s, %s))"
+            tail_params = [apply_time, leave_id]
+        if terms:
+            clauses.append(f"({rank} < %s OR ({rank} = %s AND {tail}))")
+            params.extend([after[0], after[0], *tail_params])
+        else:
+            clauses.append(tail)
+            params.extend(tail_params)
+
+    sql = f"""
+        {cte_sql}
+        SELECT {_SELECT}, {rank} AS rank
+        FROM leave_profile v
+        {scope_join}
+        {search_join}
+        WHERE {" AND ".join(clauses)}
+        ORDER BY {order_by}
+    """
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit)
+    return sql, params
+
+
+def _cursor_values(filters: LeaveSearchFilters, row: dict) -> list[object]:
+    values = [
+        row["start_time"].isoformat() if row["start_time"] else "",
+        row["apply_time"].isoformat(),
+        row["leave_id"],
+    ]
+    # 浮点数的 repr 可以无损往返，相关度作为游标首列
+    return [repr(row["rank"]), *values] if filters.search_terms else values
+
+
+def search_page(
+    scope: UserScope,
+    filters: LeaveSearchFilters,
+    *,
+    cursor: str | None = None,
+    limit: int = 50,
+) -> KeysetPage:
+    """检索结果的一页（多取一行判断是否还有下一页）。"""
+    size = 4 if filters.search_terms else 3
+    sql, params = build_search_sql(
+        scope, filters, after=decode_cursor(cursor, size), limit=limit + 1
+    )
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(sql, params)
+        rows = [dict(zip(SEARCH_COLUMNS, row)) for row in db_cursor.fetchall()]
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(_cursor_values(filters, items[-1]))
+    ordering = ("-start_time", "-apply_time", "-leave_id")
+    if filters.search_terms:
+        ordering = ("-rank", *ordering)
+    return KeysetPage(items=items, next_cursor=next_cursor, ordering=ordering)
+
+
+def iter_search_rows(
+    scope: UserScope, filters: LeaveSearchFilters, *, chunk_size: int = 2000
+) -> Iterator[tuple]:
+    """按检索顺序逐行产出全部结果（服务端游标，每次向数据库取 chunk_size 行）。"""
+    sql, params = build_search_sql(scope, filters)
+    with connection.chunked_cursor() as db_cursor:
+        db_cursor.cursor.itersize = chunk_size
+        db_cursor.execute(sql, params)
+        yield from db_cursor
+
+
+def _export_time(value) -> str:
+    return timezone.localtime(value).strftime("%Y-%m-%d %H:%M") if value else ""
+
+
+def iter_export_rows(
+    scope: UserScope, filters: LeaveSearchFilters
+) -> Iterator[list[object]]:
+    """导出行：代码值换成中文标签，时间转本地时区。"""
+    type_labels = dict(LeaveApply.LEAVE_TYPE_CHOICES)
+    status_labels = dict(LeaveApply.STATUS_CHOICES)
+    for row in iter_search_rows(scope, filters):
+        (
+            leave_id,
+            leave_type,
+            apply_status,
+            total_days,
+            apply_time,
+            emp_id,
+            emp_name,
+            org_name,
+            start_time,
+            end_time,
+            reason,
+            _rank,
+        ) = row
+        yield [
+            str(leave_id),
+            type_labels.get(leave_type, leave_type),
+            status_labels.get(apply_status, apply_status),
+            total_days,
+            _export_time(apply_time),
+            emp_id,
+            emp_name,
+            org_name,
+            _export_time(start_time),
+            _export_time(end_time),
+            reason or "",
+        ]
+
+
+def iter_export_csv(scope: UserScope, filters: LeaveSearchFilters) -> Iterator[str]:
+    """逐行产出 CSV 文本（带 BOM，Excel 直接打开不乱码）。"""
+    return iter_csv(EXPORT_HEADERS, iter_export_rows(scope, filters))
+
+
+def write_export_xlsx(
+    scope: UserScope, filters: LeaveSearchFilters, target: IO[bytes]
+) -> None:
+    """以只写模式逐行写出 xlsx（openpyxl write_only 不在内存中保留单元格）。"""
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("请假记录")
+    sheet.append(EXPORT_HEADERS)
+    for row in iter_export_rows(scope, filters):
+        sheet.append(row)
+    workbook.save(target)
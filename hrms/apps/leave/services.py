@@ -0,0 +1,1003 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from functools import partial
+from typing import Iterable, Mapping, Sequence
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.attendance.work_calendar import calendar_for_employee, get_work_calendar
+from apps.core.outbox import enqueue, enqueue_many
+from apps.core.roles import is_hr_user
+from utils.closure import ClosureDiff
+from utils.keyset import KeysetPage, keyset_paginate
+from utils.workcalendar import WorkCalendar
+
+from .calendar import invalidate_leave_calendar
+from .days import LEAVE_DAY_STATUSES, refresh_leave_days
+from .models import (
+    LeaveApply,
+    LeaveApprovalTask,
+    LeaveInboxCounter,
+    LeaveTimeSegment,
+)
+from .profile import refresh_leave_profiles
+
+
+@dataclass(frozen=True)
+class Transition:
+    """一次状态流转：允许的起始状态、目标状态、时间段是否继续参与冲突校验。"""
+
+    source: str
+    target: str
+    segments_active: bool
+    by_approver: bool
+    label: str
+
+
+TRANSITIONS = {
+    "approve": Transition("reviewing", "approved", True, True, "已批准"),
+    "reject": Transition("reviewing", "rejected", False, True, "已拒绝"),
+    "complete": Transition("approved", "completed", False, False, "已完成"),
+}
+
+# 单条结果码（批量接口按 id 返回）
+RESULT_OK = "ok"
+RESULT_NOT_FOUND = "not_found"
+RESULT_FORBIDDEN = "forbidden"
+RESULT_INVALID_STATE = "invalid_state"
+
+
+def bulk_transition(user, leave_ids: Iterable[str], action: str) -> dict[str, str]:
+    """批量审批/拒绝/完成请假单，返回 {leave_id: 结果码}。
+
+    权限与状态用一次查询判定（审批动作要求当前用户是当前步骤的审批人，HR 复核步骤
+    由任一 HR 处理，超级管理员不受限；完成动作只允许本人）；状态、时间段占用标记与
+    额度台账在同一事务内按集合更新，锁定时带起始状态条件，并发下已被他人处理的单据
+    记为 invalid_state。审批链还有后续步骤的单据批准后仍为审核中，转给下一步审批人。
+    每张处理成功的单据在同一事务内写一条发件箱消息（leave.approved / leave.rejected /
+    leave.completed，转下一步时为 leave.forwarded）。
+    """
+    transition = TRANSITIONS.get(action)
+    if transition is None:
+        raise ValueError(f"unknown leave action: {action}")
+
+    ids = list(dict.fromkeys(str(pk) for pk in leave_ids if pk))
+    results = {pk: RESULT_NOT_FOUND for pk in ids}
+    if not ids:
+        return results
+
+    employee = getattr(user, "employee", None)
+    emp_pk = str(employee.pk) if employee else None
+    rows = (
+        LeaveApply.objects.filter(pk__in=ids, is_deleted=False)
+        .order_by()
+        .values_list("id", "apply_status", "emp_id", "approver_emp_id")
+    )
+
+    allowed = []
+    approvers = {}
+    owners = {}
+    hr_reviewer = None
+    for pk, status, owner_id, approver_id in rows:
+        approvers[pk] = approver_id
+        owners[pk] = owner_id
+        if transition.by_approver:
+            permitted = user.is_superuser or (emp_pk and approver_id == emp_pk)
+            if not permitted and approver_id is None:
+                # 审批人为空即当前步骤在 HR 共享队列中
+                if hr_reviewer is None:
+                    hr_reviewer = is_hr_user(user)
+                permitted = hr_reviewer
+        else:
+            permitted = emp_pk is not None and owner_id == emp_pk
+        if not permitted:
+            results[pk] = RESULT_FORBIDDEN
+        elif status != transition.source:
+            results[pk] = RESULT_INVALID_STATE
+        else:
+            allowed.append(pk)
+
+    if not allowed:
+        return results
+
+    with transaction.atomic():
+        updated = list(
+            LeaveApply.objects.select_for_update()
+            .filter(pk__in=allowed, apply_status=transition.source)
+            .order_by()
+            .values_list("id", flat=True)
+        )
+        advanced = {}
+        if transition.by_approver:
+            advanced = decide_approval_tasks(
+                updated,
+                approve=transition.target == "approved",
+                decided_by=emp_pk,
+                operator=str(user.pk),
+            )
+        finished = [pk for pk in updated if pk not in advanced]
+        LeaveApply.objects.filter(pk__in=finished).update(
+            apply_status=transition.target,
+            update_by=str(user.pk),
+            update_time=timezone.now(),
+        )
+        LeaveTimeSegment.objects.filter(leave_id__in=finished).update(
+            is_active=transition.segments_active
+        )
+        refresh_leave_profiles(finished)
+        if (transition.source in LEAVE_DAY_STATUSES) != (
+            transition.target in LEAVE_DAY_STATUSES
+        ):
+            refresh_leave_days(finished)
+        post_leave_ledger(
+            finished,
+            ledger_moves(
+                ledger_holding(transition.source), ledger_holding(transition.target)
+            ),
+        )
+        if transition.source == "reviewing":
+            deltas = {}
+            for pk in updated:
+                for emp_id, delta in ((approvers[pk], -1), (advanced.get(pk), 1)):
+                    if emp_id:
+                        deltas[emp_id] = deltas.get(emp_id, 0) + delta
+            apply_inbox_deltas(deltas)
+        # 通知类副作用只写发件箱，由 run_outbox 异步投递，不拖慢审批请求
+        enqueue_many(
+            (
+                "leave.forwarded" if pk in advanced else f"leave.{transition.target}",
+                pk,
+                {
+                    "emp_id": owners[pk],
+                    "action": action,
+                    "operator": str(user.pk),
+                    "approver_emp_id": advanced.get(pk, approvers[pk]),
+                },
+            )
+            for pk in updated
+        )
+        periods = list(
+            LeaveTimeSegment.objects.filter(leave_id__in=finished).values_list(
+                "leave_start_time", "leave_end_time"
+            )
+        )
+
+    transaction.on_commit(partial(invalidate_leave_calendar, periods))
+    for pk in allowed:
+        results[pk] = RESULT_OK if pk in updated else RESULT_INVALID_STATE
+    return results
+
+
+@dataclass(frozen=True)
+class SegmentConflict:
+    """提交的第 index 段（从 0 开始）与某个时间段重叠。
+
+    leave_id 为已有请假单；为 None 表示与本次提交的另一段（other_index）重叠。
+    """
+
+    index: int
+    other_start: datetime
+    other_end: datetime
+    leave_id: str | None = None
+    other_index: int | None = None
+
+    @property
+    def message(self) -> str:
+        fmt = "%Y-%m-%d %H:%M"
+        window = (
+            f"{timezone.localtime(self.other_start).strftime(fmt)} ~ "
+            f"{timezone.localtime(self.other_end).strftime(fmt)}"
+        )
+        if self.leave_id is None:
+            return (
+                f"第 {self.index + 1} 段与第 {self.other_index + 1} 段（{window}）重叠"
+            )
+        return f"第 {self.index + 1} 段与已有请假（{window}）重叠"
+
+
+class SegmentOverlapError(ValidationError):
+    def __init__(self, conflicts: Sequence[SegmentConflict]):
+        self.conflicts = list(conflicts)
+        super().__init__([conflict.message for conflict in self.conflicts])
+
+
+Segment = tuple[datetime, datetime]
+
+
+def segment_days(
+    start: datetime, end: datetime, calendar: WorkCalendar | None = None
+) -> Decimal:
+    """时间段折算的请假天数：只计工作日历中工作日的工作时段（周末、节假日不计）。"""
+    if calendar is None:
+        calendar = get_work_calendar()
+    return calendar.working_days(start, end)
+
+
+def _internal_conflicts(segments: Sequence[Segment]) -> list[SegmentConflict]:
+    """本次提交的各段之间是否互相重叠（按开始时间排序后扫描）。"""
+    order = sorted(range(len(segments)), key=lambda i: segments[i])
+    conflicts = []
+    latest = None
+    for i in order:
+        start, end = segments[i]
+        if latest is not None and start < segments[latest][1]:
+            conflicts.append(
+                SegmentConflict(
+                    index=i,
+                    other_start=segments[latest][0],
+                    other_end=segments[latest][1],
+                    other_index=latest,
+                )
+            )
+        if latest is None or end > segments[latest][1]:
+            latest = i
+    return sorted(conflicts, key=lambda c: c.index)
+
+
+def preflight_segments(employee, segments: Sequence[Segment]) -> list[SegmentConflict]:
+    """一次查询找出与该员工已占用时间段重叠的提交段。
+
+    条件与 no_leave_overlap 排他约束一致（emp_id 相等、is_active、tstzrange &&），
+    可直接走该约束的 GiST 索引。
+    """
+    if not segments:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT n.idx - 1, s.leave_id, s.leave_start_time, s.leave_end_time
+            FROM unnest(%s::timestamptz[], %s::timestamptz[])
+                WITH ORDINALITY AS n(start_time, end_time, idx)
+            JOIN leave_time_segment s
+              ON s.emp_id = %s
+             AND s.is_active
+             AND tstzrange(s.leave_start_time, s.leave_end_time)
+                 && tstzrange(n.start_time, n.end_time)
+            ORDER BY n.idx, s.leave_start_time
+            """,
+            [
+                [start for start, _ in segments],
+                [end for _, end in segments],
+                str(employee.pk),
+            ],
+        )
+        return [
+            SegmentConflict(
+                index=index, other_start=start, other_end=end, leave_id=str(leave_id)
+            )
+            for index, leave_id, start, end in cursor.fetchall()
+        ]
+
+
+def submit_leave(
+    employee,
+    *,
+    leave_type: str,
+    segments: Sequence[Segment],
+    operator: str,
+    reason: str | None = None,
+    attachment_url: str | None = None,
+) -> LeaveApply:
+    """提交请假：预检全部时间段与额度后，主表一条、时间段一条批量 INSERT 落库，
+    并在同一事务内记一笔额度占用。
+
+    冲突时抛出 SegmentOverlapError，conflicts 列出每个冲突段；超出额度时抛出
+    LeaveQuotaError。同一员工的提交以事务级咨询锁串行化，预检与额度结论在提交前
+    不会被并发申请推翻。提交成功时在同一事务内写入 leave.submitted 发件箱消息。
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_advisory_xact_lock(hashtext(%s))",
+                [f"leave_apply:{employee.pk}"],
+            )
+        conflicts = _internal_conflicts(segments) + preflight_segments(
+            employee, segments
+        )
+        if conflicts:
+            raise SegmentOverlapError(sorted(conflicts, key=lambda c: c.index))
+        shortfalls = check_leave_quota(employee, leave_type, segments)
+        if shortfalls:
+            raise LeaveQuotaError(shortfalls)
+
+        calendar = calendar_for_employee(employee)
+        days = [segment_days(start, end, calendar) for start, end in segments]
+        leave = LeaveApply.objects.create(
+            emp=employee,
+            leave_type=leave_type,
+            reason=reason,
+            attachment_url=attachment_url,
+            total_days=sum(days, Decimal("0")),
+            create_by=operator,
+            update_by=operator,
+        )
+        LeaveTimeSegment.objects.bulk_create(
+            [
+                LeaveTimeSegment(
+                    leave=leave,
+                    emp=employee,
+                    leave_start_time=start,
+                    leave_end_time=end,
+                    segment_days=day,
+                    create_by=operator,
+                    update_by=operator,
+                )
+                for (start, end), day in zip(segments, days)
+            ]
+        )
+        post_leave_ledger([leave.pk], ledger_moves(None, ledger_holding("reviewing")))
+        # 时间段批量写入不触发信号，这里补上宽表的开始/结束时间
+        refresh_leave_profiles([leave.pk])
+        enqueue(
+            "leave.submitted",
+            leave.pk,
+            {
+                "emp_id": str(employee.pk),
+                "leave_type": leave_type,
+                "total_days": leave.total_days,
+                "approver_emp_id": leave.approver_emp_id,
+                "segments": list(segments),
+            },
+        )
+    transaction.on_commit(partial(invalidate_leave_calendar, segments))
+    return leave
+
+
+def is_pending(leave) -> bool:
+    return (
+        leave.apply_status == "reviewing"
+        and not leave.is_deleted
+        and leave.approver_emp_id is not None
+    )
+
+
+def apply_inbox_deltas(deltas: Mapping[str, int]) -> bool:
+    """按审批人增减待办计数（一条 upsert），返回是否产生了实际变化。"""
+    rows = [(str(emp_id), delta) for emp_id, delta in deltas.items() if delta]
+    if not rows:
+        return False
+    values = ", ".join(["(%s, %s)"] * len(rows))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO leave_inbox_counter (approver_emp_id, pending_count) "
+            f"SELECT emp_id, SUM(cnt) FROM (VALUES {values}) AS d(emp_id, cnt) "
+            "GROUP BY emp_id "
+            "ON CONFLICT (approver_emp_id) DO UPDATE SET "
+            "pending_count = leave_inbox_counter.pending_count + EXCLUDED.pending_count",
+            [value for row in rows for value in row],
+        )
+    return True
+
+
+def reassign_pending_approvals(emp_ids: Iterable[str]) -> int:
+    """员工调整上级后，把其停在上级审批步骤的单据转给新的直属上级，返回转交条数。
+
+    上级被清空时与提交时没有上级的处理一致：该步骤转入 HR 共享队列，
+    原本排在其后的 HR 复核随之取消，不再重复审批。
+    """
+    ids = [str(pk) for pk in emp_ids if pk]
+    if not ids:
+        return 0
+    with connection.cursor() as cursor:
+        # 先转交待审批的上级步骤，再自连接取单据更新前的审批人，一条语句拿到计数增减
+        cursor.execute(
+            """
+            WITH moved AS (
+                UPDATE leave_approval_task t
+                SET approver_emp_id = e.manager_emp_id,
+                    kind = CASE WHEN e.manager_emp_id IS NULL THEN 'hr' ELSE t.kind END
+                FROM leave_apply l
+                JOIN employee e ON e.id = l.emp_id
+                WHERE t.leave_id = l.id
+                  AND l.emp_id = ANY(%s)
+                  AND l.apply_status = 'reviewing'
+                  AND l.is_deleted = FALSE
+                  AND t.kind = 'manager'
+                  AND t.status = 'pending'
+                  AND t.approver_emp_id IS DISTINCT FROM e.manager_emp_id
+                RETURNING t.leave_id, t.approver_emp_id, t.kind
+            ),
+            pooled AS (
+                UPDATE leave_approval_task w
+                SET status = 'cancelled', decided_at = now()
+                FROM moved m
+                WHERE w.leave_id = m.leave_id
+                  AND m.kind = 'hr'
+                  AND w.kind = 'hr'
+                  AND w.status = 'waiting'
+            )
+            UPDATE leave_apply l
+            SET approver_emp_id = m.approver_emp_id
+            FROM leave_apply o
+            JOIN moved m ON m.leave_id = o.id
+            WHERE l.id = o.id
+            RETURNING o.approver_emp_id, l.approver_emp_id
+            """,
+            [ids],
+        )
+        moved = cursor.fetchall()
+    deltas: dict[str, int] = {}
+    for old, new in moved:
+        for emp_id, delta in ((old, -1), (new, 1)):
+            if emp_id:
+                deltas[emp_id] = deltas.get(emp_id, 0) + delta
+    apply_inbox_deltas(deltas)
+    return len(moved)
+
+
+_EXPECTED_INBOX_SQL = """
+SELECT approver_emp_id, COUNT(*)::int
+FROM leave_apply
+WHERE apply_status = 'reviewing'
+  AND is_deleted = FALSE
+  AND approver_emp_id IS NOT NULL
+GROUP BY approver_emp_id
+"""
+
+
+def rebuild_leave_inbox() -> int:
+    """按请假单全量重建待办计数，返回写入行数。"""
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM leave_inbox_counter")
+        cursor.execute(
+            "INSERT INTO leave_inbox_counter (approver_emp_id, pending_count) "
+            + _EXPECTED_INBOX_SQL
+        )
+        return cursor.rowcount
+
+
+def verify_leave_inbox() -> ClosureDiff:
+    """与请假单现算结果对比（忽略已归零的行），返回缺失/多余行数。"""
+    stored = (
+        "SELECT approver_emp_id, pending_count FROM leave_inbox_counter "
+        "WHERE pending_count <> 0"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH expected AS ({_EXPECTED_INBOX_SQL}) "
+            "SELECT "
+            f"(SELECT COUNT(*) FROM (SELECT * FROM expected EXCEPT {stored}) m), "
+            f"(SELECT COUNT(*) FROM ({stored} EXCEPT SELECT * FROM expected) x)"
+        )
+        missing, extra = cursor.fetchone()
+    return ClosureDiff(missing=int(missing), extra=int(extra))
+
+
+def pending_approval_count(employee, *, include_pool: bool = False) -> int:
+    """审批人名下的待审批数（读计数表，不扫描请假单）；include_pool 时加上 HR 共享队列。"""
+    count = 0
+    if employee is not None:
+        count = (
+            LeaveInboxCounter.objects.filter(approver_emp_id=employee.pk)
+            .values_list("pending_count", flat=True)
+            .first()
+        ) or 0
+    if include_pool:
+        count += LeaveApprovalTask.objects.filter(
+            kind=HR_STEP, status="pending", approver_emp__isnull=True
+        ).count()
+    return count
+
+
+INBOX_ORDERING = ("create_time", "id")
+
+
+def approval_inbox(
+    employee,
+    *,
+    cursor: str | None = None,
+    limit: int = 20,
+    include_pool: bool = False,
+) -> KeysetPage:
+    """审批收件箱的一页：待审批任务按到达时间升序，沿 idx_leave_task_inbox 游标翻页；
+    include_pool 时并入 HR 共享队列（idx_leave_task_pool）。条目为请假单（已带出申请人），
+    approval_step 为其当前待审批的任务。"""
+    mine = Q(approver_emp=employee) if employee is not None else Q(pk__in=[])
+    if include_pool:
+        mine |= Q(kind=HR_STEP, approver_emp__isnull=True)
+    queryset = LeaveApprovalTask.objects.filter(mine, status="pending").select_related(
+        "leave", "leave__emp"
+    )
+    page = keyset_paginate(queryset, INBOX_ORDERING, cursor=cursor, limit=limit)
+    for task in page.items:
+        task.leave.approval_step = task
+    page.items = [task.leave for task in page.items]
+    return page
+
+
+# ---------------------------------------------------------------------------
+# 审批链：提交时生成全部步骤，单据上的 approver_emp 冗余当前待审批步骤的审批人
+# （HR 共享队列为空），待办计数表按它累计
+# ---------------------------------------------------------------------------
+
+HR_STEP = "hr"
+
+# 为审核中、尚无审批任务的单据生成审批链：有直属上级时第 1 步由上级审批；请假天数
+# 达到阈值或没有上级时追加 HR 复核。首个步骤直接待审批，其余步骤等待前一步通过。
+_CREATE_TASKS_SQL = """
+INSERT INTO leave_approval_task
+    (leave_id, step, kind, approver_emp_id, status, create_time)
+SELECT l.id, 1, 'manager', l.approver_emp_id, 'pending', l.create_time
+FROM leave_apply l
+WHERE {where} AND l.approver_emp_id IS NOT NULL
+UNION ALL
+SELECT l.id,
+       CASE WHEN l.approver_emp_id IS NULL THEN 1 ELSE 2 END,
+       'hr',
+       NULL,
+       CASE WHEN l.approver_emp_id IS NULL THEN 'pending' ELSE 'waiting' END,
+       l.create_time
+FROM leave_apply l
+WHERE {where} AND (l.approver_emp_id IS NULL OR l.total_days >= %s)
+"""
+
+_WITHOUT_TASKS = """l.apply_status = 'reviewing'
+  AND l.is_deleted = FALSE
+  AND NOT EXISTS (SELECT 1 FROM leave_approval_task t WHERE t.leave_id = l.id)"""
+
+
+def create_approval_tasks(leave_ids: Iterable[str] | None = None) -> int:
+    """为审核中且尚未生成审批链的单据生成审批任务（None 表示全部单据），返回写入行数。"""
+    where, params = _WITHOUT_TASKS, []
+    if leave_ids is not None:
+        ids = [str(pk) for pk in leave_ids if pk]
+        if not ids:
+            return 0
+        where, params = f"{where} AND l.id = ANY(%s)", [ids]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _CREATE_TASKS_SQL.format(where=where),
+            [*params, *params, settings.LEAVE_HR_APPROVAL_DAYS],
+        )
+        return cursor.rowcount
+
+
+def close_approval_tasks(leave_ids: Iterable[str] | None = None) -> int:
+    """取消已不在审核中（已处理或已删除）的单据上未完成的审批任务，返回取消行数。"""
+    where, params = "TRUE", []
+    if leave_ids is not None:
+        ids = [str(pk) for pk in leave_ids if pk]
+        if not ids:
+            return 0
+        where, params = "l.id = ANY(%s)", [ids]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE leave_approval_task t
+            SET status = 'cancelled', decided_at = now()
+            FROM leave_apply l
+            WHERE l.id = t.leave_id
+              AND {where}
+              AND t.status IN ('waiting', 'pending')
+              AND (l.apply_status <> 'reviewing' OR l.is_deleted)
+            """,
+            params,
+        )
+        return cursor.rowcount
+
+
+def decide_approval_tasks(
+    leave_ids: Sequence[str],
+    *,
+    approve: bool,
+    decided_by: str | None,
+    operator: str,
+) -> dict[str, str | None]:
+    """处理单据当前待审批的步骤（须在调用方事务内、单据已锁定时执行）。
+
+    批准时激活下一步骤并把单据转给其审批人，返回 {仍在审批中的单据: 下一步审批人}，
+    HR 共享队列的审批人为 None；拒绝时取消其余步骤，返回空字典。
+    """
+    if not leave_ids:
+        return {}
+    ids = list(leave_ids)
+    decided = """
+        UPDATE leave_approval_task
+        SET status = %s, decided_at = now(), decided_by_emp_id = %s
+        WHERE leave_id = ANY(%s) AND status = 'pending'
+    """
+    with connection.cursor() as cursor:
+        if not approve:
+            cursor.execute(
+                f"""
+                WITH decided AS ({decided})
+                UPDATE leave_approval_task
+                SET status = 'cancelled', decided_at = now()
+                WHERE leave_id = ANY(%s) AND status = 'waiting'
+                """,
+                ["rejected", decided_by, ids, ids],
+            )
+            return {}
+        cursor.execute(
+            f"""
+            WITH decided AS ({decided}),
+            activated AS (
+                UPDATE leave_approval_task t
+                SET status = 'pending', create_time = now()
+                FROM (
+                    SELECT DISTINCT ON (leave_id) id
+                    FROM leave_approval_task
+                    WHERE leave_id = ANY(%s) AND status = 'waiting'
+                    ORDER BY leave_id, step
+                ) n
+                WHERE t.id = n.id
+                RETURNING t.leave_id, t.approver_emp_id
+            )
+            UPDATE leave_apply l
+            SET approver_emp_id = a.approver_emp_id,
+                update_by = %s,
+                update_time = now()
+            FROM activated a
+            WHERE l.id = a.leave_id
+            RETURNING l.id, l.approver_emp_id
+            """,
+            ["approved", decided_by, ids, ids, operator],
+        )
+        return {
+            str(pk): str(approver) if approver else None
+            for pk, approver in cursor.fetchall()
+        }
+
+
+def rebuild_approval_tasks() -> tuple[int, int]:
+    """补齐缺失的审批链、关闭已处理单据上的残留任务，并让单据上的审批人与当前
+    待审批步骤一致；返回 (新建任务数, 关闭任务数)。之后须重建待办计数。"""
+    closed = close_approval_tasks()
+    created = create_approval_tasks()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            UPDATE leave_apply l
+            SET approver_emp_id = t.approver_emp_id
+            FROM leave_approval_task t
+            WHERE t.leave_id = l.id
+              AND t.status = 'pending'
+              AND l.apply_status = 'reviewing'
+              AND l.is_deleted = FALSE
+              AND l.approver_emp_id IS DISTINCT FROM t.approver_emp_id
+            """
+        )
+    return created, closed
+
+
+def verify_approval_tasks() -> ClosureDiff:
+    """missing：审核中却没有恰好一个与单据审批人一致的待审批步骤的单据数；
+    extra：已不在审核中却仍有未完成步骤的单据数。"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT
+              (SELECT COUNT(*)
+               FROM leave_apply l
+               CROSS JOIN LATERAL (
+                   SELECT COUNT(*) AS pending,
+                          COUNT(*) FILTER (
+                              WHERE t.approver_emp_id IS NOT DISTINCT FROM
+                                    l.approver_emp_id
+                          ) AS matching
+                   FROM leave_approval_task t
+                   WHERE t.leave_id = l.id AND t.status = 'pending'
+               ) p
+               WHERE l.apply_status = 'reviewing'
+                 AND l.is_deleted = FALSE
+                 AND NOT (p.pending = 1 AND p.matching = 1)),
+              (SELECT COUNT(DISTINCT t.leave_id)
+               FROM leave_approval_task t
+               JOIN leave_apply l ON l.id = t.leave_id
+               WHERE t.status IN ('waiting', 'pending')
+                 AND (l.apply_status <> 'reviewing' OR l.is_deleted))
+            """
+        )
+        missing, extra = cursor.fetchone()
+    return ClosureDiff(missing=int(missing), extra=int(extra))
+
+
+# ---------------------------------------------------------------------------
+# 请假额度台账：流水只追加，余额表为流水累计；时间段按开始时间所在年度归属
+# ---------------------------------------------------------------------------
+
+# 每类流水对 (已入账, 审核中占用, 已使用) 的影响方向
+LEDGER_EFFECTS = {
+    "accrual": (1, 0, 0),
+    "reserve": (0, 1, 0),
+    "release": (0, -1, 0),
+    "consume": (0, -1, 1),
+    "restore": (0, 0, -1),
+}
+
+# 请假单状态占用额度的方式：审核中占用、已批准/已完成为已使用，其余不占用
+LEDGER_HOLDINGS = {"reviewing": "pending", "approved": "used", "completed": "used"}
+
+# 占用方式变化时需要记的流水
+LEDGER_MOVES = {
+    (None, "pending"): ("reserve",),
+    (None, "used"): ("reserve", "consume"),
+    ("pending", None): ("release",),
+    ("pending", "used"): ("consume",),
+    ("used", None): ("restore",),
+    ("used", "pending"): ("restore", "reserve"),
+}
+
+# 按司龄分档的入账规则（见 apps.leave.accrual）
+ACCRUAL_RULES_SQL = """
+SELECT leave_type, min_years, annual_days, frequency
+FROM config_leave_accrual_rule
+WHERE status = 'enabled'
+  AND is_deleted = FALSE
+"""
+
+# 额度配置：启用、未删除、指定了请假类型且最长天数大于 0 的理由配置，开户时入账
+# max_days；配置了入账规则的类型由规则按周期入账，开户入账为 0
+_QUOTA_CONFIG_SQL = f"""
+SELECT leave_type, max_days
+FROM config_leave_reason
+WHERE leave_type IS NOT NULL
+  AND status = 'enabled'
+  AND is_deleted = FALSE
+  AND max_days > 0
+  AND leave_type NOT IN (SELECT leave_type FROM ({ACCRUAL_RULES_SQL}) r)
+UNION ALL
+SELECT DISTINCT leave_type, 0 FROM ({ACCRUAL_RULES_SQL}) r
+"""
+
+
+def ledger_holding(apply_status: str, is_deleted: bool = False) -> str | None:
+    return None if is_deleted else LEDGER_HOLDINGS.get(apply_status)
+
+
+def ledger_moves(before: str | None, after: str | None) -> tuple[str, ...]:
+    return LEDGER_MOVES.get((before, after), ())
+
+
+def _leave_years_sql(where: str) -> str:
+    """请假单按 (员工, 类型, 年度) 汇总的时间段天数；第一个参数为时区。"""
+    return f"""
+        SELECT l.id AS leave_id, l.emp_id, l.leave_type, l.apply_status,
+               EXTRACT(YEAR FROM s.leave_start_time AT TIME ZONE %s)::int AS year,
+               SUM(s.segment_days) AS days
+        FROM leave_apply l
+        JOIN leave_time_segment s ON s.leave_id = l.id
+        WHERE {where}
+        GROUP BY l.id, l.emp_id, l.leave_type, l.apply_status, 5
+    """
+
+
+def _effect_sql(position: int, days: str = "days") -> str:
+    cases = " ".join(
+        f"WHEN '{entry_type}' THEN {days} * {effect[position]}"
+        for entry_type, effect in LEDGER_EFFECTS.items()
+        if effect[position]
+    )
+    return f"CASE entry_type {cases} ELSE 0 END"
+
+
+def post_leave_ledger(leave_ids: Iterable[str], entry_types: Sequence[str]) -> int:
+    """按请假单记账：首次出现的 (员工, 类型, 年度) 先开户并按额度配置入账，
+    再逐类写流水并更新余额。须在调用方事务内执行，返回写入的流水行数。"""
+    ids = [str(pk) for pk in leave_ids if pk]
+    if not ids or not entry_types:
+        return 0
+    leave_years = _leave_years_sql("l.id = ANY(%s)")
+    params = [settings.TIME_ZONE, ids]
+    posted = 0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH opened AS (
+                INSERT INTO leave_balance
+                    (emp_id, leave_type, year, accrued, pending, used, update_time)
+                SELECT k.emp_id, k.leave_type, k.year,
+                       COALESCE(q.max_days, 0), 0, 0, now()
+                FROM (SELECT DISTINCT emp_id, leave_type, year
+                      FROM ({leave_years}) seg) k
+                LEFT JOIN ({_QUOTA_CONFIG_SQL}) q ON q.leave_type = k.leave_type
+                ON CONFLICT (emp_id, leave_type, year) DO NOTHING
+                RETURNING emp_id, leave_type, year, accrued
+            )
+            INSERT INTO leave_ledger_entry
+                (emp_id, leave_type, year, entry_type, days, leave_id, create_time)
+            SELECT emp_id, leave_type, year, 'accrual', accrued, NULL, now()
+            FROM opened
+            WHERE accrued > 0
+            """,
+            params,
+        )
+        posted += cursor.rowcount
+        for entry_type in entry_types:
+            accrued, pending, used = LEDGER_EFFECTS[entry_type]
+            cursor.execute(
+                f"""
+                WITH entries AS (
+                    INSERT INTO leave_ledger_entry
+                        (emp_id, leave_type, year, entry_type, days, leave_id,
+                         create_time)
+                    SELECT emp_id, leave_type, year, %s, days, leave_id, now()
+                    FROM ({leave_years}) seg
+                    RETURNING emp_id, leave_type, year, days
+                )
+                UPDATE leave_balance b
+                SET accrued = b.accrued + d.days * %s,
+                    pending = b.pending + d.days * %s,
+                    used = b.used + d.days * %s,
+                    update_time = now()
+                FROM (SELECT emp_id, leave_type, year, SUM(days) AS days
+                      FROM entries GROUP BY emp_id, leave_type, year) d
+                WHERE b.emp_id = d.emp_id
+                  AND b.leave_type = d.leave_type
+                  AND b.year = d.year
+                """,
+                [entry_type, *params, accrued, pending, used],
+            )
+            posted += cursor.rowcount
+    return posted
+
+
+@dataclass(frozen=True)
+class QuotaShortfall:
+    """某年度额度不足：本次申请 requested 天，可用 available 天。"""
+
+    leave_type: str
+    year: int
+    requested: Decimal
+    available: Decimal
+
+    @property
+    def message(self) -> str:
+        label = dict(LeaveApply.LEAVE_TYPE_CHOICES).get(self.leave_type, "")
+        return (
+            f"{self.year} 年{label}剩余 {self.available} 天，"
+            f"本次申请 {self.requested} 天，超出额度"
+        )
+
+
+class LeaveQuotaError(ValidationError):
+    def __init__(self, shortfalls: Sequence[QuotaShortfall]):
+        self.shortfalls = list(shortfalls)
+        super().__init__([shortfall.message for shortfall in self.shortfalls])
+
+
+def check_leave_quota(
+    employee, leave_type: str, segments: Sequence[Segment]
+) -> list[QuotaShortfall]:
+    """一次查询读取额度配置与余额行，返回超出额度的年度（不扫描请假历史）。
+
+    未配置额度的类型不限；尚未开户的年度按配置额度全额可用，
+    按入账规则入账的类型只能使用已入账的天数。
+    """
+    calendar = calendar_for_employee(employee)
+    requested: dict[int, Decimal] = {}
+    for start, end in segments:
+        year = timezone.localtime(start).year
+        requested[year] = requested.get(year, Decimal("0")) + segment_days(
+            start, end, calendar
+        )
+    if not requested:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT y.year,
+                   COALESCE(b.accrued, q.max_days)
+                   - COALESCE(b.used, 0) - COALESCE(b.pending, 0)
+            FROM ({_QUOTA_CONFIG_SQL}) q
+            CROSS JOIN unnest(%s::int[]) AS y(year)
+            LEFT JOIN leave_balance b
+              ON b.emp_id = %s AND b.leave_type = q.leave_type AND b.year = y.year
+            WHERE q.leave_type = %s
+            """,
+            [list(requested), str(employee.pk), leave_type],
+        )
+        rows = cursor.fetchall()
+    return [
+        QuotaShortfall(leave_type, year, requested[year], available)
+        for year, available in sorted(rows)
+        if requested[year] > available
+    ]
+
+
+def _rebuild_moves_sql() -> tuple[str, list[str]]:
+    """请假单状态 -> 应有流水类型（从未占用走到当前占用方式）。"""
+    rows = [
+        (status, entry_type)
+        for status, _ in LeaveApply.STATUS_CHOICES
+        for entry_type in ledger_moves(None, ledger_holding(status))
+    ]
+    values = ", ".join(["(%s, %s)"] * len(rows))
+    return values, [value for row in rows for value in row]
+
+
+def rebuild_leave_balance() -> int:
+    """按请假历史重建台账：保留入账流水，重写请假流水并补记缺失的入账，
+    再由流水汇总出余额表。返回余额行数。"""
+    leave_years = _leave_years_sql("l.is_deleted = FALSE")
+    values, move_params = _rebuild_moves_sql()
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM leave_ledger_entry WHERE entry_type <> 'accrual'")
+        cursor.execute(
+            f"""
+            INSERT INTO leave_ledger_entry
+                (emp_id, leave_type, year, entry_type, days, leave_id, create_time)
+            SELECT seg.emp_id, seg.leave_type, seg.year, m.entry_type, seg.days,
+                   seg.leave_id, now()
+            FROM ({leave_years}) seg
+            JOIN (VALUES {values}) AS m(apply_status, entry_type)
+              ON m.apply_status = seg.apply_status
+            """,
+            [settings.TIME_ZONE, *move_params],
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO leave_ledger_entry
+                (emp_id, leave_type, year, entry_type, days, leave_id, create_time)
+            SELECT k.emp_id, k.leave_type, k.year, 'accrual', q.max_days, NULL, now()
+            FROM (SELECT DISTINCT emp_id, leave_type, year
+                  FROM leave_ledger_entry) k
+            JOIN ({_QUOTA_CONFIG_SQL}) q ON q.leave_type = k.leave_type
+            WHERE q.max_days > 0
+              AND NOT EXISTS (
+                SELECT 1 FROM leave_ledger_entry a
+                WHERE a.entry_type = 'accrual'
+                  AND a.emp_id = k.emp_id
+                  AND a.leave_type = k.leave_type
+                  AND a.year = k.year
+            )
+            """
+        )
+        cursor.execute("DELETE FROM leave_balance")
+        cursor.execute(
+            f"""
+            INSERT INTO leave_balance
+                (emp_id, leave_type, year, accrued, pending, used, update_time)
+            SELECT emp_id, leave_type, year,
+                   SUM({_effect_sql(0)}), SUM({_effect_sql(1)}), SUM({_effect_sql(2)}),
+                   now()
+            FROM leave_ledger_entry
+            GROUP BY emp_id, leave_type, year
+            """
+        )
+        return cursor.rowcount
+
+
+def verify_leave_balance() -> ClosureDiff:
+    """余额表与“入账流水 + 请假历史”现算结果对比（忽略全零行）。"""
+    leave_years = _leave_years_sql("l.is_deleted = FALSE")
+    pending = [s for s, h in LEDGER_HOLDINGS.items() if h == "pending"]
+    used = [s for s, h in LEDGER_HOLDINGS.items() if h == "used"]
+    expected = f"""
+        SELECT emp_id, leave_type, year,
+               SUM(accrued)::numeric, SUM(pending)::numeric, SUM(used)::numeric
+        FROM (
+            SELECT emp_id, leave_type, year, 0 AS accrued,
+                   CASE WHEN apply_status = ANY(%s) THEN days ELSE 0 END AS pending,
+                   CASE WHEN apply_status = ANY(%s) THEN days ELSE 0 END AS used
+            FROM ({leave_years}) seg
+            UNION ALL
+            SELECT emp_id, leave_type, year, days, 0, 0
+            FROM leave_ledger_entry
+            WHERE entry_type = 'accrual'
+        ) moves
+        GROUP BY emp_id, leave_type, year
+        HAVING SUM(accrued) <> 0 OR SUM(pending) <> 0 OR SUM(used) <> 0
+    """
+    stored = (
+        "SELECT emp_id, leave_type, year, accrued::numeric, pending::numeric, "
+        "used::numeric FROM leave_balance "
+        "WHERE accrued <> 0 OR pending <> 0 OR used <> 0"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH expected AS ({expected}) "
+            "SELECT "
+            f"(SELECT COUNT(*) FROM (SELECT * FROM expected EXCEPT {stored}) m), "
+            f"(SELECT COUNT(*) FROM ({stored} EXCEPT SELECT * FROM expected) x)",
+            [pending, used, settings.TIME_ZONE],
+        )
+        missing, extra = cursor.fetchone()
+    return ClosureDiff(missing=int(missing), extra=int(extra))
@@ -0,0 +1,271 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.attendance.models import WorkCalendarDay
+from apps.employee.models import Employee
+from apps.organization.models import Organization
+from apps.organization.services import org_ancestor_ids
+from utils.textsearch import search_vector
+from .analytics import recompute_subtree_leave_stats, retract_leave_stats
+from .calendar import invalidate_leave_calendar
+from .days import (
+    refresh_employee_leave_days,
+    refresh_leave_days,
+    refresh_leave_days_on,
+    refresh_org_leave_days,
+)
+from .models import LeaveApply, LeaveTimeSegment
+from .profile import (
+    refresh_employee_leave_profiles,
+    refresh_leave_profiles,
+    refresh_org_leave_profiles,
+)
+from .services import (
+    apply_inbox_deltas,
+    close_approval_tasks,
+    create_approval_tasks,
+    is_pending,
+    ledger_holding,
+    ledger_moves,
+    post_leave_ledger,
+    reassign_pending_approvals,
+)
+
+
+@receiver(pre_save, sender=LeaveApply)
+def assign_search_vector(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None:
+        instance.search_vector = search_vector(
+            *(getattr(instance, name) for name in LeaveApply.SEARCH_FIELDS)
+        )
+
+
+@receiver(pre_save, sender=LeaveApply)
+def remember_inbox_state(sender, instance, **kwargs):
+    # 新单据默认交给申请人当时的直属上级审批；已有单据记下原计数键与额度占用方式，保存后增减
+    instance._previous_approver_id = None
+    instance._previous_holding = None
+    if instance._state.adding:
+        if instance.approver_emp_id is None:
+            instance.approver_emp_id = (
+                Employee.objects.filter(pk=instance.emp_id)
+                .values_list("manager_emp_id", flat=True)
+                .first()
+            )
+        return
+    previous = (
+        LeaveApply.objects.filter(pk=instance.pk)
+        .values_list("approver_emp_id", "apply_status", "is_deleted")
+        .first()
+    )
+    if previous and previous[0] and previous[1] == "reviewing" and not previous[2]:
+        instance._previous_approver_id = str(previous[0])
+    if previous:
+        instance._previous_holding = ledger_holding(previous[1], previous[2])
+
+
+@receiver(post_save, sender=LeaveApply)
+def maintain_inbox_counter(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous_approver_id", None)
+    current = str(instance.approver_emp_id) if is_pending(instance) else None
+    if previous == current:
+        return
+    deltas = {}
+    if previous:
+        deltas[previous] = -1
+    if current:
+        deltas[current] = deltas.get(current, 0) + 1
+    apply_inbox_deltas(deltas)
+
+
+@receiver(post_save, sender=LeaveApply)
+def maintain_leave_ledger(sender, instance, created, **kwargs):
+    # 新单据的占用由 submit_leave 在写入时间段后记账；这里只处理直接保存引起的状态/删除变化
+    if created:
+        return
+    moves = ledger_moves(
+        getattr(instance, "_previous_holding", None),
+        ledger_holding(instance.apply_status, instance.is_deleted),
+    )
+    post_leave_ledger([instance.pk], moves)
+
+
+@receiver(post_save, sender=LeaveApply)
+def maintain_approval_tasks(sender, instance, created, **kwargs):
+    # 新单据生成审批链；直接保存使单据离开审核中（含软删除）时关闭未完成的步骤
+    if created:
+        create_approval_tasks([instance.pk])
+    elif getattr(instance, "_previous_holding", None) == "pending" and (
+        ledger_holding(instance.apply_status, instance.is_deleted) != "pending"
+    ):
+        close_approval_tasks([instance.pk])
+
+
+@receiver(pre_delete, sender=LeaveApply)
+def reverse_leave_ledger(sender, instance, **kwargs):
+    # 物理删除前时间段仍在，先按当前占用方式冲回
+    moves = ledger_moves(
+        ledger_holding(instance.apply_status, instance.is_deleted), None
+    )
+    post_leave_ledger([instance.pk], moves)
+
+
+@receiver(pre_delete, sender=LeaveApply)
+def retract_leave_month_stats(sender, instance, **kwargs):
+    # 宽表行随级联删除，不经增量刷新，先从统计汇总中扣除
+    retract_leave_stats([instance.pk])
+
+
+@receiver(post_delete, sender=LeaveApply)
+def release_inbox_counter(sender, instance, **kwargs):
+    if is_pending(instance):
+        apply_inbox_deltas({instance.approver_emp_id: -1})
+
+
+@receiver(post_save, sender=Employee)
+def follow_manager_change(sender, instance, created, **kwargs):
+    # 上级变化由员工信号在 pre_save 中记录（见 apps.employee.signals）
+    previous = getattr(instance, "_reporting_state", None)
+    if created or previous is None or previous[0] == instance.manager_emp_id:
+        return
+    reassign_pending_approvals([instance.pk])
+
+
+@receiver(post_save, sender=LeaveTimeSegment)
+@receiver(post_delete, sender=LeaveTimeSegment)
+def invalidate_segment_calendar(sender, instance, created=False, **kwargs):
+    # 修改已有时间段时原时间范围未知，整体失效（批量写入走服务层，按月份失效）
+    if created or kwargs["signal"] is post_delete:
+        transaction.on_commit(
+            partial(
+                invalidate_leave_calendar,
+                [(instance.leave_start_time, instance.leave_end_time)],
+            )
+        )
+    else:
+        transaction.on_commit(invalidate_leave_calendar)
+
+
+@receiver(post_save, sender=Employee)
+def invalidate_employee_calendar(sender, instance, created, **kwargs):
+    # 入职、调岗、状态变化、改名都会影响日历中的人员与可用人数
+    previous = getattr(instance, "_headcount_key", None)
+    current = (
+        None
+        if instance.is_deleted
+        else (str(instance.org_id), instance.emp_status, instance.employment_type)
+    )
+    if previous:
+        previous = (str(previous[0]), *previous[1:])
+    renamed = getattr(instance, "_previous_name", None) not in (None, instance.emp_name)
+    if created or previous != current or renamed:
+        transaction.on_commit(invalidate_leave_calendar)
+
+
+@receiver(post_save, sender=Organization)
+@receiver(post_delete, sender=Organization)
+def invalidate_org_calendar(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_leave_calendar)
+
+
+@receiver(post_save, sender=LeaveApply)
+def refresh_leave_profile(sender, instance, **kwargs):
+    refresh_leave_profiles([instance.pk])
+
+
+@receiver(post_save, sender=LeaveTimeSegment)
+@receiver(post_delete, sender=LeaveTimeSegment)
+def refresh_segment_leave_profile(sender, instance, **kwargs):
+    origin = kwargs.get("origin")
+    if getattr(origin, "model", type(origin)) is LeaveApply:
+        # 随请假单物理删除级联删除的时间段，不能再把宽表行写回来
+        return
+    refresh_leave_profiles([instance.leave_id])
+
+
+@receiver(post_save, sender=Employee)
+def refresh_employee_profiles(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_previous_profile", None)
+    if created or previous is None:
+        return
+    current = (
+        instance.emp_id,
+        instance.emp_name,
+        str(instance.org_id),
+        instance.is_deleted,
+        instance.email,
+    )
+    if (previous[0], previous[1], str(previous[2]), *previous[3:]) != current:
+        refresh_employee_leave_profiles([instance.pk])
+
+
+@receiver(post_save, sender=Organization)
+def refresh_org_profiles(sender, instance, created, **kwargs):
+    label = getattr(instance, "_previous_label", None)
+    state = getattr(instance, "_hierarchy_state", None)
+    if created or label is None:
+        return
+    if label != (instance.org_code, instance.org_name) or (
+        state is not None and state[1] != instance.is_deleted
+    ):
+        refresh_org_leave_profiles([instance.pk])
+
+
+@receiver(post_save, sender=Organization)
+def recompute_org_leave_stats(sender, instance, created, **kwargs):
+    # 排在宽表刷新之后：新旧祖先链的子树统计随整棵子树迁移/摘除而变化
+    previous = getattr(instance, "_hierarchy_state", None)
+    if created or previous is None:
+        return
+    if previous != (instance.parent_org_id, instance.is_deleted):
+        recompute_subtree_leave_stats(
+            [
+                *getattr(instance, "_previous_ancestor_ids", []),
+                *org_ancestor_ids(instance.pk),
+            ]
+        )
+
+
+@receiver(post_save, sender=LeaveApply)
+def refresh_leave_apply_days(sender, instance, created, **kwargs):
+    # 新建的单据还没有时间段，由时间段信号或服务层展开
+    if not created:
+        refresh_leave_days([instance.pk])
+
+
+@receiver(post_save, sender=LeaveTimeSegment)
+@receiver(post_delete, sender=LeaveTimeSegment)
+def refresh_segment_leave_days(sender, instance, **kwargs):
+    origin = kwargs.get("origin")
+    if getattr(origin, "model", type(origin)) is LeaveApply:
+        return
+    refresh_leave_days([instance.leave_id])
+
+
+@receiver(post_save, sender=Employee)
+def refresh_transferred_leave_days(sender, instance, created, **kwargs):
+    # 调岗后适用的工作日历可能不同
+    previous = getattr(instance, "_previous_profile", None)
+    if created or previous is None:
+        return
+    if str(previous[2]) != str(instance.org_id):
+        refresh_employee_leave_days([instance.pk])
+
+
+@receiver(post_save, sender=Organization)
+def refresh_moved_org_leave_days(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_hierarchy_state", None)
+    if created or previous is None:
+        return
+    # 上级变化或删除都会改变子树继承到的日历覆盖
+    if previous != (instance.parent_org_id, instance.is_deleted):
+        refresh_org_leave_days([instance.pk])
+
+
+@receiver(post_save, sender=WorkCalendarDay)
+@receiver(post_delete, sender=WorkCalendarDay)
+def refresh_calendar_day_leave_days(sender, instance, **kwargs):
+    refresh_leave_days_on(instance.day)
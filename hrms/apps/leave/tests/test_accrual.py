@@ -0,0 +1,149 @@
+from datetime import date, datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.config.models import LeaveAccrualRule, LeaveReasonConfig
+from apps.employee.models import Employee
+from apps.leave.accrual import run_leave_accrual
+from apps.leave.models import LeaveBalance, LeaveLedgerEntry
+from apps.leave.services import (
+    LeaveQuotaError,
+    rebuild_leave_balance,
+    submit_leave,
+    verify_leave_balance,
+)
+from apps.organization.models import Organization
+
+
+class LeaveAccrualTests(TestCase):
+    def setUp(self) -> None:
+        self.org = Organization.objects.create(
+            org_code="ACC-ORG",
+            org_name="入账中心",
+            org_type="company",
+            effective_time=timezone.now(),
+            status="enabled",
+            create_by="tests",
+            update_by="tests",
+        )
+        # 2031-03-01 时：满 11 年、满 20 年、不满 1 年、当月才入职、已离职
+        self.senior = self._create_emp("C001", date(2020, 2, 1))
+        self.veteran = self._create_emp("C002", date(2011, 3, 1))
+        self.junior = self._create_emp("C003", date(2030, 6, 1))
+        self.newcomer = self._create_emp("C004", date(2031, 3, 15))
+        self.leaver = self._create_emp("C005", date(2001, 1, 1), status="resigned")
+        LeaveReasonConfig.objects.create(
+            name="年假",
+            leave_type="annual",
+            max_days=Decimal("5"),
+            create_by="tests",
+            update_by="tests",
+        )
+        for min_years, days in ((1, "5"), (10, "10"), (20, "15")):
+            self._rule("annual", min_years, days)
+        self._rule("marriage", 0, "3", frequency="yearly")
+
+    def _create_emp(self, emp_id, hire_date, status="active") -> Employee:
+        return Employee.objects.create(
+            emp_id=emp_id,
+            id_card=f"42012319900101{emp_id[-3:]}1",
+            emp_name=f"入账员工{emp_id}",
+            gender="male",
+            birth_date=date(1980, 1, 1),
+            phone="13800000000",
+            email=f"{emp_id.lower()}@example.com",
+            hire_date=hire_date,
+            org=self.org,
+            position="员工",
+            employment_type="full_time",
+            emp_status=status,
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _rule(self, leave_type, min_years, days, frequency="monthly") -> None:
+        LeaveAccrualRule.objects.create(
+            leave_type=leave_type,
+            min_years=min_years,
+            annual_days=Decimal(days),
+            frequency=frequency,
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _accrued(self, emp, leave_type="annual", year=2031) -> Decimal:
+        balance = LeaveBalance.objects.filter(
+            emp=emp, leave_type=leave_type, year=year
+        ).first()
+        return balance.accrued if balance else Decimal("0")
+
+    def test_monthly_accrual_is_tiered_and_idempotent(self) -> None:
+        print("\n[额度入账验证] 按司龄分档、按月折算，同一周期重复运行不重复入账...")
+        run = run_leave_accrual("monthly", date(2031, 3, 20))
+        print(f"[2031-03] 适用 {run.eligible} 人次，入账 {run.posted} 条")
+        self.assertEqual(run.period, date(2031, 3, 1))
+        self.assertEqual((run.eligible, run.posted, run.skipped), (2, 2, 0))
+        # 第 3 个月：round(10×3/12) - round(10×2/12) = 2.50 - 1.67
+        self.assertEqual(self._accrued(self.senior), Decimal("0.83"))
+        self.assertEqual(self._accrued(self.veteran), Decimal("1.25"))
+        self.assertEqual(run.days, Decimal("2.08"))
+        self.assertEqual(self._accrued(self.junior), 0)
+        self.assertEqual(self._accrued(self.newcomer), 0)
+        self.assertEqual(self._accrued(self.leaver), 0)
+
+        again = run_leave_accrual("monthly", date(2031, 3, 1))
+        self.assertEqual((again.posted, again.skipped), (0, 2))
+        self.assertEqual(self._accrued(self.senior), Decimal("0.83"))
+
+        # 补跑全年：逐月舍入不累积误差，全年合计恰为年度天数
+        for month in range(1, 13):
+            run_leave_accrual("monthly", date(2031, month, 1))
+        self.assertEqual(self._accrued(self.senior), Decimal("10"))
+        self.assertEqual(
+            LeaveLedgerEntry.objects.filter(
+                emp=self.senior, entry_type="accrual"
+            ).count(),
+            12,
+        )
+        # 新员工 4 月起入账，满 1 年前不适用任何一档
+        self.assertEqual(self._accrued(self.newcomer), 0)
+
+        yearly = run_leave_accrual("yearly", date(2031, 7, 1))
+        self.assertEqual((yearly.period, yearly.posted), (date(2031, 1, 1), 3))
+        self.assertEqual(self._accrued(self.junior, "marriage"), Decimal("3"))
+        self.assertTrue(verify_leave_balance().ok)
+        print("[校验通过] 各档天数正确，重复与补跑都不会重复入账。")
+
+    def test_rule_driven_quota_and_command(self) -> None:
+        print("\n[额度入账验证] 规则类型只能使用已入账天数，重建台账保留入账流水...")
+        start = timezone.make_aware(datetime(2031, 3, 3, 9))
+        segments = [(start, start.replace(hour=18))]
+        # 配置了入账规则后不再按理由配置的最长天数开户入账
+        with self.assertRaises(LeaveQuotaError):
+            submit_leave(
+                self.senior, leave_type="annual", segments=segments, operator="t"
+            )
+
+        out = StringIO()
+        call_command("run_leave_accrual", "--date", "2031-03-01", stdout=out)
+        self.assertIn("月度入账 2031-03-01：适用 2 人次，新入账 2 条", out.getvalue())
+        self.assertIn("年度入账 2031-01-01：适用 3 人次", out.getvalue())
+        call_command("run_leave_accrual", "--date", "2031-02-01", stdout=StringIO())
+
+        leave = submit_leave(
+            self.veteran, leave_type="annual", segments=segments, operator="t"
+        )
+        self.assertEqual(leave.total_days, Decimal("1.00"))
+        # 2 月 1 日司龄未满 20 年按 10 天档（0.84），3 月起按 15 天档（1.25）
+        balance = LeaveBalance.objects.get(emp=self.veteran, leave_type="annual")
+        self.assertEqual((balance.accrued, balance.pending), (Decimal("2.09"), 1))
+
+        rebuild_leave_balance()
+        balance = LeaveBalance.objects.get(emp=self.veteran, leave_type="annual")
+        self.assertEqual((balance.accrued, balance.pending), (Decimal("2.09"), 1))
+        self.assertTrue(verify_leave_balance().ok)
+        print("[校验通过] 额度校验以入账流水为准，重建后余额不变。")
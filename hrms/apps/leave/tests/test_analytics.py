@@ -0,0 +1,185 @@
+from datetime import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.employee.models import Employee
+from apps.leave.analytics import leave_pivot, verify_leave_stats
+from apps.leave.models import LeaveApply, LeaveMonthStat
+from apps.leave.services import bulk_transition, submit_leave
+from apps.organization.models import Organization
+from apps.organization.restructure import restructure_orgs
+
+
+def _at(year, month, day, hour) -> datetime:
+    return timezone.make_aware(datetime(year, month, day, hour))
+
+
+class LeaveAnalyticsTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.root = self._create_org("ANA-ROOT", "分析集团")
+        self.dept_a = self._create_org("ANA-A", "交付部", parent=self.root)
+        self.team = self._create_org("ANA-A1", "交付一组", parent=self.dept_a)
+        self.dept_b = self._create_org("ANA-B", "运营部", parent=self.root)
+        self.admin = User.objects.create_superuser(username="ana-admin", password="x")
+        self.mgr_user = User.objects.create_user(username="ana-mgr", password="x")
+        self.manager = self._create_emp("A001", "运营经理", self.dept_b, self.mgr_user)
+        self.dev = self._create_emp("A002", "交付专员", self.team)
+        self.ops = self._create_emp("A003", "运营专员", self.dept_b)
+        self.dept_b.manager_emp = self.manager
+        self.dept_b.save()
+
+        self.march = self._submit(self.dev, "personal", _at(2031, 3, 4, 9), 18)
+        self.last_year = self._submit(self.dev, "sick", _at(2030, 3, 5, 9), 12)
+        self.april = self._submit(self.ops, "personal", _at(2031, 4, 8, 9), 18)
+        bulk_transition(
+            self.admin, [self.march.pk, self.last_year.pk, self.april.pk], "approve"
+        )
+
+    def _create_org(self, code, name, parent=None) -> Organization:
+        return Organization.objects.create(
+            org_code=code,
+            org_name=name,
+            org_type="company" if parent is None else "department",
+            parent_org=parent,
+            effective_time=timezone.now(),
+            status="enabled",
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _create_emp(self, emp_id, name, org, user=None) -> Employee:
+        return Employee.objects.create(
+            emp_id=emp_id,
+            id_card=f"42012319900101{emp_id[-3:]}1",
+            emp_name=name,
+            gender="male",
+            birth_date=timezone.now().date(),
+            phone="13800000000",
+            email=f"{emp_id.lower()}@example.com",
+            hire_date=timezone.now().date(),
+            org=org,
+            position="员工",
+            employment_type="full_time",
+            emp_status="active",
+            user=user,
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _submit(self, emp, leave_type, start, end_hour) -> LeaveApply:
+        return submit_leave(
+            emp,
+            leave_type=leave_type,
+            segments=[(start, start.replace(hour=end_hour))],
+            operator="tests",
+        )
+
+    def _cell(self, org, month, leave_type="personal", status="approved"):
+        row = LeaveMonthStat.objects.filter(
+            org=org, month=month, leave_type=leave_type, apply_status=status
+        ).first()
+        if row is None:
+            return (Decimal("0"), 0, Decimal("0"), 0)
+        return (row.direct_days, row.direct_count, row.subtree_days, row.subtree_count)
+
+    def test_stats_follow_leave_employee_and_org_changes(self) -> None:
+        print("\n[统计汇总验证] 审批、调岗、组织迁移、删除后汇总随之增量更新...")
+        march = datetime(2031, 3, 1).date()
+        self.assertEqual(self._cell(self.team, march), (1, 1, 1, 1))
+        self.assertEqual(self._cell(self.dept_a, march), (0, 0, 1, 1))
+        self.assertEqual(self._cell(self.root, march), (0, 0, 1, 1))
+        self.assertEqual(self._cell(self.root, march, status="reviewing")[2:], (0, 0))
+        self.assertTrue(verify_leave_stats().ok)
+
+        # 逐条保存组织：新旧祖先链的子树计数重算
+        self.team.parent_org = self.dept_b
+        self.team.save()
+        self.assertEqual(self._cell(self.dept_a, march)[2:], (0, 0))
+        self.assertEqual(self._cell(self.dept_b, march)[2:], (1, 1))
+        self.assertTrue(verify_leave_stats().ok)
+
+        # 批量组织调整同样重算
+        restructure_orgs([(str(self.team.pk), str(self.dept_a.pk))])
+        self.assertEqual(self._cell(self.dept_a, march)[2:], (1, 1))
+        self.assertTrue(verify_leave_stats().ok)
+
+        # 员工调岗：请假单随人归到新组织
+        self.dev.org = self.dept_b
+        self.dev.save()
+        self.assertEqual(self._cell(self.dept_b, march), (1, 1, 1, 1))
+        self.assertEqual(self._cell(self.team, march), (0, 0, 0, 0))
+        self.assertTrue(verify_leave_stats().ok)
+
+        self.april.is_deleted = True
+        self.april.save()
+        self.last_year.delete()
+        self.assertEqual(self._cell(self.root, datetime(2031, 4, 1).date())[2:], (0, 0))
+        self.assertTrue(verify_leave_stats().ok)
+
+        out = StringIO()
+        call_command("rebuild_leave_stats", stdout=out)
+        self.assertIn("校验通过", out.getvalue())
+        self.assertEqual(self._cell(self.dept_b, march), (1, 1, 1, 1))
+        print("[校验通过] 各写入路径下汇总与现算结果一致。")
+
+    def test_pivot_and_report_views(self) -> None:
+        print("\n[统计报表验证] 类型 × 月份透视、同比与下级组织合计只读汇总表...")
+        with self.assertNumQueries(2):
+            pivot = leave_pivot(self.root.pk, 2031)
+        self.assertEqual(
+            [row["leave_type"] for row in pivot["rows"]], ["personal", "sick"]
+        )
+        personal, sick = pivot["rows"]
+        self.assertEqual([cell["days"] for cell in personal["months"][2:4]], [1, 1])
+        self.assertEqual((personal["days"], personal["count"]), (2, 2))
+        self.assertIsNone(personal["yoy"])
+        self.assertEqual(
+            (sick["days"], sick["prev_days"], sick["yoy"]), (0, 0.38, -100)
+        )
+        self.assertEqual(pivot["totals"]["yoy"], 426.3)
+        self.assertEqual(
+            [(c["org_name"], c["days"], c["prev_days"]) for c in pivot["children"]],
+            [("交付部", 1, 0.38), ("运营部", 1, 0)],
+        )
+        company = leave_pivot(None, 2031)
+        self.assertEqual(company["totals"], pivot["totals"])
+        self.assertEqual([c["org_name"] for c in company["children"]], ["分析集团"])
+        reviewing = leave_pivot(self.root.pk, 2031, statuses=["reviewing"])
+        self.assertEqual(reviewing["rows"], [])
+
+        self.client.force_login(self.admin)
+        resp = self.client.get(reverse("leave:analytics"), {"year": 2031})
+        self.assertEqual(resp.status_code, 200)
+        self.assertIsNone(resp.context["pivot"]["org_id"])
+        data = self.client.get(
+            reverse("leave:analytics_api"), {"org": self.root.pk, "year": 2031}
+        ).json()
+        self.assertEqual(data["totals"]["days"], 2)
+        # 超出范围的年份回到今年，而不是在计算上年/次年日期时报 500
+        for year in (0, 1, 10000):
+            data = self.client.get(
+                reverse("leave:analytics_api"), {"year": year}
+            ).json()
+            self.assertEqual(data["year"], timezone.localdate().year)
+
+        # 负责人只能看自己管理的子树，默认落在该子树上
+        self.client.force_login(self.mgr_user)
+        resp = self.client.get(reverse("leave:analytics"), {"year": 2031})
+        self.assertEqual(resp.context["pivot"]["org_id"], str(self.dept_b.pk))
+        self.assertEqual(resp.context["pivot"]["totals"]["days"], 1)
+        resp = self.client.get(
+            reverse("leave:analytics_api"), {"org": self.dept_a.pk, "year": 2031}
+        )
+        self.assertEqual(resp.status_code, 403)
+        outsider = User.objects.create_user(username="ana-user", password="x")
+        self.client.force_login(outsider)
+        self.assertEqual(self.client.get(reverse("leave:analytics")).status_code, 403)
+        print("[校验通过] 报表、JSON 接口与权限范围符合预期。")
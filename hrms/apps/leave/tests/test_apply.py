@@ -0,0 +1,198 @@
+import json
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.employee.models import Employee
+from apps.leave.models import LeaveApply, LeaveTimeSegment
+from apps.leave.services import submit_leave
+from apps.organization.models import Organization
+
+
+class MultiSegmentApplyTests(TestCase):
+    def setUp(self) -> None:
+        self.org = Organization.objects.create(
+            org_code="APPLY-ORG",
+            org_name="研发中心",
+            org_type="company",
+            effective_time=timezone.now(),
+            status="enabled",
+            create_by="tests",
+            update_by="tests",
+        )
+        self.user = User.objects.create_user(username="apply-emp", password="x")
+        self.emp = Employee.objects.create(
+            emp_id="A001",
+            id_card="420123199001010011",
+            emp_name="申请员工",
+            gender="male",
+            birth_date=timezone.now().date(),
+            phone="13800000000",
+            email="a001@example.com",
+            hire_date=timezone.now().date(),
+            org=self.org,
+            position="工程师",
+            employment_type="full_time",
+            emp_status="active",
+            user=self.user,
+            create_by="tests",
+            update_by="tests",
+        )
+        self.client.force_login(self.user)
+        # 从下下周一 9:00 起，天数按工作日历折算（每天 8 个工作小时）
+        base = timezone.localtime(timezone.now() + timedelta(days=7)).replace(
+            hour=9, minute=0, second=0, microsecond=0
+        )
+        base += timedelta(days=7 - base.weekday())
+        self.day = [base + timedelta(days=i) for i in range(5)]
+
+    def _fmt(self, value) -> str:
+        return timezone.localtime(value).strftime("%Y-%m-%dT%H:%M")
+
+    def _occupy(self, start, end) -> LeaveApply:
+        leave = LeaveApply.objects.create(
+            emp=self.emp,
+            leave_type="sick",
+            total_days=1,
+            create_by="tests",
+            update_by="tests",
+        )
+        LeaveTimeSegment.objects.create(
+            leave=leave,
+            emp=self.emp,
+            leave_start_time=start,
+            leave_end_time=end,
+            segment_days=1,
+            create_by="tests",
+            update_by="tests",
+        )
+        return leave
+
+    def test_apply_with_several_segments_inserts_in_bulk(self) -> None:
+        print("\n[分段请假] 一次提交多个时间段，时间段批量写入...")
+        segments = [
+            (self.day[0], self.day[0] + timedelta(hours=12)),
+            (self.day[2], self.day[2] + timedelta(hours=5)),
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            leave = submit_leave(
+                self.emp, leave_type="annual", segments=segments, operator="tests"
+            )
+        segment_inserts = [
+            q
+            for q in ctx.captured_queries
+            if q["sql"].startswith('INSERT INTO "leave_time_segment"')
+        ]
+        self.assertEqual(len(segment_inserts), 1)
+        print(f"[申请结果] {leave.segments.count()} 段, 合计 {leave.total_days} 天")
+        self.assertEqual(leave.segments.count(), 2)
+        # 周一 9:00-21:00 计 1 天，周三 9:00-14:00 扣除午休计 0.5 天
+        self.assertEqual(str(leave.total_days), "1.50")
+
+        data = {
+            "leave_type": "annual",
+            "reason": "页面提交",
+            "start_time": [self._fmt(self.day[3]), self._fmt(self.day[4])],
+            "end_time": [
+                self._fmt(self.day[3] + timedelta(hours=8)),
+                self._fmt(self.day[4] + timedelta(hours=8)),
+            ],
+        }
+        resp = self.client.post(reverse("leave:apply"), data)
+        self.assertRedirects(resp, reverse("leave:list"))
+        self.assertEqual(
+            LeaveTimeSegment.objects.filter(leave__reason="页面提交").count(), 2
+        )
+        print("[校验通过] 主表一条、时间段一条批量 INSERT。")
+
+    def test_conflicting_segments_are_listed(self) -> None:
+        print("\n[冲突预检] 逐段列出与已有请假或本次其他段的重叠...")
+        self._occupy(self.day[1], self.day[1] + timedelta(hours=8))
+        data = {
+            "leave_type": "annual",
+            "reason": "冲突测试",
+            "start_time": [
+                self._fmt(self.day[0]),
+                self._fmt(self.day[1] + timedelta(hours=2)),
+                self._fmt(self.day[0] + timedelta(hours=4)),
+            ],
+            "end_time": [
+                self._fmt(self.day[0] + timedelta(hours=8)),
+                self._fmt(self.day[1] + timedelta(hours=4)),
+                self._fmt(self.day[0] + timedelta(hours=10)),
+            ],
+        }
+        resp = self.client.post(reverse("leave:apply"), data)
+        self.assertEqual(resp.status_code, 200)
+        conflicts = resp.context["conflicts"]
+        print(f"[冲突明细] {[c.message for c in conflicts]}")
+        self.assertEqual([c.index for c in conflicts], [1, 2])
+        self.assertIsNotNone(conflicts[0].leave_id)
+        self.assertEqual(conflicts[1].other_index, 0)
+        self.assertEqual(LeaveApply.objects.filter(emp=self.emp).count(), 1)
+        print("[校验通过] 冲突段被准确定位，未写入任何数据。")
+
+    def test_half_filled_rows_are_not_merged(self) -> None:
+        print("\n[分段校验] 只填了一端的时间段单独报错，不与其他行错位配对...")
+        data = {
+            "leave_type": "annual",
+            "reason": "缺项测试",
+            "start_time": [self._fmt(self.day[0]), "", self._fmt(self.day[3]), ""],
+            "end_time": [
+                "",
+                self._fmt(self.day[1] + timedelta(hours=8)),
+                self._fmt(self.day[3] + timedelta(hours=8)),
+                "",
+            ],
+        }
+        resp = self.client.post(reverse("leave:apply"), data)
+        self.assertEqual(resp.status_code, 200)
+        errors = resp.context["form"].non_field_errors()
+        print(f"[校验信息] {list(errors)}")
+        self.assertEqual(
+            list(errors),
+            ["第 1 段：开始/结束时间不完整", "第 2 段：开始/结束时间不完整"],
+        )
+        # 两端都空的行直接忽略，回显保留其余各行的原始位置
+        self.assertEqual(len(resp.context["form"].segment_rows()), 3)
+        self.assertFalse(LeaveApply.objects.filter(reason="缺项测试").exists())
+        print("[校验通过] 缺项行逐段提示，空行被忽略。")
+
+    def test_json_api(self) -> None:
+        print("\n[接口验证] JSON 接口提交多段请假...")
+        url = reverse("leave:apply_api")
+        segments = [
+            {
+                "start": self.day[3].isoformat(),
+                "end": (self.day[3] + timedelta(hours=8)).isoformat(),
+            },
+            {
+                "start": self.day[4].isoformat(),
+                "end": (self.day[4] + timedelta(hours=8)).isoformat(),
+            },
+        ]
+        payload = {"leave_type": "personal", "reason": "接口", "segments": segments}
+        resp = self.client.post(
+            url, json.dumps(payload), content_type="application/json"
+        )
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.json()["segments"], 2)
+
+        resp = self.client.post(
+            url, json.dumps(payload), content_type="application/json"
+        )
+        print(f"[重复提交] {resp.status_code} {resp.json()['conflicts'][0]['message']}")
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual([c["index"] for c in resp.json()["conflicts"]], [0, 1])
+
+        payload["segments"] = []
+        resp = self.client.post(
+            url, json.dumps(payload), content_type="application/json"
+        )
+        self.assertEqual(resp.status_code, 400)
+        print("[校验通过] 成功 201、冲突 409、参数错误 400。")
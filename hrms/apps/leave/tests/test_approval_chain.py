@@ -0,0 +1,191 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.employee.models import Employee
+from apps.leave.models import LeaveApply, LeaveApprovalTask
+from apps.leave.services import (
+    approval_inbox,
+    bulk_transition,
+    pending_approval_count,
+    verify_approval_tasks,
+)
+from apps.organization.models import Organization
+
+
+@override_settings(LEAVE_HR_APPROVAL_DAYS=3)
+class LeaveApprovalChainTests(TestCase):
+    def setUp(self) -> None:
+        self.org = Organization.objects.create(
+            org_code="CHAIN-ORG",
+            org_name="产品中心",
+            org_type="company",
+            effective_time=timezone.now(),
+            status="enabled",
+            create_by="tests",
+            update_by="tests",
+        )
+        self.mgr_user = User.objects.create_user(username="chain-mgr", password="x")
+        self.hr_user = User.objects.create_user(username="chain-hr", password="x")
+        self.manager = self._create_emp("C001", "产品经理", user=self.mgr_user)
+        self.hr = self._create_emp("C002", "人事专员", user=self.hr_user, position="HR")
+        self.dev = self._create_emp("C003", "产品专员", manager=self.manager)
+
+    def _create_emp(
+        self, emp_id, name, manager=None, user=None, position="员工"
+    ) -> Employee:
+        return Employee.objects.create(
+            emp_id=emp_id,
+            id_card=f"42012319900101{emp_id[-3:]}1",
+            emp_name=name,
+            gender="male",
+            birth_date=timezone.now().date(),
+            phone="13800000000",
+            email=f"{emp_id.lower()}@example.com",
+            hire_date=timezone.now().date(),
+            org=self.org,
+            position=position,
+            employment_type="full_time",
+            emp_status="active",
+            manager_emp=manager,
+            user=user,
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _create_leave(self, emp, days) -> LeaveApply:
+        return LeaveApply.objects.create(
+            emp=emp,
+            leave_type="annual",
+            total_days=days,
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _steps(self, leave):
+        steps = (
+            LeaveApprovalTask.objects.filter(leave=leave)
+            .order_by("step")
+            .values_list("kind", "approver_emp_id", "status")
+        )
+        return [
+            (kind, str(approver) if approver else None, status)
+            for kind, approver, status in steps
+        ]
+
+    def test_long_leave_goes_manager_then_hr(self) -> None:
+        print("\n[审批链验证] 长假经上级审批后转 HR 复核，短假上级审批即结束...")
+        short = self._create_leave(self.dev, 1)
+        long = self._create_leave(self.dev, 5)
+        self.assertEqual(
+            self._steps(short), [("manager", str(self.manager.pk), "pending")]
+        )
+        self.assertEqual(
+            self._steps(long),
+            [("manager", str(self.manager.pk), "pending"), ("hr", None, "waiting")],
+        )
+        inbox = approval_inbox(self.manager)
+        self.assertEqual(
+            [str(leave.pk) for leave in inbox.items], [str(short.pk), str(long.pk)]
+        )
+        self.assertEqual(pending_approval_count(self.manager), 2)
+        self.assertEqual(pending_approval_count(self.hr, include_pool=True), 0)
+
+        results = bulk_transition(self.mgr_user, [short.pk, long.pk], "approve")
+        self.assertEqual(set(results.values()), {"ok"})
+        short.refresh_from_db()
+        long.refresh_from_db()
+        self.assertEqual(short.apply_status, "approved")
+        # 长假仍在审核中，当前步骤进入 HR 共享队列
+        self.assertEqual(long.apply_status, "reviewing")
+        self.assertIsNone(long.approver_emp_id)
+        self.assertEqual(
+            self._steps(long),
+            [("manager", str(self.manager.pk), "approved"), ("hr", None, "pending")],
+        )
+        self.assertEqual(pending_approval_count(self.manager), 0)
+        self.assertEqual(pending_approval_count(self.hr, include_pool=True), 1)
+        pool = approval_inbox(self.hr, include_pool=True)
+        self.assertEqual([str(leave.pk) for leave in pool.items], [str(long.pk)])
+        self.assertEqual(pool.items[0].approval_step.kind, "hr")
+
+        # 上级不能替 HR 复核
+        results = bulk_transition(self.mgr_user, [long.pk], "approve")
+        self.assertEqual(results[str(long.pk)], "forbidden")
+
+        self.client.force_login(self.hr_user)
+        resp = self.client.get(reverse("leave:detail", args=[long.pk]))
+        self.assertEqual(resp.status_code, 200)
+        detail = resp.context["leave"]
+        self.assertTrue(detail.can_approve)
+        self.assertEqual(
+            [step.handler_display for step in detail.approval_steps],
+            ["产品经理", "人力资源"],
+        )
+
+        results = bulk_transition(self.hr_user, [long.pk], "approve")
+        self.assertEqual(results[str(long.pk)], "ok")
+        long.refresh_from_db()
+        self.assertEqual(long.apply_status, "approved")
+        task = LeaveApprovalTask.objects.get(leave=long, step=2)
+        self.assertEqual(task.status, "approved")
+        self.assertEqual(str(task.decided_by_emp_id), str(self.hr.pk))
+        self.assertEqual(pending_approval_count(self.hr, include_pool=True), 0)
+        self.assertTrue(verify_approval_tasks().ok)
+        print("[校验通过] 两级审批依次流转，计数与共享队列同步变化。")
+
+    def test_reject_and_reassign_close_out_the_chain(self) -> None:
+        print("\n[审批链验证] 拒绝取消后续步骤，调整上级只转交上级步骤...")
+        rejected = self._create_leave(self.dev, 4)
+        bulk_transition(self.mgr_user, [rejected.pk], "reject")
+        self.assertEqual(
+            self._steps(rejected),
+            [("manager", str(self.manager.pk), "rejected"), ("hr", None, "cancelled")],
+        )
+
+        # 没有上级的员工直接进入 HR 队列
+        orphan = self._create_leave(self.manager, 1)
+        self.assertEqual(self._steps(orphan), [("hr", None, "pending")])
+
+        moving = self._create_leave(self.dev, 5)
+        backup = self._create_emp("C004", "代理经理")
+        self.dev.manager_emp = backup
+        self.dev.save()
+        moving.refresh_from_db()
+        self.assertEqual(str(moving.approver_emp_id), str(backup.pk))
+        self.assertEqual(self._steps(moving)[0], ("manager", str(backup.pk), "pending"))
+        self.assertEqual(pending_approval_count(backup), 1)
+
+        # 上级被清空时转入 HR 共享队列，原有的 HR 复核不再重复审批
+        self.dev.manager_emp = None
+        self.dev.save()
+        moving.refresh_from_db()
+        self.assertIsNone(moving.approver_emp_id)
+        self.assertEqual(
+            self._steps(moving), [("hr", None, "pending"), ("hr", None, "cancelled")]
+        )
+        self.assertEqual(pending_approval_count(backup), 0)
+        self.assertEqual(pending_approval_count(self.hr, include_pool=True), 2)
+        self.assertTrue(verify_approval_tasks().ok)
+        results = bulk_transition(self.hr_user, [moving.pk], "approve")
+        self.assertEqual(results[str(moving.pk)], "ok")
+        moving.refresh_from_db()
+        self.assertEqual(moving.apply_status, "approved")
+
+        # 直接保存离开审核中（如后台改状态、软删除）时关闭未完成的步骤
+        leaving = self._create_leave(self.dev, 5)
+        leaving.is_deleted = True
+        leaving.save()
+        self.assertEqual(
+            [status for _, _, status in self._steps(leaving)],
+            ["cancelled"],
+        )
+
+        out = StringIO()
+        call_command("rebuild_leave_inbox", "--verify-only", stdout=out)
+        self.assertIn("校验通过", out.getvalue())
+        print("[校验通过] 审批任务与单据状态、待办计数保持一致。")
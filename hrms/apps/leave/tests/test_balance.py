@@ -0,0 +1,181 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.config.models import LeaveReasonConfig
+from apps.employee.models import Employee
+from apps.leave.models import LeaveApply, LeaveBalance, LeaveLedgerEntry
+from apps.leave.services import (
+    LeaveQuotaError,
+    bulk_transition,
+    check_leave_quota,
+    submit_leave,
+    verify_leave_balance,
+)
+from apps.organization.models import Organization
+
+
+class LeaveBalanceLedgerTests(TestCase):
+    def setUp(self) -> None:
+        self.org = Organization.objects.create(
+            org_code="BAL-ORG",
+            org_name="研发中心",
+            org_type="company",
+            effective_time=timezone.now(),
+            status="enabled",
+            create_by="tests",
+            update_by="tests",
+        )
+        self.mgr_user = User.objects.create_user(username="bal-mgr", password="x")
+        self.emp_user = User.objects.create_user(username="bal-emp", password="x")
+        self.manager = self._create_emp("B001", "额度经理", user=self.mgr_user)
+        self.emp = self._create_emp(
+            "B002", "额度员工", manager=self.manager, user=self.emp_user
+        )
+        LeaveReasonConfig.objects.create(
+            name="年假",
+            leave_type="annual",
+            max_days=Decimal("5"),
+            create_by="tests",
+            update_by="tests",
+        )
+        self.year = timezone.localdate().year + 1
+        # 次年 3 月的第一个周一零点；偏移取 7 的倍数加 0~3 天，时间段都落在工作日
+        first = date(self.year, 3, 1)
+        first += timedelta(days=(7 - first.weekday()) % 7)
+        self.day = timezone.make_aware(datetime.combine(first, time()))
+
+    def _create_emp(self, emp_id, name, manager=None, user=None) -> Employee:
+        return Employee.objects.create(
+            emp_id=emp_id,
+            id_card=f"42012319900101{emp_id[-3:]}1",
+            emp_name=name,
+            gender="male",
+            birth_date=timezone.now().date(),
+            phone="13800000000",
+            email=f"{emp_id.lower()}@example.com",
+            hire_date=timezone.now().date(),
+            org=self.org,
+            position="员工",
+            employment_type="full_time",
+            emp_status="active",
+            manager_emp=manager,
+            user=user,
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _days(self, offset: int, days: int):
+        start = self.day + timedelta(days=offset)
+        return (start, start + timedelta(days=days))
+
+    def _apply(self, *segments, leave_type="annual") -> LeaveApply:
+        return submit_leave(
+            self.emp, leave_type=leave_type, segments=list(segments), operator="tests"
+        )
+
+    def _balance(self) -> LeaveBalance:
+        return LeaveBalance.objects.get(
+            emp=self.emp, leave_type="annual", year=self.year
+        )
+
+    def test_ledger_follows_submit_and_review(self) -> None:
+        print("\n[台账验证] 提交占用、批准扣减、拒绝释放，余额随之变化...")
+        first = self._apply(self._days(0, 2))
+        second = self._apply(self._days(10, 1))
+        balance = self._balance()
+        print(
+            f"[提交后] 入账 {balance.accrued} 占用 {balance.pending} 已用 {balance.used}"
+        )
+        self.assertEqual(
+            (balance.accrued, balance.pending, balance.used, balance.available),
+            (Decimal("5"), Decimal("3"), Decimal("0"), Decimal("2")),
+        )
+
+        bulk_transition(self.mgr_user, [first.pk], "approve")
+        bulk_transition(self.mgr_user, [second.pk], "reject")
+        balance = self._balance()
+        self.assertEqual((balance.pending, balance.used), (Decimal("0"), Decimal("2")))
+        self.assertEqual(
+            list(
+                LeaveLedgerEntry.objects.filter(emp=self.emp)
+                .order_by("id")
+                .values_list("entry_type", flat=True)
+            ),
+            ["accrual", "reserve", "reserve", "consume", "release"],
+        )
+
+        # 完成不影响额度；删除已批准的单据退回已用天数
+        self.client.force_login(self.emp_user)
+        self.client.post(
+            reverse("leave:action", args=[first.pk]), {"action": "complete"}
+        )
+        self.assertEqual(self._balance().used, Decimal("2"))
+        first.refresh_from_db()
+        self.assertEqual(first.apply_status, "completed")
+        first.is_deleted = True
+        first.save()
+        self.assertEqual(self._balance().available, Decimal("5"))
+        self.assertTrue(verify_leave_balance().ok)
+        print("[校验通过] 余额与请假历史现算结果一致。")
+
+    # 只统计业务查询：缓存放在进程内，不把共享缓存的读写算进去
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    )
+    def test_quota_is_enforced_in_constant_queries(self) -> None:
+        print("\n[额度校验] 超出年度额度的申请被拒绝，校验只读余额行...")
+        for offset in range(0, 28, 7):
+            self._apply(self._days(offset, 1))
+        # 工作日历版本号一次主键查询 + 额度一次查询
+        with self.assertNumQueries(2):
+            shortfalls = check_leave_quota(self.emp, "annual", [self._days(50, 2)])
+        print(f"[额度不足] {shortfalls[0].message}")
+        self.assertEqual(shortfalls[0].available, Decimal("1"))
+        with self.assertRaises(LeaveQuotaError):
+            self._apply(self._days(50, 2))
+        # 未配置额度的类型不受限制
+        self.assertEqual(check_leave_quota(self.emp, "sick", [self._days(50, 30)]), [])
+
+        self.client.force_login(self.emp_user)
+        fmt = "%Y-%m-%dT%H:%M"
+        start, end = self._days(57, 2)
+        resp = self.client.post(
+            reverse("leave:apply"),
+            {
+                "leave_type": "annual",
+                "start_time": [timezone.localtime(start).strftime(fmt)],
+                "end_time": [timezone.localtime(end).strftime(fmt)],
+            },
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("超出额度", str(resp.context["form"].non_field_errors()))
+        self.assertEqual(self._balance().pending, Decimal("4"))
+        print("[校验通过] 表单与服务层都拦截了超额申请。")
+
+    def test_rebuild_command_restores_ledger(self) -> None:
+        print("\n[重建验证] 直接改库后可由请假历史重建台账...")
+        leave = self._apply(self._days(0, 2))
+        bulk_transition(self.mgr_user, [leave.pk], "approve")
+        LeaveBalance.objects.update(used=0, pending=3)
+        LeaveLedgerEntry.objects.exclude(entry_type="accrual").delete()
+        self.assertFalse(verify_leave_balance().ok)
+
+        out = StringIO()
+        call_command("rebuild_leave_balance", stdout=out)
+        balance = self._balance()
+        print(
+            f"[重建后] 入账 {balance.accrued} 占用 {balance.pending} 已用 {balance.used}"
+        )
+        self.assertEqual(
+            (balance.accrued, balance.pending, balance.used),
+            (Decimal("5"), Decimal("0"), Decimal("2")),
+        )
+        self.assertIn("校验通过", out.getvalue())
+        print("[校验通过] 重建后余额与流水一致。")
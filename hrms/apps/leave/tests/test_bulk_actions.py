@@ -0,0 +1,135 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.employee.models import Employee
+from apps.leave.models import LeaveApply, LeaveTimeSegment
+from apps.leave.services import bulk_transition
+from apps.organization.models import Organization
+
+
+class LeaveBulkActionTests(TestCase):
+    def setUp(self) -> None:
+        self.org = Organization.objects.create(
+            org_code="BULK-ORG",
+            org_name="研发中心",
+            org_type="company",
+            effective_time=timezone.now(),
+            status="enabled",
+            create_by="tests",
+            update_by="tests",
+        )
+        self.user = User.objects.create_user(username="bulk-mgr", password="x")
+        self.manager = self._create_emp("B001", "审批经理", user=self.user)
+        self.dev = self._create_emp("B002", "工程师", manager=self.manager)
+        self.qa = self._create_emp("B003", "测试", manager=self.manager)
+        self.outsider = self._create_emp("B004", "其他部门")
+
+    def _create_emp(self, emp_id, name, manager=None, user=None) -> Employee:
+        return Employee.objects.create(
+            emp_id=emp_id,
+            id_card=f"42012319900101{emp_id[-3:]}1",
+            emp_name=name,
+            gender="male",
+            birth_date=timezone.now().date(),
+            phone="13800000000",
+            email=f"{emp_id.lower()}@example.com",
+            hire_date=timezone.now().date(),
+            org=self.org,
+            position="员工",
+            employment_type="full_time",
+            emp_status="active",
+            manager_emp=manager,
+            user=user,
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _create_leave(self, emp, offset_days=0, status="reviewing") -> LeaveApply:
+        leave = LeaveApply.objects.create(
+            emp=emp,
+            leave_type="annual",
+            total_days=1,
+            apply_status=status,
+            create_by="tests",
+            update_by="tests",
+        )
+        start = timezone.now() + timedelta(days=offset_days)
+        LeaveTimeSegment.objects.create(
+            leave=leave,
+            emp=emp,
+            leave_start_time=start,
+            leave_end_time=start + timedelta(hours=8),
+            segment_days=1,
+            create_by="tests",
+            update_by="tests",
+        )
+        return leave
+
+    # 只统计业务查询：缓存放在进程内，不把共享缓存的读写算进去
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    )
+    def test_bulk_transition_reports_each_id(self) -> None:
+        print("\n[批量审批] 一次处理多张请假单并逐条返回结果...")
+        mine = [self._create_leave(self.dev, i) for i in range(3)]
+        mine.append(self._create_leave(self.qa))
+        done = self._create_leave(self.qa, 5, status="approved")
+        foreign = self._create_leave(self.outsider)
+        ids = [str(leave.pk) for leave in (*mine, done, foreign)] + ["missing"]
+
+        # 权限判定 1 次（外人的单据没有上级、在 HR 队列中，另查 1 次角色）
+        # + 事务内锁定/审批任务/主表/时间段/宽表/额度开户/记账/待办计数/发件箱/日历失效范围
+        with self.assertNumQueries(14):
+            results = bulk_transition(self.user, ids, "reject")
+        print(f"[处理结果] {sorted(results.values())}")
+        for leave in mine:
+            self.assertEqual(results[str(leave.pk)], "ok")
+        self.assertEqual(results[str(done.pk)], "invalid_state")
+        self.assertEqual(results[str(foreign.pk)], "forbidden")
+        self.assertEqual(results["missing"], "not_found")
+
+        self.assertEqual(
+            LeaveApply.objects.filter(apply_status="rejected").count(), len(mine)
+        )
+        self.assertFalse(
+            LeaveTimeSegment.objects.filter(leave__in=mine, is_active=True).exists()
+        )
+        self.assertTrue(LeaveTimeSegment.objects.get(leave=done).is_active)
+        self.assertEqual(
+            LeaveApply.objects.get(pk=foreign.pk).apply_status, "reviewing"
+        )
+        print("[校验通过] 仅有权且状态正确的单据被更新。")
+
+    def test_bulk_endpoint_and_single_action(self) -> None:
+        print("\n[接口验证] 批量审批接口返回 JSON，单条审批行为不变...")
+        first = self._create_leave(self.dev)
+        second = self._create_leave(self.qa, 2)
+        self.client.force_login(self.user)
+
+        resp = self.client.post(
+            reverse("leave:bulk_action"),
+            {"action": "approve", "ids": [str(first.pk), str(first.pk)]},
+        )
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        print(f"[接口返回] {data}")
+        self.assertEqual(data["results"], {str(first.pk): "ok"})
+        self.assertEqual(data["summary"], {"ok": 1})
+        self.assertEqual(LeaveApply.objects.get(pk=first.pk).apply_status, "approved")
+
+        resp = self.client.post(reverse("leave:bulk_action"), {"action": "complete"})
+        self.assertEqual(resp.status_code, 400)
+
+        resp = self.client.post(
+            reverse("leave:action", args=[second.pk]), {"action": "reject"}
+        )
+        self.assertRedirects(resp, reverse("leave:approval_list"))
+        second.refresh_from_db()
+        self.assertEqual(second.apply_status, "rejected")
+        self.assertEqual(second.update_by, str(self.user.pk))
+        self.assertFalse(second.segments.get().is_active)
+        print("[校验通过] 批量与单条审批共用同一套状态流转。")
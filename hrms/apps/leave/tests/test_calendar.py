@@ -0,0 +1,172 @@
+import random
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.employee.models import Employee
+from apps.leave.calendar import build_team_calendar, get_team_calendar
+from apps.leave.services import submit_leave
+from apps.organization.models import Organization
+from utils.intervals import Interval, IntervalIndex
+
+
+class TeamCalendarTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.root = self._create_org("CAL-ROOT", "研发中心")
+        self.team = self._create_org("CAL-TEAM", "平台组", parent=self.root)
+        self.other = self._create_org("CAL-OTHER", "市场部")
+        self.user = User.objects.create_user(username="cal-mgr", password="x")
+        self.manager = self._create_emp("C001", "研发经理", self.root, user=self.user)
+        self.root.manager_emp = self.manager
+        self.root.save()
+        self.alice = self._create_emp("C002", "艾丽", self.team)
+        self.bob = self._create_emp("C003", "鲍勃", self.team)
+        self.outsider = self._create_emp("C004", "外部", self.other)
+        self.month = (timezone.localdate() + timedelta(days=62)).replace(day=1)
+
+    def _create_org(self, code, name, parent=None) -> Organization:
+        return Organization.objects.create(
+            org_code=code,
+            org_name=name,
+            org_type="department" if parent else "company",
+            parent_org=parent,
+            effective_time=timezone.now(),
+            status="enabled",
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _create_emp(self, emp_id, name, org, user=None) -> Employee:
+        return Employee.objects.create(
+            emp_id=emp_id,
+            id_card=f"42012319900101{emp_id[-3:]}1",
+            emp_name=name,
+            gender="male",
+            birth_date=timezone.now().date(),
+            phone="13800000000",
+            email=f"{emp_id.lower()}@example.com",
+            hire_date=timezone.now().date(),
+            org=org,
+            position="员工",
+            employment_type="full_time",
+            emp_status="active",
+            user=user,
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _at(self, day: int, hour: int = 0) -> datetime:
+        return timezone.make_aware(
+            datetime.combine(self.month.replace(day=day), time(hour))
+        )
+
+    def _apply(self, emp, *segments):
+        return submit_leave(
+            emp, leave_type="annual", segments=list(segments), operator="tests"
+        )
+
+    def test_daily_coverage_for_subtree(self) -> None:
+        print("\n[日历验证] 一次范围查询得到子树每天的请假人员与可用人数...")
+        self._apply(self.alice, (self._at(3), self._at(5)))
+        self._apply(self.bob, (self._at(4, 9), self._at(4, 12)))
+        self._apply(self.outsider, (self._at(4), self._at(6)))
+
+        # 时间段一次查询 + 人数汇总一次查询
+        with self.assertNumQueries(2):
+            calendar = build_team_calendar(str(self.root.pk), self.month)
+        days = {d["day"]: d for d in calendar["days"]}
+        print(f"[4 日] 不在: {[p['emp_name'] for p in days[4]['out']]}")
+        self.assertEqual(calendar["headcount"], 3)
+        self.assertEqual(days[2]["out_count"], 0)
+        self.assertEqual([p["emp_name"] for p in days[3]["out"]], ["艾丽"])
+        self.assertEqual(days[4]["out_count"], 2)
+        self.assertEqual(days[4]["available"], 1)
+        partial = {p["emp_name"]: p["full_day"] for p in days[4]["out"]}
+        self.assertEqual(partial, {"艾丽": True, "鲍勃": False})
+        self.assertEqual(days[5]["out_count"], 0)
+        print("[校验通过] 跨组织的请假不计入，半天请假标记为部分时段。")
+
+    # 只统计业务查询：缓存放在进程内，不把共享缓存的读写算进去
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    )
+    def test_cache_is_invalidated_per_month(self) -> None:
+        print("\n[缓存验证] 日历按 (组织, 月份) 缓存，只有涉及的月份失效...")
+        org_id = str(self.root.pk)
+        get_team_calendar(org_id, self.month)
+        # 命中缓存只需一次主键查询取全局与月份版本号
+        with self.assertNumQueries(1):
+            get_team_calendar(org_id, self.month)
+
+        later = self._at(1) + timedelta(days=40)
+        with self.captureOnCommitCallbacks(execute=True):
+            self._apply(self.alice, (later, later + timedelta(hours=8)))
+        with self.assertNumQueries(1):
+            get_team_calendar(org_id, self.month)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._apply(self.bob, (self._at(10), self._at(11)))
+            # 提交前版本号不变，仍读到旧缓存
+            calendar = get_team_calendar(org_id, self.month)
+            self.assertEqual(calendar["days"][9]["out_count"], 0)
+        calendar = get_team_calendar(org_id, self.month)
+        self.assertEqual(calendar["days"][9]["out_count"], 1)
+
+        self.bob.org = self.other
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bob.save()
+        calendar = get_team_calendar(org_id, self.month)
+        print(f"[调岗后] 10 日不在: {calendar['days'][9]['out_count']} 人")
+        self.assertEqual(calendar["days"][9]["out_count"], 0)
+        print(
+            "[校验通过] 其他月份的提交不影响当前月缓存，调岗整体失效，均在提交后生效。"
+        )
+
+    def test_page_and_api_respect_scope(self) -> None:
+        print("\n[权限验证] 负责人只能查看自己负责的组织子树...")
+        self._apply(self.alice, (self._at(3), self._at(4)))
+        self.client.force_login(self.user)
+        month = f"{self.month:%Y-%m}"
+
+        resp = self.client.get(
+            reverse("leave:calendar_api"), {"org": self.team.pk, "month": month}
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["days"][2]["out_count"], 1)
+        resp = self.client.get(reverse("leave:calendar_api"), {"org": self.other.pk})
+        self.assertEqual(resp.status_code, 403)
+
+        resp = self.client.get(reverse("leave:calendar"), {"month": month})
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, "艾丽")
+        print("[校验通过] 越权组织返回 403，页面渲染正常。")
+
+    def test_interval_index_matches_brute_force(self) -> None:
+        print("\n[结构验证] 区间树的重叠查询与逐条比较结果一致...")
+        rng = random.Random(7)
+        base = date(2026, 1, 1)
+        intervals = []
+        for i in range(200):
+            start = base + timedelta(days=rng.randint(0, 60))
+            intervals.append(
+                Interval(start, start + timedelta(days=rng.randint(1, 5)), i)
+            )
+        index = IntervalIndex(intervals)
+        for _ in range(100):
+            start = base + timedelta(days=rng.randint(-3, 65))
+            end = start + timedelta(days=rng.randint(1, 7))
+            expected = sorted(
+                iv.payload for iv in intervals if iv.start < end and iv.end > start
+            )
+            got = sorted(iv.payload for iv in index.overlapping(start, end))
+            self.assertEqual(got, expected)
+            self.assertEqual(
+                sorted(iv.payload for iv in index.stab(start)),
+                sorted(iv.payload for iv in intervals if iv.start <= start < iv.end),
+            )
+        print("[校验通过] 100 次随机查询全部一致。")
@@ -0,0 +1,222 @@
+import csv
+from datetime import datetime, timedelta
+from io import BytesIO, StringIO
+
+import openpyxl
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.employee.models import Employee
+from apps.leave.importer import (
+    IMPORT_HEADERS,
+    import_leaves,
+    iter_import_rows,
+    parse_import_row,
+    sweep_conflicts,
+)
+from apps.leave.models import (
+    LeaveApply,
+    LeaveApprovalTask,
+    LeaveImportReport,
+    LeaveTimeSegment,
+)
+from apps.leave.services import pending_approval_count, submit_leave
+from apps.organization.models import Organization
+
+ROWS = [
+    ("M1002", "年假", "2031-03-04 09:00", "2031-03-04 18:00", "", "探亲", "A"),
+    ("M1002", "annual", "2031-03-04 13:00", "2031-03-04 15:00", "", "", "B"),
+    ("M1002", "事假", "2031-03-03 10:00", "2031-03-03 11:00", "", "", ""),
+    ("M1002", "病假", "2031-03-05 09:00", "2031-03-05 12:00", "已拒绝", "", ""),
+    ("M1002", "病假", "2031-03-05 09:00", "2031-03-05 12:00", "审核中", "复诊", "C"),
+    ("M1002", "病假", "2031-03-06 09:00", "2031-03-06 12:00", "审核中", "", "C"),
+    ("M1002", "探亲假", "2031-03-07 09:00", "2031-03-07 12:00", "", "", ""),
+    ("M1002", "年假", "2031-03-10 09:00", "2031-03-10 08:00", "", "", ""),
+    ("M1002", "年假", "2031-03-11 09:00", "2031-03-11 12:00", "", "", "D"),
+    ("M1002", "年假", "2031-03-11 10:00", "2031-03-11 11:00", "", "", "D"),
+    ("M9999", "年假", "2031-03-04 09:00", "2031-03-04 18:00", "", "", ""),
+    ("M1003", "年假", "2031-03-03 09:00", "2031-03-03 12:00", "", "", ""),
+]
+
+
+def _csv_bytes(rows) -> bytes:
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(IMPORT_HEADERS)
+    writer.writerows(rows)
+    return ("\ufeff" + buffer.getvalue()).encode("utf-8")
+
+
+class LeaveImportTests(TestCase):
+    def setUp(self) -> None:
+        self.org = Organization.objects.create(
+            org_code="IMP-ORG",
+            org_name="迁移中心",
+            org_type="company",
+            effective_time=timezone.now(),
+            status="enabled",
+            create_by="tests",
+            update_by="tests",
+        )
+        self.manager = self._create_emp("M1001", "迁移经理")
+        self.dev = self._create_emp("M1002", "迁移专员", manager=self.manager)
+        self.other = self._create_emp("M1003", "迁移助理")
+        start = timezone.make_aware(datetime(2031, 3, 3, 9))
+        self.existing = submit_leave(
+            self.dev,
+            leave_type="personal",
+            segments=[(start, start.replace(hour=12))],
+            operator="tests",
+        )
+
+    def _create_emp(self, emp_id, name, manager=None) -> Employee:
+        return Employee.objects.create(
+            emp_id=emp_id,
+            id_card=f"42012319900101{emp_id[-3:]}1",
+            emp_name=name,
+            gender="male",
+            birth_date=timezone.now().date(),
+            phone="13800000000",
+            email=f"{emp_id.lower()}@example.com",
+            hire_date=timezone.now().date(),
+            org=self.org,
+            position="员工",
+            employment_type="full_time",
+            emp_status="active",
+            manager_emp=manager,
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _rows(self, rows=ROWS):
+        return iter_import_rows(BytesIO(_csv_bytes(rows)), "leaves.csv")
+
+    def test_sweep_flags_file_and_database_overlaps(self) -> None:
+        print("\n[导入校验] 文件内与库内时间段合并排序后一遍扫描...")
+        rows = [parse_import_row(i + 2, values) for i, values in enumerate(ROWS[:3])]
+        existing = [(rows[2].start.replace(minute=0, hour=9), rows[2].end)]
+        conflicts = sweep_conflicts(rows, existing)
+        print(f"[冲突] {conflicts}")
+        self.assertEqual(set(conflicts), {3, 4})
+        self.assertEqual(conflicts[3], "与第 2 行重叠")
+        self.assertIn("与已有请假", conflicts[4])
+        # 首尾相接不算重叠
+        adjacent = [
+            parse_import_row(2, ("X", "年假", "2031-03-04 09:00", "2031-03-04 12:00")),
+            parse_import_row(3, ("X", "年假", "2031-03-04 12:00", "2031-03-04 18:00")),
+        ]
+        self.assertEqual(sweep_conflicts(adjacent, []), {})
+        print("[校验通过] 冲突行指向先出现的时间段，相接的时间段不冲突。")
+
+    def test_import_writes_valid_leaves_and_reports_the_rest(self) -> None:
+        print("\n[批量导入验证] 有效单据分批写入，问题行汇总报告，派生数据一致...")
+        before = LeaveApply.objects.count()
+        dry = import_leaves(self._rows(), operator="tests", dry_run=True)
+        self.assertEqual(LeaveApply.objects.count(), before)
+
+        result = import_leaves(self._rows(), operator="tests", chunk_size=1)
+        print(f"[导入结果] {result.leaves} 张 / {result.segments} 段")
+        for issue in result.issues:
+            print(f"  第 {issue.line} 行：{issue.message}")
+        self.assertEqual((dry.leaves, dry.segments), (result.leaves, result.segments))
+        self.assertEqual((result.leaves, result.segments), (4, 5))
+        self.assertEqual(
+            [issue.line for issue in result.issues], [3, 4, 8, 9, 10, 11, 12]
+        )
+        messages = {issue.line: issue.message for issue in result.issues}
+        self.assertEqual(messages[12], "工号 M9999 不存在")
+        self.assertEqual(messages[11], "与同一单据的第 10 行重叠")
+        self.assertEqual(messages[10], "同一单据的第 11 行有误")
+
+        grouped = LeaveApply.objects.get(emp=self.dev, reason="复诊")
+        self.assertEqual(grouped.apply_status, "reviewing")
+        self.assertEqual(grouped.segments.count(), 2)
+        self.assertEqual(str(grouped.approver_emp_id), str(self.manager.pk))
+        self.assertTrue(
+            LeaveApprovalTask.objects.filter(leave=grouped, status="pending").exists()
+        )
+        self.assertEqual(pending_approval_count(self.manager), 2)
+        rejected = LeaveTimeSegment.objects.get(
+            leave__emp=self.dev, leave__apply_status="rejected"
+        )
+        self.assertFalse(rejected.is_active)
+
+        for command in (
+            "rebuild_leave_inbox",
+            "rebuild_leave_balance",
+            "rebuild_leave_profile",
+            "rebuild_search_index",
+        ):
+            call_command(command, "--verify-only", stdout=StringIO())
+        print("[校验通过] 待办计数、额度台账、检索宽表与检索向量均与现算一致。")
+
+    def test_import_rejects_rows_not_sorted_by_employee(self) -> None:
+        print("\n[排序校验] 同一工号的行不连续时后出现的行不导入...")
+        rows = [ROWS[0], ROWS[-1], ROWS[2]]
+        result = import_leaves(self._rows(rows), operator="tests")
+        for issue in result.issues:
+            print(f"  第 {issue.line} 行：{issue.message}")
+        self.assertEqual(result.leaves, 2)
+        self.assertEqual(
+            [(issue.line, issue.message) for issue in result.issues],
+            [(4, "工号 M1002 的行不连续，文件须按工号排序")],
+        )
+        print("[校验通过] 按工号分批刷写，不连续的行被拒绝而不是拆成两批。")
+
+    def test_upload_view_accepts_csv_and_xlsx(self) -> None:
+        print("\n[导入页验证] HR 上传文件、下载错误报告，普通员工无权访问...")
+        hr = User.objects.create_superuser(username="imp-hr", password="x")
+        self.client.force_login(hr)
+        url = reverse("leave:import")
+        upload = SimpleUploadedFile("leaves.csv", _csv_bytes(ROWS[:3]))
+        resp = self.client.post(url, {"file": upload})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context["result"].leaves, 1)
+        token = resp.context["report_token"]
+        report = self.client.get(reverse("leave:import_report", args=[token]))
+        lines = report.content.decode("utf-8-sig").splitlines()
+        self.assertEqual(lines[0], "行号,工号,原单号,问题")
+        self.assertEqual(len(lines), 1 + 2)
+        template = self.client.get(reverse("leave:import_template"))
+        self.assertEqual(
+            template.content.decode("utf-8-sig").splitlines()[0],
+            ",".join(IMPORT_HEADERS),
+        )
+
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(IMPORT_HEADERS)
+        sheet.append(
+            ["M1003", "年假", datetime(2031, 3, 12, 9), datetime(2031, 3, 12, 18)]
+        )
+        target = BytesIO()
+        workbook.save(target)
+        upload = SimpleUploadedFile("leaves.xlsx", target.getvalue())
+        resp = self.client.post(url, {"file": upload})
+        self.assertEqual(resp.context["result"].leaves, 1)
+        self.assertIsNone(resp.context["report_token"])
+        self.assertEqual(
+            LeaveApply.objects.get(emp=self.other).segments.get().leave_start_time,
+            timezone.make_aware(datetime(2031, 3, 12, 9)),
+        )
+
+        outsider = User.objects.create_user(username="imp-user", password="x")
+        self.client.force_login(outsider)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(
+            self.client.get(reverse("leave:import_report", args=[token])).status_code,
+            404,
+        )
+        # 报告存于数据库，任一 worker 都能下载；超过有效期后不再提供
+        self.client.force_login(hr)
+        report_url = reverse("leave:import_report", args=[token])
+        self.assertEqual(self.client.get(report_url).status_code, 200)
+        LeaveImportReport.objects.filter(token=token).update(
+            create_time=timezone.now() - timedelta(hours=2)
+        )
+        self.assertEqual(self.client.get(report_url).status_code, 404)
+        print("[校验通过] CSV 与 Excel 均可导入，错误报告仅本人可下载。")
@@ -0,0 +1,156 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.employee.models import Employee
+from apps.leave.models import LeaveApply
+from apps.leave.services import (
+    approval_inbox,
+    bulk_transition,
+    pending_approval_count,
+    verify_leave_inbox,
+)
+from apps.organization.models import Organization
+
+
+class ApprovalInboxTests(TestCase):
+    def setUp(self) -> None:
+        self.org = Organization.objects.create(
+            org_code="INBOX-ORG",
+            org_name="研发中心",
+            org_type="company",
+            effective_time=timezone.now(),
+            status="enabled",
+            create_by="tests",
+            update_by="tests",
+        )
+        self.user = User.objects.create_user(username="inbox-mgr", password="x")
+        self.manager = self._create_emp("I001", "审批经理", user=self.user)
+        self.backup = self._create_emp("I002", "代理经理")
+        self.dev = self._create_emp("I003", "工程师", manager=self.manager)
+
+    def _create_emp(self, emp_id, name, manager=None, user=None) -> Employee:
+        return Employee.objects.create(
+            emp_id=emp_id,
+            id_card=f"42012319900101{emp_id[-3:]}1",
+            emp_name=name,
+            gender="male",
+            birth_date=timezone.now().date(),
+            phone="13800000000",
+            email=f"{emp_id.lower()}@example.com",
+            hire_date=timezone.now().date(),
+            org=self.org,
+            position="员工",
+            employment_type="full_time",
+            emp_status="active",
+            manager_emp=manager,
+            user=user,
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _create_leave(self, emp) -> LeaveApply:
+        return LeaveApply.objects.create(
+            emp=emp,
+            leave_type="annual",
+            total_days=1,
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def test_keyset_pages_cover_inbox_once(self) -> None:
+        print("\n[分页验证] 游标翻页不重复、不遗漏，总数来自计数表...")
+        leaves = [self._create_leave(self.dev) for _ in range(5)]
+        # 同一时刻提交的单据靠 id 决定先后
+        LeaveApply.objects.filter(pk__in=[leaves[1].pk, leaves[2].pk]).update(
+            create_time=leaves[1].create_time
+        )
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            page = approval_inbox(self.manager, cursor=cursor, limit=2)
+            seen.extend(str(leave.pk) for leave in page.items)
+            pages += 1
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        print(f"[翻页结果] {pages} 页, {len(seen)} 条")
+        self.assertEqual(pages, 3)
+        self.assertEqual(sorted(seen), sorted(str(leave.pk) for leave in leaves))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(pending_approval_count(self.manager), 5)
+
+        self.client.force_login(self.user)
+        resp = self.client.get(reverse("leave:approval_list"))
+        self.assertEqual(len(resp.context["tasks"]), 5)
+        self.assertEqual(resp.context["pending_total"], 5)
+        resp = self.client.get(reverse("core:dashboard"))
+        self.assertEqual(resp.context["pending_approvals_count"], 5)
+        print("[校验通过] 收件箱分页与计数一致。")
+
+    def test_team_tasks_skip_direct_reports(self) -> None:
+        print("\n[跨级下属验证] 中层经理的跨级列表不含直属下属...")
+        director = self._create_emp("I004", "研发总监")
+        self.manager.manager_emp = director
+        self.manager.save()
+        intern = self._create_emp("I005", "实习生", manager=self.dev)
+        self._create_leave(self.dev)
+        indirect = self._create_leave(intern)
+
+        self.client.force_login(self.user)
+        resp = self.client.get(reverse("leave:approval_list"))
+        team = [str(task.pk) for task in resp.context["team_tasks"]]
+        print(f"[跨级列表] {len(team)} 条")
+        # 工程师与总监相隔两级，但相对当前经理只是直属下属
+        self.assertEqual(team, [str(indirect.pk)])
+        self.assertIsNone(resp.context["team_next_url"])
+
+        # 团队动态按到达时间游标分页，不一次取出整个团队
+        more = [self._create_leave(intern) for _ in range(20)]
+        expected = [str(indirect.pk)] + [str(leave.pk) for leave in more]
+        resp = self.client.get(reverse("leave:approval_list"))
+        first = [str(task.pk) for task in resp.context["team_tasks"]]
+        self.assertEqual(len(first), 20)
+        resp = self.client.get(
+            reverse("leave:approval_list") + resp.context["team_next_url"]
+        )
+        rest = [str(task.pk) for task in resp.context["team_tasks"]]
+        self.assertEqual(first + rest, expected)
+        self.assertIsNone(resp.context["team_next_url"])
+        print("[校验通过] 层级下限与上级条件落在同一次闭包表关联上。")
+
+    def test_counter_follows_status_and_manager_changes(self) -> None:
+        print("\n[计数验证] 提交/审批/转交/删除后待办计数随之增减...")
+        first = self._create_leave(self.dev)
+        second = self._create_leave(self.dev)
+        self.assertEqual(str(first.approver_emp_id), str(self.manager.pk))
+        self.assertEqual(pending_approval_count(self.manager), 2)
+
+        bulk_transition(self.user, [first.pk], "approve")
+        self.assertEqual(pending_approval_count(self.manager), 1)
+
+        self.dev.manager_emp = self.backup
+        self.dev.save()
+        second.refresh_from_db()
+        print(f"[上级调整] 待审批单据转交给: {second.approver_emp.emp_name}")
+        self.assertEqual(str(second.approver_emp_id), str(self.backup.pk))
+        self.assertEqual(pending_approval_count(self.manager), 0)
+        self.assertEqual(pending_approval_count(self.backup), 1)
+        # 已处理的单据保留原审批人
+        first.refresh_from_db()
+        self.assertEqual(str(first.approver_emp_id), str(self.manager.pk))
+
+        second.is_deleted = True
+        second.save()
+        self.assertEqual(pending_approval_count(self.backup), 0)
+        self.assertTrue(verify_leave_inbox().ok)
+
+        out = StringIO()
+        call_command("rebuild_leave_inbox", stdout=out)
+        self.assertIn("校验通过", out.getvalue())
+        print("[校验通过] 增量维护结果与全量重建一致。")
@@ -0,0 +1,139 @@
+from datetime import date, datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.attendance.models import WorkCalendarDay
+from apps.attendance.work_calendar import invalidate_work_calendar
+from apps.employee.models import Employee
+from apps.leave.days import rebuild_leave_days, verify_leave_days
+from apps.leave.models import LeaveDay
+from apps.leave.services import bulk_transition, submit_leave
+from apps.organization.models import Organization
+
+FRIDAY = date(2031, 3, 7)
+MONDAY = date(2031, 3, 10)
+TUESDAY = date(2031, 3, 11)
+
+
+def _at(day: date, hour: int) -> datetime:
+    return timezone.make_aware(datetime(day.year, day.month, day.day, hour))
+
+
+class LeaveDayTests(TestCase):
+    def setUp(self) -> None:
+        invalidate_work_calendar()
+        self.root = self._create_org("LD-ROOT", "总部")
+        self.plant = self._create_org("LD-PLANT", "工厂", parent=self.root)
+        self.admin = User.objects.create_superuser(username="ld-admin", password="x")
+        self.dev = Employee.objects.create(
+            emp_id="D001",
+            id_card="420123199001010011",
+            emp_name="展开专员",
+            gender="male",
+            birth_date=timezone.now().date(),
+            phone="13800000000",
+            email="d001@example.com",
+            hire_date=timezone.now().date(),
+            org=self.root,
+            position="员工",
+            employment_type="full_time",
+            emp_status="active",
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _create_org(self, code, name, parent=None) -> Organization:
+        return Organization.objects.create(
+            org_code=code,
+            org_name=name,
+            org_type="company" if parent is None else "department",
+            parent_org=parent,
+            effective_time=timezone.now(),
+            status="enabled",
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _mark(self, day, day_type, org=None) -> WorkCalendarDay:
+        return WorkCalendarDay.objects.create(
+            day=day, day_type=day_type, org=org, create_by="tests", update_by="tests"
+        )
+
+    def _days(self):
+        return list(
+            LeaveDay.objects.filter(emp=self.dev)
+            .order_by("day")
+            .values_list("day", "fraction")
+        )
+
+    def test_days_follow_status_calendar_and_transfer(self) -> None:
+        print("\n[请假日明细验证] 审批、节假日、调岗与删除后按天展开的行随之刷新...")
+        # 周五 14:00 至下周二 12:00：周五半天、周一整天、周二上午 3 小时
+        leave = submit_leave(
+            self.dev,
+            leave_type="personal",
+            segments=[(_at(FRIDAY, 14), _at(TUESDAY, 12))],
+            operator="tests",
+        )
+        self.assertEqual(self._days(), [])
+        bulk_transition(self.admin, [leave.pk], "approve")
+        self.assertEqual(
+            self._days(),
+            [
+                (FRIDAY, Decimal("0.5")),
+                (MONDAY, Decimal("1")),
+                (TUESDAY, Decimal("0.375")),
+            ],
+        )
+        self.assertEqual(
+            LeaveDay.objects.filter(emp=self.dev).values("leave_type").get(day=MONDAY),
+            {"leave_type": "personal"},
+        )
+
+        # 全公司周一放假，工厂照常上班：调岗到工厂后周一重新计入
+        holiday = self._mark(MONDAY, "holiday")
+        self.assertEqual([day for day, _ in self._days()], [FRIDAY, TUESDAY])
+        self._mark(MONDAY, "workday", org=self.plant)
+        self.assertEqual(len(self._days()), 2)
+        self.dev.org = self.plant
+        self.dev.save()
+        self.assertEqual(len(self._days()), 3)
+        self.assertTrue(verify_leave_days().ok)
+
+        self.dev.org = self.root
+        self.dev.save()
+        holiday.delete()
+        self.assertEqual(len(self._days()), 3)
+
+        # 已完成的请假同样保留，删除请假单后清除
+        bulk_transition(self.admin, [leave.pk], "complete")
+        self.assertEqual(len(self._days()), 3)
+        leave.is_deleted = True
+        leave.save()
+        self.assertEqual(self._days(), [])
+        self.assertTrue(verify_leave_days().ok)
+        print("[校验通过] 各写入路径下请假日明细与现算结果一致。")
+
+    def test_rebuild_command(self) -> None:
+        print("\n[请假日明细重建] 命令行全量重建并校验...")
+        leave = submit_leave(
+            self.dev,
+            leave_type="sick",
+            segments=[(_at(MONDAY, 9), _at(MONDAY, 12))],
+            operator="tests",
+        )
+        bulk_transition(self.admin, [leave.pk], "approve")
+        LeaveDay.objects.all().delete()
+        self.assertEqual(verify_leave_days().missing, 1)
+
+        out = StringIO()
+        call_command("rebuild_leave_days", stdout=out)
+        self.assertIn("校验通过", out.getvalue())
+        self.assertEqual(self._days(), [(MONDAY, Decimal("0.375"))])
+        self.assertEqual(rebuild_leave_days(), 1)
+        print("[校验通过] 重建后明细完整。")
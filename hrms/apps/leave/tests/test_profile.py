@@ -0,0 +1,113 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.employee.models import Employee
+from apps.leave.models import LeaveProfile
+from apps.leave.profile import verify_leave_profile
+from apps.leave.services import bulk_transition, submit_leave
+from apps.organization.models import Organization
+
+
+class LeaveProfileTests(TestCase):
+    def setUp(self) -> None:
+        self.org = Organization.objects.create(
+            org_code="PRO-ORG",
+            org_name="研发中心",
+            org_type="company",
+            effective_time=timezone.now(),
+            status="enabled",
+            create_by="tests",
+            update_by="tests",
+        )
+        self.admin = User.objects.create_superuser(username="pro-admin", password="x")
+        self.manager = self._create_emp("P001", "检索经理")
+        self.emp = self._create_emp("P002", "检索员工", manager=self.manager)
+        start = timezone.localtime(timezone.now() + timedelta(days=14)).replace(
+            hour=9, minute=0, second=0, microsecond=0
+        )
+        self.leave = submit_leave(
+            self.emp,
+            leave_type="personal",
+            reason="家中有事",
+            segments=[
+                (start + timedelta(days=2), start + timedelta(days=2, hours=4)),
+                (start, start + timedelta(hours=8)),
+            ],
+            operator="tests",
+        )
+        self.start = start
+
+    def _create_emp(self, emp_id, name, manager=None) -> Employee:
+        return Employee.objects.create(
+            emp_id=emp_id,
+            id_card=f"42012319900101{emp_id[-3:]}1",
+            emp_name=name,
+            gender="male",
+            birth_date=timezone.now().date(),
+            phone="13800000000",
+            email=f"{emp_id.lower()}@example.com",
+            hire_date=timezone.now().date(),
+            org=self.org,
+            position="员工",
+            employment_type="full_time",
+            emp_status="active",
+            manager_emp=manager,
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _profile(self) -> LeaveProfile:
+        return LeaveProfile.objects.get(leave_id=self.leave.pk)
+
+    def test_profile_follows_writes(self) -> None:
+        print("\n[宽表验证] 提交/审批/改名/删除后宽表行随之刷新...")
+        profile = self._profile()
+        self.assertEqual(profile.start_time, self.start)
+        self.assertEqual(profile.end_time, self.start + timedelta(days=2, hours=4))
+        self.assertEqual((profile.emp_code, profile.org_name), ("P002", "研发中心"))
+
+        bulk_transition(self.admin, [self.leave.pk], "approve")
+        self.assertEqual(self._profile().apply_status, "approved")
+
+        self.emp.emp_name = "检索员工(新)"
+        self.emp.save()
+        self.org.org_name = "研发一部"
+        self.org.save()
+        profile = self._profile()
+        print(f"[改名后] {profile.emp_name} / {profile.org_name}")
+        self.assertEqual(
+            (profile.emp_name, profile.org_name), ("检索员工(新)", "研发一部")
+        )
+        self.assertTrue(verify_leave_profile().ok)
+
+        self.leave.refresh_from_db()
+        self.leave.is_deleted = True
+        self.leave.save()
+        self.assertFalse(LeaveProfile.objects.filter(leave_id=self.leave.pk).exists())
+        print("[校验通过] 增量刷新结果与现算一致。")
+
+    def test_search_reads_profile_table(self) -> None:
+        print("\n[检索验证] 请假检索页改读宽表，过滤条件照常生效...")
+        self.client.force_login(self.admin)
+        url = reverse("leave:sql_search")
+        resp = self.client.get(url, {"emp_id": "P002", "leave_type": "personal"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context["result_count"], 1)
+        self.assertEqual(resp.context["results"][0]["emp_id"], "P002")
+        resp = self.client.get(url, {"apply_status": "approved"})
+        self.assertEqual(resp.context["result_count"], 0)
+        resp = self.client.get(url, {"keyword": "家中"})
+        self.assertEqual(resp.context["result_count"], 1)
+
+        LeaveProfile.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_leave_profile", stdout=out)
+        self.assertIn("校验通过", out.getvalue())
+        self.assertEqual(self._profile().emp_name, "检索员工")
+        print("[校验通过] 检索结果正确，重建命令可恢复宽表。")
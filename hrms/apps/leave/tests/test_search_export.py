@@ -0,0 +1,144 @@
+import csv
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+import openpyxl
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.employee.models import Employee
+from apps.leave.models import LeaveApply
+from apps.leave.search import LeaveSearchFilters, search_page
+from apps.leave.services import submit_leave
+from apps.organization.models import Organization
+from utils.sql_scope import get_user_scope
+
+
+class LeaveSearchExportTests(TestCase):
+    def setUp(self) -> None:
+        self.org = Organization.objects.create(
+            org_code="EXP-ORG",
+            org_name="导出中心",
+            org_type="company",
+            effective_time=timezone.now(),
+            status="enabled",
+            create_by="tests",
+            update_by="tests",
+        )
+        self.admin = User.objects.create_superuser(username="exp-admin", password="x")
+        self.alice = self._create_emp("X001", "艾丽")
+        self.bob = self._create_emp("X002", "鲍勃")
+        start = timezone.localtime(timezone.now() + timedelta(days=14)).replace(
+            hour=9, minute=0, second=0, microsecond=0
+        )
+        self.leave_ids = set()
+        # 两人同一开始时间，排序要靠 apply_time / leave_id 分出先后
+        for day in range(4):
+            for emp in (self.alice, self.bob):
+                leave = submit_leave(
+                    emp,
+                    leave_type="personal",
+                    reason=f"第{day}天",
+                    segments=[
+                        (
+                            start + timedelta(days=day),
+                            start + timedelta(days=day, hours=4),
+                        )
+                    ],
+                    operator="tests",
+                )
+                self.leave_ids.add(str(leave.pk))
+        # 没有时间段的单据（start_time 为 NULL）排在最后
+        for _ in range(2):
+            leave = LeaveApply.objects.create(
+                emp=self.alice,
+                leave_type="personal",
+                total_days=0,
+                create_by="tests",
+            )
+            self.leave_ids.add(str(leave.pk))
+        self.scope = get_user_scope(
+            user_id=self.admin.id, is_superuser=True, is_staff=True
+        )
+
+    def _create_emp(self, emp_id, name) -> Employee:
+        return Employee.objects.create(
+            emp_id=emp_id,
+            id_card=f"42012319900101{emp_id[-3:]}1",
+            emp_name=name,
+            gender="male",
+            birth_date=timezone.now().date(),
+            phone="13800000000",
+            email=f"{emp_id.lower()}@example.com",
+            hire_date=timezone.now().date(),
+            org=self.org,
+            position="员工",
+            employment_type="full_time",
+            emp_status="active",
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def test_keyset_pages_cover_every_row_once(self) -> None:
+        print("\n[分页验证] 游标翻页逐页取完，每条只出现一次且顺序稳定...")
+        filters = LeaveSearchFilters()
+        seen, cursor, pages = [], None, 0
+        while True:
+            with self.assertNumQueries(1):
+                page = search_page(self.scope, filters, cursor=cursor, limit=3)
+            seen.extend(str(row["leave_id"]) for row in page.items)
+            pages += 1
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        print(f"[翻页] 共 {pages} 页，{len(seen)} 条")
+        self.assertEqual(len(seen), len(self.leave_ids))
+        self.assertEqual(set(seen), self.leave_ids)
+        self.assertEqual(pages, 4)
+
+        everything = search_page(self.scope, filters, limit=100).items
+        self.assertEqual([str(r["leave_id"]) for r in everything], seen)
+        self.assertIsNone(everything[-1]["start_time"])
+        self.assertIsNone(everything[-2]["start_time"])
+
+        # 翻页链接保留过滤条件
+        self.client.force_login(self.admin)
+        resp = self.client.get(reverse("leave:sql_search"), {"emp_id": "X002"})
+        self.assertEqual(resp.context["result_count"], 4)
+        self.assertIsNone(resp.context["next_cursor"])
+        self.assertEqual(resp.context["filter_query"], "emp_id=X002")
+        print("[校验通过] NULL 开始时间的单据在末页，条件在翻页间保持。")
+
+    def test_export_streams_scoped_rows(self) -> None:
+        print("\n[导出验证] CSV 流式导出与 Excel 导出的内容与检索一致...")
+        self.client.force_login(self.admin)
+        url = reverse("leave:sql_export")
+
+        resp = self.client.get(url, {"emp_id": "X001", "format": "csv"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        text = b"".join(resp.streaming_content).decode("utf-8-sig")
+        rows = list(csv.reader(StringIO(text)))
+        print(f"[CSV] 表头 + {len(rows) - 1} 行")
+        self.assertEqual(rows[0][:3], ["单号", "请假类型", "状态"])
+        self.assertEqual(len(rows), 1 + 6)
+        self.assertEqual({row[5] for row in rows[1:]}, {"X001"})
+        self.assertEqual(rows[1][1], "事假")
+
+        resp = self.client.get(url, {"format": "xlsx"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        workbook = openpyxl.load_workbook(BytesIO(b"".join(resp.streaming_content)))
+        sheet = workbook.active
+        self.assertEqual(sheet.max_row, 1 + len(self.leave_ids))
+        first = search_page(self.scope, LeaveSearchFilters(), limit=1).items[0]
+        self.assertEqual(sheet.cell(row=2, column=1).value, str(first["leave_id"]))
+        self.assertEqual(sheet.cell(row=2, column=4).value, float(first["total_days"]))
+
+        outsider = User.objects.create_user(username="exp-user", password="x")
+        self.client.force_login(outsider)
+        resp = self.client.get(url, {"format": "csv"})
+        self.assertEqual(resp.status_code, 403)
+        print("[校验通过] 导出按同样条件过滤，普通员工无权导出。")
@@ -0,0 +1,168 @@
+from datetime import datetime, timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.config.models import LeaveSlaRule
+from apps.core.models import OutboxMessage
+from apps.employee.models import Employee
+from apps.leave.models import LeaveApply, LeaveSlaNotice
+from apps.leave.services import bulk_transition, submit_leave
+from apps.leave.sla import check_leave_sla
+from apps.organization.models import Organization
+
+
+class LeaveSlaTests(TestCase):
+    def setUp(self) -> None:
+        self.org = Organization.objects.create(
+            org_code="SLA-ORG",
+            org_name="审批中心",
+            org_type="company",
+            effective_time=timezone.now(),
+            status="enabled",
+            create_by="tests",
+            update_by="tests",
+        )
+        self.admin = User.objects.create_superuser(username="sla-admin", password="x")
+        self.director = self._create_emp("S001", "审批总监")
+        self.manager = self._create_emp("S002", "审批经理", manager=self.director)
+        self.dev = self._create_emp("S003", "审批专员", manager=self.manager)
+        self.now = timezone.now()
+        self._sla(None, 24, 72)
+        self._sla("sick", 4, 0)
+
+    def _create_emp(self, emp_id, name, manager=None) -> Employee:
+        return Employee.objects.create(
+            emp_id=emp_id,
+            id_card=f"42012319900101{emp_id[-3:]}1",
+            emp_name=name,
+            gender="male",
+            birth_date=timezone.now().date(),
+            phone="13800000000",
+            email=f"{emp_id.lower()}@example.com",
+            hire_date=timezone.now().date(),
+            org=self.org,
+            position="员工",
+            employment_type="full_time",
+            emp_status="active",
+            manager_emp=manager,
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _sla(self, leave_type, remind, escalate) -> None:
+        LeaveSlaRule.objects.create(
+            leave_type=leave_type,
+            remind_hours=remind,
+            escalate_hours=escalate,
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _submit(self, day, hours_ago, leave_type="personal") -> LeaveApply:
+        start = timezone.make_aware(datetime(2031, 5, day, 9))
+        leave = submit_leave(
+            self.dev,
+            leave_type=leave_type,
+            segments=[(start, start.replace(hour=18))],
+            operator="tests",
+        )
+        LeaveApply.objects.filter(pk=leave.pk).update(
+            create_time=self.now - timedelta(hours=hours_ago)
+        )
+        return leave
+
+    def _notices(self):
+        return sorted(
+            (str(leave_id), level)
+            for leave_id, level in LeaveSlaNotice.objects.values_list(
+                "leave_id", "level"
+            )
+        )
+
+    def test_overdue_leaves_are_notified_once_in_batches(self) -> None:
+        print("\n[审批时限验证] 按类型时限判定提醒/升级，分批写入发件箱且只通知一次...")
+        late = self._submit(5, 30)
+        very_late = self._submit(6, 80)
+        sick = self._submit(7, 5, leave_type="sick")
+        self._submit(8, 2)
+        done = self._submit(9, 100)
+        bulk_transition(self.admin, [done.pk], "approve")
+        OutboxMessage.objects.all().delete()
+
+        run = check_leave_sla(self.now, batch_size=2)
+        print(f"[巡检] 提醒 {run.reminded} 条，升级 {run.escalated} 条")
+        self.assertEqual((run.reminded, run.escalated), (3, 1))
+        self.assertEqual(
+            self._notices(),
+            sorted(
+                [
+                    (str(late.pk), "remind"),
+                    (str(very_late.pk), "remind"),
+                    (str(very_late.pk), "escalate"),
+                    (str(sick.pk), "remind"),
+                ]
+            ),
+        )
+        escalation = OutboxMessage.objects.get(topic="leave.sla.escalate")
+        self.assertEqual(escalation.aggregate_id, str(very_late.pk))
+        self.assertEqual(escalation.payload["approver_emp_id"], str(self.manager.pk))
+        self.assertEqual(escalation.payload["escalate_to"], str(self.director.pk))
+        self.assertEqual(escalation.payload["sla_hours"], 72)
+        self.assertEqual(
+            OutboxMessage.objects.filter(topic="leave.sla.remind").count(), 3
+        )
+
+        again = check_leave_sla(self.now + timedelta(hours=1))
+        self.assertEqual((again.reminded, again.escalated), (0, 0))
+        self.assertEqual(OutboxMessage.objects.count(), 4)
+
+        # 审核中单据的部分索引能覆盖巡检的范围条件
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(
+                "EXPLAIN SELECT id FROM leave_apply "
+                "WHERE apply_status = 'reviewing' AND create_time <= now()"
+            )
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        self.assertIn("idx_leave_reviewing_created", plan)
+        print("[校验通过] 超时单据按级别各通知一次，巡检走部分索引。")
+
+    def test_policy_page(self) -> None:
+        print("\n[审批时限配置] 配置中心按类型保存时限并列出入账规则...")
+        self.client.force_login(self.admin)
+        home = self.client.get(reverse("config:dashboard"))
+        self.assertContains(home, reverse("config:leave_policy"))
+
+        url = reverse("config:leave_policy")
+        self.assertEqual(self.client.get(url).status_code, 200)
+        resp = self.client.post(
+            url,
+            {
+                "leave_type": "sick",
+                "remind_hours": 8,
+                "escalate_hours": 24,
+                "status": "enabled",
+            },
+        )
+        self.assertRedirects(resp, url)
+        self.assertEqual(LeaveSlaRule.objects.filter(leave_type="sick").count(), 1)
+        self.assertEqual(LeaveSlaRule.objects.get(leave_type="sick").escalate_hours, 24)
+
+        resp = self.client.post(
+            url,
+            {
+                "leave_type": "",
+                "remind_hours": 48,
+                "escalate_hours": 12,
+                "status": "enabled",
+            },
+        )
+        self.assertContains(resp, "升级时限应晚于提醒时限")
+        self.assertEqual(
+            LeaveSlaRule.objects.get(leave_type__isnull=True).remind_hours, 24
+        )
+        print("[校验通过] 同一类型覆盖保存，时限前后关系被校验。")
@@ -0,0 +1,119 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.employee.models import Employee
+from apps.leave.search import LeaveSearchFilters, search_page
+from apps.leave.services import submit_leave
+from apps.organization.models import Organization
+from utils.sql_scope import get_user_scope
+from utils.textsearch import search_document, search_query
+
+
+class LeaveTextSearchTests(TestCase):
+    def setUp(self) -> None:
+        self.org = Organization.objects.create(
+            org_code="TS-ORG",
+            org_name="检索中心",
+            org_type="company",
+            effective_time=timezone.now(),
+            status="enabled",
+            create_by="tests",
+            update_by="tests",
+        )
+        self.admin = User.objects.create_superuser(username="ts-admin", password="x")
+        self.scope = get_user_scope(
+            user_id=self.admin.id, is_superuser=True, is_staff=True
+        )
+        self.zhang = self._create_emp("T1001", "张三丰", "zhang.sanfeng@example.com")
+        self.li = self._create_emp("T1002", "李四", "lisi@example.com")
+        self.start = timezone.localtime(timezone.now() + timedelta(days=14)).replace(
+            hour=9, minute=0, second=0, microsecond=0
+        )
+
+    def _create_emp(self, emp_id, name, email) -> Employee:
+        return Employee.objects.create(
+            emp_id=emp_id,
+            id_card=f"42012319900101{emp_id[-3:]}1",
+            emp_name=name,
+            gender="male",
+            birth_date=timezone.now().date(),
+            phone="13800000000",
+            email=email,
+            hire_date=timezone.now().date(),
+            org=self.org,
+            position="员工",
+            employment_type="full_time",
+            emp_status="active",
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _apply(self, emp, day, reason):
+        start = self.start + timedelta(days=day)
+        return submit_leave(
+            emp,
+            leave_type="personal",
+            reason=reason,
+            segments=[(start, start + timedelta(hours=2))],
+            operator="tests",
+        )
+
+    def _search(self, keyword, **kwargs):
+        filters = LeaveSearchFilters(keyword=keyword)
+        return search_page(self.scope, filters, **kwargs)
+
+    def test_tokenizer(self) -> None:
+        print("\n[分词验证] 汉字按单字+二元组建索引，字母数字按前缀查询...")
+        document = search_document("张三丰", "T1001", "zhang.sanfeng@example.com")
+        print(f"[文档] {document}")
+        self.assertEqual(
+            document.split()[:5], ["张", "三", "丰", "张三", "三丰"], document
+        )
+        self.assertIn("1001", document.split())
+        self.assertEqual(search_query("三丰 t10"), "'三丰' & 't10':*")
+        self.assertEqual(search_query("老人住院"), "'老人' & '人住' & '住院'")
+        self.assertEqual(search_query("Ｔ１００"), "'t100':*")
+        self.assertEqual(search_query("@@ -"), "")
+        print("[校验通过] 全角字符归一，纯符号关键字不产生查询。")
+
+    def test_keyword_matches_names_reasons_and_ranks(self) -> None:
+        print("\n[全文检索验证] 关键字命中姓名/工号/邮箱/事由，按相关度排序...")
+        once = self._apply(self.li, 3, "回老家办理户口")
+        twice = self._apply(self.zhang, 1, "老家有事，需回老家一趟")
+        other = self._apply(self.li, 2, "身体不适去医院复查")
+
+        def ids(keyword, **kwargs):
+            return [str(r["leave_id"]) for r in self._search(keyword, **kwargs).items]
+
+        # 事由出现两次的单据排在前面，尽管另一张开始时间更晚
+        self.assertEqual(ids("老家"), [str(twice.pk), str(once.pk)])
+        self.assertEqual(ids("三丰"), [str(twice.pk)])
+        # 相关度相同时按开始时间倒序
+        self.assertEqual(ids("t100"), [str(once.pk), str(other.pk), str(twice.pk)])
+        self.assertEqual(ids("lisi"), [str(once.pk), str(other.pk)])
+        self.assertEqual(ids("医院 李四"), [str(other.pk)])
+        self.assertEqual(ids("老家医院"), [])
+
+        # 相关度作为游标首列，翻页不重不漏
+        page = self._search("t100", limit=1)
+        seen = [str(page.items[0]["leave_id"])]
+        while page.has_next:
+            page = self._search("t100", cursor=page.next_cursor, limit=1)
+            seen.extend(str(r["leave_id"]) for r in page.items)
+        self.assertEqual(seen, ids("t100"))
+
+        # 改名后宽表向量随之刷新
+        self.li.emp_name = "李思源"
+        self.li.save()
+        self.assertEqual(ids("思源"), [str(once.pk), str(other.pk)])
+        self.assertEqual(ids("李四"), [])
+
+        out = StringIO()
+        call_command("rebuild_search_index", "--verify-only", stdout=out)
+        self.assertIn("检索向量校验通过", out.getvalue())
+        print("[校验通过] 二元分词命中子串，改名后检索结果随之变化，校验通过。")
@@ -6,8 +6,30 @@ app_name = "leave"
 urlpatterns = [
     path("", views.LeaveListView.as_view(), name="list"),
     path("sql-search/", views.LeaveOrgSqlSearchView.as_view(), name="sql_search"),
+    path(
+        "sql-search/export/",
+        views.LeaveOrgSqlExportView.as_view(),
+        name="sql_export",
+    ),
+    path("import/", views.LeaveImportView.as_view(), name="import"),
+    path(
+        "import/template/",
+        views.LeaveImportTemplateView.as_view(),
+        name="import_template",
+    ),
+    path(
+        "import/report/<str:token>/",
+        views.LeaveImportReportView.as_view(),
+        name="import_report",
+    ),
     path("apply/", views.LeaveApplyView.as_view(), name="apply"),
+    path("api/apply/", views.LeaveApplyApiView.as_view(), name="apply_api"),
+    path("calendar/", views.TeamCalendarView.as_view(), name="calendar"),
+    path("api/calendar/", views.TeamCalendarApiView.as_view(), name="calendar_api"),
+    path("analytics/", views.LeaveAnalyticsView.as_view(), name="analytics"),
+    path("api/analytics/", views.LeaveAnalyticsApiView.as_view(), name="analytics_api"),
     path("approvals/", views.LeaveApprovalListView.as_view(), name="approval_list"),
+    path("approvals/bulk/", views.LeaveBulkActionView.as_view(), name="bulk_action"),
     path("<str:pk>/", views.LeaveDetailView.as_view(), name="detail"),
     path("<str:pk>/action/", views.LeaveActionView.as_view(), name="action"),
 ]
@@ -1,26 +1,60 @@
+import csv
+import json
+import tempfile
+import uuid
+from io import StringIO
+from urllib.parse import urlencode
+
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.contrib import messages
-from django.views.generic import ListView, View, DetailView
-from django.db import transaction, IntegrityError
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.views.generic import DetailView, FormView, ListView, View
+from django.db import IntegrityError
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.core.exceptions import PermissionDenied
 from django.db import connection
 from django.template.defaultfilters import truncatechars
-from django.contrib.auth import get_user_model
-from .models import LeaveApply, LeaveTimeSegment
-from .forms import LeaveApplyForm
+from .models import LeaveApply, LeaveImportReport
+from .analytics import USED_STATUSES, leave_pivot
+from .calendar import get_team_calendar, next_month
+from .forms import LeaveApplyForm, LeaveImportForm
+from .importer import IMPORT_HEADERS, import_leaves, iter_import_rows, iter_issue_csv
+from .search import (
+    LeaveSearchFilters,
+    iter_export_csv,
+    search_page,
+    write_export_xlsx,
+)
+from .services import (
+    HR_STEP,
+    INBOX_ORDERING,
+    RESULT_FORBIDDEN,
+    RESULT_OK,
+    TRANSITIONS,
+    LeaveQuotaError,
+    SegmentOverlapError,
+    approval_inbox,
+    bulk_transition,
+    pending_approval_count,
+    submit_leave,
+)
 from apps.employee.models import Employee
+from apps.organization.models import Organization, OrganizationClosure
 from apps.performance.models import PerformanceEvaluation
-from apps.performance.services import refresh_metrics_for_queryset
-from apps.core.roles import is_performance_admin
+from apps.core.roles import is_hr_user, is_performance_admin
 from django.utils import timezone
-from decimal import Decimal
+from datetime import datetime, timedelta
+from utils.keyset import keyset_paginate
 from utils.sql_scope import (
     build_org_tree_cte,
     get_user_scope,
     normalize_str,
-    parse_iso_datetime_local,
-    uniq,
 )
 
 # ... (Existing imports: LeaveListView, LeaveApplyView) ...
@@ -46,9 +80,23 @@ class LeaveListView(LoginRequiredMixin, ListView):
 
 
 class LeaveApplyView(LoginRequiredMixin, View):
+    template_name = "leave/apply.html"
+
+    def _render(self, request, form, conflicts=()):
+        rows = form.segment_rows()
+        for conflict in conflicts:
+            if conflict.index < len(rows):
+                rows[conflict.index].setdefault("conflicts", []).append(
+                    conflict.message
+                )
+        return render(
+            request,
+            self.template_name,
+            {"form": form, "segment_rows": rows, "conflicts": conflicts},
+        )
+
     def get(self, request):
-        form = LeaveApplyForm()
-        return render(request, "leave/apply.html", {"form": form})
+        return self._render(request, LeaveApplyForm())
 
     def post(self, request):
         if hasattr(request.user, "employee"):
@@ -57,38 +105,31 @@ class LeaveApplyView(LoginRequiredMixin, View):
             messages.error(request, "系统未配置员工档案，无法提交")
             return redirect("leave:list")
 
-        form = LeaveApplyForm(request.POST)
+        form = LeaveApplyForm(request.POST, employee=employee)
         if form.is_valid():
             try:
-                with transaction.atomic():
-                    start_time = form.cleaned_data["start_time"]
-                    end_time = form.cleaned_data["end_time"]
-
-                    duration = end_time - start_time
-                    days = Decimal(duration.total_seconds() / (24 * 3600)).quantize(
-                        Decimal("0.01")
-                    )
-
-                    leave = form.save(commit=False)
-                    leave.emp = employee
-                    leave.total_days = days
-                    leave.create_by = request.user.id
-                    leave.update_by = request.user.id
-                    leave.save()
-
-                    LeaveTimeSegment.objects.create(
-                        leave=leave,
-                        emp=employee,
-                        leave_start_time=start_time,
-                        leave_end_time=end_time,
-                        segment_days=days,
-                        create_by=request.user.id,
-                        update_by=request.user.id,
-                    )
-
+                submit_leave(
+                    employee,
+                    leave_type=form.cleaned_data["leave_type"],
+                    reason=form.cleaned_data["reason"],
+                    attachment_url=form.cleaned_data["attachment_url"],
+                    segments=form.cleaned_data["segments"],
+                    operator=request.user.id,
+                )
                 messages.success(request, "请假申请已提交")
                 return redirect("leave:list")
+            except SegmentOverlapError as e:
+                messages.error(
+                    request,
+                    "以下时间段与“审核中”或“已批准”的记录重叠，请调整后再提交",
+                )
+                return self._render(request, form, e.conflicts)
+            except LeaveQuotaError as e:
+                for message in e.messages:
+                    messages.error(request, message)
+                return self._render(request, form)
             except IntegrityError as e:
+                # 预检之外的兜底：数据库排他约束仍然生效
                 if "no_leave_overlap" in str(e) or "exclude_emp_leave_time" in str(e):
                     messages.error(
                         request,
@@ -99,49 +140,163 @@ class LeaveApplyView(LoginRequiredMixin, View):
             except Exception as e:
                 messages.error(request, f"系统错误：{str(e)}")
 
-        return render(request, "leave/apply.html", {"form": form})
+        return self._render(request, form)
+
+
+class LeaveApplyApiView(LoginRequiredMixin, View):
+    """
+    JSON 接口：提交多段请假
+    请求体 {"leave_type", "reason", "attachment_url", "segments": [{"start", "end"}, ...]}；
+    成功返回 201，时间段冲突返回 409 并逐段列出冲突，提交时额度不足同样返回 409。
+    """
+
+    def post(self, request):
+        employee = getattr(request.user, "employee", None)
+        if employee is None:
+            return JsonResponse({"error": "系统未配置员工档案，无法提交"}, status=403)
+        try:
+            payload = json.loads(request.body or b"{}")
+            segments = payload.get("segments") or []
+            data = {
+                "leave_type": payload.get("leave_type"),
+                "reason": payload.get("reason"),
+                "attachment_url": payload.get("attachment_url"),
+                "start_time": [segment.get("start") for segment in segments],
+                "end_time": [segment.get("end") for segment in segments],
+            }
+        except (ValueError, AttributeError, TypeError):
+            return JsonResponse({"error": "请求体必须是合法的 JSON"}, status=400)
+
+        form = LeaveApplyForm(data, employee=employee)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors.get_json_data()}, status=400)
+        try:
+            leave = submit_leave(
+                employee,
+                leave_type=form.cleaned_data["leave_type"],
+                reason=form.cleaned_data["reason"],
+                attachment_url=form.cleaned_data["attachment_url"],
+                segments=form.cleaned_data["segments"],
+                operator=request.user.id,
+            )
+        except SegmentOverlapError as e:
+            return JsonResponse(
+                {
+                    "error": "时间段冲突",
+                    "conflicts": [
+                        {
+                            "index": conflict.index,
+                            "message": conflict.message,
+                            "leave_id": conflict.leave_id,
+                            "other_index": conflict.other_index,
+                            "start": conflict.other_start.isoformat(),
+                            "end": conflict.other_end.isoformat(),
+                        }
+                        for conflict in e.conflicts
+                    ],
+                },
+                status=409,
+            )
+        except LeaveQuotaError as e:
+            return JsonResponse(
+                {
+                    "error": "额度不足",
+                    "shortfalls": [
+                        {
+                            "year": shortfall.year,
+                            "requested": str(shortfall.requested),
+                            "available": str(shortfall.available),
+                            "message": shortfall.message,
+                        }
+                        for shortfall in e.shortfalls
+                    ],
+                },
+                status=409,
+            )
+        return JsonResponse(
+            {
+                "id": str(leave.pk),
+                "apply_status": leave.apply_status,
+                "total_days": str(leave.total_days),
+                "segments": len(form.cleaned_data["segments"]),
+            },
+            status=201,
+        )
 
 
 class LeaveApprovalListView(LoginRequiredMixin, ListView):
     """
     待办审批列表
-    逻辑：查找申请人的直属上级是当前用户的所有 审核中(reviewing) 记录
+    逻辑：当前用户名下待审批的审批任务（HR 另含共享队列），按到达时间游标分页（?after=）
     """
 
     model = LeaveApply
     template_name = "leave/approval_list.html"
     context_object_name = "tasks"
+    page_size = 20
+    team_page_size = 20
 
     def get_queryset(self):
-        if not hasattr(self.request.user, "employee"):
+        self.page = None
+        current_emp = getattr(self.request.user, "employee", None)
+        self.include_pool = is_hr_user(self.request.user)
+        if current_emp is None and not self.include_pool:
             return LeaveApply.objects.none()
-
-        current_emp = self.request.user.employee
-        # 查找所有汇报给当前员工的下属
-        subordinates = Employee.objects.filter(manager_emp=current_emp)
-
-        # 查找下属的待审批请求
-        return (
-            LeaveApply.objects.filter(emp__in=subordinates, apply_status="reviewing")
-            .select_related("emp")
-            .order_by("create_time")
+        self.page = approval_inbox(
+            current_emp,
+            cursor=self.request.GET.get("after"),
+            limit=self.page_size,
+            include_pool=self.include_pool,
         )
+        for leave in self.page.items:
+            step = leave.approval_step
+            leave.step_label = step.get_kind_display() if step.kind == HR_STEP else None
+        return self.page.items
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         for task in context.get("tasks", []):
             task.leave_type_label = task.get_leave_type_display()
             task.reason_preview = truncatechars(task.reason or "", 20)
+        context["pending_total"] = pending_approval_count(
+            getattr(self.request.user, "employee", None),
+            include_pool=self.include_pool,
+        )
+        context["next_cursor"] = self.page.next_cursor if self.page else None
+        context["is_first_page"] = not self.request.GET.get("after")
 
         performance_tasks = []
         if is_performance_admin(self.request.user):
-            perf_qs = (
+            # 指标在进入审核时及定时任务中预先计算，这里只读取保存的结果
+            performance_tasks = list(
                 PerformanceEvaluation.objects.filter(evaluation_status="hr_audit")
-                .select_related("emp", "cycle")
+                .select_related("emp", "emp__org", "cycle")
                 .order_by("cycle__start_time", "emp__emp_name")
             )
-            refresh_metrics_for_queryset(perf_qs, save=False)
-            performance_tasks = list(perf_qs)
+
+        # 跨级下属的审核中申请：只读展示，便于上级掌握整个团队的请假情况；
+        # 与直属待办一样按到达时间游标分页（?team_after=），不一次取出整个团队
+        team_tasks, team_next_url = [], None
+        current_emp = getattr(self.request.user, "employee", None)
+        if current_emp is not None:
+            team_page = keyset_paginate(
+                LeaveApply.objects.filter(
+                    emp__in=Employee.objects.reports_under(current_emp, min_depth=2),
+                    apply_status="reviewing",
+                ).select_related("emp", "emp__manager_emp"),
+                INBOX_ORDERING,
+                cursor=self.request.GET.get("team_after"),
+                limit=self.team_page_size,
+            )
+            team_tasks = team_page.items
+            for task in team_tasks:
+                task.leave_type_label = task.get_leave_type_display()
+            if team_page.next_cursor:
+                params = self.request.GET.copy()
+                params["team_after"] = team_page.next_cursor
+                team_next_url = f"?{params.urlencode()}"
+        context["team_tasks"] = team_tasks
+        context["team_next_url"] = team_next_url
 
         context["performance_tasks"] = performance_tasks
         context["performance_tasks_count"] = len(performance_tasks)
@@ -162,9 +317,15 @@ class LeaveDetailView(LoginRequiredMixin, DetailView):
 
         current_emp = current_user.employee
         is_owner = obj.emp == current_emp
-        is_manager = obj.emp.manager_emp == current_emp
-
-        if not (is_owner or is_manager or current_user.is_superuser):
+        # 直属及跨级上级均可查看（审批仍限单据的审批人，见 _can_approve）
+        is_manager = not is_owner and Employee.objects.is_above(current_emp, obj.emp)
+
+        if not (
+            is_owner
+            or is_manager
+            or current_user.is_superuser
+            or is_hr_user(current_user)
+        ):
             raise PermissionDenied
         # 保存权限上下文，供模板使用
         self._is_owner = is_owner
@@ -186,25 +347,31 @@ class LeaveDetailView(LoginRequiredMixin, DetailView):
             )
         return rows
 
+    def _build_approval_steps(self, leave):
+        # 审批链一次查询取出；未记录处理人（如超级管理员代批）时显示指派的审批人
+        steps = list(
+            leave.approval_tasks.select_related("approver_emp", "decided_by_emp")
+        )
+        for step in steps:
+            step.kind_label = step.get_kind_display()
+            step.status_label = step.get_status_display()
+            step.decided_at_display = self._format_datetime(step.decided_at)
+            handler = step.decided_by_emp or step.approver_emp
+            if handler:
+                step.handler_display = handler.emp_name
+            elif step.kind == HR_STEP:
+                step.handler_display = "人力资源"
+            else:
+                step.handler_display = None
+        return steps
+
     def _resolve_approver(self, leave):
-        if leave.apply_status == "reviewing":
-            return None
-        user_model = get_user_model()
-        if leave.update_by:
-            approver = (
-                user_model.objects.filter(pk=leave.update_by)
-                .select_related("employee")
-                .first()
-            )
-            if approver:
-                employee_profile = getattr(approver, "employee", None)
-                if employee_profile:
-                    return employee_profile.emp_name
-                return approver.get_full_name() or approver.username
-        manager_emp = getattr(leave.emp, "manager_emp", None)
-        if manager_emp:
-            return manager_emp.emp_name
-        return None
+        decided = [
+            step
+            for step in leave.approval_steps
+            if step.status in ("approved", "rejected")
+        ]
+        return decided[-1].handler_display if decided else None
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -215,6 +382,7 @@ class LeaveDetailView(LoginRequiredMixin, DetailView):
             leave.update_time_display = self._format_datetime(leave.update_time)
             leave.status_label = leave.get_apply_status_display()
             leave.segment_rows = self._build_segment_rows(leave)
+            leave.approval_steps = self._build_approval_steps(leave)
             leave.approver_display = self._resolve_approver(leave)
             leave.can_approve = self._can_approve(leave)
             leave.can_complete = self._can_complete(leave)
@@ -227,9 +395,14 @@ class LeaveDetailView(LoginRequiredMixin, DetailView):
         user = self.request.user
         if user.is_superuser:
             return True
+        pending = [step for step in leave.approval_steps if step.status == "pending"]
+        if not pending:
+            return False
+        if pending[0].approver_emp_id is None:
+            return is_hr_user(user)
         if not hasattr(user, "employee"):
             return False
-        return leave.emp.manager_emp_id == user.employee.pk
+        return str(pending[0].approver_emp_id) == str(user.employee.pk)
 
     def _can_complete(self, leave: LeaveApply) -> bool:
         if leave.apply_status != "approved":
@@ -253,97 +426,247 @@ class LeaveActionView(LoginRequiredMixin, View):
         if not hasattr(request.user, "employee"):
             messages.error(request, "无权操作")
             return redirect("leave:list")
+        if action not in TRANSITIONS:
+            messages.warning(request, "无效的操作")
+            return redirect("leave:detail", pk=pk)
 
-        current_emp = request.user.employee
-        is_owner = leave.emp == current_emp
-        is_approver = leave.emp.manager_emp == current_emp or request.user.is_superuser
-
-        if action == "complete":
-            if not is_owner:
+        result = bulk_transition(request.user, [leave.pk], action)[str(leave.pk)]
+        if result == RESULT_FORBIDDEN:
+            if action == "complete":
                 messages.error(request, "只能本人完成自己的请假单")
-                return redirect("leave:list")
-            if leave.apply_status != "approved":
-                messages.error(request, "仅已批准的请假单可标记为已完成")
-                return redirect("leave:detail", pk=pk)
-            leave.apply_status = "completed"
-            leave.segments.update(is_active=False)
-            messages.success(request, "已将请假单标记为已完成")
-        elif action == "approve":
-            if not is_approver:
-                messages.error(request, "您不是该申请的审批人")
-                return redirect("leave:list")
-            if leave.apply_status != "reviewing":
-                messages.warning(request, "当前状态不可再次审批")
-                return redirect("leave:detail", pk=pk)
-            leave.apply_status = "approved"
-            leave.segments.update(is_active=True)
-            messages.success(request, "已批准该申请")
-        elif action == "reject":
-            if not is_approver:
+            else:
                 messages.error(request, "您不是该申请的审批人")
-                return redirect("leave:list")
-            if leave.apply_status != "reviewing":
+            return redirect("leave:list")
+        if result != RESULT_OK:
+            if action == "complete":
+                messages.error(request, "仅已批准的请假单可标记为已完成")
+            else:
                 messages.warning(request, "当前状态不可再次审批")
-                return redirect("leave:detail", pk=pk)
-            leave.apply_status = "rejected"
-            leave.segments.update(is_active=False)
-            messages.success(request, "已拒绝该申请")
-        else:
-            messages.warning(request, "无效的操作")
             return redirect("leave:detail", pk=pk)
 
-        leave.update_by = request.user.id
-        leave.save()
         # 跳转：审批人返回待办列表；本人完成后返回列表
         if action == "complete":
+            messages.success(request, "已将请假单标记为已完成")
             return redirect("leave:list")
+        messages.success(
+            request, "已批准该申请" if action == "approve" else "已拒绝该申请"
+        )
         return redirect("leave:approval_list")
 
 
-class LeaveOrgSqlSearchView(LoginRequiredMixin, View):
-    """原生 SQL：上级部门可查询下级部门请假记录，多条件组合；下级不可越权。"""
+class LeaveBulkActionView(LoginRequiredMixin, View):
+    """
+    批量审批：POST ids（可多值）+ action（approve/reject），返回逐条处理结果 JSON
+    """
 
-    template_name = "leave/sql_search.html"
-    max_rows = 200
+    bulk_actions = ("approve", "reject")
+    max_batch = 500
 
-    def get(self, request):
+    def post(self, request):
+        action = request.POST.get("action")
+        if action not in self.bulk_actions:
+            return JsonResponse({"error": "无效的操作"}, status=400)
+        ids = [pk for pk in request.POST.getlist("ids") if pk]
+        if not ids:
+            return JsonResponse({"error": "请选择需要处理的申请"}, status=400)
+        if len(ids) > self.max_batch:
+            return JsonResponse(
+                {"error": f"单次最多处理 {self.max_batch} 条"}, status=400
+            )
+
+        results = bulk_transition(request.user, ids, action)
+        summary = {}
+        for result in results.values():
+            summary[result] = summary.get(result, 0) + 1
+        return JsonResponse(
+            {
+                "action": action,
+                "label": TRANSITIONS[action].label,
+                "results": results,
+                "summary": summary,
+            }
+        )
+
+
+class TeamCalendarMixin:
+    """团队日历的组织/月份解析与权限：HR、超级管理员可看任意组织，负责人只能看自己的子树。"""
+
+    def resolve_calendar(self, request):
         scope = get_user_scope(
             user_id=request.user.id,
             is_superuser=request.user.is_superuser,
             is_staff=request.user.is_staff,
         )
-
         if not (scope.is_superuser or scope.is_hr or scope.is_manager):
             raise PermissionDenied
 
-        # Ensure SQL view exists (prevents confusing DB errors)
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT to_regclass('vw_leave_profile')")
-            if cursor.fetchone()[0] is None:
-                messages.error(
-                    request,
-                    "缺少数据库视图 vw_leave_profile：请先运行 hrms/apply_views.py 初始化视图。",
-                )
-                return redirect("core:dashboard")
+        default_org = (scope.managed_org_ids or (scope.org_id,))[0]
+        org_id = normalize_str(request.GET.get("org")) or default_org
+        if not org_id:
+            raise PermissionDenied
+        visible = scope.is_superuser or scope.is_hr
+        if not visible:
+            visible = OrganizationClosure.objects.filter(
+                ancestor_id__in=scope.managed_org_ids, descendant_id=org_id
+            ).exists()
+        if not visible:
+            raise PermissionDenied
 
-        root_ids: list[str] = []
-        if scope.org_id:
-            root_ids.append(scope.org_id)
+        try:
+            month = datetime.strptime(request.GET.get("month") or "", "%Y-%m").date()
+        except ValueError:
+            month = timezone.localdate().replace(day=1)
+        return scope, org_id, month
 
-        if scope.emp_pk:
-            with connection.cursor() as cursor:
-                cursor.execute(
-                    """
-                    SELECT org.id
-                    FROM organization org
-                    WHERE org.is_deleted = FALSE
-                      AND org.manager_emp_id = %s
-                    """,
-                    [scope.emp_pk],
-                )
-                root_ids.extend([r[0] for r in cursor.fetchall()])
 
-        root_ids = uniq([rid for rid in root_ids if rid])
+class TeamCalendarApiView(LoginRequiredMixin, TeamCalendarMixin, View):
+    """JSON：?org=&month=YYYY-MM，按天返回请假人员与可用人数。"""
+
+    def get(self, request):
+        _, org_id, month = self.resolve_calendar(request)
+        return JsonResponse(get_team_calendar(org_id, month))
+
+
+class TeamCalendarView(LoginRequiredMixin, TeamCalendarMixin, View):
+    template_name = "leave/calendar.html"
+
+    def get(self, request):
+        scope, org_id, month = self.resolve_calendar(request)
+        calendar = get_team_calendar(org_id, month)
+
+        orgs = Organization.objects.filter(is_deleted=False)
+        if not (scope.is_superuser or scope.is_hr):
+            orgs = orgs.filter(
+                ancestor_links__ancestor_id__in=scope.managed_org_ids
+            ).distinct()
+        # 月历前补齐空白格，使 1 号落在对应的星期列
+        leading = [None] * calendar["days"][0]["weekday"]
+        return render(
+            request,
+            self.template_name,
+            {
+                "calendar": calendar,
+                "cells": leading + calendar["days"],
+                "org_id": org_id,
+                "org_options": orgs.order_by("org_name").values("id", "org_name"),
+                "month": month,
+                "prev_month": (month - timedelta(days=1)).replace(day=1),
+                "next_month": next_month(month),
+            },
+        )
+
+
+# 统计口径：参数值 -> (名称, 计入的申请状态)
+ANALYTICS_STATUS_OPTIONS = {
+    "used": ("已休（已批准/已完成）", USED_STATUSES),
+    "reviewing": ("审核中", ("reviewing",)),
+    "rejected": ("已拒绝", ("rejected",)),
+    "all": ("全部申请", tuple(code for code, _ in LeaveApply.STATUS_CHOICES)),
+}
+
+
+class LeaveAnalyticsMixin:
+    """请假统计的组织/年份/口径解析：HR、超级管理员可看全公司与任意组织，
+    负责人只能看自己管理的子树。"""
+
+    def resolve_analytics(self, request):
+        scope = get_user_scope(
+            user_id=request.user.id,
+            is_superuser=request.user.is_superuser,
+            is_staff=request.user.is_staff,
+        )
+        company_wide = scope.is_superuser or scope.is_hr
+        if not (company_wide or scope.is_manager):
+            raise PermissionDenied
+
+        # 组织留空表示全公司，仅 HR、超级管理员可用
+        org_id = normalize_str(request.GET.get("org"))
+        if not org_id and not company_wide:
+            org_id = scope.managed_org_ids[0]
+        if org_id and not company_wide:
+            if not OrganizationClosure.objects.filter(
+                ancestor_id__in=scope.managed_org_ids, descendant_id=org_id
+            ).exists():
+                raise PermissionDenied
+
+        # 透视要取上年同期与次年年初，年份超出范围时与非数字一样回到今年
+        try:
+            year = int(request.GET.get("year") or "")
+            if not 1900 <= year <= 9998:
+                raise ValueError(year)
+        except ValueError:
+            year = timezone.localdate().year
+        status = request.GET.get("status")
+        if status not in ANALYTICS_STATUS_OPTIONS:
+            status = "used"
+        return scope, org_id, year, status
+
+    def get_pivot(self, request):
+        scope, org_id, year, status = self.resolve_analytics(request)
+        pivot = leave_pivot(org_id, year, statuses=ANALYTICS_STATUS_OPTIONS[status][1])
+        return scope, status, pivot
+
+
+class LeaveAnalyticsApiView(LoginRequiredMixin, LeaveAnalyticsMixin, View):
+    """JSON：?org=&year=&status=，请假类型 × 月份透视、上年同期对比与下级组织合计。"""
+
+    def get(self, request):
+        _, _, pivot = self.get_pivot(request)
+        return JsonResponse(pivot)
+
+
+class LeaveAnalyticsView(LoginRequiredMixin, LeaveAnalyticsMixin, View):
+    """请假统计报表：数据取自预聚合的 leave_month_stat，不扫描请假明细。"""
+
+    template_name = "leave/analytics.html"
+
+    def get(self, request):
+        scope, status, pivot = self.get_pivot(request)
+        orgs = Organization.objects.filter(is_deleted=False)
+        if not (scope.is_superuser or scope.is_hr):
+            orgs = orgs.filter(
+                ancestor_links__ancestor_id__in=scope.managed_org_ids
+            ).distinct()
+        return render(
+            request,
+            self.template_name,
+            {
+                "pivot": pivot,
+                "org_id": pivot["org_id"] or "",
+                "org_options": orgs.order_by("org_name").values("id", "org_name"),
+                "company_wide": scope.is_superuser or scope.is_hr,
+                "status": status,
+                "status_options": [
+                    (value, label)
+                    for value, (label, _) in ANALYTICS_STATUS_OPTIONS.items()
+                ],
+                "year": pivot["year"],
+            },
+        )
+
+
+def get_search_scope(request):
+    """请假检索/导出的数据范围：仅超管、HR 与部门负责人可用。"""
+    scope = get_user_scope(
+        user_id=request.user.id,
+        is_superuser=request.user.is_superuser,
+        is_staff=request.user.is_staff,
+    )
+    if not (scope.is_superuser or scope.is_hr or scope.is_manager):
+        raise PermissionDenied
+    return scope
+
+
+class LeaveOrgSqlSearchView(LoginRequiredMixin, View):
+    """原生 SQL：上级部门可查询下级部门请假记录，多条件组合；下级不可越权。"""
+
+    template_name = "leave/sql_search.html"
+    page_size = 50
+
+    def get(self, request):
+        scope = get_search_scope(request)
+
+        root_ids = scope.root_org_ids
 
         # org options
         org_options: list[dict[str, str]] = []
@@ -366,117 +689,19 @@ class LeaveOrgSqlSearchView(LoginRequiredMixin, View):
                     {cte_sql}
                     SELECT o.id, o.org_name
                     FROM organization o
+                    JOIN org_tree t ON t.id = o.id
                     WHERE o.is_deleted = FALSE
-                      AND o.id IN (SELECT id FROM org_tree)
                     ORDER BY o.org_name
                     """,
                     cte_params,
                 )
                 org_options = [{"id": r[0], "name": r[1]} for r in cursor.fetchall()]
 
-        filter_org = normalize_str(request.GET.get("org"))
-        keyword = normalize_str(request.GET.get("keyword"))
-        emp_id_exact = normalize_str(request.GET.get("emp_id"))
-        leave_type = normalize_str(request.GET.get("leave_type"))
-        apply_status = normalize_str(request.GET.get("apply_status"))
-        start_dt = parse_iso_datetime_local(request.GET.get("start"))
-        end_dt = parse_iso_datetime_local(request.GET.get("end"))
-        days_min_raw = normalize_str(request.GET.get("days_min"))
-        days_max_raw = normalize_str(request.GET.get("days_max"))
-
-        days_min: Decimal | None = None
-        days_max: Decimal | None = None
-        try:
-            if days_min_raw:
-                days_min = Decimal(days_min_raw)
-        except Exception:
-            days_min = None
-        try:
-            if days_max_raw:
-                days_max = Decimal(days_max_raw)
-        except Exception:
-            days_max = None
-
-        # Query from view (already filters deleted rows)
-        clauses: list[str] = ["1=1"]
-        params: list[object] = []
-
-        if not (scope.is_superuser or scope.is_hr):
-            cte_sql, cte_params = build_org_tree_cte(root_ids)
-            clauses.append("v.org_id IN (SELECT id FROM org_tree)")
-            params.extend(cte_params)
-        else:
-            cte_sql = ""
-
-        if filter_org:
-            clauses.append("v.org_id = %s")
-            params.append(filter_org)
-
-        if emp_id_exact:
-            clauses.append("v.emp_id = %s")
-            params.append(emp_id_exact)
-
-        if leave_type:
-            clauses.append("v.leave_type = %s")
-            params.append(leave_type)
-
-        if apply_status:
-            clauses.append("v.apply_status = %s")
-            params.append(apply_status)
-
-        # 时间范围基于请假分段的最小/最大区间
-        if start_dt:
-            clauses.append("v.start_time >= %s")
-            params.append(start_dt)
-
-        if end_dt:
-            clauses.append("v.end_time <= %s")
-            params.append(end_dt)
-
-        if days_min is not None:
-            clauses.append("v.total_days >= %s")
-            params.append(days_min)
-
-        if days_max is not None:
-            clauses.append("v.total_days <= %s")
-            params.append(days_max)
-
-        if keyword:
-            kw = f"%{keyword.lower()}%"
-            clauses.append(
-                "(LOWER(v.emp_name) LIKE %s OR LOWER(v.emp_id) LIKE %s OR LOWER(COALESCE(v.reason,'')) LIKE %s)"
-            )
-            params.extend([kw, kw, kw])
-
-        where_sql = " AND ".join(clauses) if clauses else "1=1"
-
-        sql = f"""
-            {cte_sql}
-            SELECT
-                v.leave_id,
-                v.leave_type,
-                v.apply_status,
-                v.total_days,
-                v.apply_time,
-                v.emp_id,
-                v.emp_name,
-                v.org_name,
-                v.start_time,
-                v.end_time,
-                v.reason
-            FROM public.vw_leave_profile v
-            WHERE {where_sql}
-            ORDER BY v.start_time DESC NULLS LAST, v.apply_time DESC
-            LIMIT {self.max_rows}
-        """
-
-        results: list[dict[str, object]] = []
-        with connection.cursor() as cursor:
-            cursor.execute(sql, params)
-            description = cursor.description or []
-            col_names = [c[0] for c in description]
-            for row in cursor.fetchall():
-                results.append(dict(zip(col_names, row)))
+        filters = LeaveSearchFilters.from_query(request.GET)
+        page = search_page(
+            scope, filters, cursor=request.GET.get("after"), limit=self.page_size
+        )
+        results = page.items
 
         leave_type_map = dict(LeaveApply.LEAVE_TYPE_CHOICES)
         apply_status_map = dict(LeaveApply.STATUS_CHOICES)
@@ -490,19 +715,136 @@ class LeaveOrgSqlSearchView(LoginRequiredMixin, View):
             "orgs": org_options,
             "results": results,
             "result_count": len(results),
-            "max_rows": self.max_rows,
+            "page_size": self.page_size,
+            "next_cursor": page.next_cursor,
+            "filter_query": urlencode(filters.as_query()),
             "leave_type_choices": LeaveApply.LEAVE_TYPE_CHOICES,
             "apply_status_choices": LeaveApply.STATUS_CHOICES,
-            "filters": {
-                "org": filter_org,
-                "keyword": keyword,
-                "emp_id": emp_id_exact,
-                "leave_type": leave_type,
-                "apply_status": apply_status,
-                "start": start_dt or "",
-                "end": end_dt or "",
-                "days_min": days_min_raw,
-                "days_max": days_max_raw,
-            },
+            "filters": filters.as_dict(),
         }
         return render(request, self.template_name, ctx)
+
+
+class LeaveOrgSqlExportView(LoginRequiredMixin, View):
+    """按检索页同样的条件与数据范围导出全部结果（CSV / Excel），流式输出。"""
+
+    def get(self, request):
+        scope = get_search_scope(request)
+        filters = LeaveSearchFilters.from_query(request.GET)
+        stamp = timezone.localtime().strftime("%Y%m%d%H%M")
+
+        if request.GET.get("format") == "xlsx":
+            # xlsx 是 zip 容器，只能整体落盘后再分块回传；临时文件在响应关闭时删除
+            target = tempfile.TemporaryFile()
+            write_export_xlsx(scope, filters, target)
+            target.seek(0)
+            return FileResponse(
+                target,
+                as_attachment=True,
+                filename=f"leave_{stamp}.xlsx",
+                content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            )
+
+        response = StreamingHttpResponse(
+            iter_export_csv(scope, filters), content_type="text/csv; charset=utf-8"
+        )
+        response["Content-Disposition"] = f'attachment; filename="leave_{stamp}.csv"'
+        return response
+
+
+# 导入错误报告的下载有效期
+IMPORT_REPORT_TTL = timedelta(hours=1)
+
+
+class LeaveImportView(LoginRequiredMixin, UserPassesTestMixin, FormView):
+    """
+    请假历史导入（HR）：上传 CSV / xlsx 后按员工校验重叠并分批写入，
+    结果页给出导入条数；有问题的行汇总为错误报告，一小时内可下载。
+    数十万行的迁移建议使用 import_leaves 命令。
+    """
+
+    template_name = "leave/import.html"
+    form_class = LeaveImportForm
+
+    def test_func(self):
+        return is_hr_user(self.request.user)
+
+    def form_valid(self, form):
+        upload = form.cleaned_data["file"]
+        dry_run = form.cleaned_data["dry_run"]
+        result = import_leaves(
+            iter_import_rows(upload, upload.name),
+            operator=str(self.request.user.pk),
+            dry_run=dry_run,
+        )
+        report_token = None
+        if result.issues:
+            LeaveImportReport.objects.filter(
+                create_time__lt=timezone.now() - IMPORT_REPORT_TTL
+            ).delete()
+            report = LeaveImportReport.objects.create(
+                token=uuid.uuid4().hex,
+                user=self.request.user,
+                content="".join(iter_issue_csv(result.issues)),
+            )
+            report_token = report.token
+        return self.render_to_response(
+            self.get_context_data(
+                form=form,
+                result=result,
+                dry_run=dry_run,
+                report_token=report_token,
+                issue_preview=result.issues[:10],
+            )
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["import_headers"] = IMPORT_HEADERS
+        return context
+
+
+class LeaveImportReportView(LoginRequiredMixin, View):
+    """下载导入错误报告（只能下载自己的）。"""
+
+    def get(self, request, token):
+        report = LeaveImportReport.objects.filter(
+            token=token,
+            user=request.user,
+            create_time__gte=timezone.now() - IMPORT_REPORT_TTL,
+        ).first()
+        if report is None:
+            raise Http404("错误报告不存在或已过期，请重新导入")
+        response = HttpResponse(report.content, content_type="text/csv; charset=utf-8")
+        response["Content-Disposition"] = (
+            'attachment; filename="leave_import_errors.csv"'
+        )
+        return response
+
+
+class LeaveImportTemplateView(LoginRequiredMixin, View):
+    """导入模板（CSV）：表头与一行示例。"""
+
+    def get(self, request):
+        writer_rows = [
+            IMPORT_HEADERS,
+            (
+                "E0001",
+                "年假",
+                "2024-03-04 09:00",
+                "2024-03-05 18:00",
+                "已批准",
+                "探亲",
+                "OLD-1",
+            ),
+        ]
+        buffer = StringIO()
+        buffer.write("\ufeff")
+        csv.writer(buffer).writerows(writer_rows)
+        response = HttpResponse(
+            buffer.getvalue(), content_type="text/csv; charset=utf-8"
+        )
+        response["Content-Disposition"] = (
+            'attachment; filename="leave_import_template.csv"'
+        )
+        return response
@@ -1 +1,70 @@
-"""Organization admin hooks (placeholder)."""
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.core.exceptions import ValidationError
+from django.shortcuts import render
+
+from .models import Organization
+from .restructure import restructure_orgs
+
+
+class RestructureForm(forms.Form):
+    new_parent = forms.ModelChoiceField(
+        queryset=Organization.objects.filter(is_deleted=False),
+        required=False,
+        label="新上级组织",
+        help_text="留空表示设为顶级组织",
+    )
+
+
+@admin.register(Organization)
+class OrganizationAdmin(admin.ModelAdmin):
+    list_display = (
+        "org_code",
+        "org_name",
+        "org_type",
+        "parent_org",
+        "manager_emp",
+        "status",
+        "is_deleted",
+    )
+    list_filter = ("org_type", "status", "is_deleted")
+    search_fields = ("org_code", "org_name")
+    raw_id_fields = ("parent_org", "manager_emp")
+    readonly_fields = ("create_time", "update_time")
+    actions = ("move_to_parent",)
+
+    def move_to_parent(self, request, queryset):
+        if "apply" in request.POST:
+            form = RestructureForm(request.POST)
+            if form.is_valid():
+                new_parent = form.cleaned_data["new_parent"]
+                moves = [
+                    (org.pk, new_parent.pk if new_parent else None) for org in queryset
+                ]
+                try:
+                    result = restructure_orgs(moves, operator=str(request.user.pk))
+                except ValidationError as exc:
+                    self.message_user(request, "；".join(exc.messages), messages.ERROR)
+                    return None
+                self.message_user(
+                    request,
+                    f"已将 {result.moved} 个组织（含全部下级）迁移到新的上级组织。",
+                )
+                return None
+        else:
+            form = RestructureForm()
+        return render(
+            request,
+            "admin/organization/restructure.html",
+            {
+                **self.admin_site.each_context(request),
+                "title": "批量调整上级组织",
+                "opts": self.model._meta,
+                "orgs": queryset,
+                "form": form,
+                "action_checkbox_name": helpers.ACTION_CHECKBOX_NAME,
+            },
+        )
+
+    move_to_parent.short_description = "批量调整上级组织（整棵子树迁移）"
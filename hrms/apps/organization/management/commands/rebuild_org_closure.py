@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.organization.services import rebuild_org_closure, verify_org_closure
+
+
+class Command(BaseCommand):
+    help = "全量重建组织闭包表 organization_closure，并与递归遍历结果校验"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify-only",
+            action="store_true",
+            help="只校验，不重建",
+        )
+
+    def handle(self, *args, **options):
+        if not options["verify_only"]:
+            with transaction.atomic():
+                rows = rebuild_org_closure()
+            self.stdout.write(f"已重建组织闭包：{rows} 行")
+
+        diff = verify_org_closure()
+        if not diff.ok:
+            raise CommandError(
+                f"组织闭包校验失败：缺失 {diff.missing} 行，多余 {diff.extra} 行"
+            )
+        self.stdout.write(self.style.SUCCESS("组织闭包校验通过"))
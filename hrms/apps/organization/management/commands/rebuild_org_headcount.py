@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.organization.services import (
+    invalidate_org_tree,
+    rebuild_org_headcount,
+    verify_org_headcount,
+)
+
+
+class Command(BaseCommand):
+    help = "按员工表全量重建组织人数汇总表 org_headcount，并校验与现算结果一致"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify-only",
+            action="store_true",
+            help="只校验，不重建",
+        )
+
+    def handle(self, *args, **options):
+        if not options["verify_only"]:
+            with transaction.atomic():
+                rows = rebuild_org_headcount()
+            transaction.on_commit(invalidate_org_tree)
+            self.stdout.write(f"已重建组织人数汇总：{rows} 行")
+
+        diff = verify_org_headcount()
+        if not diff.ok:
+            raise CommandError(
+                f"组织人数汇总校验失败：缺失 {diff.missing} 行，多余 {diff.extra} 行"
+            )
+        self.stdout.write(self.style.SUCCESS("组织人数汇总校验通过"))
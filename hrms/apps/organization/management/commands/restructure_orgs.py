@@ -0,0 +1,86 @@
+import csv
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.organization.models import Organization
+from apps.organization.restructure import plan_restructure, restructure_orgs
+
+
+class Command(BaseCommand):
+    help = (
+        "按组织编码批量调整上级组织（整棵子树迁移），一次事务内完成并统一重算派生数据"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "moves",
+            nargs="*",
+            help="形如 ORG_CODE=PARENT_CODE 的调整项，PARENT_CODE 留空表示设为顶级组织",
+        )
+        parser.add_argument(
+            "--file",
+            help="CSV 文件，每行两列：组织编码,新上级编码（可选表头 org_code,parent_code）",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="只校验，不落库",
+        )
+        parser.add_argument(
+            "--operator",
+            default="system",
+            help="写入 update_by 的操作人",
+        )
+
+    def _read_pairs(self, options):
+        pairs = []
+        for item in options["moves"]:
+            if "=" not in item:
+                raise CommandError(
+                    f"无法解析调整项：{item}（应为 ORG_CODE=PARENT_CODE）"
+                )
+            code, parent_code = item.split("=", 1)
+            pairs.append((code.strip(), parent_code.strip()))
+        if options["file"]:
+            with open(options["file"], newline="", encoding="utf-8-sig") as fh:
+                for row in csv.reader(fh):
+                    if not row or row[0].strip() in ("", "org_code"):
+                        continue
+                    parent_code = row[1].strip() if len(row) > 1 else ""
+                    pairs.append((row[0].strip(), parent_code))
+        if not pairs:
+            raise CommandError("未提供任何调整项")
+        return pairs
+
+    def handle(self, *args, **options):
+        pairs = self._read_pairs(options)
+        codes = {code for pair in pairs for code in pair if code}
+        ids = dict(
+            Organization.objects.filter(
+                org_code__in=codes, is_deleted=False
+            ).values_list("org_code", "id")
+        )
+        unknown = sorted(codes - set(ids))
+        if unknown:
+            raise CommandError(f"组织编码不存在或已删除：{', '.join(unknown)}")
+        moves = [
+            (ids[code], ids[parent_code] if parent_code else None)
+            for code, parent_code in pairs
+        ]
+
+        try:
+            if options["dry_run"]:
+                changes = plan_restructure(moves)
+                self.stdout.write(f"校验通过：{len(changes)} 个组织需要调整")
+                return
+            result = restructure_orgs(moves, operator=options["operator"])
+        except ValidationError as exc:
+            raise CommandError("；".join(exc.messages))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"已调整 {result.moved} 个组织（跳过 {result.skipped} 个无变化项），"
+                f"重算闭包 {result.closure_rows} 行"
+            )
+        )
@@ -0,0 +1,75 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("organization", "0004_fix_cycle_trigger"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrganizationClosure",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("depth", models.PositiveIntegerField(verbose_name="层级距离")),
+                (
+                    "ancestor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="descendant_links",
+                        to="organization.organization",
+                        verbose_name="祖先组织",
+                    ),
+                ),
+                (
+                    "descendant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ancestor_links",
+                        to="organization.organization",
+                        verbose_name="后代组织",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "组织闭包",
+                "verbose_name_plural": "组织闭包",
+                "db_table": "organization_closure",
+                "indexes": [
+                    models.Index(
+                        fields=["descendant", "ancestor"], name="idx_org_closure_desc"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="organizationclosure",
+            constraint=models.UniqueConstraint(
+                fields=("ancestor", "descendant"), name="uniq_org_closure_pair"
+            ),
+        ),
+        migrations.RunSQL(
+            sql="""
+            WITH RECURSIVE paths(descendant_id, ancestor_id, depth) AS (
+                SELECT n.id, n.id, 0
+                FROM organization n
+                WHERE n.is_deleted = FALSE
+                UNION ALL
+                SELECT p.descendant_id, parent.id, p.depth + 1
+                FROM paths p
+                JOIN organization cur ON cur.id = p.ancestor_id
+                JOIN organization parent ON parent.id = cur.parent_org_id
+                WHERE parent.is_deleted = FALSE AND p.depth < 256
+            )
+            INSERT INTO organization_closure (ancestor_id, descendant_id, depth)
+            SELECT ancestor_id, descendant_id, depth FROM paths;
+            """,
+            reverse_sql="""
+            DELETE FROM organization_closure;
+            """,
+        ),
+    ]
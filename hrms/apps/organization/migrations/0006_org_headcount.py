@@ -0,0 +1,91 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employee", "0006_employee_reporting_closure"),
+        ("organization", "0005_organization_closure"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrgHeadcount",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "emp_status",
+                    models.CharField(max_length=20, verbose_name="员工状态"),
+                ),
+                (
+                    "employment_type",
+                    models.CharField(max_length=20, verbose_name="雇佣类型"),
+                ),
+                (
+                    "direct_count",
+                    models.IntegerField(default=0, verbose_name="直属人数"),
+                ),
+                (
+                    "subtree_count",
+                    models.IntegerField(default=0, verbose_name="含下级人数"),
+                ),
+                (
+                    "org",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="headcounts",
+                        to="organization.organization",
+                        verbose_name="组织",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "组织人数汇总",
+                "verbose_name_plural": "组织人数汇总",
+                "db_table": "org_headcount",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="orgheadcount",
+            constraint=models.UniqueConstraint(
+                fields=("org", "emp_status", "employment_type"),
+                name="uniq_org_headcount_key",
+            ),
+        ),
+        migrations.RunSQL(
+            sql="""
+            WITH direct AS (
+                SELECT org_id, emp_status, employment_type, COUNT(*) AS cnt
+                FROM employee
+                WHERE is_deleted = FALSE
+                GROUP BY org_id, emp_status, employment_type
+            ),
+            subtree AS (
+                SELECT oc.ancestor_id AS org_id, d.emp_status, d.employment_type,
+                       SUM(d.cnt) AS cnt
+                FROM direct d
+                JOIN organization_closure oc ON oc.descendant_id = d.org_id
+                GROUP BY oc.ancestor_id, d.emp_status, d.employment_type
+            )
+            INSERT INTO org_headcount
+                (org_id, emp_status, employment_type, direct_count, subtree_count)
+            SELECT
+                COALESCE(d.org_id, s.org_id),
+                COALESCE(d.emp_status, s.emp_status),
+                COALESCE(d.employment_type, s.employment_type),
+                COALESCE(d.cnt, 0),
+                COALESCE(s.cnt, 0)
+            FROM direct d
+            FULL JOIN subtree s
+                ON s.org_id = d.org_id
+                AND s.emp_status = d.emp_status
+                AND s.employment_type = d.employment_type;
+            """,
+            reverse_sql="""
+            DELETE FROM org_headcount;
+            """,
+        ),
+    ]
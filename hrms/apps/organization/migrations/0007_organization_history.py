@@ -0,0 +1,158 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:35
+
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("organization", "0006_org_headcount"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrganizationClosureHistory",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("depth", models.PositiveIntegerField(verbose_name="层级距离")),
+                (
+                    "valid_period",
+                    django.contrib.postgres.fields.ranges.DateTimeRangeField(
+                        verbose_name="有效区间"
+                    ),
+                ),
+                (
+                    "ancestor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="descendant_history",
+                        to="organization.organization",
+                        verbose_name="祖先组织",
+                    ),
+                ),
+                (
+                    "descendant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ancestor_history",
+                        to="organization.organization",
+                        verbose_name="后代组织",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "组织闭包历史",
+                "verbose_name_plural": "组织闭包历史",
+                "db_table": "organization_closure_history",
+                "indexes": [
+                    django.contrib.postgres.indexes.GistIndex(
+                        fields=["valid_period"], name="gist_org_closure_hist_period"
+                    ),
+                    models.Index(fields=["ancestor"], name="idx_org_closure_hist_anc"),
+                    models.Index(
+                        fields=["descendant"], name="idx_org_closure_hist_desc"
+                    ),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="OrganizationVersion",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("org_code", models.CharField(max_length=50, verbose_name="组织编码")),
+                ("org_name", models.CharField(max_length=100, verbose_name="组织名称")),
+                ("org_type", models.CharField(max_length=20, verbose_name="组织类型")),
+                (
+                    "parent_org_id",
+                    models.CharField(
+                        blank=True, max_length=50, null=True, verbose_name="上级组织ID"
+                    ),
+                ),
+                (
+                    "manager_emp_id",
+                    models.CharField(
+                        blank=True, max_length=50, null=True, verbose_name="负责人ID"
+                    ),
+                ),
+                ("status", models.CharField(max_length=20, verbose_name="状态")),
+                (
+                    "valid_period",
+                    django.contrib.postgres.fields.ranges.DateTimeRangeField(
+                        verbose_name="有效区间"
+                    ),
+                ),
+                (
+                    "org",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="versions",
+                        to="organization.organization",
+                        verbose_name="组织",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "组织历史版本",
+                "verbose_name_plural": "组织历史版本",
+                "db_table": "organization_version",
+                "indexes": [
+                    django.contrib.postgres.indexes.GistIndex(
+                        fields=["valid_period"], name="gist_org_version_period"
+                    ),
+                    models.Index(fields=["org"], name="idx_org_version_org"),
+                ],
+            },
+        ),
+        migrations.RunSQL(
+            sql="""
+            INSERT INTO organization_version
+                (org_id, org_code, org_name, org_type, parent_org_id,
+                 manager_emp_id, status, valid_period)
+            SELECT id, org_code, org_name, org_type, parent_org_id,
+                   manager_emp_id, status, tstzrange(effective_time, NULL)
+            FROM organization
+            WHERE is_deleted = FALSE;
+
+            INSERT INTO organization_closure_history
+                (ancestor_id, descendant_id, depth, valid_period)
+            SELECT oc.ancestor_id, oc.descendant_id, oc.depth,
+                   tstzrange(GREATEST(a.effective_time, d.effective_time), NULL)
+            FROM organization_closure oc
+            JOIN organization a ON a.id = oc.ancestor_id
+            JOIN organization d ON d.id = oc.descendant_id;
+            """,
+            reverse_sql="""
+            DELETE FROM organization_closure_history;
+            DELETE FROM organization_version;
+            """,
+        ),
+        BtreeGistExtension(),
+        migrations.RunSQL(
+            sql="""
+            ALTER TABLE organization_version
+            ADD CONSTRAINT no_org_version_overlap
+            EXCLUDE USING gist (
+                org_id WITH =,
+                valid_period WITH &&
+            );
+
+            ALTER TABLE organization_closure_history
+            ADD CONSTRAINT no_org_closure_history_overlap
+            EXCLUDE USING gist (
+                ancestor_id WITH =,
+                descendant_id WITH =,
+                valid_period WITH &&
+            );
+            """,
+            reverse_sql="""
+            ALTER TABLE organization_closure_history
+            DROP CONSTRAINT IF EXISTS no_org_closure_history_overlap;
+            ALTER TABLE organization_version
+            DROP CONSTRAINT IF EXISTS no_org_version_overlap;
+            """,
+        ),
+    ]
@@ -1,7 +1,19 @@
+from django.contrib.postgres.fields import DateTimeRangeField
+from django.contrib.postgres.indexes import GistIndex
 from django.db import models
 from apps.core.models import BaseModel
 
 
+class OrganizationQuerySet(models.QuerySet):
+    def as_of(self, moment):
+        """在 moment 时刻有效的组织：存在覆盖该时刻的历史版本，且处于生效/失效时间之内"""
+        return self.filter(
+            models.Q(expire_time__isnull=True) | models.Q(expire_time__gt=moment),
+            versions__valid_period__contains=moment,
+            effective_time__lte=moment,
+        )
+
+
 class Organization(BaseModel):
     """
     组织结构表
@@ -59,6 +71,8 @@ class Organization(BaseModel):
         help_text="失效时间（永久有效为空）",
     )
 
+    objects = OrganizationQuerySet.as_manager()
+
     class Meta:
         db_table = "organization"
         verbose_name = "组织结构"
@@ -67,3 +81,149 @@ class Organization(BaseModel):
 
     def __str__(self):
         return f"{self.org_name} ({self.org_code})"
+
+
+class OrganizationClosure(models.Model):
+    """
+    组织闭包表（祖先, 后代, 层级）
+    由 services.refresh_org_closure 在组织新增/变更/调整上级/逻辑删除时维护，
+    只包含未删除的组织；depth=0 为节点自身。
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    ancestor = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name="descendant_links",
+        verbose_name="祖先组织",
+    )
+    descendant = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name="ancestor_links",
+        verbose_name="后代组织",
+    )
+    depth = models.PositiveIntegerField(verbose_name="层级距离")
+
+    class Meta:
+        db_table = "organization_closure"
+        verbose_name = "组织闭包"
+        verbose_name_plural = verbose_name
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ancestor", "descendant"], name="uniq_org_closure_pair"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["descendant", "ancestor"], name="idx_org_closure_desc"
+            ),
+        ]
+
+
+class OrgHeadcount(models.Model):
+    """
+    组织人数汇总表（组织, 员工状态, 雇佣类型）
+    direct_count 为直属该组织的未删除员工数，subtree_count 为含全部下级组织的合计；
+    由员工信号按增量维护，组织调整上级/删除/恢复时重算受影响祖先的 subtree_count。
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    org = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name="headcounts",
+        verbose_name="组织",
+    )
+    emp_status = models.CharField(max_length=20, verbose_name="员工状态")
+    employment_type = models.CharField(max_length=20, verbose_name="雇佣类型")
+    direct_count = models.IntegerField(default=0, verbose_name="直属人数")
+    subtree_count = models.IntegerField(default=0, verbose_name="含下级人数")
+
+    class Meta:
+        db_table = "org_headcount"
+        verbose_name = "组织人数汇总"
+        verbose_name_plural = verbose_name
+        constraints = [
+            models.UniqueConstraint(
+                fields=["org", "emp_status", "employment_type"],
+                name="uniq_org_headcount_key",
+            ),
+        ]
+
+
+class OrganizationVersionQuerySet(models.QuerySet):
+    def as_of(self, moment):
+        return self.filter(valid_period__contains=moment)
+
+
+class OrganizationVersion(models.Model):
+    """
+    组织历史版本
+    记录组织在 valid_period 区间内的名称、类型、上级与负责人；
+    组织新增/变更/删除时由信号关闭旧版本并开启新版本，删除后不再有开放版本。
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    org = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name="versions",
+        verbose_name="组织",
+    )
+    org_code = models.CharField(max_length=50, verbose_name="组织编码")
+    org_name = models.CharField(max_length=100, verbose_name="组织名称")
+    org_type = models.CharField(max_length=20, verbose_name="组织类型")
+    parent_org_id = models.CharField(
+        max_length=50, null=True, blank=True, verbose_name="上级组织ID"
+    )
+    manager_emp_id = models.CharField(
+        max_length=50, null=True, blank=True, verbose_name="负责人ID"
+    )
+    status = models.CharField(max_length=20, verbose_name="状态")
+    valid_period = DateTimeRangeField(verbose_name="有效区间")
+
+    objects = OrganizationVersionQuerySet.as_manager()
+
+    class Meta:
+        db_table = "organization_version"
+        verbose_name = "组织历史版本"
+        verbose_name_plural = verbose_name
+        indexes = [
+            GistIndex(fields=["valid_period"], name="gist_org_version_period"),
+            models.Index(fields=["org"], name="idx_org_version_org"),
+        ]
+
+
+class OrganizationClosureHistory(models.Model):
+    """
+    组织闭包历史（祖先, 后代, 层级, 有效区间）
+    与 organization_closure 同步维护：行离开闭包时关闭区间，进入闭包时开启新区间，
+    任意时刻的子树即 ancestor = X 且 valid_period @> 时刻 的一次索引查询。
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    ancestor = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name="descendant_history",
+        verbose_name="祖先组织",
+    )
+    descendant = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name="ancestor_history",
+        verbose_name="后代组织",
+    )
+    depth = models.PositiveIntegerField(verbose_name="层级距离")
+    valid_period = DateTimeRangeField(verbose_name="有效区间")
+
+    class Meta:
+        db_table = "organization_closure_history"
+        verbose_name = "组织闭包历史"
+        verbose_name_plural = verbose_name
+        indexes = [
+            GistIndex(fields=["valid_period"], name="gist_org_closure_hist_period"),
+            models.Index(fields=["ancestor"], name="idx_org_closure_hist_anc"),
+            models.Index(fields=["descendant"], name="idx_org_closure_hist_desc"),
+        ]
@@ -0,0 +1,144 @@
+"""
+组织批量调整（整棵子树迁移）
+
+逐条保存组织时，每次 post_save 都会重算闭包、人数汇总并清空缓存；
+批量调整改为在内存中校验最终结构，用两条 UPDATE 一次性落库（不触发逐行信号），
+最后对所有受影响的子树统一重算一次派生数据（含闭包历史、组织版本、请假统计汇总与请假日明细）。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.attendance.work_calendar import invalidate_work_calendar
+from apps.leave.analytics import recompute_subtree_leave_stats
+from apps.leave.calendar import invalidate_leave_calendar
+from apps.leave.days import refresh_org_leave_days
+from utils.sql_scope import invalidate_user_scope
+
+from .models import Organization, OrganizationClosure
+from .services import (
+    invalidate_org_tree,
+    recompute_subtree_headcount,
+    record_org_versions,
+    refresh_org_closure,
+)
+
+
+@dataclass(frozen=True)
+class RestructureResult:
+    moved: int
+    skipped: int
+    closure_rows: int
+
+
+def _ancestor_ids(org_ids: list[str]) -> set[str]:
+    return {
+        str(pk)
+        for pk in OrganizationClosure.objects.filter(descendant_id__in=org_ids)
+        .values_list("ancestor_id", flat=True)
+        .distinct()
+    }
+
+
+def plan_restructure(
+    moves: Iterable[tuple[str, str | None]],
+) -> dict[str, str | None]:
+    """校验 (组织, 新上级) 列表，返回真正需要变更的 {org_id: new_parent_id}。
+
+    new_parent_id 为 None 表示提升为顶级组织。校验基于调整后的最终结构：
+    组织/上级必须存在且未删除，同一组织不能有冲突的目标，且不能形成环路。
+    """
+    rows = Organization.objects.values_list("id", "parent_org_id", "is_deleted")
+    parents = {str(pk): (str(parent) if parent else None) for pk, parent, _ in rows}
+    deleted = {str(pk) for pk, _, is_deleted in rows if is_deleted}
+
+    errors: list[str] = []
+    targets: dict[str, str | None] = {}
+    for org_id, new_parent_id in moves:
+        org_id = str(org_id)
+        new_parent_id = str(new_parent_id) if new_parent_id else None
+        if org_id not in parents or org_id in deleted:
+            errors.append(f"组织 {org_id} 不存在或已删除")
+            continue
+        if new_parent_id and (new_parent_id not in parents or new_parent_id in deleted):
+            errors.append(f"上级组织 {new_parent_id} 不存在或已删除")
+            continue
+        if new_parent_id == org_id:
+            errors.append(f"组织 {org_id} 不能作为自己的上级")
+            continue
+        if targets.get(org_id, new_parent_id) != new_parent_id:
+            errors.append(f"组织 {org_id} 存在多个不同的目标上级")
+            continue
+        targets[org_id] = new_parent_id
+
+    final = dict(parents)
+    final.update(targets)
+    for org_id in targets:
+        seen = {org_id}
+        current = final[org_id]
+        while current is not None:
+            if current in seen:
+                errors.append(f"调整组织 {org_id} 会形成环路")
+                break
+            seen.add(current)
+            current = final.get(current)
+
+    if errors:
+        raise ValidationError(errors)
+    return {
+        org_id: parent
+        for org_id, parent in targets.items()
+        if parents[org_id] != parent
+    }
+
+
+def restructure_orgs(
+    moves: Iterable[tuple[str, str | None]], *, operator: str = "system"
+) -> RestructureResult:
+    """在一个事务内批量迁移组织子树，派生数据只在最后重算一次。"""
+    moves = list(moves)
+    changes = plan_restructure(moves)
+    if not changes:
+        return RestructureResult(moved=0, skipped=len(moves), closure_rows=0)
+
+    org_ids = list(changes)
+    attach = [(org_id, parent) for org_id, parent in changes.items() if parent]
+    with transaction.atomic():
+        old_ancestors = _ancestor_ids(org_ids)
+        with connection.cursor() as cursor:
+            # 先整体摘下再挂到目标上级：中间状态的边都是最终结构的子集，
+            # 行级环路触发器不会因处理顺序误报
+            cursor.execute(
+                "UPDATE organization "
+                "SET parent_org_id = NULL, update_by = %s, update_time = NOW() "
+                "WHERE id = ANY(%s)",
+                [operator, org_ids],
+            )
+            if attach:
+                values = ", ".join(["(%s, %s)"] * len(attach))
+                cursor.execute(
+                    "UPDATE organization o SET parent_org_id = m.parent_id "
+                    f"FROM (VALUES {values}) AS m(id, parent_id) WHERE o.id = m.id",
+                    [value for pair in attach for value in pair],
+                )
+        at = timezone.now()
+        closure_rows = refresh_org_closure(org_ids, at=at)
+        record_org_versions(org_ids, at=at)
+        affected = old_ancestors | _ancestor_ids(org_ids)
+        recompute_subtree_headcount(affected)
+        recompute_subtree_leave_stats(affected)
+        refresh_org_leave_days(org_ids)
+
+    transaction.on_commit(invalidate_org_tree)
+    transaction.on_commit(invalidate_user_scope)
+    transaction.on_commit(invalidate_work_calendar)
+    transaction.on_commit(invalidate_leave_calendar)
+    return RestructureResult(
+        moved=len(changes), skipped=len(moves) - len(changes), closure_rows=closure_rows
+    )
@@ -0,0 +1,404 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Iterable, Mapping
+
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.text import slugify
+
+from utils.closure import ClosureDiff, ClosureSpec, rebuild, refresh_subtrees, verify
+from utils.id_allocator import IdSequence, allocate
+from utils.sql_scope import as_of_moment, build_org_tree_cte
+
+from .models import Organization, OrganizationClosure, OrgHeadcount
+
+ORG_CLOSURE = ClosureSpec(
+    closure_table="organization_closure",
+    node_table="organization",
+    parent_column="parent_org_id",
+    ancestor_column="ancestor_id",
+    descendant_column="descendant_id",
+    history_table="organization_closure_history",
+)
+
+
+# 组织编码：名称缩写 + "-" + 全局序号，序号从已有编码的最大尾号之后继续
+ORG_CODE_SEQUENCE = IdSequence(
+    name="hrms_org_code_seq",
+    seed_sql=(
+        "SELECT MAX(substring(org_code FROM '-([0-9]{1,18})$')::bigint) "
+        "FROM organization"
+    ),
+)
+
+
+def allocate_org_code(org_name: str) -> str:
+    """按组织名称生成唯一编码，不再循环探测是否已存在。"""
+    base = slugify(org_name, allow_unicode=False).replace("-", "").upper()
+    base = (base or "ORG")[:8]
+    return allocate(ORG_CODE_SEQUENCE, prefix=f"{base}-")
+
+
+def refresh_org_closure(org_ids: Iterable[str], *, at: datetime | None = None) -> int:
+    """重算指定组织（含其全部下级）的闭包行，并按 at 时刻记录闭包历史。"""
+    return refresh_subtrees(ORG_CLOSURE, list(org_ids), at=at)
+
+
+def rebuild_org_closure() -> int:
+    """全量重建组织闭包表，返回写入行数。"""
+    return rebuild(ORG_CLOSURE)
+
+
+def verify_org_closure() -> ClosureDiff:
+    """与递归遍历结果对比，返回缺失/多余行数。"""
+    return verify(ORG_CLOSURE)
+
+
+def org_ancestor_ids(org_id: str) -> list[str]:
+    """组织自身及全部祖先的 id（取自闭包表）。"""
+    return [
+        str(pk)
+        for pk in OrganizationClosure.objects.filter(descendant_id=org_id).values_list(
+            "ancestor_id", flat=True
+        )
+    ]
+
+
+# 计入“在职人数”的员工状态；离职人员仍保留在汇总表中，展示时排除
+IN_SERVICE_STATUSES = ("probation", "active", "suspended")
+
+HeadcountKey = tuple[str, str, str]
+
+# 按员工表从头计算的期望汇总，供全量重建与校验共用
+_EXPECTED_HEADCOUNT_CTE = """
+direct AS (
+    SELECT org_id, emp_status, employment_type, COUNT(*) AS cnt
+    FROM employee
+    WHERE is_deleted = FALSE
+    GROUP BY org_id, emp_status, employment_type
+),
+subtree AS (
+    SELECT oc.ancestor_id AS org_id, d.emp_status, d.employment_type, SUM(d.cnt) AS cnt
+    FROM direct d
+    JOIN organization_closure oc ON oc.descendant_id = d.org_id
+    GROUP BY oc.ancestor_id, d.emp_status, d.employment_type
+),
+expected AS (
+    SELECT
+        COALESCE(d.org_id, s.org_id) AS org_id,
+        COALESCE(d.emp_status, s.emp_status) AS emp_status,
+        COALESCE(d.employment_type, s.employment_type) AS employment_type,
+        COALESCE(d.cnt, 0)::int AS direct_count,
+        COALESCE(s.cnt, 0)::int AS subtree_count
+    FROM direct d
+    FULL JOIN subtree s
+        ON s.org_id = d.org_id
+        AND s.emp_status = d.emp_status
+        AND s.employment_type = d.employment_type
+)
+"""
+
+
+def apply_headcount_deltas(deltas: Mapping[HeadcountKey, int]) -> bool:
+    """按 (组织, 员工状态, 雇佣类型) 增减人数。
+
+    直属计数只落在该组织上，子树计数经闭包表一次性传导到全部祖先（含自身）；
+    返回是否产生了实际变化。
+    """
+    rows = [
+        (str(org_id), emp_status, employment_type, delta)
+        for (org_id, emp_status, employment_type), delta in deltas.items()
+        if delta
+    ]
+    if not rows:
+        return False
+    values = ", ".join(["(%s, %s, %s, %s)"] * len(rows))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH delta(org_id, emp_status, employment_type, cnt) AS (VALUES {values}),
+            touched AS (
+                SELECT org_id, emp_status, employment_type,
+                       cnt AS direct_delta, 0 AS subtree_delta
+                FROM delta
+                UNION ALL
+                SELECT oc.ancestor_id, d.emp_status, d.employment_type, 0, d.cnt
+                FROM delta d
+                JOIN organization_closure oc ON oc.descendant_id = d.org_id
+            )
+            INSERT INTO org_headcount
+                (org_id, emp_status, employment_type, direct_count, subtree_count)
+            SELECT org_id, emp_status, employment_type,
+                   SUM(direct_delta), SUM(subtree_delta)
+            FROM touched
+            GROUP BY org_id, emp_status, employment_type
+            ON CONFLICT (org_id, emp_status, employment_type) DO UPDATE SET
+                direct_count = org_headcount.direct_count + EXCLUDED.direct_count,
+                subtree_count = org_headcount.subtree_count + EXCLUDED.subtree_count
+            """,
+            [value for row in rows for value in row],
+        )
+    return True
+
+
+def recompute_subtree_headcount(org_ids: Iterable[str]) -> None:
+    """组织迁移/删除/恢复后，按闭包表重算指定组织的 subtree_count。"""
+    ids = list({str(pk) for pk in org_ids if pk})
+    if not ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "UPDATE org_headcount SET subtree_count = 0 WHERE org_id = ANY(%s)",
+            [ids],
+        )
+        cursor.execute(
+            """
+            INSERT INTO org_headcount
+                (org_id, emp_status, employment_type, direct_count, subtree_count)
+            SELECT oc.ancestor_id, h.emp_status, h.employment_type, 0,
+                   SUM(h.direct_count)
+            FROM organization_closure oc
+            JOIN org_headcount h ON h.org_id = oc.descendant_id
+            WHERE oc.ancestor_id = ANY(%s)
+            GROUP BY oc.ancestor_id, h.emp_status, h.employment_type
+            ON CONFLICT (org_id, emp_status, employment_type) DO UPDATE SET
+                subtree_count = EXCLUDED.subtree_count
+            """,
+            [ids],
+        )
+
+
+def rebuild_org_headcount() -> int:
+    """按员工表全量重建人数汇总，返回写入行数。"""
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM org_headcount")
+        cursor.execute(
+            f"WITH {_EXPECTED_HEADCOUNT_CTE} "
+            "INSERT INTO org_headcount "
+            "(org_id, emp_status, employment_type, direct_count, subtree_count) "
+            "SELECT org_id, emp_status, employment_type, direct_count, subtree_count "
+            "FROM expected"
+        )
+        return cursor.rowcount
+
+
+def verify_org_headcount() -> ClosureDiff:
+    """与员工表现算结果对比（忽略已归零的行），返回缺失/多余行数。"""
+    stored = (
+        "SELECT org_id, emp_status, employment_type, direct_count, subtree_count "
+        "FROM org_headcount WHERE direct_count <> 0 OR subtree_count <> 0"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH {_EXPECTED_HEADCOUNT_CTE} "
+            "SELECT "
+            f"(SELECT COUNT(*) FROM (SELECT * FROM expected EXCEPT {stored}) m), "
+            f"(SELECT COUNT(*) FROM ({stored} EXCEPT SELECT * FROM expected) x)"
+        )
+        missing, extra = cursor.fetchone()
+    return ClosureDiff(missing=int(missing), extra=int(extra))
+
+
+def get_org_headcounts(org_ids: Iterable[str] | None = None) -> dict[str, dict]:
+    """在职人数：{org_id: {"direct": n, "subtree": n}}；org_ids 为空时返回全部组织。"""
+    qs = OrgHeadcount.objects.filter(emp_status__in=IN_SERVICE_STATUSES)
+    if org_ids is not None:
+        qs = qs.filter(org_id__in=[str(pk) for pk in org_ids])
+    rows = qs.values("org_id").annotate(
+        direct=Sum("direct_count"), subtree=Sum("subtree_count")
+    )
+    return {
+        str(row["org_id"]): {"direct": row["direct"], "subtree": row["subtree"]}
+        for row in rows
+    }
+
+
+def total_headcount() -> int:
+    """全公司在职人数（汇总表直属计数之和，不扫描员工表）。"""
+    total = OrgHeadcount.objects.filter(emp_status__in=IN_SERVICE_STATUSES).aggregate(
+        total=Sum("direct_count")
+    )["total"]
+    return total or 0
+
+
+_VERSIONED_COLUMNS = (
+    "org_code",
+    "org_name",
+    "org_type",
+    "parent_org_id",
+    "manager_emp_id",
+    "status",
+)
+
+
+def record_org_versions(org_ids: Iterable[str], *, at: datetime | None = None) -> None:
+    """为属性发生变化（或被删除）的组织关闭当前版本，并为未删除的组织开启新版本。"""
+    ids = [str(pk) for pk in org_ids if pk]
+    if not ids:
+        return
+    at = at or timezone.now()
+    columns = ", ".join(_VERSIONED_COLUMNS)
+    changed = (
+        "upper_inf(v.valid_period) AND (o.is_deleted OR "
+        f"({', '.join(f'v.{c}' for c in _VERSIONED_COLUMNS)}) IS DISTINCT FROM "
+        f"({', '.join(f'o.{c}' for c in _VERSIONED_COLUMNS)}))"
+    )
+    with connection.cursor() as cursor:
+        # 同一时刻内开启又变更的版本没有实际有效期，直接删除
+        cursor.execute(
+            "DELETE FROM organization_version v USING organization o "
+            f"WHERE v.org_id = o.id AND o.id = ANY(%s) AND {changed} "
+            "AND lower(v.valid_period) >= %s",
+            [ids, at],
+        )
+        cursor.execute(
+            "UPDATE organization_version v "
+            "SET valid_period = tstzrange(lower(v.valid_period), %s) "
+            f"FROM organization o WHERE v.org_id = o.id AND o.id = ANY(%s) AND {changed}",
+            [at, ids],
+        )
+        cursor.execute(
+            f"INSERT INTO organization_version (org_id, {columns}, valid_period) "
+            f"SELECT o.id, {', '.join(f'o.{c}' for c in _VERSIONED_COLUMNS)}, "
+            "tstzrange(%s, NULL) "
+            "FROM organization o "
+            "WHERE o.id = ANY(%s) AND o.is_deleted = FALSE AND NOT EXISTS ("
+            "SELECT 1 FROM organization_version v "
+            "WHERE v.org_id = o.id AND upper_inf(v.valid_period))",
+            [at, ids],
+        )
+
+
+def org_subtree_as_of(root_id: str, as_of: date | datetime) -> list[str]:
+    """历史某一时刻 root_id 的子树（含自身）组织 id，一次闭包历史查询。"""
+    cte_sql, params = build_org_tree_cte([str(root_id)], as_of=as_of)
+    with connection.cursor() as cursor:
+        cursor.execute(f"{cte_sql} SELECT id FROM org_tree", params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def headcount_as_of(
+    org_id: str,
+    as_of: date | datetime,
+    *,
+    statuses: Iterable[str] = IN_SERVICE_STATUSES,
+) -> int:
+    """历史某一时刻 org_id 子树内的人数：闭包历史与任职历史按区间包含做一次连接。"""
+    moment = as_of_moment(as_of)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT COUNT(DISTINCT a.emp_id)
+            FROM organization_closure_history h
+            JOIN employee_assignment_history a ON a.org_id = h.descendant_id
+            WHERE h.ancestor_id = %s
+              AND h.valid_period @> %s::timestamptz
+              AND a.valid_period @> %s::timestamptz
+              AND a.emp_status = ANY(%s)
+            """,
+            [str(org_id), moment, moment, list(statuses)],
+        )
+        return cursor.fetchone()[0]
+
+
+ORG_TREE_CACHE_KEY = "hrms:org_tree"
+ORG_TYPE_DISPLAY = {value: label for value, label in Organization.ORG_TYPE_CHOICES}
+
+
+def _type_display(org_type: str) -> str:
+    label = ORG_TYPE_DISPLAY.get(org_type)
+    return label or org_type.replace("_", " ").capitalize()
+
+
+def build_org_tree_index() -> dict:
+    """一次查询取出全部启用组织（负责人随 JOIN 一并取回），构建父→子索引；
+    各节点的在职人数取自 org_headcount 汇总表（再一次查询）。
+
+    返回 {"roots": [id...], "nodes": {id: 节点字典}}，节点的 children 为子节点 id 列表，
+    只保留能从顶级组织连通的节点（与原递归渲染一致）。
+    """
+    rows = (
+        Organization.objects.filter(status="enabled", is_deleted=False)
+        .order_by("org_code")
+        .values(
+            "id",
+            "org_code",
+            "org_name",
+            "org_type",
+            "parent_org_id",
+            "manager_emp__emp_name",
+        )
+    )
+
+    headcounts = get_org_headcounts()
+    nodes: dict[str, dict] = {}
+    children: dict[str, list[str]] = defaultdict(list)
+    roots: list[str] = []
+    for row in rows:
+        org_id = str(row["id"])
+        nodes[org_id] = {
+            "id": org_id,
+            "code": row["org_code"],
+            "name": row["org_name"],
+            "type": row["org_type"],
+            "type_display": _type_display(row["org_type"]),
+            "manager": row["manager_emp__emp_name"],
+            "headcount": headcounts.get(org_id, {}).get("subtree", 0),
+            "children": [],
+        }
+        if row["parent_org_id"] is None:
+            roots.append(org_id)
+        else:
+            children[str(row["parent_org_id"])].append(org_id)
+
+    reachable: dict[str, dict] = {}
+    stack = list(reversed(roots))
+    while stack:
+        org_id = stack.pop()
+        node = nodes[org_id]
+        node["children"] = [cid for cid in children.get(org_id, []) if cid in nodes]
+        reachable[org_id] = node
+        stack.extend(reversed(node["children"]))
+
+    return {"roots": roots, "nodes": reachable}
+
+
+def get_org_tree_index() -> dict:
+    """带缓存的组织树索引；组织变更提交后由信号清除，过期时间只是兜底。"""
+    index = cache.get(ORG_TREE_CACHE_KEY)
+    if index is None:
+        index = build_org_tree_index()
+        cache.set(ORG_TREE_CACHE_KEY, index, settings.ORG_TREE_CACHE_TIMEOUT)
+    return index
+
+
+def invalidate_org_tree() -> None:
+    """清除组织树缓存；须在变更提交后调用（transaction.on_commit），
+    否则并发请求可能在提交前按旧数据重新缓存。"""
+    cache.delete(ORG_TREE_CACHE_KEY)
+
+
+def serialize_org_subtree(
+    index: dict, root_ids: Iterable[str], depth: int
+) -> list[dict]:
+    """把索引展开为嵌套节点，超过 depth 层的子节点只给出数量，供前端按需展开。"""
+    nodes = index["nodes"]
+    result = []
+    for org_id in root_ids:
+        node = nodes.get(org_id)
+        if node is None:
+            continue
+        child_ids = node["children"]
+        item = {k: v for k, v in node.items() if k != "children"}
+        item["child_count"] = len(child_ids)
+        item["children"] = (
+            serialize_org_subtree(index, child_ids, depth - 1) if depth > 1 else []
+        )
+        result.append(item)
+    return result
@@ -0,0 +1,94 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.core.roles import refresh_user_roles
+from utils.sql_scope import invalidate_user_scope
+from .models import Organization
+from .services import (
+    invalidate_org_tree,
+    org_ancestor_ids,
+    recompute_subtree_headcount,
+    record_org_versions,
+    refresh_org_closure,
+)
+
+
+@receiver(pre_save, sender=Organization)
+def remember_previous_state(sender, instance, **kwargs):
+    # 记录保存前的上级/删除标记/负责人/编码名称，post_save 据此判断需要重算哪些派生数据
+    instance._previous_ancestor_ids = []
+    instance._previous_label = None
+    if instance._state.adding:
+        instance._hierarchy_state = None
+        instance._previous_manager_id = None
+        return
+    previous = (
+        Organization.objects.filter(pk=instance.pk)
+        .values_list(
+            "parent_org_id", "is_deleted", "manager_emp_id", "org_code", "org_name"
+        )
+        .first()
+    )
+    if previous is None:
+        instance._hierarchy_state = None
+        instance._previous_manager_id = None
+        return
+    instance._hierarchy_state = previous[:2]
+    instance._previous_manager_id = previous[2]
+    instance._previous_label = previous[3:]
+    if instance._hierarchy_state != (instance.parent_org_id, instance.is_deleted):
+        # 迁移前的祖先链：其子树人数在迁移后需要扣减
+        instance._previous_ancestor_ids = org_ancestor_ids(instance.pk)
+
+
+@receiver(post_save, sender=Organization)
+def maintain_org_closure(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_hierarchy_state", None)
+    current = (instance.parent_org_id, instance.is_deleted)
+    if not created and previous == current:
+        return
+    with transaction.atomic():
+        # 新建组织的闭包历史从生效时间起算
+        refresh_org_closure(
+            [instance.pk], at=instance.effective_time if created else None
+        )
+        if not created:
+            # 新旧祖先链上的子树人数随整棵子树迁移/摘除而变化
+            recompute_subtree_headcount(
+                [
+                    *getattr(instance, "_previous_ancestor_ids", []),
+                    *org_ancestor_ids(instance.pk),
+                ]
+            )
+
+
+@receiver(post_save, sender=Organization)
+def maintain_org_version(sender, instance, created, **kwargs):
+    record_org_versions([instance.pk], at=instance.effective_time if created else None)
+
+
+@receiver(post_save, sender=Organization)
+@receiver(post_delete, sender=Organization)
+def maintain_member_roles(sender, instance, **kwargs):
+    # 组织名称影响成员的 HR/绩效角色，负责人变更影响新旧负责人的经理角色
+    refresh_user_roles(
+        org_ids=[instance.pk],
+        emp_ids=[
+            instance.manager_emp_id,
+            getattr(instance, "_previous_manager_id", None),
+        ],
+    )
+
+
+@receiver(post_save, sender=Organization)
+@receiver(post_delete, sender=Organization)
+def invalidate_scopes(sender, instance, **kwargs):
+    # 组织名称/负责人会影响所有成员的 HR/负责人判断，提交后整体失效
+    transaction.on_commit(invalidate_user_scope)
+
+
+@receiver(post_save, sender=Organization)
+@receiver(post_delete, sender=Organization)
+def invalidate_cached_tree(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_org_tree)
@@ -0,0 +1,89 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.organization.models import Organization, OrganizationClosure
+from apps.organization.services import verify_org_closure
+from utils.sql_scope import build_org_tree_cte
+
+
+class OrganizationClosureTests(TestCase):
+    def setUp(self) -> None:
+        self.root = self._create_org("CL-ROOT", "总公司")
+        self.dept = self._create_org("CL-DEPT", "研发部", parent=self.root)
+        self.team = self._create_org("CL-TEAM", "平台组", parent=self.dept)
+        self.other = self._create_org("CL-OTHER", "市场部", parent=self.root)
+
+    def _create_org(self, code, name, parent=None) -> Organization:
+        return Organization.objects.create(
+            org_code=code,
+            org_name=name,
+            org_type="department" if parent else "company",
+            parent_org=parent,
+            effective_time=timezone.now(),
+            status="enabled",
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _subtree(self, *roots: Organization) -> set[str]:
+        cte_sql, params = build_org_tree_cte([str(r.pk) for r in roots])
+        with connection.cursor() as cursor:
+            cursor.execute(f"{cte_sql} SELECT id FROM org_tree", params)
+            return {row[0] for row in cursor.fetchall()}
+
+    def test_create_maintains_ancestors_and_depth(self) -> None:
+        print("\n[结构验证] 新建组织后闭包表记录祖先与层级...")
+        depths = dict(
+            OrganizationClosure.objects.filter(descendant=self.team).values_list(
+                "ancestor__org_code", "depth"
+            )
+        )
+        print(f"[闭包记录] 平台组的祖先: {depths}")
+        self.assertEqual(depths, {"CL-TEAM": 0, "CL-DEPT": 1, "CL-ROOT": 2})
+        self.assertEqual(
+            self._subtree(self.dept), {str(self.dept.pk), str(self.team.pk)}
+        )
+        print("[校验通过] 子树查询仅需一次闭包表查找。")
+
+    def test_reparent_moves_whole_subtree(self) -> None:
+        print("\n[结构验证] 调整上级后整棵子树随之迁移...")
+        self.dept.parent_org = self.other
+        self.dept.save()
+        self.assertIn(str(self.team.pk), self._subtree(self.other))
+        team_depth = OrganizationClosure.objects.get(
+            ancestor=self.root, descendant=self.team
+        ).depth
+        print(f"[层级变化] 总公司 -> 平台组 距离: {team_depth}")
+        self.assertEqual(team_depth, 3)
+        self.assertTrue(verify_org_closure().ok)
+        print("[校验通过] 迁移后闭包与递归遍历一致。")
+
+    def test_soft_delete_cuts_and_restores_subtree(self) -> None:
+        print("\n[结构验证] 逻辑删除切断子树，恢复后重新挂接...")
+        self.dept.is_deleted = True
+        self.dept.save()
+        self.assertEqual(
+            self._subtree(self.root), {str(self.root.pk), str(self.other.pk)}
+        )
+
+        self.dept.is_deleted = False
+        self.dept.save()
+        self.assertIn(str(self.team.pk), self._subtree(self.root))
+        self.assertTrue(verify_org_closure().ok)
+        print("[校验通过] 删除与恢复均保持闭包正确。")
+
+    def test_rebuild_command_repairs_drift(self) -> None:
+        print("\n[运维验证] 重建命令修复绕过信号产生的偏差...")
+        Organization.objects.filter(pk=self.team.pk).update(parent_org=self.other)
+        self.assertFalse(verify_org_closure().ok)
+
+        out = StringIO()
+        call_command("rebuild_org_closure", stdout=out)
+        print(f"[命令输出] {out.getvalue().strip()}")
+        self.assertTrue(verify_org_closure().ok)
+        self.assertIn(str(self.team.pk), self._subtree(self.other))
+        print("[校验通过] 重建后闭包恢复一致。")
@@ -0,0 +1,125 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.employee.models import Employee
+from apps.organization.models import Organization
+from apps.organization.services import (
+    get_org_headcounts,
+    total_headcount,
+    verify_org_headcount,
+)
+
+
+class OrgHeadcountTests(TestCase):
+    def setUp(self) -> None:
+        self.root = self._create_org("HC-ROOT", "总公司")
+        self.dept = self._create_org("HC-DEPT", "研发部", parent=self.root)
+        self.team = self._create_org("HC-TEAM", "平台组", parent=self.dept)
+        self.other = self._create_org("HC-OTHER", "市场部", parent=self.root)
+        self.emps = [
+            self._create_emp("H001", self.team),
+            self._create_emp("H002", self.team),
+            self._create_emp("H003", self.dept),
+            self._create_emp("H004", self.other),
+        ]
+
+    def _create_org(self, code, name, parent=None) -> Organization:
+        return Organization.objects.create(
+            org_code=code,
+            org_name=name,
+            org_type="department" if parent else "company",
+            parent_org=parent,
+            effective_time=timezone.now(),
+            status="enabled",
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _create_emp(self, emp_id, org) -> Employee:
+        return Employee.objects.create(
+            emp_id=emp_id,
+            id_card=f"42012319900101{emp_id[-4:]}",
+            emp_name=f"员工{emp_id}",
+            gender="female",
+            birth_date=timezone.now().date(),
+            phone="13800000000",
+            email=f"{emp_id.lower()}@example.com",
+            hire_date=timezone.now().date(),
+            org=org,
+            position="工程师",
+            employment_type="full_time",
+            emp_status="active",
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _counts(self, org: Organization) -> tuple[int, int]:
+        counts = get_org_headcounts([org.pk]).get(str(org.pk), {})
+        return counts.get("direct", 0), counts.get("subtree", 0)
+
+    def test_insert_transfer_and_soft_delete_adjust_rollup(self) -> None:
+        print("\n[汇总验证] 入职/调动/离职/删除按增量更新各级人数...")
+        self.assertEqual(self._counts(self.root), (0, 4))
+        self.assertEqual(self._counts(self.dept), (1, 3))
+        self.assertEqual(total_headcount(), 4)
+
+        mover = self.emps[0]
+        mover.org = self.other
+        mover.save()
+        self.assertEqual(self._counts(self.dept), (1, 2))
+        self.assertEqual(self._counts(self.other), (2, 2))
+
+        mover.emp_status = "resigned"
+        mover.save()
+        self.assertEqual(self._counts(self.other), (1, 1))
+        self.assertEqual(total_headcount(), 3)
+
+        self.emps[1].is_deleted = True
+        self.emps[1].save()
+        print(f"[当前汇总] 总公司 直属/含下级: {self._counts(self.root)}")
+        self.assertEqual(self._counts(self.root), (0, 2))
+        self.assertTrue(verify_org_headcount().ok)
+        print("[校验通过] 增量维护结果与员工表现算一致。")
+
+    def test_org_reparent_and_soft_delete_move_subtree_counts(self) -> None:
+        print("\n[汇总验证] 组织迁移/删除后祖先链人数随之调整...")
+        self.dept.parent_org = self.other
+        self.dept.save()
+        self.assertEqual(self._counts(self.other), (1, 4))
+        self.assertEqual(self._counts(self.root), (0, 4))
+
+        self.team.is_deleted = True
+        self.team.save()
+        self.assertEqual(self._counts(self.dept), (1, 1))
+        self.assertEqual(self._counts(self.root), (0, 2))
+        self.assertTrue(verify_org_headcount().ok)
+        print("[校验通过] 组织结构变化后子树人数保持一致。")
+
+    def test_list_and_tree_read_rollup(self) -> None:
+        print("\n[页面验证] 组织列表与组织树直接读取汇总人数...")
+        admin = User.objects.create_superuser(username="hc", password="x")
+        self.client.force_login(admin)
+        response = self.client.get(reverse("organization:list"))
+        listed = {o.org_code: o.headcount_total for o in response.context["orgs"]}
+        self.assertEqual(listed["HC-ROOT"], 4)
+        tree = self.client.get(reverse("organization:tree")).context["org_tree"]
+        print(f"[组织树] {tree[0]['name']} 在职 {tree[0]['headcount']} 人")
+        self.assertEqual(tree[0]["headcount"], 4)
+        print("[校验通过] 页面人数来自 org_headcount。")
+
+    def test_rebuild_command_repairs_drift(self) -> None:
+        print("\n[运维验证] 重建命令修复绕过信号产生的偏差...")
+        Employee.objects.filter(pk=self.emps[2].pk).update(org=self.team)
+        self.assertFalse(verify_org_headcount().ok)
+
+        out = StringIO()
+        call_command("rebuild_org_headcount", stdout=out)
+        print(f"[命令输出] {out.getvalue().strip()}")
+        self.assertTrue(verify_org_headcount().ok)
+        self.assertEqual(self._counts(self.team), (3, 3))
+        print("[校验通过] 重建后人数汇总恢复一致。")
@@ -0,0 +1,96 @@
+from datetime import date, datetime
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.employee.models import Employee
+from apps.organization.models import Organization, OrganizationVersion
+from apps.organization.restructure import restructure_orgs
+from apps.organization.services import headcount_as_of, org_subtree_as_of
+
+
+class OrganizationHistoryTests(TestCase):
+    def setUp(self) -> None:
+        self.founded = timezone.make_aware(datetime(2024, 1, 1))
+        self.root = self._create_org("HS-ROOT", "总公司")
+        self.dept = self._create_org("HS-DEPT", "研发部", parent=self.root)
+        self.team = self._create_org("HS-TEAM", "平台组", parent=self.dept)
+        self.sales = self._create_org("HS-SALES", "销售部", parent=self.root)
+        self.emp = Employee.objects.create(
+            emp_id="HS01",
+            id_card="420123199001010301",
+            emp_name="平台工程师",
+            gender="male",
+            birth_date=date(1990, 1, 1),
+            phone="13800000000",
+            email="hs01@example.com",
+            hire_date=date(2024, 3, 1),
+            org=self.team,
+            position="工程师",
+            employment_type="full_time",
+            emp_status="active",
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _create_org(self, code, name, parent=None) -> Organization:
+        return Organization.objects.create(
+            org_code=code,
+            org_name=name,
+            org_type="department" if parent else "company",
+            parent_org=parent,
+            effective_time=self.founded,
+            status="enabled",
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def test_subtree_and_headcount_as_of_past_dates(self) -> None:
+        print("\n[历史验证] 组织迁移后仍可还原历史时点的子树与人数...")
+        restructure_orgs([(self.team.pk, self.sales.pk)])
+        past, today = date(2024, 6, 30), timezone.localdate()
+
+        self.assertIn(str(self.team.pk), org_subtree_as_of(self.dept.pk, past))
+        self.assertNotIn(str(self.team.pk), org_subtree_as_of(self.dept.pk, today))
+        self.assertIn(str(self.team.pk), org_subtree_as_of(self.sales.pk, today))
+        self.assertEqual(org_subtree_as_of(self.root.pk, date(2023, 12, 31)), [])
+
+        counts = {
+            "研发部@2024-06-30": headcount_as_of(self.dept.pk, past),
+            "研发部@今天": headcount_as_of(self.dept.pk, today),
+            "销售部@今天": headcount_as_of(self.sales.pk, today),
+            "研发部@2024-02-01": headcount_as_of(self.dept.pk, date(2024, 2, 1)),
+        }
+        print(f"[历史人数] {counts}")
+        self.assertEqual(list(counts.values()), [1, 0, 1, 0])
+        print("[校验通过] 历史时点查询结果与当时结构一致。")
+
+    def test_versions_follow_changes_and_soft_delete(self) -> None:
+        print("\n[历史验证] 组织属性变更/删除生成历史版本...")
+        self.dept.org_name = "产品研发部"
+        self.dept.save()
+        self.dept.save()  # 无变化不产生新版本
+        names = list(
+            OrganizationVersion.objects.filter(org=self.dept)
+            .order_by("valid_period")
+            .values_list("org_name", flat=True)
+        )
+        print(f"[版本记录] {names}")
+        self.assertEqual(names, ["研发部", "产品研发部"])
+        past = OrganizationVersion.objects.as_of(
+            timezone.make_aware(datetime(2024, 6, 30))
+        ).get(org=self.dept)
+        self.assertEqual(past.org_name, "研发部")
+
+        self.sales.is_deleted = True
+        self.sales.save()
+
+        def codes(moment):
+            return set(
+                Organization.objects.as_of(moment).values_list("org_code", flat=True)
+            )
+
+        self.assertNotIn("HS-SALES", codes(timezone.now()))
+        self.assertIn("HS-SALES", codes(timezone.make_aware(datetime(2024, 6, 30))))
+        self.assertEqual(codes(timezone.make_aware(datetime(2023, 6, 30))), set())
+        print("[校验通过] 历史版本按有效区间查询。")
@@ -0,0 +1,119 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.employee.models import Employee
+from apps.organization.models import Organization
+from apps.organization.restructure import restructure_orgs
+from apps.organization.services import (
+    get_org_headcounts,
+    get_org_tree_index,
+    verify_org_closure,
+    verify_org_headcount,
+)
+
+
+class OrganizationRestructureTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.root = self._create_org("RS-ROOT", "总公司")
+        self.dept = self._create_org("RS-DEPT", "研发部", parent=self.root)
+        self.team = self._create_org("RS-TEAM", "平台组", parent=self.dept)
+        self.sales = self._create_org("RS-SALES", "销售部", parent=self.root)
+        Employee.objects.create(
+            emp_id="RS01",
+            id_card="420123199001010201",
+            emp_name="平台工程师",
+            gender="male",
+            birth_date=timezone.now().date(),
+            phone="13800000000",
+            email="rs01@example.com",
+            hire_date=timezone.now().date(),
+            org=self.team,
+            position="工程师",
+            employment_type="full_time",
+            emp_status="active",
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _create_org(self, code, name, parent=None) -> Organization:
+        return Organization.objects.create(
+            org_code=code,
+            org_name=name,
+            org_type="department" if parent else "company",
+            parent_org=parent,
+            effective_time=timezone.now(),
+            status="enabled",
+            create_by="tests",
+            update_by="tests",
+        )
+
+    def _subtree_count(self, org: Organization) -> int:
+        return get_org_headcounts([org.pk]).get(str(org.pk), {}).get("subtree", 0)
+
+    def test_swap_moves_apply_together_and_recompute_once(self) -> None:
+        print("\n[批量调整] 父子互换在同一事务内完成...")
+        get_org_tree_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            result = restructure_orgs(
+                [(self.team.pk, self.root.pk), (self.dept.pk, self.team.pk)]
+            )
+        print(f"[执行结果] {result}")
+        self.assertEqual(result.moved, 2)
+        self.team.refresh_from_db()
+        self.dept.refresh_from_db()
+        self.assertEqual(self.team.parent_org_id, str(self.root.pk))
+        self.assertEqual(self.dept.parent_org_id, str(self.team.pk))
+        self.assertTrue(verify_org_closure().ok)
+        self.assertTrue(verify_org_headcount().ok)
+        self.assertEqual(self._subtree_count(self.dept), 0)
+        self.assertEqual(
+            get_org_tree_index()["nodes"][str(self.team.pk)]["children"],
+            [str(self.dept.pk)],
+        )
+        print("[校验通过] 闭包、人数汇总与组织树缓存均已统一重算。")
+
+    def test_cycle_is_rejected_without_partial_writes(self) -> None:
+        print("\n[批量调整] 形成环路的调整整体拒绝...")
+        with self.assertRaises(ValidationError) as ctx:
+            restructure_orgs(
+                [(self.sales.pk, self.team.pk), (self.root.pk, self.sales.pk)]
+            )
+        print(f"[错误信息] {ctx.exception.messages}")
+        self.sales.refresh_from_db()
+        self.assertEqual(self.sales.parent_org_id, str(self.root.pk))
+        print("[校验通过] 校验失败时不做任何变更。")
+
+    def test_command_moves_by_code(self) -> None:
+        print("\n[运维验证] 命令行按组织编码批量调整...")
+        out = StringIO()
+        call_command("restructure_orgs", "RS-TEAM=RS-SALES", "RS-DEPT=", stdout=out)
+        print(f"[命令输出] {out.getvalue().strip()}")
+        self.assertEqual(self._subtree_count(self.sales), 1)
+        self.assertEqual(self._subtree_count(self.root), 1)
+        self.dept.refresh_from_db()
+        self.assertIsNone(self.dept.parent_org_id)
+        self.assertTrue(verify_org_closure().ok)
+        print("[校验通过] 命令执行后派生数据一致。")
+
+    def test_admin_action_moves_selected_orgs(self) -> None:
+        print("\n[后台验证] Admin 批量动作迁移选中组织...")
+        admin_user = User.objects.create_superuser(username="rs", password="x")
+        self.client.force_login(admin_user)
+        url = reverse("admin:organization_organization_changelist")
+        data = {"action": "move_to_parent", "_selected_action": [self.team.pk]}
+        response = self.client.post(url, data)
+        self.assertContains(response, "确认迁移")
+
+        data.update({"apply": "1", "new_parent": self.sales.pk})
+        self.client.post(url, data)
+        self.team.refresh_from_db()
+        self.assertEqual(self.team.parent_org_id, str(self.sales.pk))
+        print("[校验通过] 确认后组织已迁移。")
@@ -0,0 +1,66 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.organization.models import Organization
+from apps.organization.services import ORG_TREE_CACHE_KEY
+
+
+class OrganizationTreeViewTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = User.objects.create_user(username="tree", password="x")
+        self.client.force_login(self.user)
+        self.root = self._create_org("T-ROOT", "总公司")
+        parent = self.root
+        for level in range(1, 5):
+            parent = self._create_org(f"T-L{level}", f"第{level}层", parent=parent)
+        self.leaf = parent
+
+    def _create_org(self, code, name, parent=None) -> Organization:
+        return Organization.objects.create(
+            org_code=code,
+            org_name=name,
+            org_type="department" if parent else "company",
+            parent_org=parent,
+            effective_time=timezone.now(),
+            status="enabled",
+            create_by="tests",
+            update_by="tests",
+        )
+
+    # 只统计业务查询：缓存放在进程内，不把共享缓存的读写算进去
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    )
+    def test_tree_page_uses_constant_queries(self) -> None:
+        print("\n[性能验证] 组织树页面查询次数与节点数量无关...")
+        self.client.get(reverse("organization:tree"))
+        with self.assertNumQueries(2):  # session + auth user
+            response = self.client.get(reverse("organization:tree"))
+        roots = response.context["org_tree"]
+        print(f"[首屏渲染] 顶级节点: {[n['name'] for n in roots]}")
+        self.assertEqual(roots[0]["children"][0]["children"][0]["name"], "第2层")
+        self.assertEqual(roots[0]["children"][0]["children"][0]["children"], [])
+        print("[校验通过] 树结构来自缓存，超过首屏深度的分支延迟加载。")
+
+    def test_subtree_endpoint_and_invalidation(self) -> None:
+        print("\n[接口验证] 按节点懒加载子树，组织变更后缓存重建...")
+        level2 = Organization.objects.get(org_code="T-L2")
+        url = reverse("organization:tree_data")
+        data = self.client.get(url, {"node": str(level2.pk)}).json()
+        print(f"[接口返回] {[n['name'] for n in data['nodes']]}")
+        self.assertEqual([n["name"] for n in data["nodes"]], ["第3层"])
+        self.assertEqual(data["nodes"][0]["child_count"], 1)
+
+        # 提交前不清除缓存，并发请求不会把未提交前的旧树重新缓存
+        with self.captureOnCommitCallbacks(execute=True):
+            self.leaf.status = "disabled"
+            self.leaf.save()
+            self.assertIsNotNone(cache.get(ORG_TREE_CACHE_KEY))
+        level3 = Organization.objects.get(org_code="T-L3")
+        data = self.client.get(url, {"node": str(level3.pk)}).json()
+        self.assertEqual(data["nodes"], [])
+        print("[校验通过] 停用组织后子树即时更新。")
@@ -5,6 +5,7 @@ app_name = "organization"
 
 urlpatterns = [
     path("tree/", views.OrganizationTreeView.as_view(), name="tree"),
+    path("tree/data/", views.OrganizationTreeDataView.as_view(), name="tree_data"),
     path("", views.OrganizationListView.as_view(), name="list"),
     path("add/", views.OrganizationCreateView.as_view(), name="add"),
     path("<str:pk>/edit/", views.OrganizationUpdateView.as_view(), name="edit"),
@@ -1,71 +1,74 @@
-from dataclasses import dataclass, field
-from typing import Iterable, List, Optional
-from django.views.generic import ListView, CreateView, UpdateView, DeleteView
+from django.views.generic import (
+    ListView,
+    CreateView,
+    UpdateView,
+    DeleteView,
+    TemplateView,
+    View,
+)
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.http import HttpRequest
+from django.http import Http404, HttpRequest, JsonResponse
 from django.urls import reverse_lazy
 from django.contrib import messages
-from django.utils.text import slugify
+from apps.core.roles import is_org_admin
 from .models import Organization
 from .forms import OrganizationCreateForm, OrganizationUpdateForm
-
-ORG_TYPE_DISPLAY = {value: label for value, label in Organization.ORG_TYPE_CHOICES}
-
-
-@dataclass
-class OrganizationNode:
-    org: Organization
-    children: list = field(default_factory=list)
-
-    @property
-    def type_display(self) -> str:
-        label = ORG_TYPE_DISPLAY.get(self.org.org_type)
-        return label or self.org.org_type.replace("_", " ").capitalize()
-
-    @property
-    def manager_display(self) -> Optional[str]:
-        return getattr(self.org.manager_emp, "emp_name", None)
+from .services import (
+    allocate_org_code,
+    get_org_headcounts,
+    get_org_tree_index,
+    serialize_org_subtree,
+)
 
 
 class AdminRequiredMixin(UserPassesTestMixin):
     request: HttpRequest  # provided by CBV at runtime
 
     def test_func(self) -> bool:
-        emp = getattr(self.request.user, "employee", None)
-        return self.request.user.is_superuser or (
-            emp is not None and emp.position == "HR Director"
-        )
+        return is_org_admin(self.request.user)
 
 
-class OrganizationTreeView(LoginRequiredMixin, ListView):
-    model = Organization
-    template_name = "organization/tree.html"
-    context_object_name = "root_orgs"
+class OrganizationTreeView(LoginRequiredMixin, TemplateView):
+    """组织架构图：首屏只渲染前几层，其余分支由前端调用 tree_data 按需展开。"""
 
-    def get_queryset(self):
-        # 仅获取顶级节点，后续通过递归模板渲染子节点
-        return Organization.objects.filter(
-            parent_org__isnull=True, status="enabled", is_deleted=False
-        ).prefetch_related("manager_emp")
+    template_name = "organization/tree.html"
+    initial_depth = 3
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context_key = self.context_object_name or "root_orgs"
-        root_orgs = context.get(context_key, [])
-        context["org_tree"] = self.build_tree(root_orgs)
+        index = get_org_tree_index()
+        context["org_tree"] = serialize_org_subtree(
+            index, index["roots"], self.initial_depth
+        )
         return context
 
-    def build_tree(
-        self, organizations: Iterable[Organization]
-    ) -> List[OrganizationNode]:
-        return [self.build_node(org) for org in organizations]
-
-    def build_node(self, org: Organization) -> OrganizationNode:
-        active_children = Organization.objects.filter(
-            parent_org=org, status="enabled", is_deleted=False
-        ).order_by("org_code")
-        return OrganizationNode(
-            org=org, children=[self.build_node(child) for child in active_children]
+
+class OrganizationTreeDataView(LoginRequiredMixin, View):
+    """组织树 JSON：?node=<id> 返回该节点的下级，缺省返回顶级组织。"""
+
+    max_depth = 5
+
+    def get(self, request):
+        index = get_org_tree_index()
+        node_id = (request.GET.get("node") or "").strip()
+        try:
+            depth = int(request.GET.get("depth") or 1)
+        except ValueError:
+            depth = 1
+        depth = max(1, min(depth, self.max_depth))
+
+        if node_id:
+            node = index["nodes"].get(node_id)
+            if node is None:
+                raise Http404("组织不存在或未启用")
+            child_ids = node["children"]
+        else:
+            child_ids = index["roots"]
+        return JsonResponse(
+            {
+                "node": node_id or None,
+                "nodes": serialize_org_subtree(index, child_ids, depth),
+            }
         )
 
 
@@ -78,6 +81,16 @@ class OrganizationListView(LoginRequiredMixin, ListView):
     def get_queryset(self):
         return Organization.objects.filter(is_deleted=False).order_by("org_code")
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        orgs = context["orgs"]
+        headcounts = get_org_headcounts([org.pk for org in orgs])
+        for org in orgs:
+            counts = headcounts.get(str(org.pk), {})
+            org.headcount_direct = counts.get("direct", 0)
+            org.headcount_total = counts.get("subtree", 0)
+        return context
+
 
 class OrganizationCreateView(AdminRequiredMixin, CreateView):
     model = Organization
@@ -85,20 +98,8 @@ class OrganizationCreateView(AdminRequiredMixin, CreateView):
     template_name = "organization/form.html"
     success_url = reverse_lazy("organization:list")
 
-    def _generate_org_code(self, org_name: str) -> str:
-        base = slugify(org_name, allow_unicode=False).replace("-", "").upper()
-        if not base:
-            base = "ORG"
-        base = base[:8]
-        candidate = base
-        counter = 1
-        while Organization.objects.filter(org_code=candidate).exists():
-            counter += 1
-            candidate = f"{base}-{counter}"
-        return candidate
-
     def form_valid(self, form):
-        form.instance.org_code = self._generate_org_code(form.cleaned_data["org_name"])
+        form.instance.org_code = allocate_org_code(form.cleaned_data["org_name"])
         form.instance.create_by = self.request.user.username
         form.instance.update_by = self.request.user.username
         messages.success(self.request, "组织创建成功")
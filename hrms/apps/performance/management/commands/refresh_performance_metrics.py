@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from apps.performance.models import PerformanceEvaluation
+from apps.performance.services import refresh_metrics_for_queryset
+
+
+class Command(BaseCommand):
+    help = "重算绩效评估的出勤率、请假率与规则分并保存，供审批台等页面直接读取"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--status",
+            action="append",
+            choices=[value for value, _ in PerformanceEvaluation.EVAL_STATUS_CHOICES],
+            help="只重算指定评估状态（可重复）",
+        )
+
+    def handle(self, *args, **options):
+        qs = PerformanceEvaluation.objects.filter(is_deleted=False)
+        if options["status"]:
+            qs = qs.filter(evaluation_status__in=options["status"])
+        total = qs.count()
+        refresh_metrics_for_queryset(qs, save=True)
+        self.stdout.write(self.style.SUCCESS(f"已重算 {total} 条绩效评估指标"))
@@ -4,10 +4,12 @@ from dataclasses import dataclass
 from datetime import date, datetime, timedelta
 from decimal import Decimal
 
+from django.db.models import Sum
 from django.utils import timezone
 
 from apps.attendance.models import Attendance
-from apps.leave.models import LeaveTimeSegment
+from apps.attendance.work_calendar import calendar_for_employee
+from apps.leave.models import LeaveDay
 
 
 @dataclass(frozen=True)
@@ -23,56 +25,23 @@ def _to_date(d: datetime | date) -> date:
     return d.date() if isinstance(d, datetime) else d
 
 
-def count_weekdays(start: date, end: date) -> int:
-    if end < start:
-        return 0
-    cur = start
-    total = 0
-    while cur <= end:
-        if cur.weekday() < 5:
-            total += 1
-        cur += timedelta(days=1)
-    return total
-
-
-def _overlap_seconds(
-    a_start: datetime, a_end: datetime, b_start: datetime, b_end: datetime
-) -> int:
-    start = max(a_start, b_start)
-    end = min(a_end, b_end)
-    if end <= start:
-        return 0
-    return int((end - start).total_seconds())
-
-
 def compute_leave_days(emp, start_dt: datetime, end_dt: datetime) -> Decimal:
-    """按请假时间段计算周期内请假天数(支持部分重叠)。"""
+    """周期内已批准/已完成请假折算的工作日天数。
+
+    直接汇总请假日明细 leave_day（已按员工所在组织的工作日历折算），按本地日期计：
+    周期起止落在某天当中时，该天的请假整天计入。
+    """
     start_dt = (
         timezone.make_aware(start_dt) if timezone.is_naive(start_dt) else start_dt
     )
     end_dt = timezone.make_aware(end_dt) if timezone.is_naive(end_dt) else end_dt
-
-    segments = LeaveTimeSegment.objects.select_related("leave").filter(
-        emp=emp,
-        leave__apply_status="approved",
-        leave_start_time__lt=end_dt,
-        leave_end_time__gt=start_dt,
-    )
-
-    total = Decimal("0")
-    for seg in segments:
-        seg_start = seg.leave_start_time
-        seg_end = seg.leave_end_time
-        full = _overlap_seconds(seg_start, seg_end, seg_start, seg_end)
-        if full <= 0:
-            continue
-        overlap = _overlap_seconds(seg_start, seg_end, start_dt, end_dt)
-        if overlap <= 0:
-            continue
-        ratio = Decimal(overlap) / Decimal(full)
-        total += Decimal(seg.segment_days) * ratio
-
-    return total
+    first = timezone.localtime(start_dt).date()
+    # 结束时刻不含在内：止于零点的周期不计当天
+    last = timezone.localtime(end_dt - timedelta(microseconds=1)).date()
+    total = LeaveDay.objects.filter(emp=emp, day__range=(first, last)).aggregate(
+        total=Sum("fraction")
+    )["total"]
+    return total or Decimal("0")
 
 
 def compute_attendance_days(emp, start_day: date, end_day: date) -> tuple[int, int]:
@@ -103,7 +72,8 @@ def compute_auto_metrics_for_evaluation(evaluation) -> AutoMetrics:
 
     start_day = _to_date(start_dt)
     end_day = _to_date(end_dt)
-    expected = count_weekdays(start_day, end_day)
+    calendar = calendar_for_employee(evaluation.emp)
+    expected = calendar.workdays(start_day, end_day + timedelta(days=1))
 
     leave_days = compute_leave_days(evaluation.emp, start_dt, end_dt)
     attendance_days, total_records = compute_attendance_days(
@@ -21,6 +21,7 @@ from .forms import PerformanceCycleForm, PerformanceAdminEvaluationForm
 from apps.employee.models import Employee
 from apps.organization.models import Organization
 from .services import refresh_metrics_for_queryset, refresh_evaluation_metrics
+from apps.core.roles import is_performance_admin
 
 
 class PerformanceAdminRequiredMixin(UserPassesTestMixin):
@@ -31,21 +32,7 @@ class PerformanceAdminRequiredMixin(UserPassesTestMixin):
 
     def test_func(self) -> bool:
         request = cast(HttpRequest, self.request)
-        user = cast(AbstractUser | AnonymousUser, request.user)
-        if user.is_superuser:
-            return True
-        emp = getattr(user, "employee", None)
-        if not emp:
-            return False
-        position = (emp.position or "").upper()
-        org_name = (getattr(emp.org, "org_name", "") or "").upper()
-        return (
-            position == "CFO"
-            or "绩效" in (emp.position or "")
-            or "绩效" in (getattr(emp.org, "org_name", "") or "")
-            or "PERFORMANCE" in position
-            or "PERFORMANCE" in org_name
-        )
+        return is_performance_admin(cast(AbstractUser, request.user))
 
 
 class PerformanceDashboardView(LoginRequiredMixin, ListView):
@@ -220,6 +207,12 @@ class PerformanceCycleStatusUpdateView(
                 update_by=request.user.username,
                 update_time=now,
             )
+            if target_eval_status == "hr_audit":
+                # 进入绩效部门审核时预先算好指标，审批台只读取保存的结果
+                refresh_metrics_for_queryset(
+                    PerformanceEvaluation.objects.filter(cycle=cycle, is_deleted=False),
+                    save=True,
+                )
 
         messages.success(
             request,
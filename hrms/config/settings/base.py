@@ -51,6 +51,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "apps.core",
     "apps.organization",
     "apps.employee",
@@ -109,6 +110,57 @@ DATABASES = {
 }
 
 
+# Cache
+# 数据范围、组织树、日历等缓存靠版本号/删除键失效，必须由所有 worker 共享；
+# 默认使用数据库缓存表（部署时执行 manage.py createcachetable），
+# 也可通过环境变量改为 Redis/Memcached，不要用进程内的 LocMemCache
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "DJANGO_CACHE_BACKEND", "django.core.cache.backends.db.DatabaseCache"
+        ),
+        "LOCATION": os.environ.get("DJANGO_CACHE_LOCATION", "hrms_cache"),
+    }
+}
+
+# 用户数据范围（UserScope）缓存秒数；变更由信号主动失效，这里只是兜底
+USER_SCOPE_CACHE_TIMEOUT = int(os.environ.get("USER_SCOPE_CACHE_TIMEOUT", "600"))
+LEAVE_CALENDAR_CACHE_TIMEOUT = int(
+    os.environ.get("LEAVE_CALENDAR_CACHE_TIMEOUT", "3600")
+)
+# 组织树索引缓存秒数；变更提交后由信号主动清除，这里只是兜底
+ORG_TREE_CACHE_TIMEOUT = int(os.environ.get("ORG_TREE_CACHE_TIMEOUT", "600"))
+
+# 工作日历：每天的工作时段（本地时间，HH:MM），请假时长、出勤统计均按此折算
+WORK_DAY_WINDOWS = [("09:00", "12:00"), ("13:00", "18:00")]
+
+# 请假审批链：请假天数达到该值时，直属上级审批后还需人力资源复核
+LEAVE_HR_APPROVAL_DAYS = int(os.environ.get("LEAVE_HR_APPROVAL_DAYS", "3"))
+
+# 事务性发件箱：业务事务内写入 core_outbox，由 run_outbox 进程投递到下列下游
+OUTBOX_SINKS = [
+    {
+        "BACKEND": "apps.core.outbox.FileSink",
+        "OPTIONS": {
+            "path": os.environ.get(
+                "OUTBOX_FILE_PATH", str(BASE_DIR.parent / "var" / "outbox.jsonl")
+            )
+        },
+    }
+]
+if os.environ.get("OUTBOX_WEBHOOK_URL"):
+    OUTBOX_SINKS.append(
+        {
+            "BACKEND": "apps.core.outbox.HttpSink",
+            "OPTIONS": {"url": os.environ["OUTBOX_WEBHOOK_URL"]},
+        }
+    )
+# 失败重试：第 n 次失败后顺延 RETRY_SECONDS * 2^(n-1) 秒（封顶），达到最大次数后不再投递
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_RETRY_SECONDS = int(os.environ.get("OUTBOX_RETRY_SECONDS", "30"))
+OUTBOX_RETRY_MAX_SECONDS = int(os.environ.get("OUTBOX_RETRY_MAX_SECONDS", "3600"))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
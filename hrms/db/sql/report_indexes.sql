@@ -10,11 +10,13 @@ CREATE INDEX IF NOT EXISTS idx_employee_manager_emp_id ON employee (manager_emp_
 CREATE INDEX IF NOT EXISTS idx_employee_hire_date ON employee (hire_date);
 CREATE INDEX IF NOT EXISTS idx_employee_birth_date ON employee (birth_date);
 
--- Optional: case-insensitive text searches (requires pg_trgm)
+-- Keyword search (name / employee id / email / leave reason) uses the
+-- migration-managed tsvector columns employee.search_vector and
+-- leave_profile.search_vector with GIN indexes (gin_employee_search,
+-- gin_leave_profile_search); see utils/textsearch.py for the tokenization.
+-- Optional: substring LIKE filters on other columns (requires pg_trgm)
 -- CREATE EXTENSION IF NOT EXISTS pg_trgm;
--- CREATE INDEX IF NOT EXISTS idx_employee_emp_name_trgm ON employee USING gin (emp_name gin_trgm_ops);
 -- CREATE INDEX IF NOT EXISTS idx_employee_position_trgm ON employee USING gin (position gin_trgm_ops);
--- CREATE INDEX IF NOT EXISTS idx_employee_email_trgm ON employee USING gin (email gin_trgm_ops);
 
 -- Organization tree traversal
 CREATE INDEX IF NOT EXISTS idx_organization_parent_org_id ON organization (parent_org_id);
@@ -23,7 +23,8 @@ SELECT
     org.id AS org_id,
     org.org_code,
     org.org_name,
-    org.parent_org_id
+    org.parent_org_id,
+    emp.search_vector
 FROM employee emp
 JOIN organization org ON emp.org_id = org.id
 LEFT JOIN employee mgr ON emp.manager_emp_id = mgr.id
@@ -32,6 +33,8 @@ WHERE emp.is_deleted = FALSE
 
 
 -- Leave profile view (includes employee + org + aggregated segments)
+-- The leave search page reads the materialized table leave_profile instead
+-- (kept in sync by apps.leave.profile; rebuild with `manage.py rebuild_leave_profile`).
 DROP VIEW IF EXISTS vw_leave_profile;
 CREATE VIEW vw_leave_profile AS
 SELECT
@@ -34,7 +34,7 @@ from apps.audit.models import AuditLog
 from apps.core.models import BaseModel  # noqa: F401 (import ensures model registry)
 from apps.attendance.models import Attendance
 from apps.employee.models import Employee, EmployeeHistory
-from apps.leave.models import LeaveApply, LeaveTimeSegment
+from apps.leave.models import LeaveApply, LeaveDay, LeaveTimeSegment
 from apps.organization.models import Organization
 from apps.performance.models import (
     PerformanceCycle,
@@ -504,7 +504,7 @@ def seed_attendance_2024(employees):
 
     规则：
     - 工作日（周一~周五）生成考勤
-    - 若当天在批准请假段内，则标记 attendance_status='leave'
+    - 若当天有批准的请假（请假日明细 leave_day），则标记 attendance_status='leave'
     """
 
     print("=== 3) 构建 2024 考勤示例（工作日） ===")
@@ -512,22 +512,11 @@ def seed_attendance_2024(employees):
     start_day = date(2024, 1, 1)
     end_day = date(2024, 12, 31)
 
-    segments = list(
-        LeaveTimeSegment.objects.select_related("leave").filter(
-            leave__apply_status="approved",
-            leave_start_time__date__lte=end_day,
-            leave_end_time__date__gte=start_day,
-        )
-    )
-
     leave_days_by_emp: dict[str, set[date]] = {}
-    for seg in segments:
-        cur = seg.leave_start_time.date()
-        last = seg.leave_end_time.date()
-        while cur <= last:
-            emp_key = getattr(seg, "emp_id")
-            leave_days_by_emp.setdefault(emp_key, set()).add(cur)
-            cur += timedelta(days=1)
+    for emp_id, leave_day in LeaveDay.objects.filter(
+        leave__apply_status="approved", day__range=(start_day, end_day)
+    ).values_list("emp_id", "day"):
+        leave_days_by_emp.setdefault(emp_id, set()).add(leave_day)
 
     created = 0
     day = start_day
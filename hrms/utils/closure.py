@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Sequence
+
+from django.db import connection
+from django.utils import timezone
+
+# 防御性上限：层级环路由数据库触发器拦截，这里只避免递归失控
+MAX_DEPTH = 256
+
+
+@dataclass(frozen=True)
+class ClosureSpec:
+    """Describe a (ancestor, descendant, depth) closure over a self-referencing table.
+
+    Only live rows (``is_deleted = FALSE``) take part; a soft-deleted node cuts
+    the path for everything below it, matching the old recursive CTE walk.
+
+    When ``history_table`` is set, every refresh also versions the rows into it
+    as ``(ancestor, descendant, depth, valid_period tstzrange)`` so the tree can
+    be queried as of any past moment.
+    """
+
+    closure_table: str
+    node_table: str
+    parent_column: str
+    ancestor_column: str
+    descendant_column: str
+    history_table: str | None = None
+
+
+@dataclass(frozen=True)
+class ClosureDiff:
+    missing: int
+    extra: int
+
+    @property
+    def ok(self) -> bool:
+        return self.missing == 0 and self.extra == 0
+
+
+def _paths_cte(spec: ClosureSpec, seed_sql: str) -> str:
+    """Walk upwards from every seed node and emit one row per (node, ancestor)."""
+
+    return (
+        "paths(descendant_id, ancestor_id, depth) AS ("
+        f"SELECT n.id, n.id, 0 FROM {spec.node_table} n "
+        f"WHERE n.is_deleted = FALSE AND n.id IN ({seed_sql}) "
+        "UNION ALL "
+        "SELECT p.descendant_id, parent.id, p.depth + 1 "
+        "FROM paths p "
+        f"JOIN {spec.node_table} cur ON cur.id = p.ancestor_id "
+        f"JOIN {spec.node_table} parent ON parent.id = cur.{spec.parent_column} "
+        f"WHERE parent.is_deleted = FALSE AND p.depth < {MAX_DEPTH}"
+        ")"
+    )
+
+
+def _subtree_cte(spec: ClosureSpec) -> str:
+    # 结构性遍历（含已删除节点），确保恢复/删除时整棵子树都被重算
+    return (
+        "subtree(id) AS ("
+        f"SELECT n.id FROM {spec.node_table} n WHERE n.id = ANY(%s) "
+        "UNION "
+        f"SELECT n.id FROM {spec.node_table} n "
+        f"JOIN subtree s ON n.{spec.parent_column} = s.id"
+        ")"
+    )
+
+
+def _sync_history(
+    cursor, spec: ClosureSpec, at: datetime, ids: list[str] | None
+) -> None:
+    """Close history rows that left the closure and open rows that joined it."""
+
+    if not spec.history_table:
+        return
+    anc, desc = spec.ancestor_column, spec.descendant_column
+    scope = f"AND h.{desc} = ANY(%s)" if ids is not None else ""
+    scope_params = [ids] if ids is not None else []
+    still_present = (
+        f"EXISTS (SELECT 1 FROM {spec.closure_table} c "
+        f"WHERE c.{anc} = h.{anc} AND c.{desc} = h.{desc} AND c.depth = h.depth)"
+    )
+    # 同一时刻内先开后关的版本没有实际有效期，直接删除
+    cursor.execute(
+        f"DELETE FROM {spec.history_table} h "
+        f"WHERE upper_inf(h.valid_period) AND lower(h.valid_period) >= %s {scope} "
+        f"AND NOT {still_present}",
+        [at, *scope_params],
+    )
+    cursor.execute(
+        f"UPDATE {spec.history_table} h "
+        "SET valid_period = tstzrange(lower(h.valid_period), %s) "
+        f"WHERE upper_inf(h.valid_period) {scope} AND NOT {still_present}",
+        [at, *scope_params],
+    )
+    scope = f"WHERE c.{desc} = ANY(%s)" if ids is not None else ""
+    cursor.execute(
+        f"INSERT INTO {spec.history_table} ({anc}, {desc}, depth, valid_period) "
+        f"SELECT c.{anc}, c.{desc}, c.depth, tstzrange(%s, NULL) "
+        f"FROM {spec.closure_table} c {scope} "
+        f"{'AND' if scope else 'WHERE'} NOT EXISTS ("
+        f"SELECT 1 FROM {spec.history_table} h WHERE upper_inf(h.valid_period) "
+        f"AND h.{anc} = c.{anc} AND h.{desc} = c.{desc} AND h.depth = c.depth)",
+        [at, *scope_params],
+    )
+
+
+def refresh_subtrees(
+    spec: ClosureSpec, root_ids: Sequence[str], *, at: datetime | None = None
+) -> int:
+    """Recompute closure rows for every node below (and including) ``root_ids``.
+
+    Rows whose descendant lies outside those subtrees are untouched, so a
+    create/rename/reparent/soft delete only costs the size of the moved subtree.
+    ``at`` stamps the history versions (defaults to now). Returns the number of
+    rows written.
+    """
+
+    ids = [str(rid) for rid in root_ids if rid]
+    if not ids:
+        return 0
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH RECURSIVE {_subtree_cte(spec)} SELECT id FROM subtree", [ids]
+        )
+        subtree_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            f"DELETE FROM {spec.closure_table} WHERE {spec.descendant_column} = ANY(%s)",
+            [subtree_ids],
+        )
+        cursor.execute(
+            f"WITH RECURSIVE {_paths_cte(spec, 'SELECT unnest(%s::varchar[])')} "
+            f"INSERT INTO {spec.closure_table} "
+            f"({spec.ancestor_column}, {spec.descendant_column}, depth) "
+            "SELECT ancestor_id, descendant_id, depth FROM paths",
+            [subtree_ids],
+        )
+        written = cursor.rowcount
+        _sync_history(cursor, spec, at or timezone.now(), subtree_ids)
+        return written
+
+
+def rebuild(spec: ClosureSpec) -> int:
+    """Drop and recompute the whole closure table. Returns rows written.
+
+    History rows are reconciled against the result: drifted versions are closed
+    now rather than rewritten, so past answers stay as they were recorded.
+    """
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {spec.closure_table}")
+        cursor.execute(
+            f"WITH RECURSIVE {_paths_cte(spec, f'SELECT id FROM {spec.node_table}')} "
+            f"INSERT INTO {spec.closure_table} "
+            f"({spec.ancestor_column}, {spec.descendant_column}, depth) "
+            "SELECT ancestor_id, descendant_id, depth FROM paths"
+        )
+        written = cursor.rowcount
+        _sync_history(cursor, spec, timezone.now(), None)
+        return written
+
+
+def verify(spec: ClosureSpec) -> ClosureDiff:
+    """Compare the stored closure with a from-scratch recursive walk."""
+
+    stored = (
+        f"SELECT {spec.ancestor_column}, {spec.descendant_column}, depth "
+        f"FROM {spec.closure_table}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH RECURSIVE {_paths_cte(spec, f'SELECT id FROM {spec.node_table}')}, "
+            "expected AS (SELECT ancestor_id, descendant_id, depth FROM paths) "
+            "SELECT "
+            f"(SELECT COUNT(*) FROM (SELECT * FROM expected EXCEPT {stored}) m), "
+            f"(SELECT COUNT(*) FROM ({stored} EXCEPT SELECT * FROM expected) x)"
+        )
+        missing, extra = cursor.fetchone()
+    return ClosureDiff(missing=int(missing), extra=int(extra))
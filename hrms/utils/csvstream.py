@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import csv
+from typing import Any, Iterable, Iterator, Sequence
+
+# Excel only detects UTF-8 CSV files that start with a byte order mark.
+UTF8_BOM = "\ufeff"
+
+
+class Echo:
+    """File-like target for ``csv.writer`` that returns each formatted line
+    instead of buffering it, so rows can be streamed as they are produced."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_csv(headers: Sequence[str], rows: Iterable[Sequence[Any]]) -> Iterator[str]:
+    """Yield a CSV document line by line, BOM and header first."""
+
+    writer = csv.writer(Echo())
+    yield UTF8_BOM + writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow(row)
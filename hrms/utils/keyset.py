@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass, field
+from typing import Any, Sequence
+
+from django.db.models import Q, QuerySet
+
+
+@dataclass
+class KeysetPage:
+    items: list[Any]
+    next_cursor: str | None = None
+    ordering: Sequence[str] = field(default_factory=tuple)
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([str(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str | None, size: int) -> list[str] | None:
+    """Return the cursor's key values, or None for a missing/garbled cursor."""
+
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    return [str(v) for v in values]
+
+
+def _after(ordering: Sequence[str], values: Sequence[str]) -> Q:
+    """Rows strictly after ``values`` in ``ordering`` (row-value comparison)."""
+
+    condition = Q()
+    for position in range(len(ordering) - 1, -1, -1):
+        name = ordering[position].lstrip("-")
+        op = "lt" if ordering[position].startswith("-") else "gt"
+        step = Q(**{f"{name}__{op}": values[position]})
+        if position < len(ordering) - 1:
+            step |= Q(**{name: values[position]}) & condition
+        condition = step
+    return condition
+
+
+def keyset_paginate(
+    queryset: QuerySet,
+    ordering: Sequence[str],
+    *,
+    cursor: str | None = None,
+    limit: int = 20,
+) -> KeysetPage:
+    """Fetch one page ordered by ``ordering`` starting after ``cursor``.
+
+    The last ordering field must be unique (usually ``id``) so pages never
+    overlap. Unlike OFFSET, the cost of a page does not grow with its depth
+    as long as an index matches the filter plus ``ordering``.
+    """
+
+    values = decode_cursor(cursor, len(ordering))
+    if values is not None:
+        queryset = queryset.filter(_after(ordering, values))
+    rows = list(queryset.order_by(*ordering)[: limit + 1])
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit and items:
+        last = items[-1]
+        next_cursor = encode_cursor(
+            [_key_value(last, name.lstrip("-")) for name in ordering]
+        )
+    return KeysetPage(items=items, next_cursor=next_cursor, ordering=tuple(ordering))
+
+
+def _key_value(obj: Any, name: str) -> Any:
+    value = obj[name] if isinstance(obj, dict) else getattr(obj, name)
+    return value.isoformat() if hasattr(value, "isoformat") else value
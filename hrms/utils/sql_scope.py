@@ -1,9 +1,17 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
 from typing import Any, Iterable, Sequence
 
+from django.conf import settings
+from django.core.cache import cache
 from django.db import connection
+from django.utils import timezone
+
+
+SCOPE_CACHE_PREFIX = "hrms:scope"
+SCOPE_VERSION_KEY = f"{SCOPE_CACHE_PREFIX}:version"
 
 
 @dataclass(frozen=True)
@@ -17,22 +25,75 @@ class UserScope:
     org_name: str
     is_manager: bool
     is_hr: bool
+    managed_org_ids: tuple[str, ...] = ()
+    roles: int = 0
 
+    @property
+    def root_org_ids(self) -> list[str]:
+        """Own org plus every org this employee manages (subtree roots)."""
 
-def get_user_scope(*, user_id: int, is_superuser: bool, is_staff: bool) -> UserScope:
-    """Resolve user -> employee/org scope using raw SQL (no ORM)."""
+        return uniq([rid for rid in (self.org_id, *self.managed_org_ids) if rid])
+
+
+def _scope_version() -> int:
+    version = cache.get(SCOPE_VERSION_KEY)
+    if version is None:
+        cache.add(SCOPE_VERSION_KEY, 1, timeout=None)
+        version = cache.get(SCOPE_VERSION_KEY, 1)
+    return int(version)
+
+
+def _scope_cache_key(user_id: int) -> str:
+    return f"{SCOPE_CACHE_PREFIX}:{_scope_version()}:{user_id}"
+
+
+def invalidate_user_scope(user_id: int | None = None) -> None:
+    """Drop one user's cached scope, or every scope when ``user_id`` is None.
+
+    Call it after the change commits (``transaction.on_commit``); dropping the
+    entry earlier lets a concurrent request re-cache the pre-commit scope.
+    """
+
+    if user_id is not None:
+        cache.delete(_scope_cache_key(user_id))
+        return
+    try:
+        cache.incr(SCOPE_VERSION_KEY)
+    except ValueError:
+        cache.add(SCOPE_VERSION_KEY, 2, timeout=None)
+
+
+def _load_user_scope(*, user_id: int, is_superuser: bool, is_staff: bool) -> UserScope:
+    """Resolve user -> employee/org scope using raw SQL (no ORM), one round trip."""
+
+    # apps.core.roles imports this module; import lazily to avoid the cycle.
+    from apps.core.roles import Role, compute_role_mask
 
     emp_pk: str | None = None
     org_id: str | None = None
     position = ""
     org_name = ""
+    managed_org_ids: tuple[str, ...] = ()
 
     with connection.cursor() as cursor:
         cursor.execute(
             """
-            SELECT emp.id, emp.org_id, COALESCE(emp.position, ''), COALESCE(org.org_name, '')
+            SELECT
+                emp.id,
+                emp.org_id,
+                COALESCE(emp.position, ''),
+                COALESCE(org.org_name, ''),
+                ARRAY(
+                    SELECT m.id
+                    FROM organization m
+                    WHERE m.is_deleted = FALSE
+                      AND m.manager_emp_id = emp.id
+                    ORDER BY m.id
+                ),
+                r.roles
             FROM employee emp
             JOIN organization org ON emp.org_id = org.id
+            LEFT JOIN core_user_role r ON r.user_id = emp.user_id
             WHERE emp.is_deleted = FALSE
               AND org.is_deleted = FALSE
               AND emp.user_id = %s
@@ -41,33 +102,20 @@ def get_user_scope(*, user_id: int, is_superuser: bool, is_staff: bool) -> UserS
             [user_id],
         )
         row = cursor.fetchone()
-        if row:
-            emp_pk, org_id, position, org_name = row
-
-    is_manager = False
-    is_hr = False
-    if emp_pk:
-        pos_upper = (position or "").upper()
-        org_upper = (org_name or "").upper()
-        is_hr = (
-            ("人力" in (org_name or ""))
-            or ("HR" in pos_upper)
-            or ("HR" in org_upper)
-            or is_staff
-        )
 
-        with connection.cursor() as cursor:
-            cursor.execute(
-                """
-                SELECT 1
-                FROM organization org
-                WHERE org.is_deleted = FALSE
-                  AND org.manager_emp_id = %s
-                LIMIT 1
-                """,
-                [emp_pk],
+    roles = 0
+    if row:
+        emp_pk, org_id, position, org_name, managed, roles = row
+        managed_org_ids = tuple(managed or ())
+        if roles is None:
+            # Roles not materialized yet (e.g. raw data load): derive them inline.
+            roles = compute_role_mask(
+                position=position,
+                org_name=org_name,
+                manages_org=bool(managed_org_ids),
             )
-            is_manager = cursor.fetchone() is not None
+
+    is_hr = bool(emp_pk) and (bool(roles & Role.HR) or is_staff)
 
     return UserScope(
         user_id=user_id,
@@ -77,13 +125,72 @@ def get_user_scope(*, user_id: int, is_superuser: bool, is_staff: bool) -> UserS
         org_id=org_id,
         position=position,
         org_name=org_name,
-        is_manager=is_manager,
+        is_manager=bool(managed_org_ids),
         is_hr=is_hr,
+        managed_org_ids=managed_org_ids,
+        roles=roles,
     )
 
 
-def build_org_tree_cte(root_org_ids: Sequence[str]) -> tuple[str, list[Any]]:
-    """Build a recursive CTE for organization subtree. Postgres-friendly."""
+def get_user_scope(*, user_id: int, is_superuser: bool, is_staff: bool) -> UserScope:
+    """Return the user's scope from cache, loading it on a miss.
+
+    Entries are dropped by Employee/Organization signals once the change
+    commits (see ``invalidate_user_scope``), so a warm lookup is a single
+    shared-cache read and never re-runs the scope query.
+    """
+
+    key = _scope_cache_key(user_id)
+    scope = cache.get(key)
+    if (
+        isinstance(scope, UserScope)
+        and scope.is_superuser == is_superuser
+        and scope.is_staff == is_staff
+    ):
+        return scope
+
+    scope = _load_user_scope(
+        user_id=user_id, is_superuser=is_superuser, is_staff=is_staff
+    )
+    cache.set(key, scope, getattr(settings, "USER_SCOPE_CACHE_TIMEOUT", 600))
+    return scope
+
+
+def get_scope_for_user(user: Any) -> UserScope | None:
+    """Shortcut for request.user; anonymous users have no scope."""
+
+    if not getattr(user, "is_authenticated", False):
+        return None
+    return get_user_scope(
+        user_id=user.id, is_superuser=user.is_superuser, is_staff=user.is_staff
+    )
+
+
+def as_of_moment(value: date | datetime) -> datetime:
+    """Normalize an as-of argument to an aware datetime.
+
+    A bare date means "as the org looked on that day", i.e. the last instant of
+    that local day, so changes made during the day are included.
+    """
+
+    if isinstance(value, datetime):
+        return value if timezone.is_aware(value) else timezone.make_aware(value)
+    end_of_day = datetime.combine(value + timedelta(days=1), time.min)
+    return timezone.make_aware(end_of_day) - timedelta(microseconds=1)
+
+
+def build_org_tree_cte(
+    root_org_ids: Sequence[str], *, as_of: date | datetime | None = None
+) -> tuple[str, list[Any]]:
+    """Build an ``org_tree`` CTE for the organization subtree.
+
+    Backed by the maintained ``organization_closure`` table, so the subtree is a
+    single indexed lookup on ``ancestor_id`` instead of a recursive walk.
+    With ``as_of`` the lookup goes to ``organization_closure_history`` instead
+    (range containment on ``valid_period``) and also honours each org's
+    ``effective_time``/``expire_time``.
+    Callers join ``org_tree t ON t.id = ...``.
+    """
 
     if not root_org_ids:
         return (
@@ -91,17 +198,30 @@ def build_org_tree_cte(root_org_ids: Sequence[str]) -> tuple[str, list[Any]]:
             [],
         )
 
-    values_sql = ", ".join(["(%s)"] * len(root_org_ids))
+    placeholders = ", ".join(["%s"] * len(root_org_ids))
+    if as_of is None:
+        cte_sql = (
+            "WITH org_tree AS ("
+            "SELECT DISTINCT oc.descendant_id AS id "
+            "FROM organization_closure oc "
+            "WHERE oc.ancestor_id IN (" + placeholders + ")"
+            ")"
+        )
+        return cte_sql, list(root_org_ids)
+
+    moment = as_of_moment(as_of)
     cte_sql = (
-        "WITH RECURSIVE roots(id) AS (VALUES " + values_sql + ") , org_tree AS ("
-        "SELECT id FROM roots "
-        "UNION ALL "
-        "SELECT o.id FROM organization o "
-        "JOIN org_tree t ON o.parent_org_id = t.id "
-        "WHERE o.is_deleted = FALSE"
+        "WITH org_tree AS ("
+        "SELECT DISTINCT h.descendant_id AS id "
+        "FROM organization_closure_history h "
+        "JOIN organization o ON o.id = h.descendant_id "
+        "WHERE h.ancestor_id IN (" + placeholders + ") "
+        "AND h.valid_period @> %s::timestamptz "
+        "AND o.effective_time <= %s "
+        "AND (o.expire_time IS NULL OR o.expire_time > %s)"
         ")"
     )
-    return cte_sql, list(root_org_ids)
+    return cte_sql, [*root_org_ids, moment, moment, moment]
 
 
 def normalize_str(value: Any) -> str:
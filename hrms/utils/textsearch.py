@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Sequence
+
+from django.contrib.postgres.search import SearchVector
+from django.db import connection
+from django.db.models import TextField, Value
+
+# PostgreSQL ships no Chinese parser and pg_trgm may be unavailable, so text is
+# tokenized here and fed to the built-in ``simple`` configuration, which only
+# lower-cases. Han characters are indexed as unigrams plus overlapping bigrams;
+# a query for a run of two or more characters becomes the AND of its bigrams,
+# which matches any document containing that run. Latin/digit runs are indexed
+# whole (plus their letter and digit parts) and queried as prefixes.
+SEARCH_CONFIG = "simple"
+
+_HAN = r"\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_RUNS = re.compile(rf"[{_HAN}]+|[a-z0-9]+")
+_HAN_RUN = re.compile(rf"[{_HAN}]+")
+_PARTS = re.compile(r"[a-z]+|[0-9]+")
+
+
+def _runs(text: str | None) -> list[str]:
+    if not text:
+        return []
+    return _RUNS.findall(unicodedata.normalize("NFKC", str(text)).lower())
+
+
+def _bigrams(run: str) -> list[str]:
+    return [run[i : i + 2] for i in range(len(run) - 1)]
+
+
+def search_document(*texts: str | None) -> str:
+    """Space-separated lexemes to index for ``texts``."""
+
+    lexemes: list[str] = []
+    for text in texts:
+        for run in _runs(text):
+            if _HAN_RUN.fullmatch(run):
+                lexemes.extend(run)
+                lexemes.extend(_bigrams(run))
+            else:
+                lexemes.append(run)
+                parts = _PARTS.findall(run)
+                if len(parts) > 1:
+                    lexemes.extend(parts)
+    # repeated lexemes are kept: their positions feed ``ts_rank``
+    return " ".join(lexemes)
+
+
+def search_query(text: str | None) -> str:
+    """``to_tsquery`` text matching every term of ``text`` ("" if none)."""
+
+    terms: list[str] = []
+    for run in _runs(text):
+        if not _HAN_RUN.fullmatch(run):
+            terms.append(f"'{run}':*")
+        elif len(run) == 1:
+            terms.append(f"'{run}'")
+        else:
+            terms.extend(f"'{gram}'" for gram in _bigrams(run))
+    return " & ".join(dict.fromkeys(terms))
+
+
+def search_vector(*texts: str | None) -> SearchVector:
+    """Expression computing the stored vector; assign it before ``save()``."""
+
+    return SearchVector(
+        Value(search_document(*texts), output_field=TextField()),
+        config=SEARCH_CONFIG,
+    )
+
+
+def refresh_search_vectors(
+    table: str,
+    columns: Sequence[str],
+    *,
+    verify_only: bool = False,
+    batch_size: int = 1000,
+) -> int:
+    """Recompute ``table.search_vector`` from ``columns`` for every row.
+
+    Rows are streamed through a server-side cursor and written back in
+    batches; only rows whose stored vector differs are touched. Returns the
+    number of stale rows (left untouched when ``verify_only``).
+    """
+
+    def flush(batch: list[tuple[str, str]]) -> int:
+        if not batch:
+            return 0
+        ids, docs = [pk for pk, _ in batch], [doc for _, doc in batch]
+        fresh = "SELECT UNNEST(%s::text[]) AS id, UNNEST(%s::text[]) AS doc"
+        with connection.cursor() as cursor:
+            if verify_only:
+                cursor.execute(
+                    f"""
+                    SELECT COUNT(*) FROM ({fresh}) f JOIN {table} t ON t.id = f.id
+                    WHERE t.search_vector IS DISTINCT FROM
+                          to_tsvector('{SEARCH_CONFIG}', f.doc)
+                    """,
+                    [ids, docs],
+                )
+                return cursor.fetchone()[0]
+            cursor.execute(
+                f"""
+                UPDATE {table} t
+                SET search_vector = to_tsvector('{SEARCH_CONFIG}', f.doc)
+                FROM ({fresh}) f
+                WHERE t.id = f.id
+                  AND t.search_vector IS DISTINCT FROM
+                      to_tsvector('{SEARCH_CONFIG}', f.doc)
+                """,
+                [ids, docs],
+            )
+            return cursor.rowcount
+
+    stale = 0
+    batch: list[tuple[str, str]] = []
+    with connection.chunked_cursor() as source:
+        source.execute(f"SELECT id, {', '.join(columns)} FROM {table}")
+        for row in source:
+            batch.append((str(row[0]), search_document(*row[1:])))
+            if len(batch) >= batch_size:
+                stale += flush(batch)
+                batch = []
+    return stale + flush(batch)
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from array import array
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Iterator, Mapping, Sequence
+
+from django.utils import timezone
+
+# a Monday; weekday counts are taken relative to it
+_EPOCH = date(1970, 1, 5)
+_DAY_SECONDS = 24 * 3600
+
+
+def _weekdays_before(day: date) -> int:
+    """Number of Mon–Fri days in ``[_EPOCH, day)`` (negative before the epoch)."""
+    weeks, rest = divmod((day - _EPOCH).days, 7)
+    return weeks * 5 + min(rest, 5)
+
+
+def _seconds(value: time) -> int:
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+class WorkCalendar:
+    """Working-day calendar answering range questions in ``O(1)``.
+
+    Monday to Friday are working days unless ``overrides`` says otherwise
+    (``False`` marks a holiday, ``True`` a make-up working day on a weekend).
+    Overrides are packed into a byte-per-day bitmap spanning the first to the
+    last overridden day, together with a prefix sum of how far the bitmap
+    deviates from the plain weekday rule; outside that span the weekday rule
+    is counted in closed form.
+
+    ``windows`` are the working periods of a day in local wall-clock time,
+    e.g. ``[(time(9), time(12)), (time(13), time(18))]``; working-time queries
+    take aware datetimes and count only seconds inside those windows on
+    working days.
+    """
+
+    def __init__(
+        self,
+        overrides: Mapping[date, bool] | None = None,
+        *,
+        windows: Sequence[tuple[time, time]] = ((time(9), time(18)),),
+    ) -> None:
+        overrides = dict(overrides or {})
+        self.windows = sorted((_seconds(s), _seconds(e)) for s, e in windows if s < e)
+        self.day_seconds = sum(end - start for start, end in self.windows)
+
+        self._first = min(overrides) if overrides else None
+        size = (max(overrides) - self._first).days + 1 if overrides else 0
+        self._bits = bytearray(size)
+        self._delta = array("l", [0]) * (size + 1)
+        for offset in range(size):
+            day = self._first + timedelta(days=offset)
+            weekday = day.weekday() < 5
+            working = overrides.get(day, weekday)
+            self._bits[offset] = working
+            self._delta[offset + 1] = self._delta[offset] + working - weekday
+
+    def __len__(self) -> int:
+        return len(self._bits)
+
+    def is_workday(self, day: date) -> bool:
+        if self._first is not None:
+            offset = (day - self._first).days
+            if 0 <= offset < len(self._bits):
+                return bool(self._bits[offset])
+        return day.weekday() < 5
+
+    def _workdays_before(self, day: date) -> int:
+        count = _weekdays_before(day)
+        if self._first is not None and day > self._first:
+            count += self._delta[min((day - self._first).days, len(self._bits))]
+        return count
+
+    def workdays(self, start: date, end: date) -> int:
+        """Working days in ``[start, end)``."""
+        if end <= start:
+            return 0
+        return self._workdays_before(end) - self._workdays_before(start)
+
+    def _within_day(self, day: date, lo: int, hi: int) -> int:
+        if not self.is_workday(day):
+            return 0
+        return sum(max(0, min(hi, end) - max(lo, start)) for start, end in self.windows)
+
+    def working_seconds(self, start: datetime, end: datetime) -> int:
+        """Working seconds in ``[start, end)``."""
+        if end <= start:
+            return 0
+        start, end = timezone.localtime(start), timezone.localtime(end)
+        first, last = start.date(), end.date()
+        lo, hi = _seconds(start.time()), _seconds(end.time())
+        if first == last:
+            return self._within_day(first, lo, hi)
+        head = self._within_day(first, lo, _DAY_SECONDS)
+        tail = self._within_day(last, 0, hi)
+        middle = self.workdays(first + timedelta(days=1), last) * self.day_seconds
+        return head + middle + tail
+
+    def working_seconds_by_day(
+        self, start: datetime, end: datetime
+    ) -> Iterator[tuple[date, int]]:
+        """Working seconds in ``[start, end)`` per local day, skipping days with none."""
+        if end <= start:
+            return
+        start, end = timezone.localtime(start), timezone.localtime(end)
+        first, last = start.date(), end.date()
+        day = first
+        while day <= last:
+            lo = _seconds(start.time()) if day == first else 0
+            hi = _seconds(end.time()) if day == last else _DAY_SECONDS
+            seconds = self._within_day(day, lo, hi)
+            if seconds:
+                yield day, seconds
+            day += timedelta(days=1)
+
+    def working_days(self, start: datetime, end: datetime) -> Decimal:
+        """Working time in ``[start, end)`` expressed in working days (2 dp)."""
+        if not self.day_seconds:
+            return Decimal("0.00")
+        return (
+            Decimal(self.working_seconds(start, end)) / Decimal(self.day_seconds)
+        ).quantize(Decimal("0.01"))
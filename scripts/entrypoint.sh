@@ -9,6 +9,7 @@ export PYTHONPATH=$ROOT_DIR # Add root to pythonpath so custom scripts can impor
 
 printf "[%s] entrypoint: running migrations and collectstatic\n" "$(date -u +%Y-%m-%dT%H:%M:%SZ)"
 python manage.py migrate
+python manage.py createcachetable
 python apply_triggers.py
 python apply_views.py
 python manage.py collectstatic --noinput